@@ -26,7 +26,6 @@ from pathlib import Path
 #
 # External Imports
 import requests
-import yt_dlp
 #
 # Local Imports
 from App_Function_Libraries.DB.DB_Manager import add_media_with_keywords, \
@@ -38,6 +37,7 @@ from App_Function_Libraries.Utils.Utils import downloaded_files, \
 from App_Function_Libraries.Video_DL_Ingestion_Lib import extract_metadata
 from App_Function_Libraries.Audio.Audio_Transcription_Lib import speech_to_text
 from App_Function_Libraries.Chunk_Lib import improved_chunking_process
+from App_Function_Libraries.Video_DL_Ingestion_Lib import yt_dlp
 #
 #######################################################################################################################
 # Function Definitions
@@ -26,14 +26,18 @@ import threading
 import time
 # DEBUG Imports
 #from memory_profiler import profile
-import pyaudio
-from faster_whisper import WhisperModel as OriginalWhisperModel
+from functools import lru_cache
 from typing import Optional, Union, List, Dict, Any
 #
 # Import Local
+from App_Function_Libraries.Utils.Lazy_Loading import LazyModule
 from App_Function_Libraries.Utils.Utils import load_comprehensive_config
 from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
 #
+# faster_whisper (and ctranslate2 under it) and pyaudio load when a transcription or recording starts
+faster_whisper = LazyModule('faster_whisper')
+pyaudio = LazyModule('pyaudio')
+#
 #######################################################################################################################
 # Function Definitions
 #
@@ -50,69 +54,74 @@ processing_choice = config.get('Processing', 'processing_choice', fallback='cpu'
 total_thread_count = multiprocessing.cpu_count()
 
 
-class WhisperModel(OriginalWhisperModel):
-    tldw_dir = os.path.dirname(os.path.dirname(__file__))
-    default_download_root = os.path.join(tldw_dir, 'models', 'Whisper')
-
-    valid_model_sizes = [
-        "tiny.en", "tiny", "base.en", "base", "small.en", "small", "medium.en", "medium",
-        "large-v1", "large-v2", "large-v3", "large", "distil-large-v2", "distil-medium.en",
-        "distil-small.en", "distil-large-v3",
-    ]
-
-    def __init__(
-        self,
-        model_size_or_path: str,
-        device: str = processing_choice,
-        device_index: Union[int, List[int]] = 0,
-        compute_type: str = "default",
-        cpu_threads: int = 0,#total_thread_count, FIXME - I think this should be 0
-        num_workers: int = 1,
-        download_root: Optional[str] = None,
-        local_files_only: bool = False,
-        files: Optional[Dict[str, Any]] = None,
-        **model_kwargs: Any
-    ):
-        if download_root is None:
-            download_root = self.default_download_root
-
-        os.makedirs(download_root, exist_ok=True)
-
-        # FIXME - validate....
-        # Also write an integration test...
-        # Check if model_size_or_path is a valid model size
-        if model_size_or_path in self.valid_model_sizes:
-            # It's a model size, so we'll use the download_root
-            model_path = os.path.join(download_root, model_size_or_path)
-            if not os.path.isdir(model_path):
-                # If it doesn't exist, we'll let the parent class download it
-                model_size_or_path = model_size_or_path  # Keep the original model size
+@lru_cache(maxsize=None)
+def get_whisper_model_class():
+    """faster_whisper's WhisperModel with our model directory, defined on first use so importing stays cheap."""
+    class WhisperModel(faster_whisper.WhisperModel):
+        tldw_dir = os.path.dirname(os.path.dirname(__file__))
+        default_download_root = os.path.join(tldw_dir, 'models', 'Whisper')
+
+        valid_model_sizes = [
+            "tiny.en", "tiny", "base.en", "base", "small.en", "small", "medium.en", "medium",
+            "large-v1", "large-v2", "large-v3", "large", "distil-large-v2", "distil-medium.en",
+            "distil-small.en", "distil-large-v3",
+        ]
+
+        def __init__(
+            self,
+            model_size_or_path: str,
+            device: str = processing_choice,
+            device_index: Union[int, List[int]] = 0,
+            compute_type: str = "default",
+            cpu_threads: int = 0,#total_thread_count, FIXME - I think this should be 0
+            num_workers: int = 1,
+            download_root: Optional[str] = None,
+            local_files_only: bool = False,
+            files: Optional[Dict[str, Any]] = None,
+            **model_kwargs: Any
+        ):
+            if download_root is None:
+                download_root = self.default_download_root
+
+            os.makedirs(download_root, exist_ok=True)
+
+            # FIXME - validate....
+            # Also write an integration test...
+            # Check if model_size_or_path is a valid model size
+            if model_size_or_path in self.valid_model_sizes:
+                # It's a model size, so we'll use the download_root
+                model_path = os.path.join(download_root, model_size_or_path)
+                if not os.path.isdir(model_path):
+                    # If it doesn't exist, we'll let the parent class download it
+                    model_size_or_path = model_size_or_path  # Keep the original model size
+                else:
+                    # If it exists, use the full path
+                    model_size_or_path = model_path
             else:
-                # If it exists, use the full path
-                model_size_or_path = model_path
-        else:
-            # It's not a valid model size, so assume it's a path
-            model_size_or_path = os.path.abspath(model_size_or_path)
-
-        super().__init__(
-            model_size_or_path,
-            device=device,
-            device_index=device_index,
-            compute_type=compute_type,
-            cpu_threads=cpu_threads,
-            num_workers=num_workers,
-            download_root=download_root,
-            local_files_only=local_files_only,
-# Maybe? idk, FIXME
-#            files=files,
-#            **model_kwargs
-        )
+                # It's not a valid model size, so assume it's a path
+                model_size_or_path = os.path.abspath(model_size_or_path)
+
+            super().__init__(
+                model_size_or_path,
+                device=device,
+                device_index=device_index,
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+                num_workers=num_workers,
+                download_root=download_root,
+                local_files_only=local_files_only,
+    # Maybe? idk, FIXME
+    #            files=files,
+    #            **model_kwargs
+            )
+
+    return WhisperModel
 
 def get_whisper_model(model_name, device):
     global whisper_model_instance
     if whisper_model_instance is None:
         logging.info(f"Initializing new WhisperModel with size {model_name} on device {device}")
-        whisper_model_instance = WhisperModel(model_name, device=device)
+        whisper_model_instance = get_whisper_model_class()(model_name, device=device)
     return whisper_model_instance
 
 # os.system(r'.\Bin\ffmpeg.exe -ss 00:00:00 -i "{video_file_path}" -ar 16000 -ac 1 -c:a pcm_s16le "{out_path}"')
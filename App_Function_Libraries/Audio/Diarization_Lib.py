@@ -19,16 +19,18 @@ from typing import Dict, List, Any
 #
 # Import Local Libraries
 from App_Function_Libraries.Audio.Audio_Transcription_Lib import speech_to_text
+from App_Function_Libraries.Utils.Lazy_Loading import LazyModule
 #
 # Import 3rd Party Libraries
-from pyannote.audio.pipelines.speaker_diarization import SpeakerDiarization
 import yaml
+# pyannote pulls in torch; it loads when a diarization pipeline is first built
+speaker_diarization = LazyModule('pyannote.audio.pipelines.speaker_diarization')
 #
 #######################################################################################################################
 # Function Definitions
 #
 
-def load_pipeline_from_pretrained(path_to_config: str | Path) -> SpeakerDiarization:
+def load_pipeline_from_pretrained(path_to_config: str | Path) -> 'speaker_diarization.SpeakerDiarization':
     path_to_config = Path(path_to_config).resolve()
     logging.debug(f"Loading pyannote pipeline from {path_to_config}...")
 
@@ -44,7 +46,7 @@ def load_pipeline_from_pretrained(path_to_config: str | Path) -> SpeakerDiarizat
 
     # Create the SpeakerDiarization pipeline
     try:
-        pipeline = SpeakerDiarization(
+        pipeline = speaker_diarization.SpeakerDiarization(
             segmentation=config['pipeline']['params']['segmentation'],
             embedding=config['pipeline']['params']['embedding'],
             clustering=config['pipeline']['params']['clustering'],
@@ -0,0 +1,146 @@
+# Text_Compression_Benchmark.py
+#
+# Compares storing Media.content as plain text against the compressed layouts in
+# App_Function_Libraries/DB/Text_Compression.py (zlib, zstd, zstd with a trained dictionary) on a synthetic,
+# transcript-like library: database file size, point-read latency (fetch + decompress one item's content) and
+# browse latency (a list view over title/author/date that never selects content).
+#
+# Usage:
+#   python -m App_Function_Libraries.Benchmarks_Evaluations.Text_Compression_Benchmark --items 5000
+#
+# Imports
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+#
+# Local Imports
+from App_Function_Libraries.DB.Text_Compression import TextCompressor, train_dictionary, zstd_available
+#
+####################################################################################################
+#
+# Functions:
+
+# Same column order as Media in SQLite_DB.create_tables: the browse columns after `content` sit behind it in the row
+MEDIA_SCHEMA = '''
+CREATE TABLE Media (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT,
+    title TEXT NOT NULL,
+    type TEXT NOT NULL,
+    content TEXT,
+    author TEXT,
+    ingestion_date TEXT,
+    is_trash BOOLEAN DEFAULT 0
+)
+'''
+
+_WORDS = ("the so and like we you know this that model data really going to think about just kind of right um "
+          "actually question people video thing mean lot time work because yeah basically today talk point").split()
+
+
+def make_transcripts(num_items: int, mean_words: int = 3000, seed: int = 0) -> List[str]:
+    """Rambling, repetitive text with timestamps, which is what most of the library looks like."""
+    rng = random.Random(seed)
+    transcripts = []
+    for _ in range(num_items):
+        lines = []
+        for second in range(0, rng.randint(mean_words // 2, mean_words * 3 // 2), 12):
+            sentence = ' '.join(rng.choice(_WORDS) for _ in range(12))
+            lines.append(f"[{second // 60:02d}:{second % 60:02d}] {sentence.capitalize()}.")
+        transcripts.append('\n'.join(lines) + "\nThis text was transcribed using whisper model: medium.en")
+    return transcripts
+
+
+def build_database(path: str, transcripts: List[str], compressor: Optional[TextCompressor]) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(MEDIA_SCHEMA)
+    conn.execute('CREATE INDEX idx_media_ingestion_date ON Media(ingestion_date)')
+    conn.executemany(
+        'INSERT INTO Media (url, title, type, content, author, ingestion_date) VALUES (?, ?, ?, ?, ?, ?)',
+        [(f"https://example.com/{i}", f"Video {i}", 'video', compressor.compress(text) if compressor else text,
+          f"Channel {i % 50}", f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}") for i, text in enumerate(transcripts)])
+    conn.commit()
+    conn.execute('VACUUM')
+    conn.close()
+
+
+def time_reads(path: str, compressor: TextCompressor, num_items: int, reads: int, seed: int = 1) -> Dict[str, float]:
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA cache_size = -2000')
+
+    start_time = time.perf_counter()
+    for _ in range(reads):
+        value = conn.execute('SELECT content FROM Media WHERE id = ?', (rng.randint(1, num_items),)).fetchone()[0]
+        compressor.decompress(value)
+    point_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for _ in range(reads):
+        conn.execute('''
+            SELECT id, title, author, ingestion_date FROM Media WHERE is_trash = 0
+            ORDER BY ingestion_date DESC LIMIT 50 OFFSET ?
+        ''', (rng.randint(0, max(num_items - 50, 0)),)).fetchall()
+    browse_seconds = time.perf_counter() - start_time
+    conn.close()
+    return {
+        "point_read_ms": 1000 * point_seconds / reads,
+        "browse_ms": 1000 * browse_seconds / reads,
+    }
+
+
+def run_benchmark(num_items: int = 2000, mean_words: int = 3000, reads: int = 500,
+                  layouts: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    layouts = layouts or ["plain", "zlib", "zstd", "zstd-dict"]
+    if not zstd_available():
+        layouts = [layout for layout in layouts if not layout.startswith("zstd")]
+    transcripts = make_transcripts(num_items, mean_words)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix="text_compression_bench_")
+    try:
+        for layout in layouts:
+            compressor = TextCompressor('zlib' if layout == 'plain' else layout.split('-')[0], min_size=0)
+            if layout == "zstd-dict":
+                compressor.add_dictionary(1, train_dictionary(transcripts[:500]))
+            path = os.path.join(workdir, f"{layout}.db")
+            start_time = time.perf_counter()
+            build_database(path, transcripts, None if layout == "plain" else compressor)
+            results.append({
+                "layout": layout,
+                "size_mb": os.path.getsize(path) / 2 ** 20,
+                "write_seconds": time.perf_counter() - start_time,
+                **time_reads(path, compressor, num_items, reads),
+            })
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compressed text column layouts")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=3000, help="Mean words per transcript")
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--layouts", nargs="*", default=None,
+                        help="Any of: plain zlib zstd zstd-dict (zstd layouts need the zstandard package)")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.items, args.words, args.reads, args.layouts)
+    print(f"{'layout':<12}{'size MB':>10}{'write s':>10}{'point ms':>10}{'browse ms':>11}")
+    for result in results:
+        print(f"{result['layout']:<12}{result['size_mb']:>10.1f}{result['write_seconds']:>10.2f}"
+              f"{result['point_read_ms']:>10.3f}{result['browse_ms']:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
+
+#
+# End of Text_Compression_Benchmark.py
+####################################################################################################
@@ -0,0 +1,125 @@
+# Vector_Store_Benchmark.py
+#
+# Compares the vector store backends in App_Function_Libraries/RAG/Vector_Store.py on a synthetic, clustered
+# embedding set: insert time, query throughput (QPS) and recall@k against exact brute-force ground truth.
+#
+# Usage:
+#   python -m App_Function_Libraries.Benchmarks_Evaluations.Vector_Store_Benchmark --vectors 100000 --dim 384
+#
+# Imports
+import argparse
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+#
+# External Imports
+import numpy as np
+#
+# Local Imports
+from App_Function_Libraries.RAG.Vector_Store import ChromaVectorStore, LocalVectorStore, VectorStore
+#
+####################################################################################################
+#
+# Functions:
+
+
+def make_dataset(num_vectors: int, dim: int, num_queries: int, clusters: int = 64, seed: int = 0):
+    """Gaussian clusters, which is closer to real embedding distributions than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, num_vectors)] + 0.3 * rng.normal(size=(num_vectors, dim))
+    queries = centers[rng.integers(0, clusters, num_queries)] + 0.3 * rng.normal(size=(num_queries, dim))
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normed.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def benchmark_store(name: str, store: VectorStore, vectors: np.ndarray, queries: np.ndarray, truth: np.ndarray,
+                    k: int, batch_size: int = 5000) -> Dict[str, Any]:
+    collection = store.get_or_create_collection("benchmark")
+    start_time = time.time()
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start:start + batch_size]
+        collection.upsert(ids=[str(i) for i in range(start, start + len(batch))], embeddings=batch,
+                          metadatas=[{"media_id": str(i % 100)} for i in range(start, start + len(batch))])
+    insert_seconds = time.time() - start_time
+
+    start_time = time.time()
+    found: List[List[str]] = []
+    for query in queries:
+        found.append(collection.query(query_embeddings=[query], n_results=k, include=[])['ids'][0])
+    query_seconds = time.time() - start_time
+
+    recall = np.mean([len(set(map(int, ids)) & set(expected)) / k for ids, expected in zip(found, truth)])
+    return {
+        "backend": name,
+        "insert_seconds": insert_seconds,
+        "qps": len(queries) / query_seconds if query_seconds else float('inf'),
+        f"recall@{k}": float(recall),
+    }
+
+
+def run_benchmark(num_vectors: int = 20000, dim: int = 384, num_queries: int = 200, k: int = 10,
+                  backends: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    backends = backends or ["local-flat", "local-flat-int8", "local-hnsw", "chroma"]
+    vectors, queries = make_dataset(num_vectors, dim, num_queries)
+    truth = exact_neighbours(vectors, queries, k)
+
+    results = []
+    for backend in backends:
+        workdir = tempfile.mkdtemp(prefix="vector_store_bench_")
+        try:
+            if backend == "local-flat":
+                store = LocalVectorStore(workdir)
+            elif backend == "local-flat-int8":
+                store = LocalVectorStore(workdir, quantization="int8")
+            elif backend == "local-hnsw":
+                try:
+                    import hnswlib  # noqa: F401
+                except ImportError:
+                    print("Skipping local-hnsw: hnswlib is not installed")
+                    continue
+                store = LocalVectorStore(workdir, index_type="hnsw")
+            elif backend == "chroma":
+                try:
+                    store = ChromaVectorStore(workdir)
+                except ImportError:
+                    print("Skipping chroma: chromadb is not installed")
+                    continue
+            else:
+                raise ValueError(f"Unknown backend: {backend}")
+            results.append(benchmark_store(backend, store, vectors, queries, truth, k))
+            store.close()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector store backends (recall@k, QPS, insert time)")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", default=None,
+                        help="Any of: local-flat local-flat-int8 local-hnsw chroma")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.vectors, args.dim, args.queries, args.k, args.backends)
+    print(f"{'backend':<18}{'insert (s)':>12}{'QPS':>10}{f'recall@{args.k}':>12}")
+    for result in results:
+        print(f"{result['backend']:<18}{result['insert_seconds']:>12.2f}{result['qps']:>10.1f}"
+              f"{result[f'recall@{args.k}']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
+
+#
+# End of Vector_Store_Benchmark.py
+####################################################################################################
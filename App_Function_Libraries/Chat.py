@@ -15,11 +15,14 @@ from pathlib import Path
 #
 # Local Imports
 from App_Function_Libraries.DB.DB_Manager import get_conversation_name, save_chat_history_to_database
+from App_Function_Libraries.DB.LLM_Cache_DB import cached_llm_call
 from App_Function_Libraries.LLM_API_Calls import chat_with_openai, chat_with_anthropic, chat_with_cohere, \
     chat_with_groq, chat_with_openrouter, chat_with_deepseek, chat_with_mistral, chat_with_huggingface
 from App_Function_Libraries.LLM_API_Calls_Local import chat_with_aphrodite, chat_with_local_llm, chat_with_ollama, \
     chat_with_kobold, chat_with_llama, chat_with_oobabooga, chat_with_tabbyapi, chat_with_vllm, chat_with_custom_openai
 from App_Function_Libraries.DB.SQLite_DB import load_media_content
+from App_Function_Libraries.LLM_Providers.Provider_Registry import LLMRequest, chat_providers
+from App_Function_Libraries.LLM_Providers.Streaming_LLM_Calls import stream_chat_api_call
 from App_Function_Libraries.Utils.Utils import generate_unique_filename, load_and_log_configs
 from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
 #
@@ -27,84 +30,22 @@ from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histo
 #
 # Functions:
 
-def chat_api_call(api_endpoint, api_key, input_data, prompt, temp, system_message=None):
+def chat_api_call(api_endpoint, api_key, input_data, prompt, temp, system_message=None, force_cache=False):
     log_counter("chat_api_call_attempt", labels={"api_endpoint": api_endpoint})
     start_time = time.time()
     if not api_key:
         api_key = None
-    model = None
     try:
         logging.info(f"Debug - Chat API Call - API Endpoint: {api_endpoint}")
         logging.info(f"Debug - Chat API Call - API Key: {api_key}")
         logging.info(f"Debug - Chat chat_api_call - API Endpoint: {api_endpoint}")
-        if api_endpoint.lower() == 'openai':
-            response = chat_with_openai(api_key, input_data, prompt, temp, system_message)
-
-        elif api_endpoint.lower() == 'anthropic':
-            # Retrieve the model from config
-            loaded_config_data = load_and_log_configs()
-            model = loaded_config_data['models']['anthropic'] if loaded_config_data else None
-            response = chat_with_anthropic(
-                api_key=api_key,
-                input_data=input_data,
-                model=model,
-                custom_prompt_arg=prompt,
-                system_prompt=system_message
-            )
-
-        elif api_endpoint.lower() == "cohere":
-            response = chat_with_cohere(
-                api_key,
-                input_data,
-                model=model,
-                custom_prompt_arg=prompt,
-                system_prompt=system_message,
-                temp=temp
-            )
-
-        elif api_endpoint.lower() == "groq":
-            response = chat_with_groq(api_key, input_data, prompt, temp, system_message)
-
-        elif api_endpoint.lower() == "openrouter":
-            response = chat_with_openrouter(api_key, input_data, prompt, temp, system_message)
-
-        elif api_endpoint.lower() == "deepseek":
-            response = chat_with_deepseek(api_key, input_data, prompt, temp, system_message)
-
-        elif api_endpoint.lower() == "mistral":
-            response = chat_with_mistral(api_key, input_data, prompt, temp, system_message)
-
-        elif api_endpoint.lower() == "llama.cpp":
-            response = chat_with_llama(input_data, prompt, temp, None, api_key, system_message)
-        elif api_endpoint.lower() == "kobold":
-            response = chat_with_kobold(input_data, api_key, prompt, temp, system_message)
-
-        elif api_endpoint.lower() == "ooba":
-            response = chat_with_oobabooga(input_data, api_key, prompt, temp, system_message)
-
-        elif api_endpoint.lower() == "tabbyapi":
-            response = chat_with_tabbyapi(input_data, prompt, temp, system_message)
-
-        elif api_endpoint.lower() == "vllm":
-            response = chat_with_vllm(input_data, prompt, system_message)
-
-        elif api_endpoint.lower() == "local-llm":
-            response = chat_with_local_llm(input_data, prompt, temp, system_message)
-
-        elif api_endpoint.lower() == "huggingface":
-            response = chat_with_huggingface(api_key, input_data, prompt, temp)  # , system_message)
-
-        elif api_endpoint.lower() == "ollama":
-            response = chat_with_ollama(input_data, prompt, None, api_key, temp, system_message)
-
-        elif api_endpoint.lower() == "aphrodite":
-            response = chat_with_aphrodite(input_data, prompt, temp, system_message)
-
-        elif api_endpoint.lower() == "custom-openai-api":
-            response = chat_with_custom_openai(api_key, input_data, prompt, temp, system_message)
-
-        else:
-            raise ValueError(f"Unsupported API endpoint: {api_endpoint}")
+        loaded_config_data = load_and_log_configs()
+        cache_model = loaded_config_data['models'].get(api_endpoint.lower()) if loaded_config_data else None
+        response = cached_llm_call(
+            api_endpoint, cache_model, input_data, prompt, temp, system_message,
+            lambda: _dispatch_chat_api_call(api_endpoint, api_key, input_data, prompt, temp, system_message),
+            force_cache=force_cache
+        )
 
         call_duration = time.time() - start_time
         log_histogram("chat_api_call_duration", call_duration, labels={"api_endpoint": api_endpoint})
@@ -117,6 +58,64 @@ def chat_api_call(api_endpoint, api_key, input_data, prompt, temp, system_messag
         return f"An error occurred: {str(e)}"
 
 
+def _dispatch_chat_api_call(api_endpoint, api_key, input_data, prompt, temp, system_message=None):
+    request = LLMRequest(api_name=api_endpoint, input_data=input_data, prompt=prompt, api_key=api_key, temp=temp,
+                         system_message=system_message)
+    return chat_providers.dispatch(request)
+
+
+def _chat_with_anthropic_adapter(r):
+    # Retrieve the model from config
+    loaded_config_data = load_and_log_configs()
+    model = r.model or (loaded_config_data['models']['anthropic'] if loaded_config_data else None)
+    return chat_with_anthropic(api_key=r.api_key, input_data=r.input_data, model=model, custom_prompt_arg=r.prompt,
+                               system_prompt=r.system_message, temp=r.temp)
+
+
+# Provider adapters for chat_api_call - each maps the shared LLMRequest onto the provider's own signature
+chat_providers.register("openai", lambda r: chat_with_openai(r.api_key, r.input_data, r.prompt, r.temp, r.system_message))
+chat_providers.register("anthropic", _chat_with_anthropic_adapter)
+chat_providers.register("cohere", lambda r: chat_with_cohere(r.api_key, r.input_data, model=r.model, custom_prompt_arg=r.prompt,
+                                                             system_prompt=r.system_message, temp=r.temp))
+chat_providers.register("groq", lambda r: chat_with_groq(r.api_key, r.input_data, r.prompt, r.temp, r.system_message))
+chat_providers.register("openrouter", lambda r: chat_with_openrouter(r.api_key, r.input_data, r.prompt, r.temp, r.system_message))
+chat_providers.register("deepseek", lambda r: chat_with_deepseek(r.api_key, r.input_data, r.prompt, r.temp, r.system_message))
+chat_providers.register("mistral", lambda r: chat_with_mistral(r.api_key, r.input_data, r.prompt, r.temp, r.system_message))
+chat_providers.register("llama.cpp", lambda r: chat_with_llama(r.input_data, r.prompt, r.temp, api_url=None, api_key=r.api_key,
+                                                               system_prompt=r.system_message))
+chat_providers.register("kobold", lambda r: chat_with_kobold(r.input_data, r.api_key, r.prompt, temp=r.temp,
+                                                             system_message=r.system_message))
+chat_providers.register("ooba", lambda r: chat_with_oobabooga(r.input_data, r.api_key, r.prompt, system_prompt=r.system_message,
+                                                              temp=r.temp))
+chat_providers.register("tabbyapi", lambda r: chat_with_tabbyapi(r.input_data, r.prompt, api_key=r.api_key, temp=r.temp))
+chat_providers.register("vllm", lambda r: chat_with_vllm(r.input_data, r.prompt, api_key=r.api_key, model=r.model,
+                                                         system_prompt=r.system_message, temp=r.temp))
+chat_providers.register("local-llm", lambda r: chat_with_local_llm(r.input_data, r.prompt, r.temp, r.system_message))
+chat_providers.register("huggingface", lambda r: chat_with_huggingface(r.api_key, r.input_data, r.prompt, r.system_message, r.temp))
+chat_providers.register("ollama", lambda r: chat_with_ollama(r.input_data, r.prompt, api_url=None, api_key=r.api_key, temp=r.temp,
+                                                             system_message=r.system_message, model=r.model))
+chat_providers.register("aphrodite", lambda r: chat_with_aphrodite(r.input_data, r.prompt, api_key=r.api_key, temp=r.temp))
+chat_providers.register("custom-openai-api", lambda r: chat_with_custom_openai(r.api_key, r.input_data, r.prompt, r.temp,
+                                                                               r.system_message))
+
+
+def _build_chat_input(message, history, media_content, selected_parts):
+    # Ensure selected_parts is a list
+    if not isinstance(selected_parts, (list, tuple)):
+        selected_parts = [selected_parts] if selected_parts else []
+
+    # Combine the selected parts of the media content
+    combined_content = "\n\n".join(
+        [f"{part.capitalize()}: {media_content.get(part, '')}" for part in selected_parts if part in media_content])
+
+    # Prepare the input for the API
+    input_data = f"{combined_content}\n\n" if combined_content else ""
+    for old_message, old_response in history:
+        input_data += f"{old_message}\nAssistant: {old_response}\n\n"
+    input_data += f"{message}\n"
+    return input_data
+
+
 def chat(message, history, media_content, selected_parts, api_endpoint, api_key, prompt, temperature,
          system_message=None):
     log_counter("chat_attempt", labels={"api_endpoint": api_endpoint})
@@ -128,23 +127,7 @@ def chat(message, history, media_content, selected_parts, api_endpoint, api_key,
         logging.info(f"Debug - Chat Function - API Endpoint: {api_endpoint}")
         # logging.info(f"Debug - Chat Function - Prompt: {prompt}")
 
-        # Ensure selected_parts is a list
-        if not isinstance(selected_parts, (list, tuple)):
-            selected_parts = [selected_parts] if selected_parts else []
-
-        # logging.debug(f"Debug - Chat Function - Selected Parts (after check): {selected_parts}")
-
-        # Combine the selected parts of the media content
-        combined_content = "\n\n".join(
-            [f"{part.capitalize()}: {media_content.get(part, '')}" for part in selected_parts if part in media_content])
-        # Print first 500 chars
-        # logging.debug(f"Debug - Chat Function - Combined Content: {combined_content[:500]}...")
-
-        # Prepare the input for the API
-        input_data = f"{combined_content}\n\n" if combined_content else ""
-        for old_message, old_response in history:
-            input_data += f"{old_message}\nAssistant: {old_response}\n\n"
-        input_data += f"{message}\n"
+        input_data = _build_chat_input(message, history, media_content, selected_parts)
 
         if system_message:
             print(f"System message: {system_message}")
@@ -169,6 +152,29 @@ def chat(message, history, media_content, selected_parts, api_endpoint, api_key,
         return f"An error occurred: {str(e)}"
 
 
+def chat_stream(message, history, media_content, selected_parts, api_endpoint, api_key, prompt, temperature,
+                system_message=None):
+    """
+    Streaming version of `chat`: yields the response text as it arrives (deltas, not the accumulated text).
+    Providers without a streaming wire format yield their full response once.
+    """
+    log_counter("chat_attempt", labels={"api_endpoint": api_endpoint})
+    start_time = time.time()
+    try:
+        input_data = _build_chat_input(message, history, media_content, selected_parts)
+        temp = float(temperature) if temperature else 0.7
+        for chunk in stream_chat_api_call(api_endpoint, api_key, input_data, prompt, temp, system_message):
+            yield chunk
+
+        chat_duration = time.time() - start_time
+        log_histogram("chat_duration", chat_duration, labels={"api_endpoint": api_endpoint})
+        log_counter("chat_success", labels={"api_endpoint": api_endpoint})
+    except Exception as e:
+        log_counter("chat_error", labels={"api_endpoint": api_endpoint, "error": str(e)})
+        logging.error(f"Error in chat_stream function: {str(e)}")
+        yield f"An error occurred: {str(e)}"
+
+
 def save_chat_history_to_db_wrapper(chatbot, conversation_id, media_content, media_name=None):
     log_counter("save_chat_history_to_db_attempt")
     start_time = time.time()
@@ -13,17 +13,11 @@ import re
 from typing import Any, Dict, List, Optional, Tuple
 #
 # Import 3rd party
-from openai import OpenAI
 from tqdm import tqdm
-from langdetect import detect
-from transformers import GPT2Tokenizer
-import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 #
 # Import Local
 from App_Function_Libraries.Tokenization_Methods_Lib import openai_tokenize
+from App_Function_Libraries.Utils.Lazy_Loading import LazyModule, LazyObject
 from App_Function_Libraries.Utils.Utils import load_comprehensive_config
 #
 #######################################################################################################################
@@ -32,16 +26,24 @@ from App_Function_Libraries.Utils.Utils import load_comprehensive_config
 #
 # FIXME - Make sure it only downloads if it already exists, and does a check first.
 # Ensure NLTK data is downloaded
-def ensure_nltk_data():
+def ensure_nltk_data(nltk_module):
     try:
-        nltk.data.find('tokenizers/punkt')
+        nltk_module.data.find('tokenizers/punkt')
     except LookupError:
-        nltk.download('punkt')
-ensure_nltk_data()
+        nltk_module.download('punkt')
 
+#
+# The NLP libraries and the GPT2 tokenizer load on first use (see Utils/Lazy_Loading.py), so importing this module
+# stays cheap for callers that never chunk
+langdetect = LazyModule('langdetect')
+nltk = LazyModule('nltk', on_import=ensure_nltk_data)
+openai = LazyModule('openai')
+sklearn_pairwise = LazyModule('sklearn.metrics.pairwise')
+sklearn_text = LazyModule('sklearn.feature_extraction.text')
+transformers = LazyModule('transformers')
 #
 # Load GPT2 tokenizer
-tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
+tokenizer = LazyObject(lambda: transformers.GPT2Tokenizer.from_pretrained("gpt2"), 'GPT2 tokenizer')
 #
 # Load configuration
 config = load_comprehensive_config()
@@ -92,7 +94,7 @@ openai_api_key = config.get('API', 'openai_api_key')
 
 def detect_language(text: str) -> str:
     try:
-        return detect(text)
+        return langdetect.detect(text)
     except:
         # Default to English if detection fails
         return 'en'
@@ -260,10 +262,10 @@ def chunk_text_by_sentences(text: str, max_sentences: int = 10, overlap: int = 0
         sentences = [s.strip() for s in sentences if s.strip()]
     else:  # Default to NLTK for other languages
         try:
-            sentences = sent_tokenize(text, language=language)
+            sentences = nltk.sent_tokenize(text, language=language)
         except LookupError:
             logging.warning(f"Punkt tokenizer not found for language '{language}'. Using default 'english'.")
-            sentences = sent_tokenize(text, language='english')
+            sentences = nltk.sent_tokenize(text, language='english')
 
     chunks = []
     previous_overlap = []
@@ -374,7 +376,7 @@ def process_document_with_metadata(text: str, chunk_options: Dict[str, Any],
 # Hybrid approach, chunk each sentence while ensuring total token size does not exceed a maximum number
 def chunk_text_hybrid(text: str, max_tokens: int = 1000, overlap: int = 0) -> List[str]:
     logging.debug("chunk_text_hybrid...")
-    sentences = sent_tokenize(text)
+    sentences = nltk.sent_tokenize(text)
     chunks = []
     current_chunk = []
     current_length = 0
@@ -491,8 +493,8 @@ def count_units(text: str, unit: str = 'words') -> int:
 
 def semantic_chunking(text: str, max_chunk_size: int = 2000, unit: str = 'words') -> List[str]:
     logging.debug("semantic_chunking...")
-    sentences = sent_tokenize(text)
-    vectorizer = TfidfVectorizer()
+    sentences = nltk.sent_tokenize(text)
+    vectorizer = sklearn_text.TfidfVectorizer()
     sentence_vectors = vectorizer.fit_transform(sentences)
 
     chunks = []
@@ -513,7 +515,7 @@ def semantic_chunking(text: str, max_chunk_size: int = 2000, unit: str = 'words'
         if i + 1 < len(sentences):
             current_vector = sentence_vectors[i]
             next_vector = sentence_vectors[i + 1]
-            similarity = cosine_similarity(current_vector, next_vector)[0][0]
+            similarity = sklearn_pairwise.cosine_similarity(current_vector, next_vector)[0][0]
             if similarity < 0.5 and current_size >= max_chunk_size // 2:
                 chunks.append(' '.join(current_chunk))
                 current_chunk = current_chunk[-3:]
@@ -741,7 +743,7 @@ def chunk_json_dict(json_dict: Dict[str, Any], max_size: int, overlap: int) -> L
 # OpenAI Rolling Summarization
 #
 
-client = OpenAI(api_key=openai_api_key)
+client = LazyObject(lambda: openai.OpenAI(api_key=openai_api_key), 'OpenAI client')
 def get_chat_completion(messages, model='gpt-4-turbo'):
     response = client.chat.completions.create(
         model=model,
@@ -952,7 +954,7 @@ def chunk_ebook_by_chapters(text: str, chunk_options: Dict[str, Any]) -> List[Di
 
 def adaptive_chunk_size(text: str, base_size: int = 1000, min_size: int = 500, max_size: int = 2000) -> int:
     # Tokenize the text into sentences
-    sentences = sent_tokenize(text)
+    sentences = nltk.sent_tokenize(text)
 
     if not sentences:
         return base_size
@@ -0,0 +1,442 @@
+# Backup_Manager.py
+# Description: Online, incremental backups of the application's databases, with verified restores.
+#
+# SQLite databases are copied with the online backup API (sqlite3.Connection.backup) a few hundred pages per step,
+# sleeping between steps, so the app keeps reading and writing while a consistent snapshot is taken. The snapshot is
+# then cut into page-aligned chunks stored under their SHA-256 (objects/ab/abcdef..., zlib-compressed): the backup
+# API copies page for page, so a later backup only writes the chunks whose pages changed. Each backup is a JSON
+# manifest (manifests/<backup id>.json) listing the chunks of every file it covers. Directories (the Chroma store)
+# are stored file by file the same way, with any SQLite files inside them copied through the backup API.
+#
+# A restore rebuilds each file beside its destination, checks it against the manifest's SHA-256 and runs
+# PRAGMA integrity_check before anything live is touched. Databases are then written back through the backup API in
+# one transaction, so other connections see either the old or the restored database; directories are swapped in by
+# rename, after the open vector store is closed (the next use reopens it).
+#
+# Imports
+import configparser
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+#
+# Local Imports
+from App_Function_Libraries.DB.Pagination import generation_schema_sql
+from App_Function_Libraries.Utils.Utils import get_database_path, get_project_relative_path, load_comprehensive_config
+#
+#######################################################################################################################
+#
+# Functions:
+
+logger = logging.getLogger(__name__)
+
+# Default settings, overridden by the [Backup] section of config.txt
+DEFAULT_BACKUP_SETTINGS = {
+    'backup_dir': 'tldw_DB_Backups',
+    'page_step': 256,
+    'step_sleep': 0.005,
+    'chunk_pages': 64,
+    'keep_backups': 10,
+}
+
+TARGET_SQLITE = 'sqlite'
+TARGET_DIRECTORY = 'directory'
+
+_SQLITE_HEADER = b'SQLite format 3\x00'
+
+# One backup or restore at a time; they share the object store and the live files
+_backup_lock = threading.Lock()
+
+
+class BackupError(Exception):
+    pass
+
+
+def _read_config() -> configparser.ConfigParser:
+    # The shared parser: re-read only when config.txt changes, so Config tab edits apply without a restart
+    try:
+        return load_comprehensive_config()
+    except FileNotFoundError:
+        return configparser.ConfigParser()
+
+
+def get_backup_settings(config: Optional[configparser.ConfigParser] = None) -> Dict[str, Any]:
+    config = config or _read_config()
+    settings = dict(DEFAULT_BACKUP_SETTINGS)
+    settings['backup_dir'] = config.get('Database', 'backup_path', fallback=settings['backup_dir'])
+    if config.has_section('Backup'):
+        settings['page_step'] = config.getint('Backup', 'page_step', fallback=settings['page_step'])
+        settings['step_sleep'] = config.getfloat('Backup', 'step_sleep', fallback=settings['step_sleep'])
+        settings['chunk_pages'] = config.getint('Backup', 'chunk_pages', fallback=settings['chunk_pages'])
+        settings['keep_backups'] = config.getint('Backup', 'keep_backups', fallback=settings['keep_backups'])
+    settings['backup_dir'] = os.environ.get('DB_BACKUP_DIR', get_project_relative_path(settings['backup_dir']))
+    settings['page_step'] = max(settings['page_step'], 1)
+    settings['chunk_pages'] = max(settings['chunk_pages'], 1)
+    return settings
+
+
+def get_backup_targets(config: Optional[configparser.ConfigParser] = None) -> Dict[str, Dict[str, str]]:
+    """The databases and stores covered by a backup, by name, with the paths the app opens them at."""
+    config = config or _read_config()
+    local_store = config.get('Vector-Store', 'local_path', fallback='')
+    return {
+        'media': {'kind': TARGET_SQLITE,
+                  'path': config.get('Database', 'sqlite_path', fallback=get_database_path('media_summary.db'))},
+        'prompts': {'kind': TARGET_SQLITE,
+                    'path': config.get('Database', 'prompts_db_path', fallback=get_database_path('prompts.db'))},
+        'character_chats': {'kind': TARGET_SQLITE,
+                            'path': config.get('Database', 'chatDB_path', fallback=get_database_path('chatDB.db'))},
+        'rag_qa': {'kind': TARGET_SQLITE,
+                   'path': config.get('Database', 'rag_qa_db_path', fallback=get_database_path('RAG_QA_Chat.db'))},
+        'chroma': {'kind': TARGET_DIRECTORY,
+                   'path': config.get('Database', 'chroma_db_path', fallback=get_database_path('chroma_db'))},
+        'vector_store': {'kind': TARGET_DIRECTORY,
+                         'path': get_project_relative_path(local_store) if local_store
+                         else get_database_path('vector_store')},
+    }
+
+
+def is_sqlite_file(path: str) -> bool:
+    try:
+        with open(path, 'rb') as file:
+            return file.read(len(_SQLITE_HEADER)) == _SQLITE_HEADER
+    except OSError:
+        return False
+
+
+def online_copy(source_path: str, destination_path: str, page_step: int = 256, step_sleep: float = 0.005) -> int:
+    """
+    Copy a live SQLite database with the backup API, `page_step` pages at a time, sleeping `step_sleep` seconds
+    between steps. Returns the page size. The source is opened read-only, and the copy is a consistent snapshot.
+    """
+    source = sqlite3.connect(f"file:{os.path.abspath(source_path)}?mode=ro", uri=True, timeout=30)
+    try:
+        destination = sqlite3.connect(destination_path)
+        try:
+            source.backup(destination, pages=page_step, sleep=step_sleep)
+            # A self-contained file: chunks must not depend on a WAL beside the copy
+            destination.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            destination.close()
+        return source.execute('PRAGMA page_size').fetchone()[0]
+    finally:
+        source.close()
+
+
+def check_integrity(path: str) -> None:
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    try:
+        result = [row[0] for row in conn.execute('PRAGMA integrity_check').fetchall()]
+    finally:
+        conn.close()
+    if result != ['ok']:
+        raise BackupError(f"Integrity check failed for {path}: {'; '.join(result[:5])}")
+
+
+class BackupStore:
+    """Content-addressed chunks plus one manifest per backup, under `root`."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.manifests_dir = os.path.join(root, 'manifests')
+        self.staging_dir = os.path.join(root, 'staging')
+        for directory in (self.objects_dir, self.manifests_dir, self.staging_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def put_chunk(self, data: bytes) -> Tuple[str, int]:
+        """Store a chunk unless it is already present; returns its digest and the bytes written."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(data, 6)
+        partial_path = f"{path}.part"
+        with open(partial_path, 'wb') as file:
+            file.write(compressed)
+        os.replace(partial_path, path)
+        return digest, len(compressed)
+
+    def read_chunk(self, digest: str) -> bytes:
+        try:
+            with open(self._object_path(digest), 'rb') as file:
+                data = zlib.decompress(file.read())
+        except (OSError, zlib.error) as e:
+            raise BackupError(f"Backup chunk {digest} is missing or unreadable: {e}")
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise BackupError(f"Backup chunk {digest} is corrupt")
+        return data
+
+    def store_file(self, path: str, chunk_size: int) -> Dict[str, Any]:
+        """Chunk a file into the store; returns its manifest entry (size, sha256, chunks, bytes_written)."""
+        file_hash = hashlib.sha256()
+        chunks, size, written = [], 0, 0
+        with open(path, 'rb') as file:
+            while True:
+                data = file.read(chunk_size)
+                if not data:
+                    break
+                file_hash.update(data)
+                digest, chunk_written = self.put_chunk(data)
+                chunks.append(digest)
+                size += len(data)
+                written += chunk_written
+        return {'size': size, 'sha256': file_hash.hexdigest(), 'chunks': chunks, 'bytes_written': written}
+
+    def rebuild_file(self, entry: Dict[str, Any], destination_path: str) -> None:
+        """Write a stored file to `destination_path` and check it against its manifest entry."""
+        file_hash = hashlib.sha256()
+        with open(destination_path, 'wb') as file:
+            for digest in entry['chunks']:
+                data = self.read_chunk(digest)
+                file_hash.update(data)
+                file.write(data)
+        if file_hash.hexdigest() != entry['sha256']:
+            raise BackupError(f"Rebuilt file {destination_path} does not match its backup")
+
+    def write_manifest(self, manifest: Dict[str, Any]) -> None:
+        path = os.path.join(self.manifests_dir, f"{manifest['id']}.json")
+        with open(f"{path}.part", 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=1)
+        os.replace(f"{path}.part", path)
+
+    def load_manifest(self, backup_id: str) -> Dict[str, Any]:
+        path = os.path.join(self.manifests_dir, f"{os.path.basename(backup_id)}.json")
+        if not os.path.exists(path):
+            raise BackupError(f"Backup not found: {backup_id}")
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+
+    def list_backups(self) -> List[str]:
+        """Backup ids, newest first."""
+        return sorted((name[:-5] for name in os.listdir(self.manifests_dir) if name.endswith('.json')), reverse=True)
+
+    def prune(self, keep: int) -> List[str]:
+        """Delete all but the newest `keep` backups, then every chunk no remaining backup uses."""
+        removed = self.list_backups()[max(keep, 1):]
+        for backup_id in removed:
+            os.remove(os.path.join(self.manifests_dir, f"{backup_id}.json"))
+        referenced = set()
+        for backup_id in self.list_backups():
+            for target in self.load_manifest(backup_id)['targets'].values():
+                for entry in target['files'].values():
+                    referenced.update(entry['chunks'])
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for name in os.listdir(prefix_dir):
+                if name not in referenced:
+                    os.remove(os.path.join(prefix_dir, name))
+        return removed
+
+
+def _store_sqlite(store: BackupStore, path: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    staging_path = os.path.join(store.staging_dir, f"{os.getpid()}_{threading.get_ident()}.db")
+    try:
+        page_size = online_copy(path, staging_path, settings['page_step'], settings['step_sleep'])
+        # Page-aligned chunks: a changed page dirties exactly one chunk
+        return {**store.store_file(staging_path, page_size * settings['chunk_pages']), 'sqlite': True}
+    finally:
+        if os.path.exists(staging_path):
+            os.remove(staging_path)
+
+
+def _store_directory(store: BackupStore, root: str, settings: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            relative_path = os.path.relpath(path, root).replace(os.sep, '/')
+            if name.endswith(('-wal', '-shm', '-journal')):
+                # Folded into the snapshot of their database by the backup API
+                continue
+            if is_sqlite_file(path):
+                files[relative_path] = _store_sqlite(store, path, settings)
+            else:
+                files[relative_path] = {**store.store_file(path, 4096 * settings['chunk_pages']), 'sqlite': False}
+    return files
+
+
+def create_backup(target_names: Optional[Iterable[str]] = None, settings: Optional[Dict[str, Any]] = None,
+                  targets: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, Any]:
+    """
+    Back up the named targets (all of them by default; missing ones are skipped) and return the manifest, whose
+    'bytes_written' is the size of the new chunks this backup added to the store.
+    """
+    settings = settings or get_backup_settings()
+    targets = targets or get_backup_targets()
+    target_names = list(target_names or targets)
+    unknown = [name for name in target_names if name not in targets]
+    if unknown:
+        raise BackupError(f"Unknown backup targets: {', '.join(unknown)}")
+
+    with _backup_lock:
+        store = BackupStore(settings['backup_dir'])
+        manifest = {'id': datetime.now().strftime('%Y%m%d_%H%M%S_%f'), 'created_at': datetime.now().isoformat(),
+                    'targets': {}, 'bytes_written': 0}
+        for name in target_names:
+            kind, path = targets[name]['kind'], targets[name]['path']
+            if kind == TARGET_SQLITE and os.path.isfile(path):
+                files = {os.path.basename(path): _store_sqlite(store, path, settings)}
+            elif kind == TARGET_DIRECTORY and os.path.isdir(path):
+                files = _store_directory(store, path, settings)
+            else:
+                logger.info(f"Backup: skipping {name}, nothing at {path}")
+                continue
+            manifest['targets'][name] = {'kind': kind, 'path': path, 'files': files}
+            manifest['bytes_written'] += sum(entry['bytes_written'] for entry in files.values())
+        store.write_manifest(manifest)
+        removed = store.prune(settings['keep_backups'])
+    logger.info(f"Backup {manifest['id']} covers {', '.join(manifest['targets']) or 'nothing'}; "
+                f"{manifest['bytes_written']} bytes of new data, {len(removed)} old backups pruned")
+    return manifest
+
+
+def list_backups(settings: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    store = BackupStore((settings or get_backup_settings())['backup_dir'])
+    backups = []
+    for backup_id in store.list_backups():
+        manifest = store.load_manifest(backup_id)
+        backups.append({'id': backup_id, 'created_at': manifest['created_at'], 'targets': list(manifest['targets']),
+                        'bytes_written': manifest['bytes_written']})
+    return backups
+
+
+def _rebuild_target(store: BackupStore, target: Dict[str, Any], work_dir: str) -> str:
+    """Rebuild and verify every file of a target under `work_dir`; returns the rebuilt path of the target."""
+    for relative_path, entry in target['files'].items():
+        path = os.path.join(work_dir, *relative_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        store.rebuild_file(entry, path)
+        if entry.get('sqlite'):
+            check_integrity(path)
+    if target['kind'] == TARGET_SQLITE:
+        return os.path.join(work_dir, next(iter(target['files'])))
+    return work_dir
+
+
+def _read_index_generation(conn) -> int:
+    try:
+        row = conn.execute('SELECT generation FROM IndexGeneration WHERE id = 1').fetchone()
+        return row[0] if row else 0
+    except sqlite3.Error:
+        return 0
+
+
+def _install_sqlite(rebuilt_path: str, live_path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(live_path)), exist_ok=True)
+    live = sqlite3.connect(live_path, timeout=30)
+    try:
+        before = _read_index_generation(live)
+        source = sqlite3.connect(f"file:{os.path.abspath(rebuilt_path)}?mode=ro", uri=True)
+        try:
+            # A single step: the live database is replaced in one transaction
+            source.backup(live)
+        finally:
+            source.close()
+        # Triggers do not fire on a restore; move the write generation past any value caches may hold
+        after = _read_index_generation(live)
+        if after or before:
+            # Backups taken before IndexGeneration existed restore without it; the app adds its triggers on start
+            for statement in generation_schema_sql(()):
+                live.execute(statement)
+            live.execute('UPDATE IndexGeneration SET generation = ? WHERE id = 1', (max(before, after) + 1,))
+            live.commit()
+    finally:
+        live.close()
+
+
+def _close_vector_store() -> None:
+    # The open store holds files in the directories about to be swapped; only loaded if something opened it
+    vector_store_module = sys.modules.get('App_Function_Libraries.RAG.Vector_Store')
+    if vector_store_module is not None:
+        vector_store_module.reset_vector_store()
+
+
+def _install_directory(rebuilt_dir: str, live_dir: str) -> None:
+    parent = os.path.dirname(os.path.abspath(live_dir))
+    os.makedirs(parent, exist_ok=True)
+    _close_vector_store()
+    previous_dir = None
+    if os.path.exists(live_dir):
+        previous_dir = tempfile.mkdtemp(prefix='.restore_previous_', dir=parent)
+        os.rmdir(previous_dir)
+        os.replace(live_dir, previous_dir)
+    try:
+        os.replace(rebuilt_dir, live_dir)
+    except OSError:
+        if previous_dir:
+            os.replace(previous_dir, live_dir)
+        raise
+    if previous_dir:
+        shutil.rmtree(previous_dir, ignore_errors=True)
+
+
+def restore_database_file(backup_file: str, live_path: str) -> None:
+    """Check a single-file database backup (e.g. from create_automated_backup) and write it over `live_path`."""
+    if not is_sqlite_file(backup_file):
+        raise BackupError(f"Not a SQLite database: {backup_file}")
+    check_integrity(backup_file)
+    with _backup_lock:
+        _install_sqlite(backup_file, live_path)
+
+
+def verify_backup(backup_id: str, settings: Optional[Dict[str, Any]] = None) -> None:
+    """Rebuild every file of a backup in a scratch directory and check it; raises BackupError if any fails."""
+    store = BackupStore((settings or get_backup_settings())['backup_dir'])
+    manifest = store.load_manifest(backup_id)
+    for name, target in manifest['targets'].items():
+        with tempfile.TemporaryDirectory(dir=store.staging_dir) as work_dir:
+            _rebuild_target(store, target, work_dir)
+
+
+def restore_backup(backup_id: str, target_names: Optional[Iterable[str]] = None,
+                   settings: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Restore the named targets (all by default) of a backup to the paths they were backed up from. Every target is
+    rebuilt and verified before the first one is installed. Returns the names restored.
+    """
+    store = BackupStore((settings or get_backup_settings())['backup_dir'])
+    manifest = store.load_manifest(backup_id)
+    target_names = list(target_names or manifest['targets'])
+    missing = [name for name in target_names if name not in manifest['targets']]
+    if missing:
+        raise BackupError(f"Backup {backup_id} does not contain: {', '.join(missing)}")
+
+    with _backup_lock:
+        work_dirs, rebuilt = [], {}
+        try:
+            for name in target_names:
+                target = manifest['targets'][name]
+                # Rebuilt beside the destination, so installing a directory is a rename on the same filesystem
+                parent = os.path.dirname(os.path.abspath(target['path']))
+                os.makedirs(parent, exist_ok=True)
+                work_dir = tempfile.mkdtemp(prefix='.restore_', dir=parent)
+                work_dirs.append(work_dir)
+                rebuilt[name] = _rebuild_target(store, target, work_dir)
+            for name in target_names:
+                target = manifest['targets'][name]
+                if target['kind'] == TARGET_SQLITE:
+                    _install_sqlite(rebuilt[name], target['path'])
+                else:
+                    _install_directory(rebuilt[name], target['path'])
+                logger.info(f"Restored {name} from backup {backup_id}")
+        finally:
+            for work_dir in work_dirs:
+                shutil.rmtree(work_dir, ignore_errors=True)
+    return target_names
+
+#
+# End of Backup_Manager.py
+#######################################################################################################################
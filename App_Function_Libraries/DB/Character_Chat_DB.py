@@ -3,14 +3,16 @@
 # #
 # Imports
 import configparser
+import logging
 import sqlite3
 import json
 import os
-import sys
+import threading
 from typing import List, Dict, Optional, Tuple, Any, Union
 
+from App_Function_Libraries.DB.Schema_Migrations import Migration, migrate_file, split_sql_script
+from App_Function_Libraries.Utils.Lazy_Loading import run_once
 from App_Function_Libraries.Utils.Utils import get_database_dir, get_project_relative_path, get_database_path
-from Tests.Chat_APIs.Chat_APIs_Integration_test import logging
 
 #
 #######################################################################################################################
@@ -20,8 +22,6 @@ from Tests.Chat_APIs.Chat_APIs_Integration_test import logging
 def ensure_database_directory():
     os.makedirs(get_database_dir(), exist_ok=True)
 
-ensure_database_directory()
-
 
 # Construct the path to the config file
 config_path = get_project_relative_path('Config_Files/config.txt')
@@ -32,128 +32,126 @@ config.read(config_path)
 
 # Get the chat db path from the config, or use the default if not specified
 chat_DB_PATH = config.get('Database', 'chatDB_path', fallback=get_database_path('chatDB.db'))
-print(f"Chat Database path: {chat_DB_PATH}")
+logging.debug(f"Chat Database path: {chat_DB_PATH}")
 
 ########################################################################################################
 #
 # Functions
 
-# FIXME - Setup properly and test/add documentation for its existence...
-def initialize_database():
-    """Initialize the SQLite database with required tables and FTS5 virtual tables."""
-    conn = None
-    try:
-        conn = sqlite3.connect(chat_DB_PATH)
-        cursor = conn.cursor()
+def _create_chat_schema(conn: sqlite3.Connection) -> None:
+    cursor = conn.cursor()
 
-        # Enable foreign key constraints
-        cursor.execute("PRAGMA foreign_keys = ON;")
+    # Create CharacterCards table with V2 fields
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS CharacterCards (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        description TEXT,
+        personality TEXT,
+        scenario TEXT,
+        image BLOB,
+        post_history_instructions TEXT,
+        first_mes TEXT,
+        mes_example TEXT,
+        creator_notes TEXT,
+        system_prompt TEXT,
+        alternate_greetings TEXT,
+        tags TEXT,
+        creator TEXT,
+        character_version TEXT,
+        extensions TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+    # Create CharacterChats table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS CharacterChats (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        character_id INTEGER NOT NULL,
+        conversation_name TEXT,
+        chat_history TEXT,
+        is_snapshot BOOLEAN DEFAULT FALSE,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (character_id) REFERENCES CharacterCards(id) ON DELETE CASCADE
+    );
+    """)
+
+    # Create FTS5 virtual table for CharacterChats
+    cursor.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS CharacterChats_fts USING fts5(
+        conversation_name,
+        chat_history,
+        content='CharacterChats',
+        content_rowid='id'
+    );
+    """)
+
+    # Create triggers to keep FTS5 table in sync with CharacterChats
+    for statement in split_sql_script("""
+    CREATE TRIGGER IF NOT EXISTS CharacterChats_ai AFTER INSERT ON CharacterChats BEGIN
+        INSERT INTO CharacterChats_fts(rowid, conversation_name, chat_history)
+        VALUES (new.id, new.conversation_name, new.chat_history);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS CharacterChats_ad AFTER DELETE ON CharacterChats BEGIN
+        DELETE FROM CharacterChats_fts WHERE rowid = old.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS CharacterChats_au AFTER UPDATE ON CharacterChats BEGIN
+        UPDATE CharacterChats_fts SET conversation_name = new.conversation_name, chat_history = new.chat_history
+        WHERE rowid = new.id;
+    END;
+    """):
+        cursor.execute(statement)
+
+    # Create ChatKeywords table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS ChatKeywords (
+        chat_id INTEGER NOT NULL,
+        keyword TEXT NOT NULL,
+        FOREIGN KEY (chat_id) REFERENCES CharacterChats(id) ON DELETE CASCADE
+    );
+    """)
+
+    # Create indexes for faster searches
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_chatkeywords_keyword ON ChatKeywords(keyword);
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_chatkeywords_chat_id ON ChatKeywords(chat_id);
+    """)
+
+
+# Ordered schema changes of the character chat database (see Schema_Migrations.py)
+CHAT_MIGRATIONS = (
+    Migration(1, "Base character chat schema", _create_chat_schema),
+)
 
-        # Create CharacterCards table with V2 fields
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS CharacterCards (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            description TEXT,
-            personality TEXT,
-            scenario TEXT,
-            image BLOB,
-            post_history_instructions TEXT,
-            first_mes TEXT,
-            mes_example TEXT,
-            creator_notes TEXT,
-            system_prompt TEXT,
-            alternate_greetings TEXT,
-            tags TEXT,
-            creator TEXT,
-            character_version TEXT,
-            extensions TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        );
-        """)
-
-        # Create CharacterChats table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS CharacterChats (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            character_id INTEGER NOT NULL,
-            conversation_name TEXT,
-            chat_history TEXT,
-            is_snapshot BOOLEAN DEFAULT FALSE,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (character_id) REFERENCES CharacterCards(id) ON DELETE CASCADE
-        );
-        """)
-
-        # Create FTS5 virtual table for CharacterChats
-        cursor.execute("""
-        CREATE VIRTUAL TABLE IF NOT EXISTS CharacterChats_fts USING fts5(
-            conversation_name,
-            chat_history,
-            content='CharacterChats',
-            content_rowid='id'
-        );
-        """)
-
-        # Create triggers to keep FTS5 table in sync with CharacterChats
-        cursor.executescript("""
-        CREATE TRIGGER IF NOT EXISTS CharacterChats_ai AFTER INSERT ON CharacterChats BEGIN
-            INSERT INTO CharacterChats_fts(rowid, conversation_name, chat_history)
-            VALUES (new.id, new.conversation_name, new.chat_history);
-        END;
-
-        CREATE TRIGGER IF NOT EXISTS CharacterChats_ad AFTER DELETE ON CharacterChats BEGIN
-            DELETE FROM CharacterChats_fts WHERE rowid = old.id;
-        END;
-
-        CREATE TRIGGER IF NOT EXISTS CharacterChats_au AFTER UPDATE ON CharacterChats BEGIN
-            UPDATE CharacterChats_fts SET conversation_name = new.conversation_name, chat_history = new.chat_history
-            WHERE rowid = new.id;
-        END;
-        """)
-
-        # Create ChatKeywords table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS ChatKeywords (
-            chat_id INTEGER NOT NULL,
-            keyword TEXT NOT NULL,
-            FOREIGN KEY (chat_id) REFERENCES CharacterChats(id) ON DELETE CASCADE
-        );
-        """)
-
-        # Create indexes for faster searches
-        cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_chatkeywords_keyword ON ChatKeywords(keyword);
-        """)
-        cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_chatkeywords_chat_id ON ChatKeywords(chat_id);
-        """)
 
-        conn.commit()
+def initialize_database():
+    """Initialize the SQLite database with required tables and FTS5 virtual tables."""
+    try:
+        ensure_database_directory()
+        migrate_file(chat_DB_PATH, CHAT_MIGRATIONS, 'character chat database')
         logging.info("Database initialized successfully.")
-    except sqlite3.Error as e:
-        logging.error(f"SQLite error occurred during database initialization: {e}")
-        if conn:
-            conn.rollback()
-        raise
     except Exception as e:
-        logging.error(f"Unexpected error occurred during database initialization: {e}")
-        if conn:
-            conn.rollback()
+        logging.error(f"Error occurred during database initialization: {e}")
         raise
-    finally:
-        if conn:
-            conn.close()
 
-# Call initialize_database() at the start of your application
+# Runs before the first connection (see connect_chat_db) rather than on import; retried if it fails
+@run_once
 def setup_chat_database():
     try:
         initialize_database()
     except Exception as e:
         logging.critical(f"Failed to initialize database: {e}")
-        sys.exit(1)
+        raise
+
 
-setup_chat_database()
+def connect_chat_db() -> sqlite3.Connection:
+    setup_chat_database()
+    return sqlite3.connect(chat_DB_PATH)
 
 ########################################################################################################
 #
@@ -187,7 +185,7 @@ def parse_character_card(card_data: Dict[str, Any]) -> Dict[str, Any]:
 
 def add_character_card(card_data: Dict[str, Any]) -> Optional[int]:
     """Add or update a character card in the database."""
-    conn = sqlite3.connect(chat_DB_PATH)
+    conn = connect_chat_db()
     cursor = conn.cursor()
     try:
         parsed_card = parse_character_card(card_data)
@@ -307,7 +305,7 @@ def add_character_card(card_data: Dict[str, Any]) -> Optional[int]:
 def get_character_cards() -> List[Dict]:
     """Retrieve all character cards from the database."""
     logging.debug(f"Fetching characters from DB: {chat_DB_PATH}")
-    conn = sqlite3.connect(chat_DB_PATH)
+    conn = connect_chat_db()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM CharacterCards")
     rows = cursor.fetchall()
@@ -328,7 +326,7 @@ def get_character_card_by_id(character_id: Union[int, Dict[str, Any]]) -> Option
     Returns:
         A dictionary containing the character card data, or None if not found.
     """
-    conn = sqlite3.connect(chat_DB_PATH)
+    conn = connect_chat_db()
     cursor = conn.cursor()
     try:
         if isinstance(character_id, dict):
@@ -353,7 +351,7 @@ def get_character_card_by_id(character_id: Union[int, Dict[str, Any]]) -> Option
 
 def update_character_card(character_id: int, card_data: Dict) -> bool:
     """Update an existing character card."""
-    conn = sqlite3.connect(chat_DB_PATH)
+    conn = connect_chat_db()
     cursor = conn.cursor()
     try:
         cursor.execute("""
@@ -381,7 +379,7 @@ def update_character_card(character_id: int, card_data: Dict) -> bool:
 
 def delete_character_card(character_id: int) -> bool:
     """Delete a character card and its associated chats."""
-    conn = sqlite3.connect(chat_DB_PATH)
+    conn = connect_chat_db()
     cursor = conn.cursor()
     try:
         # Delete associated chats first due to foreign key constraint
@@ -410,7 +408,7 @@ def add_character_chat(character_id: int, conversation_name: str, chat_history:
     Returns:
         Optional[int]: The ID of the inserted chat or None if failed.
     """
-    conn = sqlite3.connect(chat_DB_PATH)
+    conn = connect_chat_db()
     cursor = conn.cursor()
     try:
         chat_history_json = json.dumps(chat_history)
@@ -444,7 +442,7 @@ def add_character_chat(character_id: int, conversation_name: str, chat_history:
 
 def get_character_chats(character_id: Optional[int] = None) -> List[Dict]:
     """Retrieve all chats, or chats for a specific character if character_id is provided."""
-    conn = sqlite3.connect(chat_DB_PATH)
+    conn = connect_chat_db()
     cursor = conn.cursor()
     if character_id is not None:
         cursor.execute("SELECT * FROM CharacterChats WHERE character_id = ?", (character_id,))
@@ -458,7 +456,7 @@ def get_character_chats(character_id: Optional[int] = None) -> List[Dict]:
 
 def get_character_chat_by_id(chat_id: int) -> Optional[Dict]:
     """Retrieve a single chat by its ID."""
-    conn = sqlite3.connect(chat_DB_PATH)
+    conn = connect_chat_db()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM CharacterChats WHERE id = ?", (chat_id,))
     row = cursor.fetchone()
@@ -485,7 +483,7 @@ def search_character_chats(query: str, character_id: Optional[int] = None) -> Tu
     if not query.strip():
         return [], "Please enter a search query."
 
-    conn = sqlite3.connect(chat_DB_PATH)
+    conn = connect_chat_db()
     cursor = conn.cursor()
     try:
         if character_id is not None:
@@ -523,9 +521,24 @@ def search_character_chats(query: str, character_id: Optional[int] = None) -> Tu
     finally:
         conn.close()
 
+def queue_chat_embedding(chat_id: int, chat_history: List[Tuple[str, str]]) -> Optional[threading.Thread]:
+    """
+    Embed the new or edited turns of a saved chat in a background thread, so saving a chat never waits on the
+    embedding provider. Disabled with `embed_chat_history = False` under [Embeddings].
+    """
+    # Imported here: the RAG modules import this one
+    from App_Function_Libraries.RAG.RAG_Persona_Chat import auto_embed_chats_enabled, embed_and_store_chat
+    if not auto_embed_chats_enabled():
+        return None
+    thread = threading.Thread(target=embed_and_store_chat, args=(chat_id, chat_history), daemon=True,
+                              name=f"embed-chat-{chat_id}")
+    thread.start()
+    return thread
+
+
 def update_character_chat(chat_id: int, chat_history: List[Tuple[str, str]]) -> bool:
-    """Update an existing chat history."""
-    conn = sqlite3.connect(chat_DB_PATH)
+    """Update an existing chat history and queue embedding of its new turns."""
+    conn = connect_chat_db()
     cursor = conn.cursor()
     try:
         chat_history_json = json.dumps(chat_history)
@@ -538,7 +551,13 @@ def update_character_chat(chat_id: int, chat_history: List[Tuple[str, str]]) ->
             chat_id
         ))
         conn.commit()
-        return cursor.rowcount > 0
+        updated = cursor.rowcount > 0
+        if updated:
+            try:
+                queue_chat_embedding(chat_id, chat_history)
+            except Exception as e:
+                logging.error(f"Error queueing embedding for chat ID {chat_id}: {e}")
+        return updated
     except sqlite3.Error as e:
         logging.error(f"Error updating character chat: {e}")
         return False
@@ -548,7 +567,7 @@ def update_character_chat(chat_id: int, chat_history: List[Tuple[str, str]]) ->
 
 def delete_character_chat(chat_id: int) -> bool:
     """Delete a specific chat."""
-    conn = sqlite3.connect(chat_DB_PATH)
+    conn = connect_chat_db()
     cursor = conn.cursor()
     try:
         cursor.execute("DELETE FROM CharacterChats WHERE id = ?", (chat_id,))
@@ -573,7 +592,7 @@ def fetch_keywords_for_chats(keywords: List[str]) -> List[int]:
     if not keywords:
         return []
 
-    conn = sqlite3.connect(chat_DB_PATH)
+    conn = connect_chat_db()
     cursor = conn.cursor()
     try:
         # Construct the WHERE clause to search for each keyword
@@ -617,7 +636,7 @@ def search_db(query: str, fields: List[str], where_clause: str = "", page: int =
     if not query.strip():
         return []
 
-    conn = sqlite3.connect(chat_DB_PATH)
+    conn = connect_chat_db()
     cursor = conn.cursor()
     try:
         # Construct the MATCH query for FTS5
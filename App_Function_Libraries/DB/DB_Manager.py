@@ -8,9 +8,6 @@ import logging
 import time
 from typing import Tuple, List, Union, Dict
 #
-# 3rd-Party Libraries
-from elasticsearch import Elasticsearch
-#
 # Import your existing SQLite functions
 from App_Function_Libraries.DB.SQLite_DB import DatabaseError
 from App_Function_Libraries.DB.SQLite_DB import (
@@ -38,6 +35,8 @@ from App_Function_Libraries.DB.SQLite_DB import (
     get_trashed_items as sqlite_get_trashed_items,
     user_delete_item as sqlite_user_delete_item,
     empty_trash as sqlite_empty_trash,
+    purge_media as sqlite_purge_media,
+    purge_trash as sqlite_purge_trash,
     create_automated_backup as sqlite_create_automated_backup,
     add_or_update_prompt as sqlite_add_or_update_prompt,
     load_prompt_details as sqlite_load_prompt_details,
@@ -49,7 +48,9 @@ from App_Function_Libraries.DB.SQLite_DB import (
     add_media_with_keywords as sqlite_add_media_with_keywords,
     check_media_and_whisper_model as sqlite_check_media_and_whisper_model, \
     create_document_version as sqlite_create_document_version,
-    get_document_version as sqlite_get_document_version, sqlite_search_db, add_media_chunk as sqlite_add_media_chunk,
+    get_document_version as sqlite_get_document_version, compact_document_versions as sqlite_compact_document_versions, \
+    compress_text_columns as sqlite_compress_text_columns, decompress_text_columns as sqlite_decompress_text_columns, \
+    sqlite_search_db, add_media_chunk as sqlite_add_media_chunk,
     sqlite_update_fts_for_media, get_unprocessed_media as sqlite_get_unprocessed_media, fetch_item_details as sqlite_fetch_item_details, \
     search_media_database as sqlite_search_media_database, mark_as_trash as sqlite_mark_as_trash, \
     get_media_transcripts as sqlite_get_media_transcripts, get_specific_transcript as sqlite_get_specific_transcript, \
@@ -59,16 +60,24 @@ from App_Function_Libraries.DB.SQLite_DB import (
     delete_specific_summary as sqlite_delete_specific_summary, \
     delete_specific_prompt as sqlite_delete_specific_prompt,
     fetch_keywords_for_media as sqlite_fetch_keywords_for_media, \
+    fetch_media_ids_for_keywords as sqlite_fetch_media_ids_for_keywords, \
+    invalidate_keyword_media_index as sqlite_invalidate_keyword_media_index, \
+    get_media_index_generation as sqlite_get_media_index_generation, \
     update_keywords_for_media as sqlite_update_keywords_for_media, check_media_exists as sqlite_check_media_exists, \
+    bulk_update_keywords_for_media as sqlite_bulk_update_keywords_for_media, \
     search_prompts as sqlite_search_prompts, get_media_content as sqlite_get_media_content, \
     get_paginated_files as sqlite_get_paginated_files, get_media_title as sqlite_get_media_title, \
     get_all_content_from_database as sqlite_get_all_content_from_database,
+    iter_all_content_from_database as sqlite_iter_all_content_from_database, \
+    iter_unprocessed_media as sqlite_iter_unprocessed_media, iter_media_by_keyword as sqlite_iter_media_by_keyword, \
+    export_media_library as sqlite_export_media_library,
     get_next_media_id as sqlite_get_next_media_id, \
-    batch_insert_chunks as sqlite_batch_insert_chunks, Database, save_workflow_chat_to_db as sqlite_save_workflow_chat_to_db, \
+    batch_insert_chunks as sqlite_batch_insert_chunks, Database, create_tables, save_workflow_chat_to_db as sqlite_save_workflow_chat_to_db, \
     get_workflow_chat as sqlite_get_workflow_chat, update_media_content_with_version as sqlite_update_media_content_with_version, \
     check_existing_media as sqlite_check_existing_media, get_all_document_versions as sqlite_get_all_document_versions, \
     fetch_paginated_data as sqlite_fetch_paginated_data, get_latest_transcription as sqlite_get_latest_transcription, \
     mark_media_as_processed as sqlite_mark_media_as_processed,
+    schedule_media_backfill as sqlite_schedule_media_backfill, get_media_backfill_status as sqlite_get_media_backfill_status,
 )
 from App_Function_Libraries.DB.Character_Chat_DB import (
     add_character_card as sqlite_add_character_card, get_character_cards as sqlite_get_character_cards, \
@@ -145,7 +154,7 @@ elif db_type == 'elasticsearch':
 else:
     raise ValueError(f"Unsupported database type: {db_type}")
 
-print(f"Database path: {db.db_path}")
+logger.debug(f"Database path: {db.db_path}")
 
 def get_db_config():
     try:
@@ -191,6 +200,8 @@ db_type = db_config['type']
 
 if db_type == 'sqlite':
     db = Database(os.path.basename(db_config['sqlite_path']))
+    # Like SQLite_DB.db, the schema is brought up to date before the first query rather than on import
+    db.on_first_use(create_tables)
 elif db_type == 'elasticsearch':
     # Implement Elasticsearch setup here if needed
     raise NotImplementedError("Elasticsearch support not yet implemented")
@@ -198,7 +209,7 @@ else:
     raise ValueError(f"Unsupported database type: {db_type}")
 
 # Print database path for debugging
-print(f"Database path: {db.db_path}")
+logger.debug(f"Database path: {db.db_path}")
 
 # Sanity Check for SQLite DB
 # FIXME - Remove this after testing / Writing Unit tests
@@ -214,9 +225,10 @@ print(f"Database path: {db.db_path}")
 #
 # DB Search functions
 
-def search_db(search_query: str, search_fields: List[str], keywords: str, page: int = 1, results_per_page: int = 10):
+def search_db(search_query: str, search_fields: List[str], keywords: str, page: int = 1, results_per_page: int = 10,
+              media_ids=None):
     if db_type == 'sqlite':
-        return sqlite_search_db(search_query, search_fields, keywords, page, results_per_page)
+        return sqlite_search_db(search_query, search_fields, keywords, page, results_per_page, media_ids=media_ids)
     elif db_type == 'elasticsearch':
         # Implement Elasticsearch version when available
         raise NotImplementedError("Elasticsearch version of search_db not yet implemented")
@@ -244,6 +256,27 @@ def get_all_content_from_database():
         # Implement Elasticsearch version
         raise NotImplementedError("Elasticsearch version of add_media_with_keywords not yet implemented")
 
+def iter_all_content_from_database(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_iter_all_content_from_database(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of iter_all_content_from_database not yet implemented")
+
+def iter_media_by_keyword(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_iter_media_by_keyword(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of iter_media_by_keyword not yet implemented")
+
+def export_media_library(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_export_media_library(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of export_media_library not yet implemented")
+
 def search_and_display(*args, **kwargs):
     if db_type == 'sqlite':
         return sqlite_search_and_display(*args, **kwargs)
@@ -438,6 +471,16 @@ def get_unprocessed_media(*args, **kwargs):
         raise ValueError(f"Unsupported database type: {db_type}")
 
 
+def iter_unprocessed_media(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_iter_unprocessed_media(db, batch_size=kwargs.get('batch_size'))
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of iter_unprocessed_media not yet implemented")
+    else:
+        raise ValueError(f"Unsupported database type: {db_type}")
+
+
 def mark_media_as_processed(*args, **kwargs):
     if db_type == 'sqlite':
         return sqlite_mark_media_as_processed(*args, **kwargs)
@@ -706,6 +749,13 @@ def update_keywords_for_media(*args, **kwargs):
         # Implement Elasticsearch version
         raise NotImplementedError("Elasticsearch version of add_media_with_keywords not yet implemented")
 
+def bulk_update_keywords_for_media(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_bulk_update_keywords_for_media(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of bulk_update_keywords_for_media not yet implemented")
+
 def fetch_keywords_for_media(*args, **kwargs):
     if db_type == 'sqlite':
         return sqlite_fetch_keywords_for_media(*args, **kwargs)
@@ -713,6 +763,27 @@ def fetch_keywords_for_media(*args, **kwargs):
         # Implement Elasticsearch version
         raise NotImplementedError("Elasticsearch version of add_media_with_keywords not yet implemented")
 
+def fetch_media_ids_for_keywords(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_fetch_media_ids_for_keywords(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of fetch_media_ids_for_keywords not yet implemented")
+
+def invalidate_keyword_media_index(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_invalidate_keyword_media_index(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of invalidate_keyword_media_index not yet implemented")
+
+def get_media_index_generation(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_get_media_index_generation(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of get_media_index_generation not yet implemented")
+
 #
 # End of Keywords-related Functions
 ############################################################################################################
@@ -893,6 +964,20 @@ def empty_trash(*args, **kwargs):
         # Implement Elasticsearch version
         raise NotImplementedError("Elasticsearch version of add_media_with_keywords not yet implemented")
 
+def purge_media(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_purge_media(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of purge_media not yet implemented")
+
+def purge_trash(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_purge_trash(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of purge_trash not yet implemented")
+
 
 def fetch_item_details(media_id: int) -> Tuple[str, str, str]:
     """
@@ -929,6 +1014,20 @@ def create_automated_backup(*args, **kwargs):
         # Implement Elasticsearch version
         raise NotImplementedError("Elasticsearch version of add_media_with_keywords not yet implemented")
 
+def schedule_media_backfill(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_schedule_media_backfill(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of schedule_media_backfill not yet implemented")
+
+def get_media_backfill_status(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_get_media_backfill_status(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of get_media_backfill_status not yet implemented")
+
 #
 # End of DB-Backup Functions
 ############################################################################################################
@@ -952,6 +1051,27 @@ def get_document_version(*args, **kwargs):
         # Implement Elasticsearch version
         raise NotImplementedError("Elasticsearch version of get_document_version not yet implemented")
 
+def compact_document_versions(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_compact_document_versions(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of compact_document_versions not yet implemented")
+
+def compress_text_columns(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_compress_text_columns(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of compress_text_columns not yet implemented")
+
+def decompress_text_columns(*args, **kwargs):
+    if db_type == 'sqlite':
+        return sqlite_decompress_text_columns(*args, **kwargs)
+    elif db_type == 'elasticsearch':
+        # Implement Elasticsearch version
+        raise NotImplementedError("Elasticsearch version of decompress_text_columns not yet implemented")
+
 #
 # End of Document Versioning Functions
 ############################################################################################################
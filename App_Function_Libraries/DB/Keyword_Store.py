@@ -0,0 +1,197 @@
+# Keyword_Store.py
+# Description: Set-based keyword upserts and keyword link updates for the media, prompts and RAG QA databases.
+#
+# Each of those databases has a keyword table (id INTEGER PRIMARY KEY AUTOINCREMENT, keyword TEXT UNIQUE), the media
+# database also an FTS table whose rowid is the keyword id, and link tables pairing an owner (a media item, prompt,
+# note or conversation) with keyword ids. Tagging used to insert and look up one keyword at a time. Here a batch of
+# keywords is upserted with one executemany (INSERT ... ON CONFLICT DO NOTHING) and resolved with one query, and a
+# link table is brought to the wanted keywords by writing only the difference.
+#
+# Resolved ids are cached in memory per database file, so known keywords skip the upsert and the lookup by text. A
+# cached id can go stale - its keyword deleted by another process, or the file replaced by a restored backup - so
+# cached ids are checked with one primary key query per batch, and links are only inserted where the id still belongs
+# to the keyword; keywords whose cached id turned out to be wrong are resolved again.
+#
+# Imports
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+#
+#######################################################################################################################
+#
+# Functions:
+
+# SQLite builds before 3.32 allow at most 999 bound parameters per statement
+MAX_QUERY_PARAMETERS = 999
+
+
+def _chunks(items: List[Any], size: int = MAX_QUERY_PARAMETERS):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def unique_keywords(keywords: Iterable[str]) -> List[str]:
+    """The non-empty keywords, in first-seen order and without repeats."""
+    return list(dict.fromkeys(keyword for keyword in keywords if keyword))
+
+
+@dataclass(frozen=True)
+class LinkTable:
+    """A table linking owners (`owner_column`) to keyword ids (`keyword_column`)."""
+    table: str
+    owner_column: str
+    keyword_column: str = 'keyword_id'
+
+
+class KeywordStore:
+    """
+    Keyword ids and keyword links for one kind of keyword table. Methods take the connection to use, so they join the
+    caller's transaction; none of them commits.
+    """
+
+    def __init__(self, keyword_table: str, fts_table: Optional[str] = None, case_insensitive: bool = False):
+        self.keyword_table = keyword_table
+        self.fts_table = fts_table
+        # The prompts Keywords table compares keywords with COLLATE NOCASE
+        self.case_insensitive = case_insensitive
+        self._ids: Dict[str, Dict[str, int]] = {}  # database file -> keyword -> id
+        self._lock = threading.Lock()
+
+    def _fold(self, keyword: str) -> str:
+        return keyword.lower() if self.case_insensitive else keyword
+
+    def _cache(self, conn) -> Dict[str, int]:
+        database_file = conn.execute('PRAGMA database_list').fetchone()[2]
+        if not database_file:
+            # Every in-memory database is a different one
+            return {}
+        with self._lock:
+            return self._ids.setdefault(database_file, {})
+
+    def forget(self, keywords: Optional[Iterable[str]] = None) -> None:
+        """Drop cached ids: of `keywords`, or all of them. Call after deleting keywords."""
+        with self._lock:
+            if keywords is None:
+                self._ids.clear()
+                return
+            keywords = list(keywords)
+            for cache in self._ids.values():
+                for keyword in keywords:
+                    cache.pop(keyword, None)
+
+    def _select_ids(self, conn, keywords: List[str]) -> Dict[str, int]:
+        found = {}
+        for chunk in _chunks(keywords):
+            placeholders = ', '.join('?' * len(chunk))
+            by_keyword = {self._fold(keyword): keyword_id for keyword_id, keyword in conn.execute(
+                f"SELECT id, keyword FROM {self.keyword_table} WHERE keyword IN ({placeholders})", chunk)}
+            found.update((keyword, by_keyword[self._fold(keyword)]) for keyword in chunk
+                         if self._fold(keyword) in by_keyword)
+        return found
+
+    def _index_keywords(self, conn, keyword_ids: Dict[str, int]) -> None:
+        """Add FTS rows for keywords that have none yet."""
+        ids = sorted(set(keyword_ids.values()))
+        indexed: Set[int] = set()
+        for chunk in _chunks(ids):
+            placeholders = ', '.join('?' * len(chunk))
+            indexed.update(row[0] for row in conn.execute(
+                f"SELECT rowid FROM {self.fts_table} WHERE rowid IN ({placeholders})", chunk))
+        rows = [(keyword_id, keyword) for keyword, keyword_id in keyword_ids.items() if keyword_id not in indexed]
+        if rows:
+            conn.executemany(f"INSERT INTO {self.fts_table} (rowid, keyword) VALUES (?, ?)", rows)
+
+    def _valid_ids(self, conn, ids: Dict[str, int]) -> Dict[str, int]:
+        """The entries of {keyword: id} whose id still belongs to that keyword."""
+        stored: Dict[int, str] = {}
+        for chunk in _chunks(sorted(set(ids.values()))):
+            placeholders = ', '.join('?' * len(chunk))
+            stored.update(conn.execute(
+                f"SELECT id, keyword FROM {self.keyword_table} WHERE id IN ({placeholders})", chunk).fetchall())
+        return {keyword: keyword_id for keyword, keyword_id in ids.items()
+                if keyword_id in stored and self._fold(stored[keyword_id]) == self._fold(keyword)}
+
+    def keyword_ids(self, conn, keywords: Iterable[str]) -> Dict[str, int]:
+        """{keyword: id} for `keywords`, adding the ones the table does not have yet (and their FTS rows)."""
+        keywords = unique_keywords(keywords)
+        cache = self._cache(conn)
+        ids = {keyword: cache[keyword] for keyword in keywords if keyword in cache}
+        if ids:
+            valid = self._valid_ids(conn, ids)
+            if len(valid) < len(ids):
+                self.forget(set(ids) - set(valid))
+            ids = valid
+        missing = [keyword for keyword in keywords if keyword not in ids]
+        if missing:
+            conn.executemany(f"INSERT INTO {self.keyword_table} (keyword) VALUES (?) ON CONFLICT(keyword) DO NOTHING",
+                             [(keyword,) for keyword in missing])
+            found = self._select_ids(conn, missing)
+            if self.fts_table:
+                self._index_keywords(conn, found)
+            ids.update(found)
+            with self._lock:
+                cache.update(found)
+        return ids
+
+    def _current_links(self, conn, link: LinkTable, owners: List[Any]) -> Dict[Any, Set[int]]:
+        current: Dict[Any, Set[int]] = {}
+        for chunk in _chunks(owners):
+            placeholders = ', '.join('?' * len(chunk))
+            for owner, keyword_id in conn.execute(
+                    f"SELECT {link.owner_column}, {link.keyword_column} FROM {link.table} "
+                    f"WHERE {link.owner_column} IN ({placeholders})", chunk):
+                current.setdefault(owner, set()).add(keyword_id)
+        return current
+
+    def _insert_links(self, conn, link: LinkTable, rows: List[Tuple[Any, str]], ids: Dict[str, int]) -> int:
+        """Link (owner, keyword) pairs using the ids in `ids`."""
+        if not rows:
+            return 0
+        # A link is only written if the id still belongs to the keyword (it may have changed since keyword_ids)
+        query = (f"INSERT INTO {link.table} ({link.owner_column}, {link.keyword_column}) "
+                 f"SELECT ?, id FROM {self.keyword_table} WHERE id = ? AND keyword = ?")
+        added = conn.executemany(query, [(owner, ids[keyword], keyword) for owner, keyword in rows]).rowcount
+        if added == len(rows):
+            return added
+
+        # Some cached ids were stale: resolve those keywords again and link the right ids
+        used = {keyword: ids[keyword] for _, keyword in rows}
+        stale = set(used) - set(self._valid_ids(conn, used))
+        logging.debug(f"Keyword_Store: {len(stale)} cached keyword ids in {self.keyword_table} were stale")
+        self.forget(stale)
+        fresh = self.keyword_ids(conn, stale)
+        retry = [(owner, fresh[keyword], keyword) for owner, keyword in rows if keyword in stale and keyword in fresh]
+        if retry:
+            added += conn.executemany(query, retry).rowcount
+        return added
+
+    def link_keywords(self, conn, link: LinkTable, assignments: Dict[Any, Iterable[str]],
+                      replace: bool = True) -> Tuple[int, int]:
+        """
+        Link each owner in `assignments` to its keywords, creating missing keywords. With `replace`, the owner's
+        links to other keywords are removed, so it ends up with exactly those keywords. Only the difference from the
+        current links is written. Returns (links added, links removed).
+        """
+        assignments = {owner: unique_keywords(keywords) for owner, keywords in assignments.items()}
+        if not assignments:
+            return 0, 0
+        ids = self.keyword_ids(conn, (keyword for keywords in assignments.values() for keyword in keywords))
+        current = self._current_links(conn, link, list(assignments))
+        to_add, to_remove = [], []
+        for owner, keywords in assignments.items():
+            # By id, so keywords that differ only in case (in a case-insensitive table) are linked once
+            wanted = {ids[keyword]: keyword for keyword in keywords if keyword in ids}
+            linked = current.get(owner, set())
+            to_add.extend((owner, keyword) for keyword_id, keyword in wanted.items() if keyword_id not in linked)
+            if replace:
+                to_remove.extend((owner, keyword_id) for keyword_id in sorted(linked - set(wanted)))
+        removed = 0
+        if to_remove:
+            removed = conn.executemany(f"DELETE FROM {link.table} WHERE {link.owner_column} = ? "
+                                       f"AND {link.keyword_column} = ?", to_remove).rowcount
+        return self._insert_links(conn, link, to_add, ids), removed
+
+#
+# End of Keyword_Store.py
+#######################################################################################################################
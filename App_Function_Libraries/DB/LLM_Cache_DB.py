@@ -0,0 +1,448 @@
+# LLM_Cache_DB.py
+# Description: Persistent, content-addressed cache for LLM responses (chat + summarization calls).
+#
+# The cache sits in front of the provider dispatch in `chat_api_call` and `summarize`. Entries are keyed on a
+# SHA-256 of (provider, model, system prompt, prompt, input, temperature) and stored in a standalone SQLite DB.
+# It is opt-in (see the `[LLM-Cache]` section of config.txt), and calls with temperature > 0 bypass the cache
+# unless `cache_nonzero_temperature` is set or the caller forces it.
+#
+# Imports
+import asyncio
+import configparser
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+#
+# External Imports
+# (No external imports)
+#
+# Local Imports
+from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
+from App_Function_Libraries.Utils.Utils import get_project_relative_path, get_database_path, load_comprehensive_config
+#
+########################################################################################################################
+#
+# Functions:
+
+def _read_config() -> configparser.ConfigParser:
+    # The shared parser, so edits saved from the Config tab apply without a restart
+    try:
+        return load_comprehensive_config()
+    except FileNotFoundError:
+        return configparser.ConfigParser()
+
+
+config = _read_config()
+
+if config.has_section('LLM-Cache') and config.has_option('LLM-Cache', 'cache_db_path'):
+    llm_cache_db_path = get_project_relative_path(config.get('LLM-Cache', 'cache_db_path'))
+else:
+    llm_cache_db_path = get_database_path('llm_cache.db')
+
+logger = logging.getLogger(__name__)
+
+# Default settings, overridden by the [LLM-Cache] section of config.txt
+DEFAULT_CACHE_SETTINGS = {
+    'enabled': False,
+    'ttl_seconds': 7 * 24 * 60 * 60,
+    'max_entries': 10000,
+    'max_size_mb': 256,
+    'cache_nonzero_temperature': False,
+}
+
+# Responses that look like provider/dispatch errors are never cached
+_ERROR_RESPONSE_PATTERN = re.compile(
+    r"^(Error|An error occurred|[\w .\-]+: (Error|Failed|API Key|Unexpected|Network|Invalid|Chat not available))",
+    re.IGNORECASE
+)
+
+SCHEMA_SQL = '''
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key TEXT PRIMARY KEY,
+    api_name TEXT NOT NULL,
+    model TEXT,
+    response TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    token_estimate INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_accessed REAL NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_last_accessed ON llm_response_cache(last_accessed);
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_created_at ON llm_response_cache(created_at);
+
+-- Per-chunk checkpoints for contextual chunk generation, so a failed run resumes where it stopped
+CREATE TABLE IF NOT EXISTS chunk_context_checkpoints (
+    document_key TEXT NOT NULL,
+    chunk_key TEXT NOT NULL,
+    api_name TEXT NOT NULL,
+    context TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (document_key, chunk_key)
+);
+'''
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+_stats_lock = threading.Lock()
+_session_stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'stores': 0, 'evictions': 0, 'tokens_saved': 0}
+
+
+def get_cache_settings() -> Dict[str, Any]:
+    settings = dict(DEFAULT_CACHE_SETTINGS)
+    config = _read_config()
+    if not config.has_section('LLM-Cache'):
+        return settings
+    try:
+        settings['enabled'] = config.getboolean('LLM-Cache', 'enabled', fallback=settings['enabled'])
+        settings['ttl_seconds'] = config.getint('LLM-Cache', 'ttl_seconds', fallback=settings['ttl_seconds'])
+        settings['max_entries'] = config.getint('LLM-Cache', 'max_entries', fallback=settings['max_entries'])
+        settings['max_size_mb'] = config.getfloat('LLM-Cache', 'max_size_mb', fallback=settings['max_size_mb'])
+        settings['cache_nonzero_temperature'] = config.getboolean(
+            'LLM-Cache', 'cache_nonzero_temperature', fallback=settings['cache_nonzero_temperature'])
+    except ValueError as e:
+        logger.warning(f"LLM Cache: Invalid value in [LLM-Cache] config section, using defaults: {e}")
+        return dict(DEFAULT_CACHE_SETTINGS)
+    return settings
+
+
+@contextmanager
+def get_db_connection():
+    global _schema_ready
+    conn = sqlite3.connect(llm_cache_db_path, timeout=10.0)
+    try:
+        if not _schema_ready:
+            with _schema_lock:
+                if not _schema_ready:
+                    conn.executescript(SCHEMA_SQL)
+                    _schema_ready = True
+        yield conn
+    finally:
+        conn.close()
+
+#
+# End of Setup
+############################################################
+
+
+############################################################
+#
+# Cache key + bypass logic
+
+def make_cache_key(api_name: str, model: Optional[str], system_message: Optional[str], prompt: Optional[str],
+                   input_data: Any, temp: Optional[float]) -> str:
+    """
+    Build the content address for an LLM request.
+
+    The key is a SHA-256 over a canonical JSON encoding of the request tuple, so identical requests map to the
+    same entry regardless of which code path (chat vs. summarize) issued them.
+    """
+    payload = json.dumps({
+        'api_name': (api_name or '').lower(),
+        'model': model or '',
+        'system_message': system_message or '',
+        'prompt': prompt or '',
+        'input_data': input_data,
+        'temp': None if temp is None else float(temp),
+    }, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def should_use_cache(temp: Optional[float], force: bool = False, settings: Optional[Dict[str, Any]] = None) -> bool:
+    settings = settings or get_cache_settings()
+    if not settings['enabled']:
+        return False
+    if force or settings['cache_nonzero_temperature']:
+        return True
+    try:
+        return temp is not None and float(temp) <= 0
+    except (TypeError, ValueError):
+        return False
+
+
+def is_cacheable_response(response: Any) -> bool:
+    if not isinstance(response, str) or not response.strip():
+        return False
+    return not _ERROR_RESPONSE_PATTERN.match(response.strip())
+
+
+def estimate_tokens(*texts: Any) -> int:
+    # Rough estimate (~4 characters per token) - avoids pulling tiktoken into the hot path
+    return sum(len(str(text)) for text in texts if text) // 4
+
+#
+# End of Cache key + bypass logic
+############################################################
+
+
+############################################################
+#
+# Cache storage
+
+def get_cached_response(cache_key: str, ttl_seconds: Optional[int] = None) -> Optional[str]:
+    if ttl_seconds is None:
+        ttl_seconds = get_cache_settings()['ttl_seconds']
+    now = time.time()
+    try:
+        with get_db_connection() as conn:
+            row = conn.execute(
+                "SELECT response, created_at, token_estimate FROM llm_response_cache WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created_at, token_estimate = row
+            if ttl_seconds and now - created_at > ttl_seconds:
+                conn.execute("DELETE FROM llm_response_cache WHERE cache_key = ?", (cache_key,))
+                conn.commit()
+                return None
+            conn.execute(
+                "UPDATE llm_response_cache SET last_accessed = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                (now, cache_key)
+            )
+            conn.commit()
+            return response
+    except sqlite3.Error as e:
+        logger.error(f"LLM Cache: Error reading cache entry: {e}")
+        return None
+
+
+def store_cached_response(cache_key: str, api_name: str, model: Optional[str], response: str,
+                          token_estimate: int = 0) -> bool:
+    now = time.time()
+    try:
+        with get_db_connection() as conn:
+            conn.execute('''
+                INSERT INTO llm_response_cache
+                    (cache_key, api_name, model, response, size_bytes, token_estimate, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    response = excluded.response,
+                    size_bytes = excluded.size_bytes,
+                    token_estimate = excluded.token_estimate,
+                    created_at = excluded.created_at,
+                    last_accessed = excluded.last_accessed
+            ''', (cache_key, (api_name or '').lower(), model, response, len(response.encode('utf-8')),
+                  token_estimate, now, now))
+            conn.commit()
+        with _stats_lock:
+            _session_stats['stores'] += 1
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"LLM Cache: Error storing cache entry: {e}")
+        return False
+
+
+def evict_cache_entries(ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None,
+                        max_size_mb: Optional[float] = None) -> int:
+    """
+    Remove expired entries, then evict least-recently-used entries until the cache fits within the entry-count
+    and size limits. Returns the number of evicted rows.
+    """
+    settings = get_cache_settings()
+    ttl_seconds = settings['ttl_seconds'] if ttl_seconds is None else ttl_seconds
+    max_entries = settings['max_entries'] if max_entries is None else max_entries
+    max_size_mb = settings['max_size_mb'] if max_size_mb is None else max_size_mb
+    evicted = 0
+    try:
+        with get_db_connection() as conn:
+            if ttl_seconds:
+                cursor = conn.execute("DELETE FROM llm_response_cache WHERE created_at < ?",
+                                      (time.time() - ttl_seconds,))
+                evicted += cursor.rowcount
+
+            count, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_response_cache").fetchone()
+            max_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+            over_count = max_entries and count > max_entries
+            over_size = max_bytes and total_bytes > max_bytes
+            if over_count or over_size:
+                # Walk entries from least to most recently used, dropping until both limits are satisfied
+                to_delete = []
+                for cache_key, size_bytes in conn.execute(
+                        "SELECT cache_key, size_bytes FROM llm_response_cache ORDER BY last_accessed ASC"):
+                    if (not max_entries or count <= max_entries) and (not max_bytes or total_bytes <= max_bytes):
+                        break
+                    to_delete.append((cache_key,))
+                    count -= 1
+                    total_bytes -= size_bytes
+                conn.executemany("DELETE FROM llm_response_cache WHERE cache_key = ?", to_delete)
+                evicted += len(to_delete)
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"LLM Cache: Error during eviction: {e}")
+        return evicted
+
+    if evicted:
+        with _stats_lock:
+            _session_stats['evictions'] += evicted
+        log_counter("llm_cache_evictions", value=evicted)
+    return evicted
+
+
+def clear_llm_cache() -> int:
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.execute("DELETE FROM llm_response_cache")
+            conn.commit()
+            return cursor.rowcount
+    except sqlite3.Error as e:
+        logger.error(f"LLM Cache: Error clearing cache: {e}")
+        return 0
+
+
+def get_llm_cache_stats() -> Dict[str, Any]:
+    stats = {'entries': 0, 'size_bytes': 0, 'total_hits': 0}
+    try:
+        with get_db_connection() as conn:
+            entries, size_bytes, total_hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), COALESCE(SUM(hit_count), 0) FROM llm_response_cache"
+            ).fetchone()
+            stats.update({'entries': entries, 'size_bytes': size_bytes, 'total_hits': total_hits})
+    except sqlite3.Error as e:
+        logger.error(f"LLM Cache: Error reading cache stats: {e}")
+    with _stats_lock:
+        stats['session'] = dict(_session_stats)
+    return stats
+
+#
+# End of Cache storage
+############################################################
+
+
+############################################################
+#
+# Contextual chunk checkpoints
+
+def get_chunk_context_checkpoints(document_key: str) -> Dict[str, str]:
+    """Return {chunk_key: context} for every chunk of this document that was already contextualized."""
+    try:
+        with get_db_connection() as conn:
+            return dict(conn.execute(
+                "SELECT chunk_key, context FROM chunk_context_checkpoints WHERE document_key = ?",
+                (document_key,)
+            ).fetchall())
+    except sqlite3.Error as e:
+        logger.error(f"LLM Cache: Error reading chunk context checkpoints: {e}")
+        return {}
+
+
+def store_chunk_context_checkpoint(document_key: str, chunk_key: str, api_name: str, context: str) -> bool:
+    try:
+        with get_db_connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO chunk_context_checkpoints "
+                "(document_key, chunk_key, api_name, context, created_at) VALUES (?, ?, ?, ?, ?)",
+                (document_key, chunk_key, (api_name or '').lower(), context, time.time())
+            )
+            conn.commit()
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"LLM Cache: Error storing chunk context checkpoint: {e}")
+        return False
+
+
+def clear_chunk_context_checkpoints(document_key: str) -> int:
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.execute("DELETE FROM chunk_context_checkpoints WHERE document_key = ?", (document_key,))
+            conn.commit()
+            return cursor.rowcount
+    except sqlite3.Error as e:
+        logger.error(f"LLM Cache: Error clearing chunk context checkpoints: {e}")
+        return 0
+
+#
+# End of Contextual chunk checkpoints
+############################################################
+
+
+############################################################
+#
+# Dispatch wrapper
+
+def _lookup(api_name: str, model: Optional[str], input_data: Any, prompt: Optional[str], temp: Optional[float],
+            system_message: Optional[str], force_cache: bool, settings: Dict[str, Any]):
+    """Returns (cache_key, cached_response); cache_key is None when the cache is bypassed."""
+    labels = {"api_name": (api_name or '').lower()}
+    if not should_use_cache(temp, force_cache, settings):
+        if settings['enabled']:
+            with _stats_lock:
+                _session_stats['bypassed'] += 1
+            log_counter("llm_cache_bypass", labels=labels)
+        return None, None
+
+    cache_key = make_cache_key(api_name, model, system_message, prompt, input_data, temp)
+    start_time = time.time()
+    cached = get_cached_response(cache_key, settings['ttl_seconds'])
+    if cached is not None:
+        tokens_saved = estimate_tokens(system_message, prompt, input_data, cached)
+        with _stats_lock:
+            _session_stats['hits'] += 1
+            _session_stats['tokens_saved'] += tokens_saved
+        log_counter("llm_cache_hit", labels=labels)
+        log_counter("llm_cache_tokens_saved", labels=labels, value=tokens_saved)
+        log_histogram("llm_cache_lookup_duration", time.time() - start_time, labels=labels)
+        logger.debug(f"LLM Cache: Hit for {api_name} (key {cache_key[:12]}...)")
+        return cache_key, cached
+
+    with _stats_lock:
+        _session_stats['misses'] += 1
+    log_counter("llm_cache_miss", labels=labels)
+    return cache_key, None
+
+
+def _store(cache_key: str, api_name: str, model: Optional[str], input_data: Any, prompt: Optional[str],
+           system_message: Optional[str], response: Any, settings: Dict[str, Any]) -> None:
+    if is_cacheable_response(response):
+        token_estimate = estimate_tokens(system_message, prompt, input_data, response)
+        if store_cached_response(cache_key, api_name, model, response, token_estimate):
+            evict_cache_entries(settings['ttl_seconds'], settings['max_entries'], settings['max_size_mb'])
+
+
+def cached_llm_call(api_name: str, model: Optional[str], input_data: Any, prompt: Optional[str],
+                    temp: Optional[float], system_message: Optional[str], call_fn: Callable[[], Any],
+                    force_cache: bool = False) -> Any:
+    """
+    Return a cached response for this request if one exists, otherwise run `call_fn` and cache its result.
+
+    `call_fn` is a zero-argument callable that performs the actual provider request. Non-string or
+    error-looking responses are returned to the caller but never stored.
+    """
+    settings = get_cache_settings()
+    cache_key, cached = _lookup(api_name, model, input_data, prompt, temp, system_message, force_cache, settings)
+    if cached is not None:
+        return cached
+    response = call_fn()
+    if cache_key is not None:
+        _store(cache_key, api_name, model, input_data, prompt, system_message, response, settings)
+    return response
+
+
+async def acached_llm_call(api_name: str, model: Optional[str], input_data: Any, prompt: Optional[str],
+                           temp: Optional[float], system_message: Optional[str],
+                           acall_fn: Callable[[], Awaitable[Any]], force_cache: bool = False) -> Any:
+    """Async variant of `cached_llm_call`; SQLite access runs in a worker thread to keep the event loop free."""
+    settings = get_cache_settings()
+    if not settings['enabled']:
+        return await acall_fn()
+    cache_key, cached = await asyncio.to_thread(
+        _lookup, api_name, model, input_data, prompt, temp, system_message, force_cache, settings)
+    if cached is not None:
+        return cached
+    response = await acall_fn()
+    if cache_key is not None:
+        await asyncio.to_thread(_store, cache_key, api_name, model, input_data, prompt, system_message, response,
+                                settings)
+    return response
+
+#
+# End of Dispatch wrapper
+############################################################
@@ -0,0 +1,219 @@
+# Pagination.py
+# Description: Keyset ("seek") pagination with remembered page boundaries and cached totals, for the browse views.
+#
+# The browse views ask for page numbers. `LIMIT ? OFFSET ?` reads and discards every earlier row, so deep pages get
+# slower and slower, and each page turn also re-counted the whole result. Instead, the sort key of each page's last
+# row is remembered and the next page seeks past it through the index. A jump to an arbitrary page walks forward
+# from the nearest remembered page reading sort keys only, so paging forwards or backwards costs the same at any depth. Totals are counted
+# once per write generation (a counter bumped by triggers on the tables involved), which also drops stale boundaries.
+#
+# Imports
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+#
+#######################################################################################################################
+#
+# Functions:
+
+
+@dataclass(frozen=True)
+class PageQuery:
+    """
+    A paginated SELECT, split into parts so seek conditions can be added.
+
+    `source` is the FROM/JOIN clause without the FROM keyword. `order_by` is a sequence of (expression, 'ASC' or
+    'DESC'); its last expression must be unique within the result (usually the primary key) so pages never overlap.
+    """
+    select: str
+    source: str
+    order_by: Tuple[Tuple[str, str], ...]
+    where: str = ''
+    params: Tuple = ()
+    group_by: str = ''
+    distinct: bool = False
+
+    def cache_key(self) -> Hashable:
+        return self.select, self.source, self.order_by, self.where, self.params, self.group_by, self.distinct
+
+
+def _seek_condition(order_by: Sequence[Tuple[str, str]], cursor: Sequence[Any]) -> Tuple[str, List[Any]]:
+    """SQL condition matching rows strictly after `cursor` in `order_by` order (SQLite sorts NULLs first)."""
+    condition, params = '', []
+    for (expression, direction), value in reversed(list(zip(order_by, cursor))):
+        descending = direction.upper() == 'DESC'
+        if value is None:
+            after, after_params = ('0' if descending else f'{expression} IS NOT NULL'), []
+            equal, equal_params = f'{expression} IS NULL', []
+        else:
+            after = f'({expression} < ? OR {expression} IS NULL)' if descending else f'{expression} > ?'
+            after_params = [value]
+            equal, equal_params = f'{expression} = ?', [value]
+        if condition:
+            condition = f'({after} OR ({equal} AND {condition}))'
+            params = after_params + equal_params + params
+        else:
+            condition, params = after, after_params
+    return condition, params
+
+
+def _seek_phases(order_by: Sequence[Tuple[str, str]], cursor: Sequence[Any]) -> List[Tuple[str, List[Any]]]:
+    """
+    Conditions selecting, in order, the rows after `cursor`. Each one bounds the first sort key so SQLite can seek
+    its index instead of scanning it; NULLs (first in ascending order, last in descending) get their own phase.
+    """
+    expression, direction = order_by[0]
+    value = cursor[0]
+    if len(order_by) > 1:
+        tie, tie_params = _seek_condition(order_by[1:], cursor[1:])
+    else:
+        tie, tie_params = '0', []
+    if value is None:
+        phases = [(f'{expression} IS NULL AND {tie}', tie_params)]
+        if direction.upper() != 'DESC':
+            phases.append((f'{expression} IS NOT NULL', []))
+        return phases
+    after, after_params = _seek_condition(order_by, cursor)
+    if direction.upper() == 'DESC':
+        return [(f'{expression} <= ? AND {after}', [value] + after_params), (f'{expression} IS NULL', [])]
+    return [(f'{expression} >= ? AND {after}', [value] + after_params)]
+
+
+def _rows_after(conn, query: PageQuery, cursor: Optional[Sequence[Any]], limit: int, keys_only: bool) -> List[tuple]:
+    """Up to `limit` rows following `cursor` (from the start if None): the selected columns then the sort keys."""
+    key_columns = ', '.join(expression for expression, _ in query.order_by)
+    columns = key_columns if keys_only else f'{query.select}, {key_columns}'
+    order = ', '.join(f'{expression} {direction}' for expression, direction in query.order_by)
+    phases = _seek_phases(query.order_by, cursor) if cursor is not None else [('', [])]
+    rows: List[tuple] = []
+    for condition, condition_params in phases:
+        conditions = ([f'({query.where})'] if query.where else []) + ([condition] if condition else [])
+        sql = (f"SELECT {'DISTINCT ' if query.distinct else ''}{columns} FROM {query.source}"
+               f"{' WHERE ' + ' AND '.join(conditions) if conditions else ''}"
+               f"{' GROUP BY ' + query.group_by if query.group_by else ''}"
+               f" ORDER BY {order} LIMIT ?")
+        rows.extend(conn.execute(sql, list(query.params) + condition_params + [limit - len(rows)]).fetchall())
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+class Paginator:
+    """
+    Remembers page boundaries and totals per query. `generation` is any value that changes whenever the rows a
+    query can return change; cached state from another generation is discarded, and nothing is cached without one.
+    """
+
+    def __init__(self, max_queries: int = 256):
+        self.max_queries = max_queries
+        self._boundaries: "OrderedDict[Hashable, Tuple[Any, Dict[int, tuple]]]" = OrderedDict()
+        self._counts: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, store: OrderedDict, key: Hashable, value) -> None:
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_queries:
+            store.popitem(last=False)
+
+    def _page_boundaries(self, key: Hashable, generation) -> Dict[int, tuple]:
+        if generation is None:
+            # Nothing tells us when the rows change, so nothing can be reused
+            return {}
+        with self._lock:
+            entry = self._boundaries.get(key)
+            if entry is None or entry[0] != generation:
+                entry = (generation, {})
+            self._remember(self._boundaries, key, entry)
+            return entry[1]
+
+    def fetch_page(self, conn, query: PageQuery, page: int, page_size: int, generation=None,
+                   namespace: Hashable = '') -> List[tuple]:
+        if page < 1:
+            raise ValueError("Page number must be 1 or greater.")
+        boundaries = self._page_boundaries((namespace, query.cache_key(), page_size), generation)
+        start_page = max((known for known in boundaries if known < page), default=0)
+        cursor = boundaries[start_page] if start_page else None
+        key_count = len(query.order_by)
+
+        # Walk from the nearest remembered page, reading only the sort keys of the pages in between
+        for skipped_page in range(start_page + 1, page):
+            keys = _rows_after(conn, query, cursor, page_size, keys_only=True)
+            if len(keys) < page_size:
+                return []
+            cursor = tuple(keys[-1])
+            with self._lock:
+                boundaries[skipped_page] = cursor
+
+        rows = _rows_after(conn, query, cursor, page_size, keys_only=False)
+        if len(rows) == page_size:
+            with self._lock:
+                boundaries[page] = tuple(rows[-1][-key_count:])
+        return [tuple(row[:-key_count]) for row in rows]
+
+    def count(self, conn, query: PageQuery, generation=None, namespace: Hashable = '') -> int:
+        key = (namespace, query.cache_key())
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is not None and generation is not None and cached[0] == generation:
+                self._counts.move_to_end(key)
+                return cached[1]
+        where = f' WHERE {query.where}' if query.where else ''
+        if query.group_by:
+            sql = f"SELECT COUNT(*) FROM (SELECT 1 FROM {query.source}{where} GROUP BY {query.group_by})"
+        elif query.distinct:
+            sql = f"SELECT COUNT(*) FROM (SELECT DISTINCT {query.select} FROM {query.source}{where})"
+        else:
+            sql = f"SELECT COUNT(*) FROM {query.source}{where}"
+        total = conn.execute(sql, query.params).fetchone()[0]
+        if generation is not None:
+            with self._lock:
+                self._remember(self._counts, key, (generation, total))
+        return total
+
+    def fetch(self, conn, query: PageQuery, page: int, page_size: int, generation=None,
+              namespace: Hashable = '') -> Tuple[List[tuple], int, int]:
+        """Return (rows, total_pages, total_count) for `page`."""
+        total = self.count(conn, query, generation, namespace)
+        rows = self.fetch_page(conn, query, page, page_size, generation, namespace)
+        return rows, total_pages(total, page_size), total
+
+    def clear(self) -> None:
+        with self._lock:
+            self._boundaries.clear()
+            self._counts.clear()
+
+
+def total_pages(total_count: int, page_size: int) -> int:
+    return (total_count + page_size - 1) // page_size
+
+
+def generation_schema_sql(table_events: Iterable[Tuple[str, Iterable[str]]]) -> List[str]:
+    """
+    Statements creating an IndexGeneration counter and triggers that bump it on the given (table, events), e.g.
+    ('Prompts', ('INSERT', 'UPDATE', 'DELETE')). Same layout as IndexGeneration in the media database.
+    """
+    statements = [
+        'CREATE TABLE IF NOT EXISTS IndexGeneration (id INTEGER PRIMARY KEY CHECK (id = 1), generation INTEGER NOT NULL)',
+        'INSERT OR IGNORE INTO IndexGeneration (id, generation) VALUES (1, 0)',
+    ]
+    for table, events in table_events:
+        for event in events:
+            statements.append(f'''
+                CREATE TRIGGER IF NOT EXISTS bump_index_generation_{table.lower()}_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE IndexGeneration SET generation = generation + 1 WHERE id = 1;
+                END
+            ''')
+    return statements
+
+
+def read_generation(conn) -> int:
+    row = conn.execute('SELECT generation FROM IndexGeneration WHERE id = 1').fetchone()
+    return row[0] if row else 0
+
+#
+# End of Pagination.py
+#######################################################################################################################
@@ -0,0 +1,357 @@
+# Query_Plan_Audit.py
+# Description: Schema/index review for the media database.
+#
+# Builds a synthetic media database (1M items by default) with the real schema from SQLite_DB.create_tables, calls
+# the public functions of SQLite_DB against it while tracing every statement they run, and explains each statement
+# with EXPLAIN QUERY PLAN. Statements that scan a whole table or index, or sort in a temporary B-tree, are flagged
+# unless the function is known to need a full scan (substring LIKE searches, whole-library exports).
+# Tests/SQLite_DB/test_query_plans.py keeps a snapshot of the plans so an index regression fails the test suite.
+#
+# Usage:
+#   python -m App_Function_Libraries.DB.Query_Plan_Audit --rows 1000000
+#
+# Imports
+import argparse
+import inspect
+import logging
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+#
+# Local Imports
+from App_Function_Libraries.DB.Schema_Migrations import current_version
+#
+#######################################################################################################################
+#
+# Functions:
+
+# Stands in for the fixture Database instance in call arguments (e.g. get_unprocessed_media(db))
+FIXTURE_DATABASE = object()
+
+# (label, function name, arguments). Ids refer to rows that build_media_fixture always creates.
+DEFAULT_CALLS: Tuple[Tuple[str, str, tuple], ...] = (
+    ('check_media_exists', 'check_media_exists', ('Title 42', 'https://example.com/42')),
+    ('check_media_and_whisper_model', 'check_media_and_whisper_model',
+     ('Title 42', 'https://example.com/42', 'medium.en')),
+    ('fetch_all_keywords', 'fetch_all_keywords', ()),
+    ('fetch_keywords_for_media', 'fetch_keywords_for_media', (42,)),
+    ('get_keyword_media_index', 'get_keyword_media_index', ()),
+    ('get_media_index_generation', 'get_media_index_generation', ()),
+    ('browse_items:Title', 'browse_items', ('Title 4', 'Title')),
+    ('browse_items:Keyword', 'browse_items', ('keyword 4', 'Keyword')),
+    ('fetch_item_details', 'fetch_item_details', (42,)),
+    ('fetch_item_details_single', 'fetch_item_details_single', (42,)),
+    ('fetch_items_by_content', 'fetch_items_by_content', ('item 4',)),
+    ('sqlite_search_db', 'sqlite_search_db', ('Title 4', ['title'], '', 3)),
+    ('sqlite_search_db:keywords', 'sqlite_search_db', ('', ['title'], 'keyword 4', 1)),
+    ('search_media_database', 'search_media_database', ('Title 4',)),
+    ('load_media_content', 'load_media_content', (42,)),
+    ('fetch_paginated_data', 'fetch_paginated_data', (3, 20)),
+    ('search_and_display_items', 'search_and_display_items', ('Title 4', 'Title', 2, 10, 100)),
+    ('get_paginated_files', 'get_paginated_files', (5, 50)),
+    ('get_chat_messages', 'get_chat_messages', (7,)),
+    ('search_chat_conversations', 'search_chat_conversations', ('Chat 4',)),
+    ('get_transcripts', 'get_transcripts', (42,)),
+    ('get_latest_transcription', 'get_latest_transcription', (42,)),
+    ('get_media_transcripts', 'get_media_transcripts', (42,)),
+    ('get_specific_transcript', 'get_specific_transcript', (42,)),
+    ('get_media_summaries', 'get_media_summaries', (42,)),
+    ('get_media_prompts', 'get_media_prompts', (42,)),
+    ('get_specific_summary', 'get_specific_summary', (42,)),
+    ('get_specific_prompt', 'get_specific_prompt', (42,)),
+    ('get_media_content', 'get_media_content', (42,)),
+    ('get_full_document', 'get_full_document', (42,)),
+    ('get_media_title', 'get_media_title', (42,)),
+    ('get_trashed_items', 'get_trashed_items', ()),
+    ('empty_trash', 'empty_trash', (365000,)),
+    ('mark_as_trash', 'mark_as_trash', (43,)),
+    ('restore_from_trash', 'restore_from_trash', (43,)),
+    ('get_all_content_from_database', 'get_all_content_from_database', ()),
+    ('get_unprocessed_media', 'get_unprocessed_media', (FIXTURE_DATABASE,)),
+    ('iter_media_by_keyword', 'iter_media_by_keyword', ('keyword 4',)),
+    ('get_document_version', 'get_document_version', (42,)),
+    ('get_document_version:number', 'get_document_version', (42, 2)),
+    ('get_all_document_versions', 'get_all_document_versions', (42,)),
+    ('purge_media', 'purge_media', ([44, 45], None, 'none', False)),
+)
+
+# Calls that have to read every row, and why. Any other full scan is reported as a problem.
+ALLOWED_FULL_SCANS: Dict[str, str] = {
+    'fetch_all_keywords': "returns every keyword",
+    'get_keyword_media_index': "loads every keyword assignment into memory",
+    'browse_items:Title': "substring LIKE '%...%' cannot use an index",
+    'browse_items:Keyword': "substring LIKE '%...%' cannot use an index",
+    'sqlite_search_db': "substring LIKE '%...%' cannot use an index",
+    'sqlite_search_db:keywords': "substring LIKE '%...%' cannot use an index",
+    'search_media_database': "substring LIKE '%...%' cannot use an index",
+    'fetch_items_by_content': "substring LIKE '%...%' cannot use an index",
+    'search_and_display_items': "substring LIKE '%...%' cannot use an index",
+    'search_chat_conversations': "substring LIKE '%...%' cannot use an index",
+    'get_all_content_from_database': "returns every item that is not in the trash",
+    'iter_media_by_keyword': "substring LIKE '%...%' cannot use an index",
+    'fetch_paginated_data': "counts the exact total, once per write generation",
+    'get_paginated_files': "counts the exact total, once per write generation",
+}
+
+_QUERY_KEYWORDS = ('SELECT', 'WITH', 'INSERT', 'REPLACE', 'UPDATE', 'DELETE')
+_FULL_SCAN = re.compile(r'^SCAN (\w+)(.*)$')
+
+
+def _media_module():
+    # Imported here so the tool can be imported without opening the configured database
+    from App_Function_Libraries.DB import SQLite_DB
+    return SQLite_DB
+
+
+def _batches(rows: Iterable[tuple], batch_size: int = 10000) -> Iterator[List[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def build_media_fixture(database, media_rows: int = 1_000_000, module=None) -> None:
+    """
+    Create the media schema in `database` (a SQLite_DB.Database) and fill it with `media_rows` items, each with
+    keywords, a summary, a transcript, prompt/summary versions and document versions, plus one chat per ten items.
+    """
+    module = module or _media_module()
+    media_rows = max(media_rows, 100)
+    module.create_tables(database)
+    keyword_count = max(media_rows // 200, 10)
+    conversation_count = max(media_rows // 10, 10)
+    start = datetime(2024, 1, 1)
+
+    def when(minutes: int) -> str:
+        return (start + timedelta(minutes=minutes)).strftime('%Y-%m-%d %H:%M:%S')
+
+    tables = [
+        ('INSERT INTO Media (url, title, type, content, author, ingestion_date, prompt, summary, transcription_model, '
+         'is_trash, trash_date, vector_processing) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+         ((f'https://example.com/{i}', f'Title {i}', 'video', f'Transcript of item {i}. ' * 4, f'Author {i % 500}',
+           when(i), 'Summarize', f'Summary of item {i}', 'medium.en', int(i % 50 == 0),
+           when(i + 60) if i % 50 == 0 else None, int(i % 10 != 0)) for i in range(1, media_rows + 1))),
+        ('INSERT INTO Keywords (keyword) VALUES (?)', ((f'keyword {k}',) for k in range(1, keyword_count + 1))),
+        ('INSERT OR IGNORE INTO MediaKeywords (media_id, keyword_id) VALUES (?, ?)',
+         ((i, (i * step + offset) % keyword_count + 1) for i in range(1, media_rows + 1)
+          for step, offset in ((7, 0), (13, 1)))),
+        ('INSERT INTO MediaModifications (media_id, prompt, summary, modification_date) VALUES (?, ?, ?, ?)',
+         ((i, 'Summarize', f'Summary of item {i}', when(i + 1)) for i in range(1, media_rows + 1))),
+        ('INSERT INTO MediaVersion (media_id, version, prompt, summary, created_at) VALUES (?, 1, ?, ?, ?)',
+         ((i, 'Summarize', f'Summary of item {i}', when(i + 1)) for i in range(1, media_rows + 1))),
+        ('INSERT INTO Transcripts (media_id, whisper_model, transcription, created_at) VALUES (?, ?, ?, ?)',
+         ((i, 'medium.en', f'Transcript of item {i}.\nThis text was transcribed using whisper model: medium.en',
+           when(i)) for i in range(1, media_rows + 1))),
+        ('INSERT INTO DocumentVersions (media_id, version_number, content, storage, created_at) '
+         "VALUES (?, ?, ?, 'full', ?)",
+         ((i, version, f'Version {version} of item {i}', when(i + version)) for i in range(1, media_rows + 1)
+          for version in range(1, 2 + i % 3))),
+        ('INSERT INTO ChatConversations (media_id, conversation_name, created_at, updated_at) VALUES (?, ?, ?, ?)',
+         ((c * 10, f'Chat {c}', when(c * 10), when(c * 10 + 5)) for c in range(1, conversation_count + 1))),
+        ('INSERT INTO ChatMessages (conversation_id, sender, message, timestamp) VALUES (?, ?, ?, ?)',
+         ((c, 'user' if n % 2 == 0 else 'ai', f'Message {n} of chat {c}', when(c * 10 + n))
+          for c in range(1, conversation_count + 1) for n in range(10))),
+    ]
+    with database.get_connection() as conn:
+        for statement, rows in tables:
+            conn.execute('BEGIN')
+            for batch in _batches(rows):
+                conn.executemany(statement, batch)
+            conn.execute('COMMIT')
+    logging.info(f"Built query plan fixture with {media_rows} media items at {database.db_path}")
+
+
+def _reset_caches(module) -> None:
+    # Cached results would hide the statements a cold call runs
+    module.paginator.clear()
+    module.invalidate_keyword_media_index()
+    module.document_version_cache.invalidate()
+
+
+def _query_statements(traced: Sequence[str]) -> List[str]:
+    statements = []
+    for statement in traced:
+        statement = statement.strip()
+        # Statements run by triggers are reported again under the statement that fired them
+        if statement.split(None, 1)[0].upper() not in _QUERY_KEYWORDS:
+            continue
+        if statements and statements[-1] == statement:
+            continue
+        statements.append(statement)
+    return statements
+
+
+def capture_queries(database, calls: Sequence[Tuple[str, str, tuple]] = DEFAULT_CALLS,
+                    module=None) -> List[Dict[str, Any]]:
+    """
+    Call each function with the module's `db` pointed at `database`, recording the SQL it executes (with parameters
+    inlined, as traced by SQLite). Returns one dict per call: label, function, statements and error (or None).
+    """
+    module = module or _media_module()
+    original_db = module.db
+    module.db = database
+    captured = []
+    try:
+        for label, function_name, args in calls:
+            _reset_caches(module)
+            traced: List[str] = []
+            error = None
+            with database.get_connection() as conn:
+                conn.set_trace_callback(traced.append)
+                try:
+                    result = getattr(module, function_name)(*[database if arg is FIXTURE_DATABASE else arg for arg in args])
+                    if inspect.isgenerator(result):
+                        # Streaming readers only run their queries as they are consumed
+                        for _ in result:
+                            pass
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                finally:
+                    conn.set_trace_callback(None)
+            captured.append({'label': label, 'function': function_name, 'statements': _query_statements(traced),
+                             'error': error})
+    finally:
+        module.db = original_db
+        _reset_caches(module)
+    return captured
+
+
+def explain_query_plan(conn, sql: str) -> List[str]:
+    """EXPLAIN QUERY PLAN output as indented lines, like the sqlite3 shell's .eqp."""
+    depths = {0: -1}
+    lines = []
+    for node_id, parent_id, _, detail in conn.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall():
+        depths[node_id] = depths.get(parent_id, -1) + 1
+        lines.append('  ' * depths[node_id] + detail)
+    return lines
+
+
+def full_scans(plan: Sequence[str]) -> List[str]:
+    """Tables or aliases the plan reads in full (including full scans of an index)."""
+    scanned = []
+    for line in plan:
+        match = _FULL_SCAN.match(line.strip())
+        # Virtual tables (FTS) do their own lookups; CONSTANT ROW is a SELECT without a FROM
+        if match and match.group(1) != 'CONSTANT' and not match.group(2).startswith(' VIRTUAL TABLE'):
+            scanned.append(match.group(1))
+    return scanned
+
+
+def audit(database, calls: Sequence[Tuple[str, str, tuple]] = DEFAULT_CALLS, module=None) -> List[Dict[str, Any]]:
+    """
+    Capture and explain the statements of each call. Each result has label, function, error, a list of statements
+    (sql, plan, full_scans, temp_sorts) and `problems`: the full scans and temporary sort trees of calls that are not
+    in ALLOWED_FULL_SCANS.
+    """
+    results = []
+    with database.get_connection() as conn:
+        for record in capture_queries(database, calls, module):
+            statements, problems = [], []
+            for sql in record['statements']:
+                plan = explain_query_plan(conn, sql)
+                temp_sorts = [line.strip() for line in plan if 'TEMP B-TREE' in line]
+                statements.append({'sql': sql, 'plan': plan, 'full_scans': full_scans(plan), 'temp_sorts': temp_sorts})
+                problems.extend(f"full scan of {table}" for table in full_scans(plan))
+                problems.extend(temp_sorts)
+            results.append({
+                **record,
+                'statements': statements,
+                'problems': [] if record['label'] in ALLOWED_FULL_SCANS else list(dict.fromkeys(problems)),
+            })
+    return results
+
+
+def plan_snapshot(results: Sequence[Dict[str, Any]]) -> Dict[str, List[List[str]]]:
+    """{label: [plan lines of each statement]} - the form stored by the query plan tests."""
+    return {result['label']: [statement['plan'] for statement in result['statements']] for result in results}
+
+
+def uncovered_functions(calls: Sequence[Tuple[str, str, tuple]] = DEFAULT_CALLS, module=None) -> List[str]:
+    """Public functions of SQLite_DB that run SQL but are not exercised by `calls`."""
+    module = module or _media_module()
+    called = {function_name for _, function_name, _ in calls}
+    uncovered = []
+    for name, function in inspect.getmembers(module, inspect.isfunction):
+        if name.startswith('_') or name in called or function.__module__ != module.__name__:
+            continue
+        if '.execute' in inspect.getsource(function):
+            uncovered.append(name)
+    return uncovered
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explain the queries of SQLite_DB against a synthetic media library")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Media items in the fixture")
+    parser.add_argument("--fixture", default=None, help="Reuse or keep the fixture database at this path")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the --fixture database even if it is current")
+    parser.add_argument("--analyze", action="store_true", help="Run ANALYZE on the fixture before explaining")
+    parser.add_argument("--verbose", action="store_true", help="Print the SQL and plan of every statement")
+    args = parser.parse_args()
+
+    module = _media_module()
+    workdir = None
+    fixture_path = args.fixture
+    if fixture_path is None:
+        workdir = tempfile.mkdtemp(prefix="query_plan_audit_")
+        fixture_path = os.path.join(workdir, "media_fixture.db")
+    try:
+        database = module.Database(os.path.abspath(fixture_path))
+        with database.get_connection() as conn:
+            populated = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Media'").fetchone() is not None
+            # New indexes arrive as media migrations; edits to an applied migration need --rebuild
+            current = populated and not args.rebuild and \
+                current_version(conn) >= module.MEDIA_MIGRATIONS[-1].version
+        if populated and not current:
+            logging.info(f"Rebuilding the stale fixture {fixture_path}")
+            database.close_connection()
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(fixture_path + suffix):
+                    os.remove(fixture_path + suffix)
+        if not current:
+            build_media_fixture(database, args.rows, module)
+        if args.analyze:
+            database.execute_query('ANALYZE')
+
+        results = audit(database, DEFAULT_CALLS, module)
+        problems = 0
+        for result in results:
+            status = 'ok'
+            if result['error']:
+                status = f"ERROR {result['error']}"
+            elif result['problems']:
+                status = f"NEEDS INDEX: {'; '.join(result['problems'])}"
+            elif result['label'] in ALLOWED_FULL_SCANS and any(s['full_scans'] for s in result['statements']):
+                status = f"full scan expected: {ALLOWED_FULL_SCANS[result['label']]}"
+            flagged = bool(result['error'] or result['problems'])
+            problems += flagged
+            print(f"{result['label']:<36}{status}")
+            if args.verbose or flagged:
+                for statement in result['statements']:
+                    print(f"    {' '.join(statement['sql'].split())[:200]}")
+                    for line in statement['plan']:
+                        print(f"        {line}")
+        print(f"\n{problems} of {len(results)} calls need attention.")
+        uncovered = uncovered_functions(DEFAULT_CALLS, module)
+        if uncovered:
+            print(f"Not exercised: {', '.join(uncovered)}")
+        database.close_connection()
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
+
+#
+# End of Query_Plan_Audit.py
+#######################################################################################################################
@@ -17,7 +17,10 @@ from App_Function_Libraries.Utils.Utils import get_project_relative_path, get_da
 # (No external imports)
 #
 # Local Imports
-# (No additional local imports)
+from App_Function_Libraries.DB.Keyword_Store import KeywordStore, LinkTable
+from App_Function_Libraries.DB.Pagination import PageQuery, Paginator, generation_schema_sql, read_generation
+from App_Function_Libraries.DB.Schema_Migrations import Migration, migrate, split_sql_script
+from App_Function_Libraries.Utils.Lazy_Loading import run_once
 #
 ########################################################################################################################
 #
@@ -36,7 +39,7 @@ if config.has_section('Database') and config.has_option('Database', 'rag_qa_db_p
 else:
     rag_qa_db_path = get_database_path('RAG_QA_Chat.db')
 
-print(f"RAG QA Chat Database path: {rag_qa_db_path}")
+logging.debug(f"RAG QA Chat Database path: {rag_qa_db_path}")
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -134,6 +137,7 @@ END;
 # Database connection management
 @contextmanager
 def get_db_connection():
+    create_tables()
     conn = sqlite3.connect(rag_qa_db_path)
     try:
         yield conn
@@ -168,14 +172,37 @@ def execute_query(query, params=None, conn=None):
             conn.commit()
             return cursor.fetchall()
 
+# Writes that change what the paginated views list bump IndexGeneration (see Pagination.py)
+GENERATION_TABLE_EVENTS = (
+    ('rag_qa_chats', ('INSERT', 'UPDATE', 'DELETE')),
+    ('conversation_metadata', ('INSERT', 'UPDATE', 'DELETE')),
+    ('rag_qa_keywords', ('UPDATE', 'DELETE')),
+    ('rag_qa_conversation_keywords', ('INSERT', 'DELETE')),
+    ('rag_qa_keyword_collections', ('INSERT', 'UPDATE', 'DELETE')),
+    ('rag_qa_collection_keywords', ('INSERT', 'DELETE')),
+    ('rag_qa_notes', ('INSERT', 'UPDATE', 'DELETE')),
+    ('rag_qa_note_keywords', ('INSERT', 'DELETE')),
+)
+
+paginator = Paginator()
+
+def _create_rag_qa_schema(conn):
+    for statement in split_sql_script(SCHEMA_SQL) + generation_schema_sql(GENERATION_TABLE_EVENTS):
+        conn.execute(statement)
+
+
+# Ordered schema changes of the RAG QA database (see Schema_Migrations.py)
+RAG_QA_MIGRATIONS = (
+    Migration(1, "Base RAG QA schema", _create_rag_qa_schema),
+)
+
+# Runs before the first connection rather than on import; retried if it fails
+@run_once
 def create_tables():
     with get_db_connection() as conn:
-        conn.executescript(SCHEMA_SQL)
+        migrate(conn, RAG_QA_MIGRATIONS, 'RAG QA database')
     logger.info("All RAG QA Chat tables created successfully")
 
-# Initialize the database
-create_tables()
-
 #
 # End of Setup
 ############################################################
@@ -208,12 +235,20 @@ def validate_collection_name(name):
         raise ValueError("Collection name contains invalid characters")
     return name.strip()
 
+# Keyword ids are upserted in batches and cached in memory, and links are added by difference (see Keyword_Store.py)
+rag_keywords = KeywordStore('rag_qa_keywords')
+CONVERSATION_KEYWORD_LINKS = LinkTable('rag_qa_conversation_keywords', 'conversation_id')
+NOTE_KEYWORD_LINKS = LinkTable('rag_qa_note_keywords', 'note_id')
+
 # Core functions
 def add_keyword(keyword, conn=None):
     try:
         validated_keyword = validate_keyword(keyword)
-        query = "INSERT OR IGNORE INTO rag_qa_keywords (keyword) VALUES (?)"
-        execute_query(query, (validated_keyword,), conn)
+        if conn:
+            rag_keywords.keyword_ids(conn, [validated_keyword])
+        else:
+            with transaction() as conn:
+                rag_keywords.keyword_ids(conn, [validated_keyword])
         logger.info(f"Keyword '{validated_keyword}' added successfully")
     except ValueError as e:
         logger.error(f"Invalid keyword: {e}")
@@ -263,16 +298,10 @@ def add_keywords_to_conversation(conversation_id, keywords):
     if not isinstance(keywords, (list, tuple)):
         raise ValueError("Keywords must be a list or tuple")
     try:
+        validated_keywords = [validate_keyword(keyword) for keyword in keywords]
         with transaction() as conn:
-            for keyword in keywords:
-                validated_keyword = validate_keyword(keyword)
-                add_keyword(validated_keyword, conn)
-
-                query = '''
-                INSERT INTO rag_qa_conversation_keywords (conversation_id, keyword_id)
-                SELECT ?, id FROM rag_qa_keywords WHERE keyword = ?
-                '''
-                execute_query(query, (conversation_id, validated_keyword), conn)
+            rag_keywords.link_keywords(conn, CONVERSATION_KEYWORD_LINKS, {conversation_id: validated_keywords},
+                                       replace=False)
 
         logger.info(f"Keywords added to conversation '{conversation_id}' successfully")
     except ValueError as e:
@@ -373,15 +402,13 @@ def get_note_by_id(note_id):
 def get_notes_by_keywords(keywords, page=1, page_size=20):
     try:
         placeholders = ','.join(['?'] * len(keywords))
-        query = f'''
-        SELECT n.id, n.title, n.content, n.timestamp
-        FROM rag_qa_notes n
-        JOIN rag_qa_note_keywords nk ON n.id = nk.note_id
-        JOIN rag_qa_keywords k ON nk.keyword_id = k.id
-        WHERE k.keyword IN ({placeholders})
-        ORDER BY n.timestamp DESC
-        '''
-        results, total_pages, total_count = get_paginated_results(query, tuple(keywords), page, page_size)
+        query = PageQuery(
+            'n.id, n.title, n.content, n.timestamp',
+            'rag_qa_notes n JOIN rag_qa_note_keywords nk ON n.id = nk.note_id '
+            'JOIN rag_qa_keywords k ON nk.keyword_id = k.id',
+            (('n.timestamp', 'DESC'), ('n.id', 'DESC')),
+            where=f'k.keyword IN ({placeholders})', params=tuple(keywords), group_by='n.id')
+        results, total_pages, total_count = get_paginated_results(query, page, page_size)
         logger.info(f"Retrieved {len(results)} notes matching keywords: {', '.join(keywords)} (page {page} of {total_pages})")
         notes = [(row[0], row[1], row[2], row[3]) for row in results]
         return notes, total_pages, total_count
@@ -391,17 +418,15 @@ def get_notes_by_keywords(keywords, page=1, page_size=20):
 
 def get_notes_by_keyword_collection(collection_name, page=1, page_size=20):
     try:
-        query = '''
-        SELECT n.id, n.title, n.content, n.timestamp
-        FROM rag_qa_notes n
-        JOIN rag_qa_note_keywords nk ON n.id = nk.note_id
-        JOIN rag_qa_keywords k ON nk.keyword_id = k.id
-        JOIN rag_qa_collection_keywords ck ON k.id = ck.keyword_id
-        JOIN rag_qa_keyword_collections c ON ck.collection_id = c.id
-        WHERE c.name = ?
-        ORDER BY n.timestamp DESC
-        '''
-        results, total_pages, total_count = get_paginated_results(query, (collection_name,), page, page_size)
+        query = PageQuery(
+            'n.id, n.title, n.content, n.timestamp',
+            'rag_qa_notes n JOIN rag_qa_note_keywords nk ON n.id = nk.note_id '
+            'JOIN rag_qa_keywords k ON nk.keyword_id = k.id '
+            'JOIN rag_qa_collection_keywords ck ON k.id = ck.keyword_id '
+            'JOIN rag_qa_keyword_collections c ON ck.collection_id = c.id',
+            (('n.timestamp', 'DESC'), ('n.id', 'DESC')),
+            where='c.name = ?', params=(collection_name,), group_by='n.id')
+        results, total_pages, total_count = get_paginated_results(query, page, page_size)
         logger.info(f"Retrieved {len(results)} notes for collection '{collection_name}' (page {page} of {total_pages})")
         notes = [(row[0], row[1], row[2], row[3]) for row in results]
         return notes, total_pages, total_count
@@ -422,28 +447,26 @@ def clear_notes(conversation_id):
 def add_keywords_to_note(note_id, keywords):
     """Associate keywords with a note."""
     try:
+        validated_keywords = [validate_keyword(keyword) for keyword in keywords]
         with transaction() as conn:
-            for keyword in keywords:
-                validated_keyword = validate_keyword(keyword)
-                add_keyword(validated_keyword, conn)
-
-                # Retrieve the keyword ID
-                query = "SELECT id FROM rag_qa_keywords WHERE keyword = ?"
-                result = execute_query(query, (validated_keyword,), conn)
-                if result:
-                    keyword_id = result[0][0]
-                else:
-                    raise Exception(f"Keyword '{validated_keyword}' not found after insertion")
-
-                # Link the note and keyword
-                query = "INSERT INTO rag_qa_note_keywords (note_id, keyword_id) VALUES (?, ?)"
-                execute_query(query, (note_id, keyword_id), conn)
+            rag_keywords.link_keywords(conn, NOTE_KEYWORD_LINKS, {note_id: validated_keywords}, replace=False)
 
         logger.info(f"Keywords added to note ID '{note_id}' successfully")
     except Exception as e:
         logger.error(f"Error adding keywords to note ID '{note_id}': {e}")
         raise
 
+def set_keywords_for_note(note_id, keywords):
+    """Replace the keywords of a note, in one transaction and writing only the links that change."""
+    try:
+        validated_keywords = [validate_keyword(keyword) for keyword in keywords]
+        with transaction() as conn:
+            rag_keywords.link_keywords(conn, NOTE_KEYWORD_LINKS, {note_id: validated_keywords})
+        logger.info(f"Keywords of note ID '{note_id}' updated successfully")
+    except Exception as e:
+        logger.error(f"Error setting keywords of note ID '{note_id}': {e}")
+        raise
+
 def get_keywords_for_note(note_id):
     """Retrieve keywords associated with a given note."""
     try:
@@ -530,7 +553,8 @@ def start_new_conversation(title="Untitled Conversation"):
 
 def get_all_conversations(page=1, page_size=20):
     try:
-        query = "SELECT conversation_id, title FROM conversation_metadata ORDER BY last_updated DESC"
+        query = PageQuery('conversation_id, title', 'conversation_metadata',
+                          (('last_updated', 'DESC'), ('conversation_id', 'DESC')))
         results, total_pages, total_count = get_paginated_results(query, page=page, page_size=page_size)
         conversations = [(row[0], row[1]) for row in results]
         logger.info(f"Retrieved {len(conversations)} conversations (page {page} of {total_pages})")
@@ -540,23 +564,11 @@ def get_all_conversations(page=1, page_size=20):
         raise
 
 # Pagination helper function
-def get_paginated_results(query, params=None, page=1, page_size=20):
+def get_paginated_results(query: PageQuery, page=1, page_size=20):
     try:
-        offset = (page - 1) * page_size
-        paginated_query = f"{query} LIMIT ? OFFSET ?"
-        if params:
-            paginated_params = params + (page_size, offset)
-        else:
-            paginated_params = (page_size, offset)
-
-        result = execute_query(paginated_query, paginated_params)
-
-        count_query = f"SELECT COUNT(*) FROM ({query}) AS total"
-        count_params = params if params else ()
-
-        total_count = execute_query(count_query, count_params)[0][0]
-
-        total_pages = (total_count + page_size - 1) // page_size
+        with get_db_connection() as conn:
+            result, total_pages, total_count = paginator.fetch(conn, query, page, page_size, read_generation(conn),
+                                                               rag_qa_db_path)
 
         logger.info(f"Retrieved page {page} of {total_pages} (total items: {total_count})")
         return result, total_pages, total_count
@@ -566,7 +578,7 @@ def get_paginated_results(query, params=None, page=1, page_size=20):
 
 def get_all_collections(page=1, page_size=20):
     try:
-        query = "SELECT name FROM rag_qa_keyword_collections"
+        query = PageQuery('name', 'rag_qa_keyword_collections', (('id', 'ASC'),))
         results, total_pages, total_count = get_paginated_results(query, page=page, page_size=page_size)
         collections = [row[0] for row in results]
         logger.info(f"Retrieved {len(collections)} keyword collections (page {page} of {total_pages})")
@@ -578,14 +590,13 @@ def get_all_collections(page=1, page_size=20):
 def search_conversations_by_keywords(keywords, page=1, page_size=20):
     try:
         placeholders = ','.join(['?' for _ in keywords])
-        query = f'''
-        SELECT DISTINCT cm.conversation_id, cm.title
-        FROM conversation_metadata cm
-        JOIN rag_qa_conversation_keywords ck ON cm.conversation_id = ck.conversation_id
-        JOIN rag_qa_keywords k ON ck.keyword_id = k.id
-        WHERE k.keyword IN ({placeholders})
-        '''
-        results, total_pages, total_count = get_paginated_results(query, tuple(keywords), page, page_size)
+        query = PageQuery(
+            'cm.conversation_id, cm.title',
+            'conversation_metadata cm JOIN rag_qa_conversation_keywords ck ON cm.conversation_id = ck.conversation_id '
+            'JOIN rag_qa_keywords k ON ck.keyword_id = k.id',
+            (('cm.conversation_id', 'ASC'),),
+            where=f'k.keyword IN ({placeholders})', params=tuple(keywords), group_by='cm.conversation_id')
+        results, total_pages, total_count = get_paginated_results(query, page, page_size)
         logger.info(
             f"Found {total_count} conversations matching keywords: {', '.join(keywords)} (page {page} of {total_pages})")
         return results, total_pages, total_count
@@ -595,8 +606,9 @@ def search_conversations_by_keywords(keywords, page=1, page_size=20):
 
 def load_chat_history(conversation_id, page=1, page_size=50):
     try:
-        query = "SELECT role, content FROM rag_qa_chats WHERE conversation_id = ? ORDER BY timestamp"
-        results, total_pages, total_count = get_paginated_results(query, (conversation_id,), page, page_size)
+        query = PageQuery('role, content', 'rag_qa_chats', (('timestamp', 'ASC'), ('id', 'ASC')),
+                          where='conversation_id = ?', params=(conversation_id,))
+        results, total_pages, total_count = get_paginated_results(query, page, page_size)
         logger.info(
             f"Loaded {len(results)} messages for conversation '{conversation_id}' (page {page} of {total_pages})")
         return results, total_pages, total_count
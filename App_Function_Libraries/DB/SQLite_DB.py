@@ -58,18 +58,34 @@ import threading
 import traceback
 from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Set, FrozenSet, Iterable, Iterator, Sequence
 from urllib.parse import quote
 
 # Local Libraries
 from App_Function_Libraries.Utils.Utils import get_project_relative_path, get_database_path, \
-    get_database_dir
+    get_database_dir, load_comprehensive_config
 from App_Function_Libraries.Chunk_Lib import chunk_options, chunk_text
+from App_Function_Libraries.DB.Version_Store import ReconstructionCache, STORAGE_DELTA, STORAGE_FULL, \
+    STORAGE_SNAPSHOT, apply_delta, decode_snapshot, encode_snapshot, make_delta
+from App_Function_Libraries.DB.Text_Compression import TextCompressor, train_dictionary
+from App_Function_Libraries.DB.Pagination import PageQuery, Paginator, generation_schema_sql, read_generation
+from App_Function_Libraries.DB.Keyword_Store import MAX_QUERY_PARAMETERS, KeywordStore, LinkTable
+from App_Function_Libraries.DB.Schema_Migrations import Backfill, Migration, add_column_if_missing, \
+    backfill_status, migrate, migrate_file, schedule_backfill, split_sql_script, start_backfill_worker
+from App_Function_Libraries.DB.Backup_Manager import TARGET_SQLITE, create_backup, get_backup_settings, online_copy
+from App_Function_Libraries.DB.Streaming_Export import safe_file_name, write_csv, write_jsonl, write_markdown_zip
+from App_Function_Libraries.Utils.Lazy_Loading import LazyModule, run_once
+from App_Function_Libraries.RAG.BM25_Index import get_bm25_index, get_bm25_settings
+from App_Function_Libraries.RAG.Dedup_Index import chunk_key, get_dedup_index
+from App_Function_Libraries.RAG.Vector_Store import get_vector_store
+# ChromaDB_Library imports this module; only purging media with duplicated chunks needs it
+chromadb_library = LazyModule('App_Function_Libraries.RAG.ChromaDB_Library')
 #
 # Third-Party Libraries
-import gradio as gr
-import pandas as pd
 import yaml
+# Only a few UI helpers below need these
+gr = LazyModule('gradio')
+pd = LazyModule('pandas')
 #
 #######################################################################################################################
 # Function Definitions
@@ -78,8 +94,6 @@ import yaml
 def ensure_database_directory():
     os.makedirs(get_database_dir(), exist_ok=True)
 
-ensure_database_directory()
-
 # Set up logging
 logger = logging.getLogger(__name__)
 
@@ -91,6 +105,15 @@ config_path = get_project_relative_path('Config_Files/config.txt')
 config = configparser.ConfigParser()
 config.read(config_path)
 
+
+def _read_config() -> configparser.ConfigParser:
+    # The shared parser, so settings saved from the Config tab apply without a restart
+    try:
+        return load_comprehensive_config()
+    except FileNotFoundError:
+        return configparser.ConfigParser()
+
+
 # Get the SQLite path from the config, or use the default if not specified
 sqlite_path = config.get('Database', 'sqlite_path', fallback=get_database_path('media_summary.db'))
 
@@ -102,8 +125,8 @@ backup_path = get_project_relative_path(backup_path)
 db_path = sqlite_path
 backup_dir = backup_path
 
-print(f"Media Database path: {db_path}")
-print(f"Media Backup directory: {backup_dir}")
+logger.debug(f"Media Database path: {db_path}")
+logger.debug(f"Media Backup directory: {backup_dir}")
 #create_automated_backup(db_path, backup_dir)
 
 # FIXME - Setup properly and test/add documentation for its existence...
@@ -126,23 +149,11 @@ print(f"Media Backup directory: {backup_dir}")
 # Backup-related functions
 
 def create_incremental_backup(db_path, backup_dir):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # Get the page count of the database
-    cursor.execute("PRAGMA page_count")
-    page_count = cursor.fetchone()[0]
-
-    # Create a new backup file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_file = os.path.join(backup_dir, f"incremental_backup_{timestamp}.sqlib")
-
-    # Perform the incremental backup
-    conn.execute(f"VACUUM INTO '{backup_file}'")
-
-    conn.close()
-    print(f"Incremental backup created: {backup_file}")
-    return backup_file
+    # Only the pages changed since the previous backup in backup_dir are written (see Backup_Manager.py)
+    manifest = create_backup(['media'], settings={**get_backup_settings(), 'backup_dir': backup_dir},
+                             targets={'media': {'kind': TARGET_SQLITE, 'path': db_path}})
+    logger.info(f"Incremental backup created: {manifest['id']} ({manifest['bytes_written']} bytes of new data)")
+    return manifest['id']
 
 
 def create_automated_backup(db_path, backup_dir):
@@ -153,8 +164,8 @@ def create_automated_backup(db_path, backup_dir):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     backup_file = os.path.join(backup_dir, f"media_db_backup_{timestamp}.db")
 
-    # Copy the database file
-    shutil.copy2(db_path, backup_file)
+    # Copy the live database through the backup API; a plain file copy can catch a write half-done
+    online_copy(db_path, backup_file, **{key: get_backup_settings()[key] for key in ('page_step', 'step_sleep')})
 
     print(f"Backup created: {backup_file}")
     return backup_file
@@ -214,6 +225,62 @@ def check_database_integrity(db_path):
 #######################################################################################################################
 
 
+#######################################################################################################################
+#
+# Compressed text columns
+#
+# Large Media.content and Transcripts.transcription values can be stored compressed (see Text_Compression.py).
+# Reads go through decompress_text(), which is also registered as an SQL function on every connection so that
+# LIKE searches and FTS rebuilds see the text. Plain and compressed rows can be mixed freely.
+
+COMPRESSED_TEXT_COLUMNS = (('Media', 'content'), ('Transcripts', 'transcription'))
+
+
+def get_text_compression_settings() -> Dict[str, Any]:
+    config = _read_config()
+    return {
+        'enabled': config.getboolean('Text-Compression', 'enabled', fallback=False),
+        'codec': config.get('Text-Compression', 'codec', fallback='zstd').strip().lower(),
+        'level': config.getint('Text-Compression', 'level', fallback=3),
+        'min_size': config.getint('Text-Compression', 'min_size', fallback=4096),
+        'dictionary_size': config.getint('Text-Compression', 'dictionary_size', fallback=112640),
+    }
+
+
+def _load_compression_dictionary(dictionary_id: int) -> Optional[bytes]:
+    # Called from inside SQL function calls, so it must not reuse the connection running the query
+    conn = sqlite3.connect(db.db_path, timeout=db.timeout)
+    try:
+        row = conn.execute('SELECT data FROM CompressionDictionaries WHERE id = ?', (dictionary_id,)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+text_compression_settings = get_text_compression_settings()
+text_compressor = TextCompressor(text_compression_settings['codec'], text_compression_settings['level'],
+                                 text_compression_settings['min_size'], _load_compression_dictionary)
+
+
+def compress_text(text: Optional[str]):
+    """Value to store for a compressible column: compressed when enabled and the text is large enough."""
+    if not text_compression_settings['enabled']:
+        return text
+    return text_compressor.compress(text)
+
+
+def decompress_text(value) -> Optional[str]:
+    return text_compressor.decompress(value)
+
+
+def register_text_functions(conn) -> None:
+    conn.create_function('decompress_text', 1, decompress_text, deterministic=True)
+
+#
+# End of Compressed text columns
+#######################################################################################################################
+
+
 #######################################################################################################################
 #
 # DB Setup Functions
@@ -230,12 +297,40 @@ class Database:
         self.db_path = get_database_path(db_name)
         self.timeout = 10.0
         self._local = threading.local()
+        self._setup_steps = []
+        self._setup_lock = threading.RLock()
+        self._setup_running = False
+
+    def on_first_use(self, step) -> None:
+        """
+        Run `step(database)` before the first connection is handed out, instead of when the module is imported.
+        Steps run in the order added; one that raises is retried on the next use.
+        """
+        with self._setup_lock:
+            self._setup_steps.append(step)
+
+    def _run_setup_steps(self) -> None:
+        if not self._setup_steps:
+            return
+        with self._setup_lock:
+            # The steps use the database themselves; let those nested calls through
+            if self._setup_running:
+                return
+            self._setup_running = True
+            try:
+                while self._setup_steps:
+                    self._setup_steps[0](self)
+                    self._setup_steps.pop(0)
+            finally:
+                self._setup_running = False
 
     @contextmanager
     def get_connection(self):
+        self._run_setup_steps()
         if not hasattr(self._local, 'connection') or self._local.connection is None:
             self._local.connection = sqlite3.connect(self.db_path, timeout=self.timeout)
             self._local.connection.isolation_level = None  # This enables autocommit mode
+            register_text_functions(self._local.connection)
         yield self._local.connection
 
     def close_connection(self):
@@ -273,17 +368,14 @@ class Database:
         result = self.execute_query(query, (table_name,))
         return bool(result)
 
+# The media database is set up (directory, migrations, ...) on first use rather than on import; see on_first_use
 db = Database()
-
-# Usage example:
-if db.table_exists('DocumentVersions'):
-    logging.debug("DocumentVersions table exists")
-else:
-    logging.debug("DocumentVersions table does not exist")
+db.on_first_use(lambda database: ensure_database_directory())
 
 
-# Function to create tables with the new media schema
-def create_tables(db) -> None:
+# Version 1 of the media schema: everything up to the migration framework. Later schema changes are new migrations
+# in MEDIA_MIGRATIONS rather than edits here, so databases that already have version 1 get them too.
+def _create_media_schema(conn) -> None:
     table_queries = [
         # CREATE TABLE statements
         '''
@@ -405,9 +497,27 @@ def create_tables(db) -> None:
             version_number INTEGER NOT NULL,
             content TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            storage TEXT NOT NULL DEFAULT 'full',
+            base_version INTEGER,
+            data BLOB,
             FOREIGN KEY (media_id) REFERENCES Media(id)
         )
         ''',
+        '''
+        CREATE TABLE IF NOT EXISTS CompressionDictionaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            codec TEXT NOT NULL,
+            data BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS IndexGeneration (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+        ''',
+        'INSERT OR IGNORE INTO IndexGeneration (id, generation) VALUES (1, 0)',
     ]
 
     index_queries = [
@@ -417,21 +527,30 @@ def create_tables(db) -> None:
         'CREATE INDEX IF NOT EXISTS idx_media_author ON Media(author)',
         'CREATE INDEX IF NOT EXISTS idx_media_ingestion_date ON Media(ingestion_date)',
         'CREATE INDEX IF NOT EXISTS idx_keywords_keyword ON Keywords(keyword)',
-        'CREATE INDEX IF NOT EXISTS idx_mediakeywords_media_id ON MediaKeywords(media_id)',
-        'CREATE INDEX IF NOT EXISTS idx_mediakeywords_keyword_id ON MediaKeywords(keyword_id)',
-        'CREATE INDEX IF NOT EXISTS idx_media_version_media_id ON MediaVersion(media_id)',
-        'CREATE INDEX IF NOT EXISTS idx_mediamodifications_media_id ON MediaModifications(media_id)',
+        'CREATE INDEX IF NOT EXISTS idx_mediakeywords_keyword_media ON MediaKeywords(keyword_id, media_id)',
+        'CREATE INDEX IF NOT EXISTS idx_media_version_media_version ON MediaVersion(media_id, version)',
+        'CREATE INDEX IF NOT EXISTS idx_mediamodifications_media_date ON MediaModifications(media_id, modification_date)',
         'CREATE INDEX IF NOT EXISTS idx_chatconversations_media_id ON ChatConversations(media_id)',
-        'CREATE INDEX IF NOT EXISTS idx_chatmessages_conversation_id ON ChatMessages(conversation_id)',
-        'CREATE INDEX IF NOT EXISTS idx_media_is_trash ON Media(is_trash)',
+        'CREATE INDEX IF NOT EXISTS idx_chatmessages_conversation_timestamp ON ChatMessages(conversation_id, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_transcripts_media_created ON Transcripts(media_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_media_trash_ingestion_date ON Media(is_trash, ingestion_date)',
+        'CREATE INDEX IF NOT EXISTS idx_media_trash_date ON Media(is_trash, trash_date)',
+        'CREATE INDEX IF NOT EXISTS idx_media_unprocessed ON Media(vector_processing) WHERE vector_processing = 0',
         'CREATE INDEX IF NOT EXISTS idx_mediachunks_media_id ON MediaChunks(media_id)',
         'CREATE INDEX IF NOT EXISTS idx_unvectorized_media_chunks_media_id ON UnvectorizedMediaChunks(media_id)',
         'CREATE INDEX IF NOT EXISTS idx_unvectorized_media_chunks_is_processed ON UnvectorizedMediaChunks(is_processed)',
         'CREATE INDEX IF NOT EXISTS idx_unvectorized_media_chunks_chunk_type ON UnvectorizedMediaChunks(chunk_type)',
         'CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_media_url ON Media(url)',
         'CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_media_keyword ON MediaKeywords(media_id, keyword_id)',
-        'CREATE INDEX IF NOT EXISTS idx_document_versions_media_id ON DocumentVersions(media_id)',
-        'CREATE INDEX IF NOT EXISTS idx_document_versions_version_number ON DocumentVersions(version_number)',
+        'CREATE INDEX IF NOT EXISTS idx_document_versions_media_version ON DocumentVersions(media_id, version_number)',
+    ]
+
+    # Single-column indexes made redundant by the composite ones above (see Query_Plan_Audit.py)
+    redundant_index_queries = [
+        f'DROP INDEX IF EXISTS {index_name}'
+        for index_name in ('idx_mediakeywords_media_id', 'idx_mediakeywords_keyword_id', 'idx_media_version_media_id',
+                           'idx_mediamodifications_media_id', 'idx_chatmessages_conversation_id', 'idx_media_is_trash',
+                           'idx_document_versions_media_id', 'idx_document_versions_version_number')
     ]
 
     virtual_table_queries = [
@@ -440,25 +559,180 @@ def create_tables(db) -> None:
         'CREATE VIRTUAL TABLE IF NOT EXISTS keyword_fts USING fts5(keyword)'
     ]
 
-    all_queries = table_queries + index_queries + virtual_table_queries
+    # Any write that can change search results bumps IndexGeneration (see get_media_index_generation), so caches
+    # keyed on the generation miss instead of serving stale results - including after writes from other processes
+    trigger_queries = [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS bump_index_generation_{table.lower()}_{event.lower()} AFTER {event} ON {table}
+        BEGIN
+            UPDATE IndexGeneration SET generation = generation + 1 WHERE id = 1;
+        END
+        '''
+        for table, events in (('Media', ('INSERT', 'UPDATE', 'DELETE')),
+                              ('Keywords', ('UPDATE', 'DELETE')),
+                              ('MediaKeywords', ('INSERT', 'DELETE')))
+        for event in events
+    ]
+
+    for query in table_queries:
+        conn.execute(query)
 
-    for query in all_queries:
+    # Columns added to existing tables over time; databases created before them lack them
+    add_column_if_missing(conn, 'Media', 'chunking_status', "TEXT DEFAULT 'pending'")
+    add_column_if_missing(conn, 'Media', 'vector_processing', 'INTEGER DEFAULT 0')
+    add_column_if_missing(conn, 'MediaChunks', 'chunk_id', 'TEXT')
+
+    for query in index_queries + redundant_index_queries + virtual_table_queries + trigger_queries:
         try:
-            db.execute_query(query)
-        except Exception as e:
+            conn.execute(query)
+        except sqlite3.Error as e:
             logging.error(f"Error executing query: {query}")
             logging.error(f"Error details: {str(e)}")
             raise
 
+
+def _add_document_version_storage(conn) -> None:
+    add_column_if_missing(conn, 'DocumentVersions', 'storage', f"TEXT NOT NULL DEFAULT '{STORAGE_FULL}'")
+    add_column_if_missing(conn, 'DocumentVersions', 'base_version', 'INTEGER')
+    add_column_if_missing(conn, 'DocumentVersions', 'data', 'BLOB')
+
+
+# Ordered schema changes of the media database (see Schema_Migrations.py); the backfills are in MEDIA_BACKFILLS
+MEDIA_MIGRATIONS = (
+    Migration(1, "Base media schema", _create_media_schema),
+    Migration(2, "Delta storage columns for DocumentVersions", _add_document_version_storage,
+              backfills=('compact_document_versions',)),
+    Migration(3, "Index media that is missing from media_fts", lambda conn: None, backfills=('media_fts',)),
+)
+
+
+# Function to create tables with the new media schema
+def create_tables(db) -> None:
+    with db.get_connection() as conn:
+        if conn.execute('PRAGMA page_count').fetchone()[0] == 0:
+            # Only takes effect before the first table exists; lets purge_media give freed pages back cheaply
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        migrate(conn, MEDIA_MIGRATIONS, 'media database')
     logging.info("All tables, indexes, and virtual tables created successfully.")
 
-create_tables(db)
+db.on_first_use(create_tables)
 
 #
 # End of DB Setup Functions
 #######################################################################################################################
 
 
+#######################################################################################################################
+#
+# Compressed text column migrations
+
+def _activate_latest_compression_dictionary(database) -> None:
+    if text_compressor.codec != 'zstd':
+        return
+    row = database.execute_query(
+        "SELECT id, data FROM CompressionDictionaries WHERE codec = 'zstd' ORDER BY id DESC LIMIT 1")
+    if row:
+        text_compressor.add_dictionary(row[0][0], row[0][1])
+
+db.on_first_use(_activate_latest_compression_dictionary)
+
+
+def _rewrite_text_batch(conn, table: str, column: str, typeof: str, convert, last_id: int,
+                        batch_size: int) -> Tuple[Optional[int], int, int, int]:
+    """
+    Rewrite the next `batch_size` rows after `last_id` whose value has SQLite type `typeof`. Returns the last id
+    read (None when there were no rows left), rows changed, and bytes before and after.
+    """
+    rows = conn.execute(f'''
+        SELECT id, {column} FROM {table} WHERE id > ? AND typeof({column}) = ? ORDER BY id LIMIT ?
+    ''', (last_id, typeof, batch_size)).fetchall()
+    if not rows:
+        return None, 0, 0, 0
+    updates, bytes_before, bytes_after = [], 0, 0
+    for row_id, value in rows:
+        converted = convert(value)
+        if type(converted) is not type(value):
+            updates.append((converted, row_id))
+            bytes_before += len(value.encode('utf-8') if isinstance(value, str) else value)
+            bytes_after += len(converted.encode('utf-8') if isinstance(converted, str) else converted)
+    if updates:
+        conn.executemany(f'UPDATE {table} SET {column} = ? WHERE id = ?', updates)
+    return rows[-1][0], len(updates), bytes_before, bytes_after
+
+
+def _rewrite_text_column(table: str, column: str, typeof: str, convert, batch_size: int) -> Tuple[int, int, int]:
+    """Rewrite rows whose value has SQLite type `typeof`, in id order and one transaction per batch."""
+    rows_changed, bytes_before, bytes_after = 0, 0, 0
+    last_id = 0
+    while True:
+        with db.transaction() as conn:
+            last_id, rows, before, after = _rewrite_text_batch(conn, table, column, typeof, convert, last_id,
+                                                               batch_size)
+        if last_id is None:
+            break
+        rows_changed += rows
+        bytes_before += before
+        bytes_after += after
+    return rows_changed, bytes_before, bytes_after
+
+
+def compress_text_columns(train_new_dictionary: bool = True, batch_size: int = 200,
+                          sample_limit: int = 2000) -> Dict[str, Any]:
+    """
+    Migration: compress the existing large values of Media.content and Transcripts.transcription.
+
+    With zstd, a dictionary is first trained on a sample of the stored text. Safe to re-run; compressed rows are
+    left alone. Runs whether or not [Text-Compression] is enabled, which only governs new writes.
+    schedule_media_backfill('compress_text') does the same in the background, with the current dictionary.
+    """
+    stats: Dict[str, Any] = {'dictionary_id': None, 'rows': 0, 'bytes_before': 0, 'bytes_after': 0}
+    if train_new_dictionary and text_compressor.codec == 'zstd':
+        samples = []
+        for table, column in COMPRESSED_TEXT_COLUMNS:
+            rows = db.execute_query(f'''
+                SELECT substr({column}, 1, 16384) FROM {table} WHERE typeof({column}) = 'text'
+                ORDER BY RANDOM() LIMIT ?
+            ''', (sample_limit,))
+            samples.extend(row[0] for row in rows)
+        try:
+            dictionary = train_dictionary(samples, text_compression_settings['dictionary_size']) if samples else None
+        except Exception as e:
+            # Too few or too small samples; plain zstd still works
+            logging.warning(f"Could not train a compression dictionary, compressing without one: {e}")
+            dictionary = None
+        if dictionary:
+            with db.transaction() as conn:
+                cursor = conn.execute('INSERT INTO CompressionDictionaries (codec, data) VALUES (?, ?)',
+                                      ('zstd', dictionary))
+                dictionary_id = cursor.lastrowid
+            text_compressor.add_dictionary(dictionary_id, dictionary)
+    stats['dictionary_id'] = text_compressor.dictionary_id or None
+
+    for table, column in COMPRESSED_TEXT_COLUMNS:
+        rows, before, after = _rewrite_text_column(table, column, 'text', text_compressor.compress, batch_size)
+        stats['rows'] += rows
+        stats['bytes_before'] += before
+        stats['bytes_after'] += after
+    logging.info(f"Compressed {stats['rows']} text values: {stats['bytes_before']} -> {stats['bytes_after']} bytes")
+    return stats
+
+
+def decompress_text_columns(batch_size: int = 200) -> Dict[str, int]:
+    """Migration: store every compressed value as plain text again."""
+    stats = {'rows': 0, 'bytes_before': 0, 'bytes_after': 0}
+    for table, column in COMPRESSED_TEXT_COLUMNS:
+        rows, before, after = _rewrite_text_column(table, column, 'blob', text_compressor.decompress, batch_size)
+        stats['rows'] += rows
+        stats['bytes_before'] += before
+        stats['bytes_after'] += after
+    logging.info(f"Decompressed {stats['rows']} text values")
+    return stats
+
+#
+# End of Compressed text column migrations
+#######################################################################################################################
+
+
 #######################################################################################################################
 #
 # Media-related Functions
@@ -519,8 +793,8 @@ def check_media_and_whisper_model(title=None, url=None, current_whisper_model=No
 
         # Now, get the latest transcript for this media
         cursor.execute("""
-            SELECT transcription 
-            FROM Transcripts 
+            SELECT decompress_text(transcription)
+            FROM Transcripts
             WHERE media_id = ? 
             ORDER BY created_at DESC 
             LIMIT 1
@@ -561,18 +835,12 @@ def add_media_chunk(media_id: int, chunk_text: str, start_index: int, end_index:
 def sqlite_update_fts_for_media(db, media_id: int):
     with db.get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("INSERT OR REPLACE INTO media_fts (rowid, title, content) SELECT id, title, content FROM Media WHERE id = ?", (media_id,))
+        cursor.execute("INSERT OR REPLACE INTO media_fts (rowid, title, content) SELECT id, title, decompress_text(content) FROM Media WHERE id = ?", (media_id,))
         conn.commit()
 
 
 def get_unprocessed_media(db):
-    query = """
-    SELECT id, content, type, COALESCE(title, '') as file_name
-    FROM Media 
-    WHERE vector_processing = 0
-    ORDER BY id
-    """
-    return db.execute_query(query)
+    return list(iter_unprocessed_media(db))
 
 def get_next_media_id():
     try:
@@ -603,6 +871,11 @@ def mark_media_as_processed(database, media_id):
 # Keyword-related Functions
 #
 
+# Keyword ids are upserted in batches and cached in memory, and links are updated by difference (see Keyword_Store.py)
+media_keywords = KeywordStore('Keywords', fts_table='keyword_fts')
+MEDIA_KEYWORD_LINKS = LinkTable('MediaKeywords', 'media_id')
+
+
 # Function to add media with keywords
 def add_media_with_keywords(url, title, media_type, content, keywords, prompt, summary, transcription_model, author,
                             ingestion_date):
@@ -660,13 +933,13 @@ def add_media_with_keywords(url, title, media_type, content, keywords, prompt, s
                 UPDATE Media 
                 SET content = ?, transcription_model = ?, type = ?, author = ?, ingestion_date = ?
                 WHERE id = ?
-                ''', (content, transcription_model, media_type, author, ingestion_date, media_id))
+                ''', (compress_text(content), transcription_model, media_type, author, ingestion_date, media_id))
             else:
                 logging.debug("Inserting new media")
                 cursor.execute('''
                 INSERT INTO Media (url, title, type, content, author, ingestion_date, transcription_model)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (url, title, media_type, content, author, ingestion_date, transcription_model))
+                ''', (url, title, media_type, compress_text(content), author, ingestion_date, transcription_model))
                 media_id = cursor.lastrowid
                 logging.debug(f"New media inserted with ID: {media_id}")
 
@@ -675,18 +948,8 @@ def add_media_with_keywords(url, title, media_type, content, keywords, prompt, s
             VALUES (?, ?, ?, ?)
             ''', (media_id, prompt, summary, ingestion_date))
 
-            # Batch insert keywords
-            keyword_params = [(keyword.strip().lower(),) for keyword in keyword_list]
-            cursor.executemany('INSERT OR IGNORE INTO Keywords (keyword) VALUES (?)', keyword_params)
-
-            # Get keyword IDs
-            placeholder = ','.join(['?'] * len(keyword_list))
-            cursor.execute(f'SELECT id, keyword FROM Keywords WHERE keyword IN ({placeholder})', keyword_list)
-            keyword_ids = cursor.fetchall()
-
-            # Batch insert media-keyword associations
-            media_keyword_params = [(media_id, keyword_id) for keyword_id, _ in keyword_ids]
-            cursor.executemany('INSERT OR IGNORE INTO MediaKeywords (media_id, keyword_id) VALUES (?, ?)', media_keyword_params)
+            # Link the keywords, keeping any the item already has
+            media_keywords.link_keywords(conn, MEDIA_KEYWORD_LINKS, {media_id: keyword_list}, replace=False)
 
             # Update full-text search index
             cursor.execute('INSERT OR REPLACE INTO media_fts (rowid, title, content) VALUES (?, ?, ?)',
@@ -696,6 +959,7 @@ def add_media_with_keywords(url, title, media_type, content, keywords, prompt, s
             add_media_version(conn, media_id, prompt, summary)
 
             conn.commit()
+            invalidate_keyword_media_index()
             logging.info(f"Media '{title}' successfully added/updated with ID: {media_id}")
 
         return media_id, f"Media '{title}' added/updated successfully with keywords: {', '.join(keyword_list)}"
@@ -783,31 +1047,17 @@ def add_keyword(keyword: str) -> int:
         raise DatabaseError("Keyword cannot be empty")
 
     keyword = keyword.strip().lower()
-    with db.get_connection() as conn:
-        cursor = conn.cursor()
-        try:
-            # Insert into Keywords table
-            cursor.execute('INSERT OR IGNORE INTO Keywords (keyword) VALUES (?)', (keyword,))
-
-            # Get the keyword_id (whether it was just inserted or already existed)
-            cursor.execute('SELECT id FROM Keywords WHERE keyword = ?', (keyword,))
-            keyword_id = cursor.fetchone()[0]
-
-            # Check if the keyword exists in keyword_fts
-            cursor.execute('SELECT rowid FROM keyword_fts WHERE rowid = ?', (keyword_id,))
-            if not cursor.fetchone():
-                # If it doesn't exist in keyword_fts, insert it
-                cursor.execute('INSERT OR IGNORE INTO keyword_fts (rowid, keyword) VALUES (?, ?)', (keyword_id, keyword))
-
-            logging.info(f"Keyword '{keyword}' added or updated with ID: {keyword_id}")
-            conn.commit()
-            return keyword_id
-        except sqlite3.IntegrityError as e:
-            logging.error(f"Integrity error adding keyword: {e}")
-            raise DatabaseError(f"Integrity error adding keyword: {e}")
-        except sqlite3.Error as e:
-            logging.error(f"Error adding keyword: {e}")
-            raise DatabaseError(f"Error adding keyword: {e}")
+    try:
+        with db.transaction() as conn:
+            keyword_id = media_keywords.keyword_ids(conn, [keyword])[keyword]
+        logging.info(f"Keyword '{keyword}' added or updated with ID: {keyword_id}")
+        return keyword_id
+    except sqlite3.IntegrityError as e:
+        logging.error(f"Integrity error adding keyword: {e}")
+        raise DatabaseError(f"Integrity error adding keyword: {e}")
+    except sqlite3.Error as e:
+        logging.error(f"Error adding keyword: {e}")
+        raise DatabaseError(f"Error adding keyword: {e}")
 
 
 
@@ -823,6 +1073,8 @@ def delete_keyword(keyword: str) -> str:
                 cursor.execute('DELETE FROM Keywords WHERE keyword = ?', (keyword,))
                 cursor.execute('DELETE FROM keyword_fts WHERE rowid = ?', (keyword_id[0],))
                 conn.commit()
+                media_keywords.forget([keyword])
+                invalidate_keyword_media_index()
                 return f"Keyword '{keyword}' deleted successfully."
             else:
                 return f"Keyword '{keyword}' not found."
@@ -888,24 +1140,82 @@ def fetch_keywords_for_media(media_id):
 
 def update_keywords_for_media(media_id, keyword_list):
     try:
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # Remove old keywords
-            cursor.execute('DELETE FROM MediaKeywords WHERE media_id = ?', (media_id,))
+        bulk_update_keywords_for_media({media_id: keyword_list})
+        return "Keywords updated successfully."
+    except DatabaseError as e:
+        logging.error(f"Error updating keywords: {e}")
+        return "Error updating keywords."
 
-            # Add new keywords
-            for keyword in keyword_list:
-                cursor.execute('INSERT OR IGNORE INTO Keywords (keyword) VALUES (?)', (keyword,))
-                cursor.execute('SELECT id FROM Keywords WHERE keyword = ?', (keyword,))
-                keyword_id = cursor.fetchone()[0]
-                cursor.execute('INSERT INTO MediaKeywords (media_id, keyword_id) VALUES (?, ?)', (media_id, keyword_id))
 
-            conn.commit()
-        return "Keywords updated successfully."
+def bulk_update_keywords_for_media(assignments: Dict[int, Iterable[str]]) -> Tuple[int, int]:
+    """
+    Set the keywords of many media items ({media_id: keywords}) in one transaction: each item ends up with exactly
+    its keywords, stored as given. Returns (links added, links removed).
+    """
+    assignments = {media_id: list(keywords) for media_id, keywords in assignments.items()}
+    try:
+        with db.transaction() as conn:
+            added, removed = media_keywords.link_keywords(conn, MEDIA_KEYWORD_LINKS, assignments)
     except sqlite3.Error as e:
         logging.error(f"Error updating keywords: {e}")
-        return "Error updating keywords."
+        raise DatabaseError(f"Error updating keywords: {e}")
+    finally:
+        invalidate_keyword_media_index()
+    logging.debug(f"Updated keywords of {len(assignments)} media items: {added} links added, {removed} removed")
+    return added, removed
+
+
+# In-memory keyword -> media_id index, loaded with a single query and dropped whenever keyword assignments change,
+# so keyword-filtered RAG searches don't need a DB round trip per keyword or per result.
+_keyword_media_index: Optional[Dict[str, FrozenSet[int]]] = None
+_keyword_media_index_lock = threading.Lock()
+
+
+def invalidate_keyword_media_index() -> None:
+    global _keyword_media_index
+    with _keyword_media_index_lock:
+        _keyword_media_index = None
+
+
+def get_keyword_media_index() -> Dict[str, FrozenSet[int]]:
+    global _keyword_media_index
+    index = _keyword_media_index
+    if index is not None:
+        return index
+    with _keyword_media_index_lock:
+        if _keyword_media_index is None:
+            mapping: Dict[str, Set[int]] = {}
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT k.keyword, mk.media_id
+                    FROM Keywords k
+                    JOIN MediaKeywords mk ON k.id = mk.keyword_id
+                ''')
+                for keyword, media_id in cursor.fetchall():
+                    mapping.setdefault(keyword.strip().lower(), set()).add(media_id)
+            _keyword_media_index = {keyword: frozenset(ids) for keyword, ids in mapping.items()}
+            logging.debug(f"Loaded keyword index: {len(_keyword_media_index)} keywords")
+        return _keyword_media_index
+
+
+def get_media_index_generation() -> int:
+    """Counter bumped by triggers whenever media or keyword assignments change."""
+    with db.get_connection() as conn:
+        return read_generation(conn)
+
+
+# Page boundaries and totals for the browse views, keyed by database path and invalidated by IndexGeneration
+paginator = Paginator()
+
+
+def fetch_media_ids_for_keywords(keywords: Iterable[str]) -> Set[int]:
+    """Return the ids of all media tagged with any of the given keywords (case-insensitive)."""
+    index = get_keyword_media_index()
+    media_ids: Set[int] = set()
+    for keyword in keywords:
+        media_ids.update(index.get(keyword.strip().lower(), ()))
+    return media_ids
 
 #
 # End of Keyword-related functions
@@ -930,7 +1240,7 @@ def browse_items(search_query, search_type):
             elif search_type == 'Keyword':
                 return fetch_items_by_keyword(search_query)
             elif search_type == 'Content':
-                cursor.execute("SELECT id, title, url FROM Media WHERE content LIKE ?", (f'%{search_query}%',))
+                cursor.execute("SELECT id, title, url FROM Media WHERE decompress_text(content) LIKE ?", (f'%{search_query}%',))
             else:
                 raise ValueError(f"Invalid search type: {search_type}")
 
@@ -958,7 +1268,7 @@ def fetch_item_details(media_id: int):
             prompt_summary_result = cursor.fetchone()
 
             # Fetch the latest transcription
-            cursor.execute("SELECT content FROM Media WHERE id = ?", (media_id,))
+            cursor.execute("SELECT decompress_text(content) FROM Media WHERE id = ?", (media_id,))
             content_result = cursor.fetchone()
 
             prompt = prompt_summary_result[0] if prompt_summary_result else "No prompt available."
@@ -1000,49 +1310,23 @@ def add_media_version(conn, media_id: int, prompt: str, summary: str) -> None:
 
 
 # Function to search the database with advanced options, including keyword search and full-text search
-def sqlite_search_db(search_query: str, search_fields: List[str], keywords: str, page: int = 1, results_per_page: int = 10, connection=None):
+def sqlite_search_db(search_query: str, search_fields: List[str], keywords: str, page: int = 1, results_per_page: int = 10, connection=None,
+                     media_ids: Optional[Iterable[int]] = None):
+    """
+    `media_ids`, when given, restricts the search to those media items inside the query itself (an empty
+    collection matches nothing).
+    """
     if page < 1:
         raise ValueError("Page number must be 1 or greater.")
 
-    # Prepare keywords by splitting and trimming
-    keywords = [keyword.strip().lower() for keyword in keywords.split(',') if keyword.strip()]
+    query, params = _build_search_query(search_query, search_fields, keywords, media_ids)
+    query += "\n        LIMIT ? OFFSET ?"
+    params.extend([results_per_page, (page - 1) * results_per_page])
 
     def execute_query(conn):
+        # Callers may pass their own connection, which lacks decompress_text()
+        register_text_functions(conn)
         cursor = conn.cursor()
-        offset = (page - 1) * results_per_page
-
-        # Prepare the search conditions for general fields
-        search_conditions = []
-        params = []
-
-        for field in search_fields:
-            if search_query:  # Ensure there's a search query before adding this condition
-                search_conditions.append(f"Media.{field} LIKE ?")
-                params.append(f'%{search_query}%')
-
-        # Prepare the conditions for keywords filtering
-        keyword_conditions = []
-        for keyword in keywords:
-            keyword_conditions.append(
-                f"EXISTS (SELECT 1 FROM MediaKeywords mk JOIN Keywords k ON mk.keyword_id = k.id WHERE mk.media_id = Media.id AND k.keyword LIKE ?)")
-            params.append(f'%{keyword}%')
-
-        # Combine all conditions
-        where_clause = " AND ".join(
-            search_conditions + keyword_conditions) if search_conditions or keyword_conditions else "1=1"
-
-        # Complete the query
-        query = f'''
-        SELECT DISTINCT Media.id, Media.url, Media.title, Media.type, Media.content, Media.author, Media.ingestion_date, 
-               MediaModifications.prompt, MediaModifications.summary
-        FROM Media
-        LEFT JOIN MediaModifications ON Media.id = MediaModifications.media_id
-        WHERE {where_clause}
-        ORDER BY Media.ingestion_date DESC
-        LIMIT ? OFFSET ?
-        '''
-        params.extend([results_per_page, offset])
-
         cursor.execute(query, params)
         return cursor.fetchall()
 
@@ -1053,6 +1337,55 @@ def sqlite_search_db(search_query: str, search_fields: List[str], keywords: str,
             return execute_query(conn)
 
 
+def _build_search_query(search_query: str, search_fields: List[str], keywords: str,
+                        media_ids: Optional[Iterable[int]] = None) -> Tuple[str, List[Any]]:
+    """The SELECT behind sqlite_search_db, without LIMIT/OFFSET, and its parameters."""
+    # Prepare keywords by splitting and trimming
+    keywords = [keyword.strip().lower() for keyword in keywords.split(',') if keyword.strip()]
+
+    # Prepare the search conditions for general fields
+    search_conditions = []
+    params = []
+
+    for field in search_fields:
+        if search_query:  # Ensure there's a search query before adding this condition
+            column = f"decompress_text(Media.{field})" if field == 'content' else f"Media.{field}"
+            search_conditions.append(f"{column} LIKE ?")
+            params.append(f'%{search_query}%')
+
+    # Prepare the conditions for keywords filtering
+    keyword_conditions = []
+    for keyword in keywords:
+        keyword_conditions.append(
+            f"EXISTS (SELECT 1 FROM MediaKeywords mk JOIN Keywords k ON mk.keyword_id = k.id WHERE mk.media_id = Media.id AND k.keyword LIKE ?)")
+        params.append(f'%{keyword}%')
+
+    # Restrict to a precomputed set of media ids (e.g. from the keyword index)
+    id_conditions = []
+    if media_ids is not None:
+        id_list = sorted({int(media_id) for media_id in media_ids})
+        if id_list:
+            id_conditions.append(f"Media.id IN ({','.join('?' * len(id_list))})")
+            params.extend(id_list)
+        else:
+            id_conditions.append("0")
+
+    # Combine all conditions
+    where_clause = " AND ".join(
+        search_conditions + keyword_conditions + id_conditions) if search_conditions or keyword_conditions or id_conditions else "1=1"
+
+    # Complete the query
+    query = f'''
+        SELECT DISTINCT Media.id, Media.url, Media.title, Media.type, decompress_text(Media.content), Media.author,
+               Media.ingestion_date, 
+               MediaModifications.prompt, MediaModifications.summary
+        FROM Media
+        LEFT JOIN MediaModifications ON Media.id = MediaModifications.media_id
+        WHERE {where_clause}
+        ORDER BY Media.ingestion_date DESC'''
+    return query, params
+
+
 # Gradio function to handle user input and display results with pagination, with better feedback
 def search_and_display(search_query, search_fields, keywords, page):
     results = sqlite_search_db(search_query, search_fields, keywords, page)
@@ -1130,43 +1463,41 @@ def format_results(results):
     return df
 
 
-# Function to export search results to CSV or markdown with pagination
-def export_to_file(search_query: str, search_fields: List[str], keyword: str, page: int = 1, results_per_file: int = 1000, export_format: str = 'csv'):
+# Function to export search results to CSV, JSONL or markdown with pagination (page=None exports every result)
+def export_to_file(search_query: str, search_fields: List[str], keyword: str, page: Optional[int] = 1, results_per_file: int = 1000, export_format: str = 'csv'):
     try:
-        results = sqlite_search_db(search_query, search_fields, keyword, page, results_per_file)
-        if not results:
-            return "No results found to export."
+        if page is not None and page < 1:
+            raise InputError("Page number must be 1 or greater.")
+        export_dir = get_export_settings()['export_dir']
+        os.makedirs(export_dir, exist_ok=True)
+        page_label = 'all' if page is None else f'page_{page}'
+        columns = ['url', 'title', 'type', 'content', 'author', 'ingestion_date', 'prompt', 'summary']
 
-        # Create an 'exports' directory if it doesn't exist
-        if not os.path.exists('exports'):
-            os.makedirs('exports')
+        def records():
+            for row in iter_search_results(search_query, search_fields, keyword, page, results_per_file):
+                yield dict(zip(['id'] + columns, row))
 
         if export_format == 'csv':
-            filename = f'exports/search_results_page_{page}.csv'
-            with open(filename, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow(['URL', 'Title', 'Type', 'Content', 'Author', 'Ingestion Date', 'Prompt', 'Summary'])
-                for row in results:
-                    writer.writerow(row)
+            filename = os.path.join(export_dir, f'search_results_{page_label}.csv')
+            count = write_csv(filename, ['URL', 'Title', 'Type', 'Content', 'Author', 'Ingestion Date', 'Prompt', 'Summary'],
+                              ([record[column] for column in columns] for record in records()))
+        elif export_format == 'jsonl':
+            filename = os.path.join(export_dir, f'search_results_{page_label}.jsonl')
+            count = write_jsonl(filename, records())
         elif export_format == 'markdown':
-            filename = f'exports/search_results_page_{page}.md'
+            filename = os.path.join(export_dir, f'search_results_{page_label}.md')
+            count = 0
             with open(filename, 'w', encoding='utf-8') as file:
-                for item in results:
-                    markdown_content = convert_to_markdown({
-                        'title': item[1],
-                        'url': item[0],
-                        'type': item[2],
-                        'content': item[3],
-                        'author': item[4],
-                        'ingestion_date': item[5],
-                        'summary': item[7],
-                        'keywords': item[8].split(',') if item[8] else []
-                    })
-                    file.write(markdown_content)
+                for record in records():
+                    file.write(convert_to_markdown({**record, 'keywords': fetch_keywords_for_media(record['id'])}))
                     file.write("\n---\n\n")  # Separator between items
+                    count += 1
         else:
             return f"Unsupported export format: {export_format}"
 
+        if not count:
+            os.remove(filename)
+            return "No results found to export."
         return f"Results exported to {filename}"
     except (DatabaseError, InputError) as e:
         return str(e)
@@ -1228,7 +1559,7 @@ def add_media_to_database(url, info_dict, segments, summary, keywords, custom_pr
                     UPDATE Media 
                     SET content = ?, transcription_model = ?, title = ?, type = ?, author = ?, ingestion_date = ?, chunking_status = ?
                     WHERE id = ?
-                    ''', (content, whisper_model, info_dict.get('title', 'Untitled'), media_type,
+                    ''', (compress_text(content), whisper_model, info_dict.get('title', 'Untitled'), media_type,
                           info_dict.get('uploader', 'Unknown'), datetime.now().strftime('%Y-%m-%d'), 'pending', media_id))
                     action = "updated"
                 else:
@@ -1238,7 +1569,7 @@ def add_media_to_database(url, info_dict, segments, summary, keywords, custom_pr
                 cursor.execute('''
                 INSERT INTO Media (url, title, type, content, author, ingestion_date, transcription_model, chunking_status)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (url, info_dict.get('title', 'Untitled'), media_type, content,
+                ''', (url, info_dict.get('title', 'Untitled'), media_type, compress_text(content),
                       info_dict.get('uploader', 'Unknown'), datetime.now().strftime('%Y-%m-%d'), whisper_model, 'pending'))
                 media_id = cursor.lastrowid
                 action = "added"
@@ -1254,12 +1585,7 @@ def add_media_to_database(url, info_dict, segments, summary, keywords, custom_pr
                 ''', (media_id, custom_prompt_input, summary, datetime.now().strftime('%Y-%m-%d')))
 
             # Process keywords
-            for keyword in keyword_list:
-                cursor.execute('INSERT OR IGNORE INTO Keywords (keyword) VALUES (?)', (keyword,))
-                cursor.execute('SELECT id FROM Keywords WHERE keyword = ?', (keyword,))
-                keyword_id = cursor.fetchone()[0]
-                cursor.execute('INSERT OR IGNORE INTO MediaKeywords (media_id, keyword_id) VALUES (?, ?)',
-                               (media_id, keyword_id))
+            media_keywords.link_keywords(conn, MEDIA_KEYWORD_LINKS, {media_id: keyword_list}, replace=False)
 
             # Update full-text search index
             cursor.execute('INSERT OR REPLACE INTO media_fts (rowid, title, content) VALUES (?, ?, ?)',
@@ -1274,6 +1600,7 @@ def add_media_to_database(url, info_dict, segments, summary, keywords, custom_pr
             ''', (media_id, current_version + 1, custom_prompt_input, summary, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
 
             conn.commit()
+        invalidate_keyword_media_index()
 
         # Schedule chunking
         schedule_chunking(media_id, content, info_dict.get('title', 'Untitled'))
@@ -1326,7 +1653,7 @@ def update_media_content_with_version(media_id, info_dict, content_input, prompt
             UPDATE Media 
             SET content = ?, transcription_model = ?, title = ?, author = ?, ingestion_date = ?, chunking_status = ?
             WHERE id = ?
-            ''', (content_input, whisper_model, info_dict.get('title', 'Untitled'),
+            ''', (compress_text(content_input), whisper_model, info_dict.get('title', 'Untitled'),
                   info_dict.get('uploader', 'Unknown'), datetime.now().strftime('%Y-%m-%d'), 'pending', media_id))
 
             # Update or insert into MediaModifications
@@ -1350,27 +1677,23 @@ def update_media_content_with_version(media_id, info_dict, content_input, prompt
         return f"Error updating content: {str(e)}"
 
 
+def _store_media_chunks(conn, media_id: int, content: str) -> None:
+    """Replace a media item's MediaChunks with a fresh chunking of `content` and mark it chunked."""
+    chunks = chunk_text(content, chunk_options['method'], chunk_options['max_size'], chunk_options['overlap'])
+    conn.execute("DELETE FROM MediaChunks WHERE media_id = ?", (media_id,))
+    conn.executemany('''
+        INSERT INTO MediaChunks (media_id, chunk_text, start_index, end_index, chunk_id)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [(media_id, chunk, i * chunk_options['max_size'], min((i + 1) * chunk_options['max_size'], len(content)),
+           f"{media_id}_chunk_{i}") for i, chunk in enumerate(chunks)])
+    conn.execute("UPDATE Media SET chunking_status = 'completed' WHERE id = ?", (media_id,))
+
+
 # FIXME: This function is not complete and needs to be implemented
 def schedule_chunking(media_id: int, content: str, media_name: str):
     try:
-        chunks = chunk_text(content, chunk_options['method'], chunk_options['max_size'], chunk_options['overlap'])
-        db = Database()
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            for i, chunk in enumerate(chunks):
-                cursor.execute('''
-                INSERT INTO MediaChunks (media_id, chunk_text, start_index, end_index, chunk_id)
-                VALUES (?, ?, ?, ?, ?)
-                ''', (media_id, chunk, i * chunk_options['max_size'],
-                      min((i + 1) * chunk_options['max_size'], len(content)),
-                      f"{media_id}_chunk_{i}"))
-            conn.commit()
-
-        # Update chunking status
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE Media SET chunking_status = 'completed' WHERE id = ?", (media_id,))
-            conn.commit()
+        with db.transaction() as conn:
+            _store_media_chunks(conn, media_id, content)
 
     except Exception as e:
         logging.error(f"Error scheduling chunking for media_id {media_id}: {str(e)}")
@@ -1385,11 +1708,8 @@ def schedule_chunking(media_id: int, content: str, media_name: str):
 #
 # Functions to manage prompts DB
 
-def create_prompts_db():
-    logging.debug("create_prompts_db: Creating prompts database.")
-    with sqlite3.connect(get_database_path('prompts.db')) as conn:
-        cursor = conn.cursor()
-        cursor.executescript('''
+def _create_prompts_schema(conn) -> None:
+    for statement in split_sql_script('''
             CREATE TABLE IF NOT EXISTS Prompts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL UNIQUE,
@@ -1412,25 +1732,40 @@ def create_prompts_db():
             CREATE INDEX IF NOT EXISTS idx_keywords_keyword ON Keywords(keyword);
             CREATE INDEX IF NOT EXISTS idx_promptkeywords_prompt_id ON PromptKeywords(prompt_id);
             CREATE INDEX IF NOT EXISTS idx_promptkeywords_keyword_id ON PromptKeywords(keyword_id);
-        ''')
+        '''):
+        conn.execute(statement)
+    # Bumped on writes that change what the prompt browse/search views list (see Pagination.py)
+    for statement in generation_schema_sql((('Prompts', ('INSERT', 'UPDATE', 'DELETE')),
+                                            ('Keywords', ('UPDATE', 'DELETE')),
+                                            ('PromptKeywords', ('INSERT', 'DELETE')))):
+        conn.execute(statement)
 
-# FIXME - dirty hack that should be removed later...
-# Migration function to add the 'author' column to the Prompts table
-def add_author_column_to_prompts():
-    with sqlite3.connect(get_database_path('prompts.db')) as conn:
-        cursor = conn.cursor()
-        # Check if 'author' column already exists
-        cursor.execute("PRAGMA table_info(Prompts)")
-        columns = [col[1] for col in cursor.fetchall()]
-
-        if 'author' not in columns:
-            # Add the 'author' column
-            cursor.execute('ALTER TABLE Prompts ADD COLUMN author TEXT')
-            print("Author column added to Prompts table.")
-        else:
-            print("Author column already exists in Prompts table.")
 
-add_author_column_to_prompts()
+# Ordered schema changes of the prompts database (see Schema_Migrations.py)
+PROMPTS_MIGRATIONS = (
+    Migration(1, "Base prompts schema", _create_prompts_schema),
+    Migration(2, "Prompts.author for databases created before it",
+              lambda conn: add_column_if_missing(conn, 'Prompts', 'author', 'TEXT')),
+)
+
+
+def create_prompts_db():
+    logging.debug("create_prompts_db: Creating prompts database.")
+    ensure_database_directory()
+    migrate_file(get_database_path('prompts.db'), PROMPTS_MIGRATIONS, 'prompts database')
+
+
+_ensure_prompts_db = run_once(create_prompts_db)
+
+# The prompts database has its own Keywords table (see media_keywords)
+prompt_keywords = KeywordStore('Keywords', case_insensitive=True)
+PROMPT_KEYWORD_LINKS = LinkTable('PromptKeywords', 'prompt_id')
+
+
+def get_prompts_db_path() -> str:
+    """Path of the prompts database, which is created or migrated the first time this is called."""
+    _ensure_prompts_db()
+    return get_database_path('prompts.db')
 
 def normalize_keyword(keyword):
     return re.sub(r'\s+', ' ', keyword.strip().lower())
@@ -1444,7 +1779,7 @@ def add_prompt(name, author, details, system=None, user=None, keywords=None):
         return "A name is required."
 
     try:
-        with sqlite3.connect(get_database_path('prompts.db')) as conn:
+        with sqlite3.connect(get_prompts_db_path()) as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO Prompts (name, author, details, system, user)
@@ -1454,15 +1789,7 @@ def add_prompt(name, author, details, system=None, user=None, keywords=None):
 
             if keywords:
                 normalized_keywords = [normalize_keyword(k) for k in keywords if k.strip()]
-                for keyword in set(normalized_keywords):  # Use set to remove duplicates
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO Keywords (keyword) VALUES (?)
-                    ''', (keyword,))
-                    cursor.execute('SELECT id FROM Keywords WHERE keyword = ?', (keyword,))
-                    keyword_id = cursor.fetchone()[0]
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO PromptKeywords (prompt_id, keyword_id) VALUES (?, ?)
-                    ''', (prompt_id, keyword_id))
+                prompt_keywords.link_keywords(conn, PROMPT_KEYWORD_LINKS, {prompt_id: normalized_keywords})
         return "Prompt added successfully."
     except sqlite3.IntegrityError:
         return "Prompt with this name already exists."
@@ -1472,7 +1799,7 @@ def add_prompt(name, author, details, system=None, user=None, keywords=None):
 
 def fetch_prompt_details(name):
     logging.debug(f"fetch_prompt_details: Fetching details for prompt: {name}")
-    with sqlite3.connect(get_database_path('prompts.db')) as conn:
+    with sqlite3.connect(get_prompts_db_path()) as conn:
         cursor = conn.cursor()
         cursor.execute('''
             SELECT p.name, p.author, p.details, p.system, p.user, GROUP_CONCAT(k.keyword, ', ') as keywords
@@ -1487,17 +1814,11 @@ def fetch_prompt_details(name):
 
 def list_prompts(page=1, per_page=10):
     logging.debug(f"list_prompts: Listing prompts for page {page} with {per_page} prompts per page.")
-    offset = (page - 1) * per_page
-    with sqlite3.connect(get_database_path('prompts.db')) as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT name FROM Prompts LIMIT ? OFFSET ?', (per_page, offset))
-        prompts = [row[0] for row in cursor.fetchall()]
-
-        # Get total count of prompts
-        cursor.execute('SELECT COUNT(*) FROM Prompts')
-        total_count = cursor.fetchone()[0]
-
-    total_pages = (total_count + per_page - 1) // per_page
+    prompts_db_path = get_prompts_db_path()
+    query = PageQuery('name', 'Prompts', (('id', 'ASC'),))
+    with sqlite3.connect(prompts_db_path) as conn:
+        rows, total_pages, _ = paginator.fetch(conn, query, page, per_page, read_generation(conn), prompts_db_path)
+    prompts = [row[0] for row in rows]
     return prompts, total_pages, page
 
 # This will not scale. For a large number of prompts, use a more efficient method.
@@ -1505,7 +1826,7 @@ def list_prompts(page=1, per_page=10):
 def load_preset_prompts():
     logging.debug("load_preset_prompts: Loading preset prompts.")
     try:
-        with sqlite3.connect(get_database_path('prompts.db')) as conn:
+        with sqlite3.connect(get_prompts_db_path()) as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT name FROM Prompts ORDER BY name ASC')
             prompts = [row[0] for row in cursor.fetchall()]
@@ -1520,7 +1841,7 @@ def insert_prompt_to_db(title, author, description, system_prompt, user_prompt,
 
 
 def get_prompt_db_connection():
-    prompt_db_path = get_database_path('prompts.db')
+    prompt_db_path = get_prompts_db_path()
     return sqlite3.connect(prompt_db_path)
 
 
@@ -1547,37 +1868,21 @@ def search_prompts(query):
 def search_prompts_by_keyword(keyword, page=1, per_page=10):
     logging.debug(f"search_prompts_by_keyword: Searching prompts by keyword: {keyword}")
     normalized_keyword = normalize_keyword(keyword)
-    offset = (page - 1) * per_page
-    with sqlite3.connect(get_database_path('prompts.db')) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT DISTINCT p.name
-            FROM Prompts p
-            JOIN PromptKeywords pk ON p.id = pk.prompt_id
-            JOIN Keywords k ON pk.keyword_id = k.id
-            WHERE k.keyword LIKE ?
-            LIMIT ? OFFSET ?
-        ''', ('%' + normalized_keyword + '%', per_page, offset))
-        prompts = [row[0] for row in cursor.fetchall()]
-
-        # Get total count of matching prompts
-        cursor.execute('''
-            SELECT COUNT(DISTINCT p.id)
-            FROM Prompts p
-            JOIN PromptKeywords pk ON p.id = pk.prompt_id
-            JOIN Keywords k ON pk.keyword_id = k.id
-            WHERE k.keyword LIKE ?
-        ''', ('%' + normalized_keyword + '%',))
-        total_count = cursor.fetchone()[0]
-
-    total_pages = (total_count + per_page - 1) // per_page
+    prompts_db_path = get_prompts_db_path()
+    query = PageQuery('p.name', 'Prompts p JOIN PromptKeywords pk ON p.id = pk.prompt_id '
+                                'JOIN Keywords k ON pk.keyword_id = k.id',
+                      (('p.id', 'ASC'),), where='k.keyword LIKE ?', params=('%' + normalized_keyword + '%',),
+                      group_by='p.id')
+    with sqlite3.connect(prompts_db_path) as conn:
+        rows, total_pages, _ = paginator.fetch(conn, query, page, per_page, read_generation(conn), prompts_db_path)
+    prompts = [row[0] for row in rows]
     return prompts, total_pages, page
 
 
 def update_prompt_keywords(prompt_name, new_keywords):
     logging.debug(f"update_prompt_keywords: Updating keywords for prompt: {prompt_name}")
     try:
-        with sqlite3.connect(get_database_path('prompts.db')) as conn:
+        with sqlite3.connect(get_prompts_db_path()) as conn:
             cursor = conn.cursor()
 
             cursor.execute('SELECT id FROM Prompts WHERE name = ?', (prompt_name,))
@@ -1586,21 +1891,16 @@ def update_prompt_keywords(prompt_name, new_keywords):
                 return "Prompt not found."
             prompt_id = prompt_id[0]
 
-            cursor.execute('DELETE FROM PromptKeywords WHERE prompt_id = ?', (prompt_id,))
-
             normalized_keywords = [normalize_keyword(k) for k in new_keywords if k.strip()]
-            for keyword in set(normalized_keywords):  # Use set to remove duplicates
-                cursor.execute('INSERT OR IGNORE INTO Keywords (keyword) VALUES (?)', (keyword,))
-                cursor.execute('SELECT id FROM Keywords WHERE keyword = ?', (keyword,))
-                keyword_id = cursor.fetchone()[0]
-                cursor.execute('INSERT INTO PromptKeywords (prompt_id, keyword_id) VALUES (?, ?)',
-                               (prompt_id, keyword_id))
+            prompt_keywords.link_keywords(conn, PROMPT_KEYWORD_LINKS, {prompt_id: normalized_keywords})
 
             # Remove unused keywords
             cursor.execute('''
                 DELETE FROM Keywords
                 WHERE id NOT IN (SELECT DISTINCT keyword_id FROM PromptKeywords)
             ''')
+            if cursor.rowcount:
+                prompt_keywords.forget()
         return "Keywords updated successfully."
     except sqlite3.Error as e:
         return f"Database error: {e}"
@@ -1638,7 +1938,7 @@ def load_prompt_details(selected_prompt):
 def update_prompt_in_db(title, author, description, system_prompt, user_prompt):
     logging.debug(f"update_prompt_in_db: Updating prompt: {title}")
     try:
-        with sqlite3.connect(get_database_path('prompts.db')) as conn:
+        with sqlite3.connect(get_prompts_db_path()) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE Prompts SET author = ?, details = ?, system = ?, user = ? WHERE name = ?",
@@ -1651,12 +1951,10 @@ def update_prompt_in_db(title, author, description, system_prompt, user_prompt):
         return f"Error updating prompt: {e}"
 
 
-create_prompts_db()
-
 def delete_prompt(prompt_id):
     logging.debug(f"delete_prompt: Deleting prompt with ID: {prompt_id}")
     try:
-        with sqlite3.connect(get_database_path('prompts.db')) as conn:
+        with sqlite3.connect(get_prompts_db_path()) as conn:
             cursor = conn.cursor()
 
             # Delete associated keywords
@@ -1691,7 +1989,7 @@ def update_media_content(selected_item, item_mapping, content_input, prompt_inpu
                 cursor = conn.cursor()
 
                 # Update the main content in the Media table
-                cursor.execute("UPDATE Media SET content = ? WHERE id = ?", (content_input, media_id))
+                cursor.execute("UPDATE Media SET content = ? WHERE id = ?", (compress_text(content_input), media_id))
 
                 # Check if a row already exists in MediaModifications for this media_id
                 cursor.execute("SELECT COUNT(*) FROM MediaModifications WHERE media_id = ?", (media_id,))
@@ -1744,7 +2042,7 @@ def load_media_content(media_id: int) -> dict:
     try:
         with db.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT content, prompt, summary FROM Media WHERE id = ?", (media_id,))
+            cursor.execute("SELECT decompress_text(content), prompt, summary FROM Media WHERE id = ?", (media_id,))
             result = cursor.fetchone()
             if result:
                 return {
@@ -1792,7 +2090,7 @@ def fetch_items_by_content(search_query: str):
     try:
         with db.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id, title, url FROM Media WHERE content LIKE ?", (f'%{search_query}%',))
+            cursor.execute("SELECT id, title, url FROM Media WHERE decompress_text(content) LIKE ?", (f'%{search_query}%',))
             results = cursor.fetchall()
             return results
     except sqlite3.Error as e:
@@ -1811,7 +2109,7 @@ def fetch_item_details_single(media_id: int):
                 LIMIT 1
             """, (media_id,))
             prompt_summary_result = cursor.fetchone()
-            cursor.execute("SELECT content FROM Media WHERE id = ?", (media_id,))
+            cursor.execute("SELECT decompress_text(content) FROM Media WHERE id = ?", (media_id,))
             content_result = cursor.fetchone()
 
             prompt = prompt_summary_result[0] if prompt_summary_result else "No prompt available."
@@ -1841,14 +2139,10 @@ def convert_to_markdown(item):
 # Gradio function to handle user input and display results with pagination for displaying entries in the DB
 def fetch_paginated_data(page: int, results_per_page: int) -> Tuple[List[Tuple], int]:
     try:
-        offset = (page - 1) * results_per_page
+        query = PageQuery('id, title, url', 'Media', (('id', 'ASC'),))
         with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM Media")
-            total_entries = cursor.fetchone()[0]
-
-            cursor.execute("SELECT id, title, url FROM Media LIMIT ? OFFSET ?", (results_per_page, offset))
-            results = cursor.fetchall()
+            generation = read_generation(conn)
+            results, _, total_entries = paginator.fetch(conn, query, page, results_per_page, generation, db.db_path)
 
         return results, total_entries
     except sqlite3.Error as e:
@@ -1871,44 +2165,28 @@ def view_database(page: int, results_per_page: int) -> Tuple[str, str, int]:
 
 
 def search_and_display_items(query, search_type, page, entries_per_page,char_count):
-    offset = (page - 1) * entries_per_page
     try:
-        with sqlite3.connect('./Databases/media_summary.db') as conn:
-            cursor = conn.cursor()
-
-            # Adjust the SQL query based on the search type
-            if search_type == "Title":
-                where_clause = "WHERE m.title LIKE ?"
-            elif search_type == "URL":
-                where_clause = "WHERE m.url LIKE ?"
-            elif search_type == "Keyword":
-                where_clause = "WHERE k.keyword LIKE ?"
-            elif search_type == "Content":
-                where_clause = "WHERE m.content LIKE ?"
-            else:
-                raise ValueError("Invalid search type")
-
-            cursor.execute(f'''
-                SELECT m.id, m.title, m.url, m.content, mm.summary, GROUP_CONCAT(k.keyword, ', ') as keywords
-                FROM Media m
-                LEFT JOIN MediaModifications mm ON m.id = mm.media_id
-                LEFT JOIN MediaKeywords mk ON m.id = mk.media_id
-                LEFT JOIN Keywords k ON mk.keyword_id = k.id
-                {where_clause}
-                GROUP BY m.id
-                ORDER BY m.ingestion_date DESC
-                LIMIT ? OFFSET ?
-            ''', (f'%{query}%', entries_per_page, offset))
-            items = cursor.fetchall()
-
-            cursor.execute(f'''
-                SELECT COUNT(DISTINCT m.id)
-                FROM Media m
-                LEFT JOIN MediaKeywords mk ON m.id = mk.media_id
-                LEFT JOIN Keywords k ON mk.keyword_id = k.id
-                {where_clause}
-            ''', (f'%{query}%',))
-            total_items = cursor.fetchone()[0]
+        # Adjust the SQL query based on the search type
+        if search_type == "Title":
+            where_clause = "m.title LIKE ?"
+        elif search_type == "URL":
+            where_clause = "m.url LIKE ?"
+        elif search_type == "Keyword":
+            where_clause = "k.keyword LIKE ?"
+        elif search_type == "Content":
+            where_clause = "decompress_text(m.content) LIKE ?"
+        else:
+            raise ValueError("Invalid search type")
+
+        page_query = PageQuery(
+            "m.id, m.title, m.url, decompress_text(m.content), mm.summary, GROUP_CONCAT(k.keyword, ', ') as keywords",
+            "Media m LEFT JOIN MediaModifications mm ON m.id = mm.media_id "
+            "LEFT JOIN MediaKeywords mk ON m.id = mk.media_id LEFT JOIN Keywords k ON mk.keyword_id = k.id",
+            (('m.ingestion_date', 'DESC'), ('m.id', 'DESC')),
+            where=where_clause, params=(f'%{query}%',), group_by='m.id')
+        with db.get_connection() as conn:
+            items, total_pages, total_items = paginator.fetch(conn, page_query, page, entries_per_page,
+                                                              read_generation(conn), db.db_path)
 
         results = ""
         for item in items:
@@ -1939,7 +2217,6 @@ def search_and_display_items(query, search_type, page, entries_per_page,char_cou
             </div>
             """
 
-        total_pages = (total_items + entries_per_page - 1) // entries_per_page
         pagination = f"Page {page} of {total_pages} (Total items: {total_items})"
 
         return results, pagination, total_pages
@@ -1973,24 +2250,18 @@ def import_obsidian_note_to_db(note_data):
                     UPDATE Media
                     SET content = ?, author = ?, ingestion_date = CURRENT_TIMESTAMP, url = ?
                     WHERE id = ?
-                """, (note_data['content'], note_data['frontmatter'].get('author', 'Unknown'), relative_path, media_id))
-
-                cursor.execute("DELETE FROM MediaKeywords WHERE media_id = ?", (media_id,))
+                """, (compress_text(note_data['content']), note_data['frontmatter'].get('author', 'Unknown'), relative_path,
+                      media_id))
             else:
                 cursor.execute("""
                     INSERT INTO Media (title, content, type, author, ingestion_date, url)
                     VALUES (?, ?, 'obsidian_note', ?, CURRENT_TIMESTAMP, ?)
-                """, (note_data['title'], note_data['content'], note_data['frontmatter'].get('author', 'Unknown'),
+                """, (note_data['title'], compress_text(note_data['content']), note_data['frontmatter'].get('author', 'Unknown'),
                       relative_path))
 
                 media_id = cursor.lastrowid
 
-            for tag in note_data['tags']:
-                cursor.execute("INSERT OR IGNORE INTO Keywords (keyword) VALUES (?)", (tag,))
-                cursor.execute("SELECT id FROM Keywords WHERE keyword = ?", (tag,))
-                keyword_id = cursor.fetchone()[0]
-                cursor.execute("INSERT OR IGNORE INTO MediaKeywords (media_id, keyword_id) VALUES (?, ?)",
-                               (media_id, keyword_id))
+            media_keywords.link_keywords(conn, MEDIA_KEYWORD_LINKS, {media_id: note_data['tags']})
 
             frontmatter_str = yaml.dump(note_data['frontmatter'])
             cursor.execute("""
@@ -2002,6 +2273,7 @@ def import_obsidian_note_to_db(note_data):
             cursor.execute('INSERT OR REPLACE INTO media_fts (rowid, title, content) VALUES (?, ?, ?)',
                            (media_id, note_data['title'], note_data['content']))
 
+        invalidate_keyword_media_index()
         action = "Updated" if existing_note else "Imported"
         logger.info(f"{action} Obsidian note: {note_data['title']}")
         return True, None
@@ -2228,7 +2500,7 @@ def get_transcripts(media_id):
         with db.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-            SELECT id, whisper_model, transcription, created_at
+            SELECT id, whisper_model, decompress_text(transcription), created_at
             FROM Transcripts
             WHERE media_id = ?
             ORDER BY created_at DESC
@@ -2243,7 +2515,7 @@ def get_latest_transcription(media_id: int):
         with db.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT transcription
+                SELECT decompress_text(transcription)
                 FROM Transcripts
                 WHERE media_id = ?
                 ORDER BY created_at DESC
@@ -2300,36 +2572,12 @@ def get_trashed_items() -> List[Dict]:
 
 
 def permanently_delete_item(media_id: int) -> None:
-    with db.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM Media WHERE id = ?", (media_id,))
-        cursor.execute("DELETE FROM MediaKeywords WHERE media_id = ?", (media_id,))
-        cursor.execute("DELETE FROM MediaVersion WHERE media_id = ?", (media_id,))
-        cursor.execute("DELETE FROM MediaModifications WHERE media_id = ?", (media_id,))
-        cursor.execute("DELETE FROM media_fts WHERE rowid = ?", (media_id,))
-        conn.commit()
+    purge_media([media_id])
 
 
 def empty_trash(days_threshold: int) -> Tuple[int, int]:
-    threshold_date = datetime.now() - timedelta(days=days_threshold)
-    with db.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id FROM Media 
-            WHERE is_trash = 1 AND trash_date <= ?
-        """, (threshold_date,))
-        old_items = cursor.fetchall()
-
-        for item in old_items:
-            permanently_delete_item(item[0])
-
-        cursor.execute("""
-            SELECT COUNT(*) FROM Media 
-            WHERE is_trash = 1 AND trash_date > ?
-        """, (threshold_date,))
-        remaining_items = cursor.fetchone()[0]
-
-    return len(old_items), remaining_items
+    report = purge_trash(days_threshold)
+    return report['media'], report['remaining']
 
 
 def user_delete_item(media_id: int, force: bool = False) -> str:
@@ -2365,7 +2613,7 @@ def get_chunk_text(media_id: int, chunk_index: int) -> str:
 def get_full_document(media_id: int) -> str:
     with db.get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT content FROM Media WHERE id = ?", (media_id,))
+        cursor.execute("SELECT decompress_text(content) FROM Media WHERE id = ?", (media_id,))
         result = cursor.fetchone()
     return result[0] if result else None
 
@@ -2373,33 +2621,14 @@ def get_all_content_from_database() -> List[Dict[str, Any]]:
     """
     Retrieve all media content from the database that requires embedding.
 
+    Loads the whole library at once; prefer iter_all_content_from_database() for anything that can stream.
+
     Returns:
         List[Dict[str, Any]]: A list of dictionaries, each containing the media ID, content, title, and other relevant fields.
     """
     try:
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, content, title, author, type
-                FROM Media
-                WHERE is_trash = 0  -- Exclude items marked as trash
-            """)
-            media_items = cursor.fetchall()
-
-            all_content = [
-                {
-                    'id': item[0],
-                    'content': item[1],
-                    'title': item[2],
-                    'author': item[3],
-                    'type': item[4]
-                }
-                for item in media_items
-            ]
-
-        return all_content
-
-    except sqlite3.Error as e:
+        return list(iter_all_content_from_database())
+    except DatabaseError as e:
         logger.error(f"Error retrieving all content from database: {e}")
         raise DatabaseError(f"Error retrieving all content from database: {e}")
 
@@ -2408,7 +2637,7 @@ def get_media_content(media_id: int) -> str:
     try:
         with db.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT content FROM Media WHERE id = ?", (media_id,))
+            cursor.execute("SELECT decompress_text(content) FROM Media WHERE id = ?", (media_id,))
             result = cursor.fetchone()
             if result is None:
                 raise ValueError(f"No media found with id {media_id}")
@@ -2436,7 +2665,7 @@ def get_media_transcripts(media_id):
         with db.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-            SELECT id, whisper_model, transcription, created_at
+            SELECT id, whisper_model, decompress_text(transcription), created_at
             FROM Transcripts
             WHERE media_id = ?
             ORDER BY created_at DESC
@@ -2460,7 +2689,7 @@ def get_specific_transcript(transcript_id: int) -> Dict:
         with db.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-            SELECT id, whisper_model, transcription, created_at
+            SELECT id, whisper_model, decompress_text(transcription), created_at
             FROM Transcripts
             WHERE id = ?
             ''', (transcript_id,))
@@ -2610,25 +2839,10 @@ def delete_specific_prompt(prompt_id: int) -> str:
 
 def get_paginated_files(page: int = 1, results_per_page: int = 50) -> Tuple[List[Tuple[int, str]], int, int]:
     try:
-        offset = (page - 1) * results_per_page
+        query = PageQuery('id, title', 'Media', (('title', 'ASC'), ('id', 'ASC')))
         with db.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # Get total count of media items
-            cursor.execute("SELECT COUNT(*) FROM Media")
-            total_entries = cursor.fetchone()[0]
-
-            # Fetch paginated results
-            cursor.execute("""
-                SELECT id, title 
-                FROM Media 
-                ORDER BY title
-                LIMIT ? OFFSET ?
-            """, (results_per_page, offset))
-            results = cursor.fetchall()
-
-        # Calculate total pages
-        total_pages = (total_entries + results_per_page - 1) // results_per_page
+            generation = read_generation(conn)
+            results, total_pages, _ = paginator.fetch(conn, query, page, results_per_page, generation, db.db_path)
 
         return results, total_pages, page
     except sqlite3.Error as e:
@@ -2641,9 +2855,441 @@ def get_paginated_files(page: int = 1, results_per_page: int = 50) -> Tuple[List
 #######################################################################################################################
 
 
+#######################################################################################################################
+#
+# Purging media
+#
+# Deleting a media item for good removes everything that belongs to it - keywords, versions, transcripts, chunks,
+# chats, its media_fts row and its vectors - so nothing is left behind for later scans to wade through. Items are
+# deleted in batches of set-based statements, one transaction per batch, so a large purge neither holds the write
+# lock for long nor loses finished batches if it is interrupted. Afterwards the freed pages are given back to the
+# file system ([Trash] vacuum in config.txt).
+
+# Tables with rows belonging to a media item, children before Media itself. {ids} stands for the batch's placeholders.
+MEDIA_DEPENDENT_TABLES = (
+    ('ChatMessages', 'conversation_id IN (SELECT id FROM ChatConversations WHERE media_id IN ({ids}))'),
+    ('ChatConversations', 'media_id IN ({ids})'),
+    ('MediaKeywords', 'media_id IN ({ids})'),
+    ('MediaVersion', 'media_id IN ({ids})'),
+    ('MediaModifications', 'media_id IN ({ids})'),
+    ('Transcripts', 'media_id IN ({ids})'),
+    ('MediaChunks', 'media_id IN ({ids})'),
+    ('UnvectorizedMediaChunks', 'media_id IN ({ids})'),
+    ('DocumentVersions', 'media_id IN ({ids})'),
+    ('media_fts', 'rowid IN ({ids})'),
+    ('Media', 'id IN ({ids})'),
+)
+
+VACUUM_MODES = ('incremental', 'full', 'none')
+
+
+def get_trash_settings() -> Dict[str, Any]:
+    config = _read_config()
+    vacuum = config.get('Trash', 'vacuum', fallback='incremental').strip().lower()
+    if vacuum not in VACUUM_MODES:
+        logger.warning(f"Unknown [Trash] vacuum mode '{vacuum}', using 'incremental'")
+        vacuum = 'incremental'
+    return {
+        'batch_size': min(max(config.getint('Trash', 'purge_batch_size', fallback=200), 1), MAX_QUERY_PARAMETERS),
+        'vacuum': vacuum,
+        'purge_vectors': config.getboolean('Trash', 'purge_vectors', fallback=True),
+    }
+
+
+def _page_counts(conn) -> Tuple[int, int, int]:
+    """(page_size, page_count, freelist_count) of the main database."""
+    return tuple(conn.execute(f'PRAGMA {pragma}').fetchone()[0]
+                 for pragma in ('page_size', 'page_count', 'freelist_count'))
+
+
+def _purge_media_batch(conn, media_ids: List[int], rows: Dict[str, int]) -> List[Tuple[int, str]]:
+    """Delete one batch of media items and their dependent rows; returns the (id, type) of the items deleted."""
+    placeholders = ', '.join('?' * len(media_ids))
+    found = conn.execute(f"SELECT id, type FROM Media WHERE id IN ({placeholders})", media_ids).fetchall()
+    for table, condition in MEDIA_DEPENDENT_TABLES:
+        cursor = conn.execute(f"DELETE FROM {table} WHERE {condition.format(ids=placeholders)}", media_ids)
+        rows[table] += max(cursor.rowcount, 0)
+    return found
+
+
+def _purge_vectors(media: Dict[int, str], batch_size: int) -> int:
+    """
+    Delete the vectors and dedup index entries of purged media: the per-item collections ("<type>_<id>") entirely,
+    and the item's records (chunks, RAPTOR nodes) in every other collection. Returns the number of vectors deleted.
+    """
+    media_keys = sorted(str(media_id) for media_id in media)
+    own_collections = {f"{media_type}_{media_id}" for media_id, media_type in media.items()}
+    vector_store = get_vector_store()
+    dedup_index = get_dedup_index()
+    deleted = 0
+    orphans = []
+    for name in vector_store.list_collections():
+        collection = vector_store.get_collection(name)
+        count_before = collection.count()
+        if name in own_collections:
+            vector_store.delete_collection(name)
+            deleted += count_before
+            if dedup_index is not None:
+                orphans.extend(dedup_index.remove_collection(name))
+            continue
+        for start in range(0, len(media_keys), batch_size):
+            collection.delete(where={"media_id": {"$in": media_keys[start:start + batch_size]}})
+        deleted += count_before - collection.count()
+        if dedup_index is not None:
+            for media_id in media:
+                orphans.extend(dedup_index.remove_prefix(chunk_key(name, f"{media_id}_chunk_")))
+    if orphans:
+        # Chunks of other media that duplicated purged chunks need vectors of their own now
+        chromadb_library.reembed_orphaned_chunks()
+    return deleted
+
+
+def _purge_bm25_entries(media_ids: Iterable[int]) -> None:
+    """Drop purged media and their chunks from the BM25 indexes (see RAGSystem.index_document), if any were built."""
+    if not os.path.exists(get_bm25_settings()['index_path']):
+        return
+    document_index = get_bm25_index('document')
+    chunk_index = get_bm25_index('chunk')
+    document_index.remove_documents(str(media_id) for media_id in media_ids)
+    for media_id in media_ids:
+        chunk_index.remove_documents_with_prefix(f"{media_id}_chunk_")
+
+
+def _reclaim_free_pages(conn, vacuum: str) -> str:
+    """Give free pages back to the file system as `vacuum` asks; returns what actually ran."""
+    if vacuum == 'none':
+        return 'none'
+    auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+    if vacuum == 'full':
+        # Switch to incremental auto-vacuum while rebuilding, so later purges can shrink the file cheaply
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        return 'full'
+    if auto_vacuum == 1:
+        # auto_vacuum = FULL already truncated the file at each commit
+        return 'auto'
+    if auto_vacuum == 2:
+        # Through executescript so the pragma runs to completion; a single execute() step frees just one page
+        conn.executescript('PRAGMA incremental_vacuum;')
+        return 'incremental'
+    logger.info("The media database does not use incremental auto-vacuum; freed pages will be reused by later "
+                "writes. Set [Trash] vacuum = full once to shrink the file and enable it.")
+    return 'none'
+
+
+def purge_media(media_ids: Iterable[int], batch_size: Optional[int] = None, vacuum: Optional[str] = None,
+                purge_vectors: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Permanently delete media items and everything that belongs to them (MEDIA_DEPENDENT_TABLES, vectors, dedup
+    and BM25 index entries), `batch_size` items per transaction, then reclaim the freed space. Ids without a Media row still
+    have leftover dependent rows removed. Arguments left as None come from [Trash] in config.txt.
+
+    Returns a report: 'media' (items deleted), 'rows' ({table: rows deleted}), 'vectors' (vectors deleted),
+    'freed_bytes' (space no longer used by data), 'reclaimed_bytes' (by how much the file shrank) and 'vacuum'
+    (what was run to shrink it).
+    """
+    settings = get_trash_settings()
+    batch_size = min(max(batch_size or settings['batch_size'], 1), MAX_QUERY_PARAMETERS)
+    vacuum = vacuum or settings['vacuum']
+    if vacuum not in VACUUM_MODES:
+        raise InputError(f"Unknown vacuum mode: {vacuum}")
+    purge_vectors = settings['purge_vectors'] if purge_vectors is None else purge_vectors
+    media_ids = sorted({int(media_id) for media_id in media_ids})
+    report = {'media': 0, 'rows': {table: 0 for table, _ in MEDIA_DEPENDENT_TABLES}, 'vectors': 0,
+              'freed_bytes': 0, 'reclaimed_bytes': 0, 'vacuum': 'none'}
+    if not media_ids:
+        return report
+
+    purged: Dict[int, str] = {}
+    try:
+        with db.get_connection() as conn:
+            page_size, pages_before, free_before = _page_counts(conn)
+        try:
+            for start in range(0, len(media_ids), batch_size):
+                batch = media_ids[start:start + batch_size]
+                with db.transaction() as conn:
+                    purged.update(_purge_media_batch(conn, batch, report['rows']))
+        finally:
+            # Batches already committed are gone even if a later one failed
+            invalidate_keyword_media_index()
+            for media_id in purged:
+                document_version_cache.invalidate(media_id)
+        report['media'] = report['rows']['Media']
+        logger.info(f"Purged {report['media']} media items ({sum(report['rows'].values())} rows)")
+
+        with db.get_connection() as conn:
+            _, pages_after, free_after = _page_counts(conn)
+            report['freed_bytes'] = max(((pages_before - free_before) - (pages_after - free_after)) * page_size, 0)
+            report['vacuum'] = _reclaim_free_pages(conn, vacuum)
+            report['reclaimed_bytes'] = max((pages_before - _page_counts(conn)[1]) * page_size, 0)
+    except sqlite3.Error as e:
+        logger.error(f"Error purging media items: {e}")
+        raise DatabaseError(f"Error purging media items: {e}")
+
+    if purged:
+        try:
+            _purge_bm25_entries(purged)
+        except sqlite3.Error as e:
+            # sync_bm25_index also drops entries whose media row is gone
+            logger.error(f"Error removing purged media from the BM25 index: {e}")
+    if purge_vectors and purged:
+        try:
+            report['vectors'] = _purge_vectors(purged, batch_size)
+        except Exception as e:
+            # The database rows are gone either way; leftover vectors are skipped by searches that check the DB
+            logger.error(f"Error deleting vectors of purged media: {e}")
+    return report
+
+
+def purge_trash(days_threshold: int, **purge_options) -> Dict[str, Any]:
+    """
+    Purge the items that have been in the trash for at least `days_threshold` days (see purge_media for the options
+    and the report). The report also has 'remaining': items still in the trash.
+    """
+    threshold_date = datetime.now() - timedelta(days=days_threshold)
+    with db.get_connection() as conn:
+        old_items = [row[0] for row in conn.execute(
+            "SELECT id FROM Media WHERE is_trash = 1 AND trash_date <= ?", (threshold_date,))]
+    report = purge_media(old_items, **purge_options)
+    with db.get_connection() as conn:
+        report['remaining'] = conn.execute("SELECT COUNT(*) FROM Media WHERE is_trash = 1 AND trash_date > ?",
+                                           (threshold_date,)).fetchone()[0]
+    return report
+
+#
+# End of Purging media
+#######################################################################################################################
+
+
+#######################################################################################################################
+#
+# Streaming reads and exports
+#
+# Whole-library reads (exports, embedding backfills) yield rows in batches instead of building one list, so memory
+# stays flat however large the library is. Media rows are read in keyset batches (id > last id seen), each batch a
+# short read of its own: callers may write between rows - e.g. mark an item processed - without holding a read
+# transaction open for the whole run, and without skipping rows whose filter column they just changed.
+
+# Columns that iter_media_rows can project, and the SQL that reads each one
+MEDIA_STREAM_COLUMNS = {
+    'id': 'id',
+    'url': 'url',
+    'title': 'title',
+    'type': 'type',
+    'content': 'decompress_text(content)',
+    'author': 'author',
+    'ingestion_date': 'ingestion_date',
+    'prompt': 'prompt',
+    'summary': 'summary',
+    'transcription_model': 'transcription_model',
+    'is_trash': 'is_trash',
+    'trash_date': 'trash_date',
+    'vector_processing': 'vector_processing',
+    # Latest prompt/summary pair from MediaModifications, as shown by fetch_item_details
+    'latest_prompt': '(SELECT mm.prompt FROM MediaModifications mm WHERE mm.media_id = Media.id '
+                     'ORDER BY mm.modification_date DESC LIMIT 1)',
+    'latest_summary': '(SELECT mm.summary FROM MediaModifications mm WHERE mm.media_id = Media.id '
+                      'ORDER BY mm.modification_date DESC LIMIT 1)',
+}
+
+CONTENT_STREAM_COLUMNS = ('id', 'content', 'title', 'author', 'type')
+
+
+def get_export_settings() -> Dict[str, Any]:
+    config = _read_config()
+    return {
+        'batch_size': max(config.getint('Export', 'stream_batch_size', fallback=200), 1),
+        'export_dir': config.get('Export', 'export_dir', fallback='exports'),
+    }
+
+
+def iter_query_rows(conn, query: str, params: Iterable[Any] = (), batch_size: Optional[int] = None) -> Iterator[tuple]:
+    """Yield the rows of `query`, fetching `batch_size` at a time from a cursor that stays open until exhausted."""
+    batch_size = batch_size or get_export_settings()['batch_size']
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, tuple(params))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+# Most rows are not in the trash, so this filter is checked while walking the primary key; the unary + keeps SQLite
+# from using an is_trash index instead, which would sort every untrashed row again for each batch.
+NOT_IN_TRASH = '+is_trash = 0'
+
+
+def iter_media_rows(columns: Sequence[str] = CONTENT_STREAM_COLUMNS, where: str = NOT_IN_TRASH,
+                    params: Iterable[Any] = (), batch_size: Optional[int] = None, database=None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield Media rows matching `where` (SQL, with `params`) in id order, as dicts of the requested `columns` (keys of
+    MEDIA_STREAM_COLUMNS). Only one batch of rows is held in memory.
+    """
+    unknown = [column for column in columns if column not in MEDIA_STREAM_COLUMNS]
+    if unknown:
+        raise InputError(f"Unknown media columns: {', '.join(unknown)}")
+    database = database or db
+    batch_size = batch_size or get_export_settings()['batch_size']
+    selected = ', '.join(['id'] + [MEDIA_STREAM_COLUMNS[column] for column in columns])
+    query = f"SELECT {selected} FROM Media WHERE ({where}) AND id > ? ORDER BY id LIMIT ?"
+    params = tuple(params)
+    last_id = 0
+    while True:
+        try:
+            with database.get_connection() as conn:
+                rows = conn.execute(query, params + (last_id, batch_size)).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error streaming media rows: {e}")
+            raise DatabaseError(f"Error streaming media rows: {e}")
+        for row in rows:
+            yield dict(zip(columns, row[1:]))
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1][0]
+
+
+def iter_all_content_from_database(columns: Sequence[str] = CONTENT_STREAM_COLUMNS,
+                                   batch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Stream every media item that is not in the trash; see get_all_content_from_database."""
+    return iter_media_rows(columns, NOT_IN_TRASH, (), batch_size)
+
+
+def iter_unprocessed_media(db, batch_size: Optional[int] = None) -> Iterator[Tuple[int, str, str, str]]:
+    """Stream (id, content, type, file_name) of media not yet vectorized, as get_unprocessed_media returns them."""
+    for row in iter_media_rows(('id', 'content', 'type', 'title'), 'vector_processing = 0', (), batch_size, db):
+        yield row['id'], row['content'], row['type'], row['title'] or ''
+
+
+def iter_media_by_keyword(keyword: str, columns: Sequence[str] = ('id', 'title', 'content', 'latest_prompt',
+                                                                 'latest_summary'),
+                          batch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Stream media tagged with a keyword containing `keyword` (the same match as fetch_items_by_keyword)."""
+    where = ("id IN (SELECT mk.media_id FROM MediaKeywords mk JOIN Keywords k ON mk.keyword_id = k.id "
+             "WHERE k.keyword LIKE ?)")
+    return iter_media_rows(columns, where, (f'%{keyword}%',), batch_size)
+
+
+def iter_search_results(search_query: str, search_fields: List[str], keywords: str, page: Optional[int] = None,
+                        results_per_page: int = 1000, batch_size: Optional[int] = None) -> Iterator[tuple]:
+    """Stream sqlite_search_db rows: one page of them, or every result when `page` is None."""
+    query, params = _build_search_query(search_query, search_fields, keywords)
+    if page is not None:
+        query += "\n        LIMIT ? OFFSET ?"
+        params.extend([results_per_page, (page - 1) * results_per_page])
+    with db.get_connection() as conn:
+        yield from iter_query_rows(conn, query, params, batch_size)
+
+
+def media_markdown(item: Dict[str, Any]) -> str:
+    return (f"# {item.get('title')}\n\n## Prompt\n{item.get('latest_prompt') or ''}\n\n"
+            f"## Summary\n{item.get('latest_summary') or ''}\n\n## Content\n{item.get('content') or ''}")
+
+
+def export_media_library(path: str, export_format: str = 'jsonl', columns: Optional[Sequence[str]] = None,
+                         include_trash: bool = False, batch_size: Optional[int] = None) -> int:
+    """
+    Stream the media library to `path` as 'csv', 'jsonl' or 'markdown_zip' (one Markdown file per item). Returns the
+    number of items written.
+    """
+    if export_format == 'markdown_zip':
+        columns = columns or ('id', 'title', 'content', 'latest_prompt', 'latest_summary')
+    else:
+        columns = columns or ('id', 'url', 'title', 'type', 'author', 'ingestion_date', 'content', 'latest_prompt',
+                              'latest_summary')
+    items = iter_media_rows(columns, '1 = 1' if include_trash else NOT_IN_TRASH, (), batch_size)
+    if export_format == 'csv':
+        count = write_csv(path, list(columns), ([item[column] for column in columns] for item in items))
+    elif export_format == 'jsonl':
+        count = write_jsonl(path, items)
+    elif export_format == 'markdown_zip':
+        count = write_markdown_zip(path, items, media_markdown,
+                                   lambda item: f"{item.get('id')}_{safe_file_name(item.get('title'))}")
+    else:
+        raise InputError(f"Unsupported export format: {export_format}")
+    logging.info(f"Exported {count} media items to {path} ({export_format})")
+    return count
+
+#
+# End of Streaming reads and exports
+#######################################################################################################################
+
+
 #######################################################################################################################
 #
 # Functions to manage document versions
+#
+# Versions are stored as compressed snapshots plus compressed deltas against the previous version (see
+# Version_Store.py); rows written before that keep their plain `content` with storage 'full' until compacted.
+
+document_version_cache = ReconstructionCache(_read_config().getint('Document-Versions', 'cache_entries', fallback=64))
+
+
+def get_document_version_settings() -> Dict[str, int]:
+    config = _read_config()
+    return {
+        'snapshot_interval': max(config.getint('Document-Versions', 'snapshot_interval', fallback=10), 1),
+    }
+
+
+def _decode_document_version(storage: str, content: Optional[str], data: Optional[bytes],
+                             previous: Optional[str]) -> str:
+    if storage == STORAGE_SNAPSHOT:
+        return decode_snapshot(data)
+    if storage == STORAGE_DELTA:
+        if previous is None:
+            raise DatabaseError("Document version delta has no base version")
+        return apply_delta(previous, data)
+    return content
+
+
+def _reconstruct_document_version(cursor, media_id: int, version_number: int) -> Optional[str]:
+    """Rebuild one version from the nearest snapshot at or below it: at most snapshot_interval - 1 deltas."""
+    cached = document_version_cache.get(media_id, version_number)
+    if cached is not None:
+        return cached
+    cursor.execute('''
+        SELECT MAX(version_number) FROM DocumentVersions
+        WHERE media_id = ? AND version_number <= ? AND storage != ?
+    ''', (media_id, version_number, STORAGE_DELTA))
+    snapshot_version = cursor.fetchone()[0]
+    if snapshot_version is None:
+        return None
+    cursor.execute('''
+        SELECT version_number, storage, content, data FROM DocumentVersions
+        WHERE media_id = ? AND version_number BETWEEN ? AND ?
+        ORDER BY version_number
+    ''', (media_id, snapshot_version, version_number))
+    content, last_version = None, None
+    for last_version, storage, text, data in cursor.fetchall():
+        content = _decode_document_version(storage, text, data, content)
+    if last_version != version_number:
+        return None
+    document_version_cache.put(media_id, version_number, content)
+    return content
+
+
+def _encode_document_version(cursor, media_id: int, content: str, previous_version: int):
+    """Return (storage, data, base_version) for a new version following `previous_version` (0 if none)."""
+    snapshot = encode_snapshot(content)
+    if previous_version:
+        cursor.execute('''
+            SELECT MAX(version_number) FROM DocumentVersions WHERE media_id = ? AND storage != ?
+        ''', (media_id, STORAGE_DELTA))
+        snapshot_version = cursor.fetchone()[0]
+        if snapshot_version is not None and \
+                previous_version - snapshot_version + 1 < get_document_version_settings()['snapshot_interval']:
+            base = _reconstruct_document_version(cursor, media_id, previous_version)
+            if base is not None:
+                delta = make_delta(base, content)
+                # Rewrites that share little with the previous version are cheaper as a snapshot
+                if len(delta) < len(snapshot):
+                    return STORAGE_DELTA, delta, previous_version
+    return STORAGE_SNAPSHOT, snapshot, None
+
 
 def create_document_version(media_id: int, content: str) -> int:
     logging.info(f"Attempting to create document version for media_id: {media_id}")
@@ -2673,15 +3319,18 @@ def create_document_version(media_id: int, content: str) -> int:
 
                 logging.debug(f"Inserting new version {new_version} for media_id: {media_id}")
 
-                # Insert new version
+                # Insert new version, as a delta against the latest one where that is smaller
+                storage, data, base_version = _encode_document_version(cursor, media_id, content, latest_version)
                 cursor.execute('''
-                    INSERT INTO DocumentVersions (media_id, version_number, content)
-                    VALUES (?, ?, ?)
-                ''', (media_id, new_version, content))
+                    INSERT INTO DocumentVersions (media_id, version_number, content, storage, data, base_version)
+                    VALUES (?, ?, NULL, ?, ?, ?)
+                ''', (media_id, new_version, storage, data, base_version))
 
                 # Commit the transaction
                 conn.commit()
-                logging.info(f"Successfully created document version {new_version} for media_id: {media_id}")
+                document_version_cache.put(media_id, new_version, content)
+                logging.info(f"Successfully created document version {new_version} for media_id: {media_id} "
+                             f"({storage}, {len(data)} bytes for {len(content)} characters)")
                 return new_version
             except Exception as e:
                 # If any error occurs, roll back the transaction
@@ -2705,7 +3354,7 @@ def get_document_version(media_id: int, version_number: int = None) -> Dict[str,
             if version_number is None:
                 # Get the latest version
                 cursor.execute('''
-                    SELECT id, version_number, content, created_at
+                    SELECT id, version_number, created_at
                     FROM DocumentVersions
                     WHERE media_id = ?
                     ORDER BY version_number DESC
@@ -2713,7 +3362,7 @@ def get_document_version(media_id: int, version_number: int = None) -> Dict[str,
                 ''', (media_id,))
             else:
                 cursor.execute('''
-                    SELECT id, version_number, content, created_at
+                    SELECT id, version_number, created_at
                     FROM DocumentVersions
                     WHERE media_id = ? AND version_number = ?
                 ''', (media_id, version_number))
@@ -2724,12 +3373,12 @@ def get_document_version(media_id: int, version_number: int = None) -> Dict[str,
                 return {
                     'id': result[0],
                     'version_number': result[1],
-                    'content': result[2],
-                    'created_at': result[3]
+                    'content': _reconstruct_document_version(cursor, media_id, result[1]),
+                    'created_at': result[2]
                 }
             else:
                 return {'error': f"No document version found for media_id {media_id}" + (f" and version_number {version_number}" if version_number is not None else "")}
-    except sqlite3.Error as e:
+    except (sqlite3.Error, DatabaseError) as e:
         error_message = f"Error retrieving document version: {e}"
         logging.error(error_message)
         return {'error': error_message}
@@ -2739,26 +3388,26 @@ def get_all_document_versions(media_id: int) -> List[Dict[str, Any]]:
         with db.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT id, version_number, content, created_at
+                SELECT id, version_number, storage, content, data, created_at
                 FROM DocumentVersions
                 WHERE media_id = ?
-                ORDER BY version_number DESC
+                ORDER BY version_number
             ''', (media_id,))
             results = cursor.fetchall()
 
-            if results:
-                return [
-                    {
-                        'id': row[0],
-                        'version_number': row[1],
-                        'content': row[2],
-                        'created_at': row[3]
-                    }
-                    for row in results
-                ]
-            else:
-                return []
-    except sqlite3.Error as e:
+            # Decode oldest to newest in one pass, each delta applying to the version before it
+            versions = []
+            content = None
+            for row in results:
+                content = _decode_document_version(row[2], row[3], row[4], content)
+                versions.append({
+                    'id': row[0],
+                    'version_number': row[1],
+                    'content': content,
+                    'created_at': row[5]
+                })
+            return versions[::-1]
+    except (sqlite3.Error, DatabaseError) as e:
         error_message = f"Error retrieving all document versions: {e}"
         logging.error(error_message)
         return [{'error': error_message}]
@@ -2767,17 +3416,38 @@ def delete_document_version(media_id: int, version_number: int) -> Dict[str, Any
     try:
         with db.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                DELETE FROM DocumentVersions
-                WHERE media_id = ? AND version_number = ?
-            ''', (media_id, version_number))
-            conn.commit()
+            cursor.execute("BEGIN EXCLUSIVE TRANSACTION")
+            try:
+                # A delta based on the version being deleted is rewritten as a snapshot first
+                cursor.execute('''
+                    SELECT version_number FROM DocumentVersions
+                    WHERE media_id = ? AND base_version = ? AND storage = ?
+                ''', (media_id, version_number, STORAGE_DELTA))
+                dependent = cursor.fetchone()
+                if dependent:
+                    dependent_content = _reconstruct_document_version(cursor, media_id, dependent[0])
+                    cursor.execute('''
+                        UPDATE DocumentVersions SET storage = ?, data = ?, content = NULL, base_version = NULL
+                        WHERE media_id = ? AND version_number = ?
+                    ''', (STORAGE_SNAPSHOT, encode_snapshot(dependent_content), media_id, dependent[0]))
 
-            if cursor.rowcount > 0:
+                cursor.execute('''
+                    DELETE FROM DocumentVersions
+                    WHERE media_id = ? AND version_number = ?
+                ''', (media_id, version_number))
+                deleted = cursor.rowcount
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                document_version_cache.invalidate(media_id)
+
+            if deleted > 0:
                 return {'success': f"Document version {version_number} for media_id {media_id} deleted successfully"}
             else:
                 return {'error': f"No document version found for media_id {media_id} and version_number {version_number}"}
-    except sqlite3.Error as e:
+    except (sqlite3.Error, DatabaseError) as e:
         error_message = f"Error deleting document version: {e}"
         logging.error(error_message)
         return {'error': error_message}
@@ -2786,39 +3456,85 @@ def rollback_to_version(media_id: int, version_number: int) -> Dict[str, Any]:
     try:
         with db.get_connection() as conn:
             cursor = conn.cursor()
-            
-            # Get the content of the version to rollback to
-            cursor.execute('''
-                SELECT content
-                FROM DocumentVersions
-                WHERE media_id = ? AND version_number = ?
-            ''', (media_id, version_number))
-            result = cursor.fetchone()
-            
-            if not result:
-                return {'error': f"No document version found for media_id {media_id} and version_number {version_number}"}
-            
-            rollback_content = result[0]
-            
-            # Create a new version with the content of the version to rollback to
-            cursor.execute('''
-                INSERT INTO DocumentVersions (media_id, version_number, content)
-                VALUES (?, (SELECT COALESCE(MAX(version_number), 0) + 1 FROM DocumentVersions WHERE media_id = ?), ?)
-            ''', (media_id, media_id, rollback_content))
-            
-            new_version_number = cursor.lastrowid
-            
-            conn.commit()
-            
-            return {
-                'success': f"Rolled back to version {version_number} for media_id {media_id}",
-                'new_version_number': new_version_number
-            }
-    except sqlite3.Error as e:
+
+            # Get the content of the version to rollback to (usually served from the reconstruction cache)
+            rollback_content = _reconstruct_document_version(cursor, media_id, version_number)
+
+        if rollback_content is None:
+            return {'error': f"No document version found for media_id {media_id} and version_number {version_number}"}
+
+        # Create a new version with the content of the version to rollback to
+        new_version_number = create_document_version(media_id, rollback_content)
+
+        return {
+            'success': f"Rolled back to version {version_number} for media_id {media_id}",
+            'new_version_number': new_version_number
+        }
+    except (sqlite3.Error, DatabaseError, ValueError) as e:
         error_message = f"Error rolling back to document version: {e}"
         logging.error(error_message)
         return {'error': error_message}
 
+
+def _compact_media_versions(cursor, media_id: int, snapshot_interval: int, stats: Dict[str, int]) -> None:
+    """Re-encode one media item's version history; runs inside the caller's transaction."""
+    cursor.execute('''
+        SELECT version_number, storage, content, data FROM DocumentVersions
+        WHERE media_id = ? ORDER BY version_number
+    ''', (media_id,))
+    previous, previous_version, snapshot_version = None, None, None
+    for version_number, storage, text, data in cursor.fetchall():
+        content = _decode_document_version(storage, text, data, previous)
+        stats['bytes_before'] += len((text or '').encode('utf-8')) + len(data or b'')
+        new_storage, new_data, base_version = STORAGE_SNAPSHOT, encode_snapshot(content), None
+        if previous is not None and version_number - snapshot_version < snapshot_interval:
+            delta = make_delta(previous, content)
+            if len(delta) < len(new_data):
+                new_storage, new_data, base_version = STORAGE_DELTA, delta, previous_version
+        if new_storage == STORAGE_SNAPSHOT:
+            snapshot_version = version_number
+        cursor.execute('''
+            UPDATE DocumentVersions SET storage = ?, data = ?, base_version = ?, content = NULL
+            WHERE media_id = ? AND version_number = ?
+        ''', (new_storage, new_data, base_version, media_id, version_number))
+        stats['bytes_after'] += len(new_data)
+        stats['versions'] += 1
+        previous, previous_version = content, version_number
+    stats['media'] += 1
+
+
+def compact_document_versions(media_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Re-encode version history written before delta storage (storage 'full') as snapshots plus deltas. Each media
+    item is rewritten in its own transaction. Returns row and byte counts before and after.
+
+    Databases upgraded by migration 2 are compacted in the background (the compact_document_versions backfill).
+    """
+    stats = {'media': 0, 'versions': 0, 'bytes_before': 0, 'bytes_after': 0}
+    snapshot_interval = get_document_version_settings()['snapshot_interval']
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        if media_id is None:
+            cursor.execute("SELECT DISTINCT media_id FROM DocumentVersions WHERE storage = ?", (STORAGE_FULL,))
+            media_ids = [row[0] for row in cursor.fetchall()]
+        else:
+            media_ids = [media_id]
+
+        for current_media_id in media_ids:
+            cursor.execute("BEGIN EXCLUSIVE TRANSACTION")
+            try:
+                _compact_media_versions(cursor, current_media_id, snapshot_interval, stats)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                document_version_cache.invalidate(current_media_id)
+
+    logging.info(f"Compacted {stats['versions']} document versions of {stats['media']} media items: "
+                 f"{stats['bytes_before']} -> {stats['bytes_after']} bytes")
+    return stats
+
 #
 # End of Functions to manage document versions
 #######################################################################################################################
@@ -2912,62 +3628,6 @@ def chunk_processor():
 #     chunk_queue.put(None)
 #     chunk_processor_thread.join()
 
-#FIXME - add into main db creation code
-def update_media_chunks_table():
-    with db.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS MediaChunks_new (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            media_id INTEGER,
-            chunk_text TEXT,
-            start_index INTEGER,
-            end_index INTEGER,
-            chunk_id TEXT,
-            FOREIGN KEY (media_id) REFERENCES Media(id)
-        )
-        ''')
-        cursor.execute('''
-        INSERT INTO MediaChunks_new (media_id, chunk_text, start_index, end_index)
-        SELECT media_id, chunk_text, start_index, end_index FROM MediaChunks
-        ''')
-        cursor.execute('DROP TABLE MediaChunks')
-        cursor.execute('ALTER TABLE MediaChunks_new RENAME TO MediaChunks')
-
-    logger.info("Updated MediaChunks table schema")
-
-update_media_chunks_table()
-# Above function is a dirty hack that should be merged into the initial DB creation statement. This is a placeholder
-# FIXME
-
-
-# This is backwards compatibility for older setups.
-# Function to add a missing column to the Media table
-def add_missing_column_if_not_exists(db, table_name, column_name, column_definition):
-    try:
-        # Check if the column already exists in the table
-        cursor = db.cursor()
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = [column[1] for column in cursor.fetchall()]
-
-        # If the column is not found, add it
-        if column_name not in columns:
-            logging.info(f"Adding missing column '{column_name}' to table '{table_name}'")
-            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_definition}")
-            db.commit()
-            logging.info(f"Column '{column_name}' added successfully.")
-        else:
-            logging.info(f"Column '{column_name}' already exists in table '{table_name}'")
-
-    except sqlite3.Error as e:
-        logging.error(f"Error checking or adding column '{column_name}' in table '{table_name}': {e}")
-        raise
-
-# Example usage of the function
-def update_media_table(db):
-    # Add chunking_status column if it doesn't exist
-    add_missing_column_if_not_exists(db, 'Media', 'chunking_status', "TEXT DEFAULT 'pending'")
-
 # DEADCODE
 # # Vector check FIXME/Delete later
 # def alter_media_table(db):
@@ -3088,3 +3748,112 @@ def get_workflow_chat(conversation_id):
 #
 # End of Workflow Functions
 #######################################################################################################################
+
+
+#######################################################################################################################
+#
+# Background backfills of the media database
+#
+# Each step handles one batch inside the transaction opened by Schema_Migrations.run_backfill_batch and returns where
+# the next batch starts (None when done). Migrations schedule some of these; schedule_media_backfill queues any of them.
+
+def _backfill_media_fts(conn, state, batch_size: int):
+    """Rebuild media_fts from Media, one id range at a time."""
+    last_id = state or 0
+    ids = [row[0] for row in conn.execute("SELECT id FROM Media WHERE id > ? ORDER BY id LIMIT ?",
+                                          (last_id, batch_size))]
+    if not ids:
+        conn.execute("DELETE FROM media_fts WHERE rowid > ?", (last_id,))
+        return None
+    conn.execute("DELETE FROM media_fts WHERE rowid > ? AND rowid <= ?", (last_id, ids[-1]))
+    conn.execute('''
+        INSERT INTO media_fts (rowid, title, content)
+        SELECT id, title, decompress_text(content) FROM Media WHERE id > ? AND id <= ?
+    ''', (last_id, ids[-1]))
+    return ids[-1]
+
+
+def _backfill_compact_document_versions(conn, state, batch_size: int):
+    last_media_id = state or 0
+    media_ids = [row[0] for row in conn.execute('''
+        SELECT DISTINCT media_id FROM DocumentVersions WHERE storage = ? AND media_id > ? ORDER BY media_id LIMIT ?
+    ''', (STORAGE_FULL, last_media_id, batch_size))]
+    if not media_ids:
+        return None
+    stats = {'media': 0, 'versions': 0, 'bytes_before': 0, 'bytes_after': 0}
+    snapshot_interval = get_document_version_settings()['snapshot_interval']
+    cursor = conn.cursor()
+    for media_id in media_ids:
+        _compact_media_versions(cursor, media_id, snapshot_interval, stats)
+        document_version_cache.invalidate(media_id)
+    return media_ids[-1]
+
+
+def _backfill_compress_text(conn, state, batch_size: int):
+    """Compress the large text values written before compression was turned on (see compress_text_columns)."""
+    column_index, last_id = state or (0, 0)
+    while column_index < len(COMPRESSED_TEXT_COLUMNS):
+        table, column = COMPRESSED_TEXT_COLUMNS[column_index]
+        next_id, _, _, _ = _rewrite_text_batch(conn, table, column, 'text', text_compressor.compress, last_id,
+                                               batch_size)
+        if next_id is not None:
+            return [column_index, next_id]
+        column_index, last_id = column_index + 1, 0
+    return None
+
+
+def _backfill_rechunk_media(conn, state, batch_size: int):
+    """Chunk media still waiting for it (chunking_status 'pending') into MediaChunks."""
+    rows = conn.execute('''
+        SELECT id, decompress_text(content) FROM Media
+        WHERE chunking_status = 'pending' AND is_trash = 0 AND id > ? ORDER BY id LIMIT ?
+    ''', (state or 0, batch_size)).fetchall()
+    if not rows:
+        return None
+    for media_id, content in rows:
+        _store_media_chunks(conn, media_id, content or '')
+    return rows[-1][0]
+
+
+MEDIA_BACKFILLS = {backfill.name: backfill for backfill in (
+    Backfill('media_fts', "Rebuild the media full-text index", _backfill_media_fts),
+    Backfill('compact_document_versions', "Store old document versions as snapshots plus deltas",
+             _backfill_compact_document_versions),
+    Backfill('compress_text', "Compress large text values written before compression was enabled",
+             _backfill_compress_text),
+    Backfill('rechunk_media', "Chunk media whose chunking is pending", _backfill_rechunk_media),
+)}
+
+
+@contextmanager
+def _backfill_connection():
+    # The worker thread gets its own connection from `db`; close it when the worker is done
+    try:
+        with db.get_connection() as conn:
+            yield conn
+    finally:
+        db.close_connection()
+
+
+def start_media_backfills():
+    return start_backfill_worker('media database', _backfill_connection, MEDIA_BACKFILLS)
+
+
+def schedule_media_backfill(name: str):
+    """Queue one of MEDIA_BACKFILLS (e.g. 'compress_text' after enabling compression) and run it in the background."""
+    if name not in MEDIA_BACKFILLS:
+        raise InputError(f"Unknown backfill: {name}. Available: {', '.join(MEDIA_BACKFILLS)}")
+    with db.get_connection() as conn:
+        schedule_backfill(conn, name)
+    return start_media_backfills()
+
+
+def get_media_backfill_status() -> Dict[str, Dict[str, Any]]:
+    with db.get_connection() as conn:
+        return backfill_status(conn)
+
+db.on_first_use(lambda database: start_media_backfills())
+
+#
+# End of Background backfills of the media database
+#######################################################################################################################
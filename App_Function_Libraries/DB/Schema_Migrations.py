@@ -0,0 +1,355 @@
+# Schema_Migrations.py
+# Description: Versioned schema migrations and resumable background backfills for the SQLite databases.
+#
+# Each database file has an ordered list of migrations. The versions applied are recorded in its `schema_version`
+# table, and only the missing ones run, each in its own transaction. Migrations only change the schema, so they are
+# quick; work that touches every row (FTS rebuilds, re-chunking, compression, version compaction) is a backfill
+# instead. A migration can schedule backfills, which then run in a background thread in small batches. Each batch
+# commits together with its resume point in `schema_backfills`, so an interrupted backfill picks up where it stopped
+# and startup never waits for one.
+#
+# Imports
+import configparser
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Sequence, Tuple
+#
+# Local Imports
+from App_Function_Libraries.Utils.Utils import load_comprehensive_config
+#
+#######################################################################################################################
+#
+# Functions:
+
+logger = logging.getLogger(__name__)
+
+# Default settings, overridden by the [Migrations] section of config.txt
+DEFAULT_MIGRATION_SETTINGS = {
+    'run_backfills_in_background': True,
+    'backfill_batch_size': 200,
+    'backfill_pause': 0.05,
+}
+
+BACKFILL_PENDING = 'pending'
+BACKFILL_DONE = 'done'
+BACKFILL_FAILED = 'failed'
+
+_MIGRATION_TABLES = (
+    '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS schema_backfills (
+        name TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        state TEXT,
+        batches INTEGER NOT NULL DEFAULT 0,
+        scheduled_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        error TEXT
+    )
+    ''',
+)
+
+
+class MigrationError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    One schema change. `apply` runs inside the migration's transaction and must not commit. `backfills` names the
+    backfills to schedule once it is applied.
+    """
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+    backfills: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class Backfill:
+    """
+    Data work done in batches. `step(conn, state, batch_size)` processes one batch after `state` (None on the first
+    call) inside a transaction, and returns the state to resume from, or None once there is nothing left. The state
+    is stored as JSON.
+    """
+    name: str
+    description: str
+    step: Callable[[sqlite3.Connection, Any, int], Any]
+
+
+def get_migration_settings(config: Optional[configparser.ConfigParser] = None) -> Dict[str, Any]:
+    if config is None:
+        try:
+            config = load_comprehensive_config()
+        except FileNotFoundError:
+            config = configparser.ConfigParser()
+    settings = dict(DEFAULT_MIGRATION_SETTINGS)
+    if config.has_section('Migrations'):
+        settings['run_backfills_in_background'] = config.getboolean(
+            'Migrations', 'run_backfills_in_background', fallback=settings['run_backfills_in_background'])
+        settings['backfill_batch_size'] = max(
+            config.getint('Migrations', 'backfill_batch_size', fallback=settings['backfill_batch_size']), 1)
+        settings['backfill_pause'] = config.getfloat('Migrations', 'backfill_pause', fallback=settings['backfill_pause'])
+    return settings
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+@contextmanager
+def _immediate_transaction(conn: sqlite3.Connection):
+    """BEGIN IMMEDIATE ... COMMIT on any connection, whatever its isolation_level."""
+    isolation_level = conn.isolation_level
+    if conn.in_transaction:
+        conn.commit()
+    conn.isolation_level = None
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+    finally:
+        conn.isolation_level = isolation_level
+
+
+def split_sql_script(script: str) -> List[str]:
+    """Split a script into statements (triggers keep their inner semicolons), so it can run inside a transaction."""
+    statements, current = [], ''
+    for line in script.splitlines(keepends=True):
+        if not current and (not line.strip() or line.strip().startswith('--')):
+            continue
+        current += line
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ''
+    if current.strip():
+        statements.append(current.strip())
+    return statements
+
+
+def column_names(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()]
+
+
+def add_column_if_missing(conn: sqlite3.Connection, table: str, column: str, definition: str) -> bool:
+    """Add `column` (declared as `definition`, without the name) unless the table already has it."""
+    if column in column_names(conn, table):
+        return False
+    conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    logger.info(f"Added column {column} to {table}")
+    return True
+
+
+def ensure_migration_tables(conn: sqlite3.Connection) -> None:
+    for statement in _MIGRATION_TABLES:
+        conn.execute(statement)
+    if conn.in_transaction and conn.isolation_level is not None:
+        conn.commit()
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    ensure_migration_tables(conn)
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def _schedule(conn: sqlite3.Connection, name: str) -> None:
+    conn.execute('''
+        INSERT INTO schema_backfills (name, status, state, batches, scheduled_at, updated_at, error)
+        VALUES (?, ?, NULL, 0, ?, ?, NULL)
+        ON CONFLICT(name) DO UPDATE SET status = excluded.status, state = NULL, batches = 0,
+            scheduled_at = excluded.scheduled_at, updated_at = excluded.updated_at, error = NULL
+    ''', (name, BACKFILL_PENDING, _now(), _now()))
+
+
+def migrate(conn: sqlite3.Connection, migrations: Sequence[Migration], database_name: str = 'database') -> List[int]:
+    """Apply the migrations this database has not had yet, in order. Returns the versions applied."""
+    versions = [migration.version for migration in migrations]
+    if versions != sorted(set(versions)) or (versions and versions[0] < 1):
+        raise MigrationError(f"Migrations for {database_name} must have increasing versions from 1: {versions}")
+    ensure_migration_tables(conn)
+    applied = []
+    for migration in migrations:
+        if migration.version <= current_version(conn):
+            continue
+        try:
+            with _immediate_transaction(conn):
+                # Another process may have applied it while this one waited for the lock
+                if migration.version <= current_version(conn):
+                    continue
+                migration.apply(conn)
+                conn.execute('INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                             (migration.version, migration.description, _now()))
+                for name in migration.backfills:
+                    _schedule(conn, name)
+        except Exception as e:
+            logger.error(f"Migration {migration.version} of {database_name} ({migration.description}) failed: {e}")
+            raise MigrationError(f"Migration {migration.version} of {database_name} failed: {e}") from e
+        logger.info(f"Migrated {database_name} to version {migration.version}: {migration.description}")
+        applied.append(migration.version)
+    latest = versions[-1] if versions else 0
+    if current_version(conn) > latest:
+        logger.warning(f"{database_name} is at schema version {current_version(conn)}, newer than this version of "
+                       f"the app knows ({latest})")
+    return applied
+
+
+def schedule_backfill(conn: sqlite3.Connection, name: str) -> None:
+    """Queue a backfill to run (again) from the beginning."""
+    ensure_migration_tables(conn)
+    with _immediate_transaction(conn):
+        _schedule(conn, name)
+
+
+def backfill_status(conn: sqlite3.Connection) -> Dict[str, Dict[str, Any]]:
+    ensure_migration_tables(conn)
+    rows = conn.execute('SELECT name, status, batches, scheduled_at, updated_at, error FROM schema_backfills')
+    return {name: {'status': status, 'batches': batches, 'scheduled_at': scheduled_at, 'updated_at': updated_at,
+                   'error': error}
+            for name, status, batches, scheduled_at, updated_at, error in rows.fetchall()}
+
+
+def pending_backfills(conn: sqlite3.Connection) -> List[str]:
+    ensure_migration_tables(conn)
+    return [row[0] for row in conn.execute(
+        'SELECT name FROM schema_backfills WHERE status = ? ORDER BY scheduled_at, name', (BACKFILL_PENDING,))]
+
+
+def run_backfill_batch(conn: sqlite3.Connection, backfill: Backfill, batch_size: int) -> bool:
+    """Run one batch of a pending backfill, saving its resume point with it. Returns True once it has finished."""
+    try:
+        with _immediate_transaction(conn):
+            row = conn.execute('SELECT status, state FROM schema_backfills WHERE name = ?', (backfill.name,)).fetchone()
+            if row is None or row[0] != BACKFILL_PENDING:
+                return True
+            state = backfill.step(conn, json.loads(row[1]) if row[1] is not None else None, batch_size)
+            conn.execute('''
+                UPDATE schema_backfills SET status = ?, state = ?, batches = batches + 1, updated_at = ? WHERE name = ?
+            ''', (BACKFILL_DONE if state is None else BACKFILL_PENDING,
+                  None if state is None else json.dumps(state), _now(), backfill.name))
+    except Exception as e:
+        logger.error(f"Backfill {backfill.name} failed: {e}")
+        with _immediate_transaction(conn):
+            conn.execute('UPDATE schema_backfills SET status = ?, error = ?, updated_at = ? WHERE name = ?',
+                         (BACKFILL_FAILED, str(e), _now(), backfill.name))
+        return True
+    if state is None:
+        logger.info(f"Backfill {backfill.name} finished")
+    return state is None
+
+
+def run_backfills(conn: sqlite3.Connection, backfills: Dict[str, Backfill], batch_size: int = 200,
+                  pause: float = 0.0, stop_event: Optional[threading.Event] = None) -> List[str]:
+    """Run every pending backfill to completion (or until `stop_event` is set). Returns the names finished."""
+    finished = []
+    for name in pending_backfills(conn):
+        backfill = backfills.get(name)
+        if backfill is None:
+            logger.warning(f"No backfill named {name} is registered; leaving it pending")
+            continue
+        logger.info(f"Running backfill {name}: {backfill.description}")
+        while not (stop_event is not None and stop_event.is_set()):
+            if run_backfill_batch(conn, backfill, batch_size):
+                finished.append(name)
+                break
+            if pause:
+                time.sleep(pause)
+        if stop_event is not None and stop_event.is_set():
+            break
+    return finished
+
+
+class BackfillWorker(threading.Thread):
+    """Runs the pending backfills of one database in the background, on a connection of its own."""
+
+    def __init__(self, database_name: str, connect: Callable[[], ContextManager[sqlite3.Connection]],
+                 backfills: Dict[str, Backfill], settings: Dict[str, Any]):
+        super().__init__(name=f"backfills-{database_name}", daemon=True)
+        self.database_name = database_name
+        self.connect = connect
+        self.backfills = backfills
+        self.settings = settings
+        self.stop_event = threading.Event()
+        self.finished: List[str] = []
+
+    def run(self):
+        try:
+            with self.connect() as conn:
+                self.finished = run_backfills(conn, self.backfills, self.settings['backfill_batch_size'],
+                                              self.settings['backfill_pause'], self.stop_event)
+        except Exception as e:
+            logger.error(f"Background backfills for {self.database_name} stopped: {e}")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self.stop_event.set()
+        self.join(timeout)
+
+
+_workers: Dict[str, BackfillWorker] = {}
+_workers_lock = threading.Lock()
+
+
+def start_backfill_worker(database_name: str, connect: Callable[[], ContextManager[sqlite3.Connection]],
+                          backfills: Dict[str, Backfill],
+                          settings: Optional[Dict[str, Any]] = None) -> Optional[BackfillWorker]:
+    """
+    Start a background worker for the database's pending backfills, unless one is already running, nothing is
+    pending, or background backfills are turned off in [Migrations].
+    """
+    settings = settings or get_migration_settings()
+    if not settings['run_backfills_in_background']:
+        return None
+    with _workers_lock:
+        worker = _workers.get(database_name)
+        if worker is not None and worker.is_alive():
+            return worker
+        with connect() as conn:
+            if not pending_backfills(conn):
+                return None
+        worker = BackfillWorker(database_name, connect, backfills, settings)
+        _workers[database_name] = worker
+        worker.start()
+    return worker
+
+
+def sqlite_connector(path: str) -> Callable[[], ContextManager[sqlite3.Connection]]:
+    """A `connect` callable for a database that has no connection manager of its own."""
+    @contextmanager
+    def connect():
+        conn = sqlite3.connect(path, timeout=30)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    return connect
+
+
+def migrate_file(path: str, migrations: Sequence[Migration], database_name: str,
+                 backfills: Optional[Dict[str, Backfill]] = None) -> List[int]:
+    """Migrate the database at `path` and start its pending backfills in the background."""
+    connect = sqlite_connector(path)
+    with connect() as conn:
+        applied = migrate(conn, migrations, database_name)
+    if backfills:
+        start_backfill_worker(database_name, connect, backfills)
+    return applied
+
+#
+# End of Schema_Migrations.py
+#######################################################################################################################
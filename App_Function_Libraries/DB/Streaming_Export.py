@@ -0,0 +1,90 @@
+# Streaming_Export.py
+# Description: Export writers that stream records to disk one at a time.
+#
+# Each writer takes any iterable (usually a generator over a batched database read) and writes every record as it
+# arrives, so memory use does not grow with the size of the export. Files are written next to their destination
+# and renamed into place when complete, so an interrupted export never leaves a truncated file behind.
+#
+# Imports
+import csv
+import json
+import os
+import re
+import zipfile
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Sequence
+#
+#######################################################################################################################
+#
+# Functions:
+
+
+@contextmanager
+def _replace_when_done(path: str):
+    """Yield a temporary path beside `path`; it replaces `path` only if the block completes."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    partial_path = f"{path}.part"
+    try:
+        yield partial_path
+        os.replace(partial_path, path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def write_csv(path: str, header: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """Write `rows` under `header`; returns the number of rows written."""
+    count = 0
+    with _replace_when_done(path) as partial_path:
+        with open(partial_path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+    return count
+
+
+def write_jsonl(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """Write one JSON object per line; returns the number of records written."""
+    count = 0
+    with _replace_when_done(path) as partial_path:
+        with open(partial_path, 'w', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False, default=str))
+                file.write('\n')
+                count += 1
+    return count
+
+
+def safe_file_name(name: str, max_length: int = 50) -> str:
+    name = re.sub(r'[\\/:*?"<>|\x00-\x1f]+', '_', str(name or '')).strip(' .')
+    return name[:max_length] or 'untitled'
+
+
+def write_markdown_zip(path: str, records: Iterable[Dict[str, Any]], render: Callable[[Dict[str, Any]], str],
+                       file_name: Callable[[Dict[str, Any]], str]) -> int:
+    """
+    Write each record as its own Markdown file inside a zip archive. `render` turns a record into Markdown and
+    `file_name` names its entry (duplicates get a numeric suffix). Returns the number of files written.
+    """
+    count = 0
+    used_names = set()
+    with _replace_when_done(path) as partial_path:
+        with zipfile.ZipFile(partial_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for record in records:
+                base_name = file_name(record)
+                name, suffix = f"{base_name}.md", 1
+                while name in used_names:
+                    suffix += 1
+                    name = f"{base_name}_{suffix}.md"
+                used_names.add(name)
+                with archive.open(name, 'w') as entry:
+                    entry.write(render(record).encode('utf-8'))
+                count += 1
+    return count
+
+#
+# End of Streaming_Export.py
+#######################################################################################################################
@@ -0,0 +1,137 @@
+# Text_Compression.py
+# Description: Transparent compression of large text columns (Media.content, Transcripts.transcription).
+#
+# A compressed value is stored as a BLOB: a 3-byte marker, a codec byte, a 4-byte dictionary id (0 = none) and the
+# compressed UTF-8 text. Plain TEXT values pass through untouched, so compressed and uncompressed rows can live in
+# the same column and compression can be switched on or off at any time.
+#
+# zstd (via the optional `zstandard` package) can use a dictionary trained on the library's own text, which works
+# far better than plain zstd on many short, similar transcripts. Without `zstandard`, zlib from the stdlib is used.
+#
+# Imports
+import logging
+import struct
+import threading
+import zlib
+from typing import Callable, Dict, Iterable, Optional, Union
+#
+# External Imports
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+#
+#######################################################################################################################
+#
+# Functions:
+
+COMPRESSED_MARKER = b'TZ\x00'
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_NAMES = {'zlib': CODEC_ZLIB, 'zstd': CODEC_ZSTD}
+_HEADER = struct.Struct('>3sBI')
+
+
+def zstd_available() -> bool:
+    return zstandard is not None
+
+
+def is_compressed(value) -> bool:
+    return isinstance(value, (bytes, memoryview)) and bytes(value[:len(COMPRESSED_MARKER)]) == COMPRESSED_MARKER
+
+
+def train_dictionary(samples: Iterable[str], dictionary_size: int = 112640) -> bytes:
+    """Train a zstd dictionary from sample texts. Requires the `zstandard` package."""
+    if zstandard is None:
+        raise RuntimeError("Training a compression dictionary requires the 'zstandard' package")
+    encoded = [sample.encode('utf-8') for sample in samples if sample]
+    return zstandard.train_dictionary(dictionary_size, encoded).as_bytes()
+
+
+class TextCompressor:
+    """
+    Compresses text for storage and decompresses stored values, whatever codec or dictionary wrote them.
+
+    `dictionary_loader(dictionary_id)` is called the first time a value compressed with an unknown dictionary is
+    read, e.g. one trained by another process.
+    """
+
+    def __init__(self, codec: str = 'zstd', level: int = 3, min_size: int = 4096,
+                 dictionary_loader: Optional[Callable[[int], Optional[bytes]]] = None):
+        if codec not in CODEC_NAMES:
+            raise ValueError(f"Unknown compression codec: {codec}")
+        if codec == 'zstd' and zstandard is None:
+            logging.info("zstandard is not installed; compressing text columns with zlib instead")
+            codec = 'zlib'
+        self.codec = codec
+        self.level = level
+        self.min_size = min_size
+        self.dictionary_loader = dictionary_loader
+        self.dictionary_id = 0
+        self._dictionaries: Dict[int, bytes] = {}
+        self._local = threading.local()
+
+    def add_dictionary(self, dictionary_id: int, data: bytes, activate: bool = True) -> None:
+        self._dictionaries[dictionary_id] = data
+        if activate and self.codec == 'zstd':
+            self.dictionary_id = dictionary_id
+
+    def _dictionary(self, dictionary_id: int):
+        if dictionary_id not in self._dictionaries:
+            data = self.dictionary_loader(dictionary_id) if self.dictionary_loader else None
+            if data is None:
+                raise ValueError(f"Compression dictionary {dictionary_id} not found")
+            self._dictionaries[dictionary_id] = data
+        return zstandard.ZstdCompressionDict(self._dictionaries[dictionary_id])
+
+    # zstd (de)compressors are not thread-safe, so each thread keeps its own, keyed by dictionary id
+    def _compressor(self, dictionary_id: int):
+        key = ('c', dictionary_id)
+        if key not in self._local.__dict__:
+            dictionary = self._dictionary(dictionary_id) if dictionary_id else None
+            self._local.__dict__[key] = zstandard.ZstdCompressor(level=self.level, dict_data=dictionary)
+        return self._local.__dict__[key]
+
+    def _decompressor(self, dictionary_id: int):
+        key = ('d', dictionary_id)
+        if key not in self._local.__dict__:
+            dictionary = self._dictionary(dictionary_id) if dictionary_id else None
+            self._local.__dict__[key] = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return self._local.__dict__[key]
+
+    def compress(self, text: Optional[str]) -> Union[str, bytes, None]:
+        """Return the value to store: compressed bytes, or `text` itself if it is too short to be worth it."""
+        if text is None or not isinstance(text, str) or len(text) < self.min_size:
+            return text
+        raw = text.encode('utf-8')
+        if self.codec == 'zstd':
+            payload = self._compressor(self.dictionary_id).compress(raw)
+            header = _HEADER.pack(COMPRESSED_MARKER, CODEC_ZSTD, self.dictionary_id)
+        else:
+            payload = zlib.compress(raw, min(max(self.level, 1), 9))
+            header = _HEADER.pack(COMPRESSED_MARKER, CODEC_ZLIB, 0)
+        # Incompressible text is cheaper to read back as plain text
+        if len(header) + len(payload) >= len(raw):
+            return text
+        return header + payload
+
+    def decompress(self, value) -> Optional[str]:
+        """Return stored values as text: plain text is returned unchanged, compressed values are expanded."""
+        if value is None or isinstance(value, str):
+            return value
+        value = bytes(value)
+        if not value.startswith(COMPRESSED_MARKER):
+            return value.decode('utf-8')
+        _, codec, dictionary_id = _HEADER.unpack_from(value)
+        payload = value[_HEADER.size:]
+        if codec == CODEC_ZLIB:
+            return zlib.decompress(payload).decode('utf-8')
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("This value was compressed with zstd; install the 'zstandard' package to read it")
+            return self._decompressor(dictionary_id).decompress(payload).decode('utf-8')
+        raise ValueError(f"Unknown compression codec id: {codec}")
+
+#
+# End of Text_Compression.py
+#######################################################################################################################
@@ -0,0 +1,112 @@
+# Version_Store.py
+# Description: Compact storage for document version history: compressed full snapshots plus compressed deltas.
+#
+# A version is stored either as a snapshot (the whole text, zlib-compressed) or as a delta against the previous
+# version. A snapshot is forced every `snapshot_interval` versions, so rebuilding any version applies at most
+# `snapshot_interval - 1` deltas. Deltas work on segments (sentences and lines) rather than lines alone, so
+# single-line transcripts still diff well.
+#
+# Delta format (zlib-compressed JSON): a list whose items are either [start, end] - copy base segments
+# start..end - or a string of literal text to insert.
+#
+# Imports
+import difflib
+import json
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Hashable, List, Optional
+#
+#######################################################################################################################
+#
+# Functions:
+
+STORAGE_FULL = 'full'
+STORAGE_SNAPSHOT = 'snapshot'
+STORAGE_DELTA = 'delta'
+
+_SEGMENT_PATTERN = re.compile(r'[^.!?\n]*(?:[.!?]+[ \t]*|\n|$)')
+
+
+def split_segments(text: str) -> List[str]:
+    """Split text into sentence/line segments that concatenate back to the original text."""
+    return [segment for segment in _SEGMENT_PATTERN.findall(text) if segment]
+
+
+def encode_snapshot(text: str) -> bytes:
+    return zlib.compress(text.encode('utf-8'), 6)
+
+
+def decode_snapshot(data: bytes) -> str:
+    return zlib.decompress(data).decode('utf-8')
+
+
+def make_delta(base: str, target: str) -> bytes:
+    base_segments = split_segments(base)
+    target_segments = split_segments(target)
+    # Edits are usually local: match the shared prefix and suffix directly and only diff what lies between
+    prefix = 0
+    limit = min(len(base_segments), len(target_segments))
+    while prefix < limit and base_segments[prefix] == target_segments[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and base_segments[-1 - suffix] == target_segments[-1 - suffix]:
+        suffix += 1
+
+    operations = [[0, prefix]] if prefix else []
+    matcher = difflib.SequenceMatcher(None, base_segments[prefix:len(base_segments) - suffix],
+                                      target_segments[prefix:len(target_segments) - suffix])
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            operations.append([prefix + i1, prefix + i2])
+        elif j2 > j1:
+            operations.append(''.join(target_segments[prefix + j1:prefix + j2]))
+    if suffix:
+        operations.append([len(base_segments) - suffix, len(base_segments)])
+    return zlib.compress(json.dumps(operations, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def apply_delta(base: str, delta: bytes) -> str:
+    base_segments = split_segments(base)
+    parts = []
+    for operation in json.loads(zlib.decompress(delta).decode('utf-8')):
+        parts.append(operation if isinstance(operation, str) else ''.join(base_segments[operation[0]:operation[1]]))
+    return ''.join(parts)
+
+
+class ReconstructionCache:
+    """Small thread-safe LRU of reconstructed versions, keyed by (owner id, version number)."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, owner_id, version: int) -> Optional[str]:
+        with self._lock:
+            content = self._entries.get((owner_id, version))
+            if content is not None:
+                self._entries.move_to_end((owner_id, version))
+            return content
+
+    def put(self, owner_id, version: int, content: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(owner_id, version)] = content
+            self._entries.move_to_end((owner_id, version))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, owner_id=None) -> None:
+        with self._lock:
+            if owner_id is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == owner_id]:
+                    del self._entries[key]
+
+#
+# End of Version_Store.py
+#######################################################################################################################
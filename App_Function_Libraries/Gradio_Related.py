@@ -10,64 +10,11 @@ import logging
 import os
 import webbrowser
 
-#
-# Import 3rd-Party Libraries
-import gradio as gr
 #
 # Local Imports
+# The tab modules (and gradio itself) are imported by launch_ui as it builds each group, so importing this module,
+# e.g. from summarize.py for a CLI run, does not load the UI stack
 from App_Function_Libraries.DB.DB_Manager import get_db_config
-from App_Function_Libraries.Gradio_UI.Arxiv_tab import create_arxiv_tab
-from App_Function_Libraries.Gradio_UI.Audio_ingestion_tab import create_audio_processing_tab
-from App_Function_Libraries.Gradio_UI.Book_Ingestion_tab import create_import_book_tab
-from App_Function_Libraries.Gradio_UI.Character_Chat_tab import create_character_card_interaction_tab, create_character_chat_mgmt_tab, create_custom_character_card_tab, \
-    create_character_card_validation_tab, create_export_characters_tab
-from App_Function_Libraries.Gradio_UI.Character_interaction_tab import create_narrator_controlled_conversation_tab, \
-    create_multiple_character_chat_tab
-from App_Function_Libraries.Gradio_UI.Chat_ui import create_chat_management_tab, \
-    create_chat_interface_four, create_chat_interface_multi_api, create_chat_interface_stacked, create_chat_interface
-from App_Function_Libraries.Gradio_UI.Config_tab import create_config_editor_tab
-from App_Function_Libraries.Gradio_UI.Explain_summarize_tab import create_summarize_explain_tab
-from App_Function_Libraries.Gradio_UI.Export_Functionality import create_export_tab
-from App_Function_Libraries.Gradio_UI.Backup_Functionality import create_backup_tab, create_view_backups_tab, \
-    create_restore_backup_tab
-from App_Function_Libraries.Gradio_UI.Import_Functionality import create_import_single_prompt_tab, \
-    create_import_obsidian_vault_tab, create_import_item_tab, create_import_multiple_prompts_tab
-from App_Function_Libraries.Gradio_UI.Introduction_tab import create_introduction_tab
-from App_Function_Libraries.Gradio_UI.Keywords import create_view_keywords_tab, create_add_keyword_tab, \
-    create_delete_keyword_tab, create_export_keywords_tab
-from App_Function_Libraries.Gradio_UI.Live_Recording import create_live_recording_tab
-from App_Function_Libraries.Gradio_UI.Llamafile_tab import create_chat_with_llamafile_tab
-#from App_Function_Libraries.Gradio_UI.MMLU_Pro_tab import create_mmlu_pro_tab
-from App_Function_Libraries.Gradio_UI.Media_edit import create_prompt_clone_tab, create_prompt_edit_tab, \
-    create_media_edit_and_clone_tab, create_media_edit_tab
-from App_Function_Libraries.Gradio_UI.Media_wiki_tab import create_mediawiki_import_tab, create_mediawiki_config_tab
-from App_Function_Libraries.Gradio_UI.PDF_ingestion_tab import create_pdf_ingestion_tab, create_pdf_ingestion_test_tab
-from App_Function_Libraries.Gradio_UI.Plaintext_tab_import import create_plain_text_import_tab
-from App_Function_Libraries.Gradio_UI.Podcast_tab import create_podcast_tab
-from App_Function_Libraries.Gradio_UI.Prompt_Suggestion_tab import create_prompt_suggestion_tab
-from App_Function_Libraries.Gradio_UI.RAG_QA_Chat_tab import create_rag_qa_chat_tab, create_rag_qa_notes_management_tab, \
-    create_rag_qa_chat_management_tab
-from App_Function_Libraries.Gradio_UI.Re_summarize_tab import create_resummary_tab
-from App_Function_Libraries.Gradio_UI.Search_Tab import create_prompt_search_tab, \
-    create_search_summaries_tab, create_search_tab
-from App_Function_Libraries.Gradio_UI.RAG_Chat_tab import create_rag_tab
-from App_Function_Libraries.Gradio_UI.Embeddings_tab import create_embeddings_tab, create_view_embeddings_tab, \
-    create_purge_embeddings_tab
-from App_Function_Libraries.Gradio_UI.Trash import create_view_trash_tab, create_empty_trash_tab, \
-    create_delete_trash_tab, create_search_and_mark_trash_tab
-from App_Function_Libraries.Gradio_UI.Utilities import create_utilities_yt_timestamp_tab, create_utilities_yt_audio_tab, \
-    create_utilities_yt_video_tab
-from App_Function_Libraries.Gradio_UI.Video_transcription_tab import create_video_transcription_tab
-from App_Function_Libraries.Gradio_UI.View_tab import create_manage_items_tab
-from App_Function_Libraries.Gradio_UI.Website_scraping_tab import create_website_scraping_tab
-from App_Function_Libraries.Gradio_UI.Chat_Workflows import chat_workflows_tab
-from App_Function_Libraries.Gradio_UI.View_DB_Items_tab import create_prompt_view_tab, \
-    create_view_all_with_versions_tab, create_viewing_tab
-#
-# Gradio UI Imports
-from App_Function_Libraries.Gradio_UI.Evaluations_Benchmarks_tab import create_geval_tab, create_infinite_bench_tab
-#from App_Function_Libraries.Local_LLM.Local_LLM_huggingface import create_huggingface_tab
-from App_Function_Libraries.Local_LLM.Local_LLM_ollama import create_ollama_tab
 #
 #######################################################################################################################
 # Function Definitions
@@ -232,6 +179,7 @@ custom_prompt_summarize_bulleted_notes = ("""
 
 
 def launch_ui(share_public=None, server_mode=False):
+    import gradio as gr
     webbrowser.open_new_tab('http://127.0.0.1:7860/?__theme=dark')
     share=share_public
     css = """
@@ -270,6 +218,18 @@ def launch_ui(share_public=None, server_mode=False):
         gr.Markdown(f"(Using {db_type.capitalize()} Database)")
         with gr.Tabs():
             with gr.TabItem("Transcription / Summarization / Ingestion", id="ingestion-grouping", visible=True):
+                from App_Function_Libraries.Gradio_UI.Video_transcription_tab import create_video_transcription_tab
+                from App_Function_Libraries.Gradio_UI.Audio_ingestion_tab import create_audio_processing_tab
+                from App_Function_Libraries.Gradio_UI.Podcast_tab import create_podcast_tab
+                from App_Function_Libraries.Gradio_UI.Book_Ingestion_tab import create_import_book_tab
+                from App_Function_Libraries.Gradio_UI.Plaintext_tab_import import create_plain_text_import_tab
+                from App_Function_Libraries.Gradio_UI.Website_scraping_tab import create_website_scraping_tab
+                from App_Function_Libraries.Gradio_UI.PDF_ingestion_tab import create_pdf_ingestion_tab, \
+                    create_pdf_ingestion_test_tab
+                from App_Function_Libraries.Gradio_UI.Re_summarize_tab import create_resummary_tab
+                from App_Function_Libraries.Gradio_UI.Explain_summarize_tab import create_summarize_explain_tab
+                from App_Function_Libraries.Gradio_UI.Live_Recording import create_live_recording_tab
+                from App_Function_Libraries.Gradio_UI.Arxiv_tab import create_arxiv_tab
                 with gr.Tabs():
                     create_video_transcription_tab()
                     create_audio_processing_tab()
@@ -285,16 +245,25 @@ def launch_ui(share_public=None, server_mode=False):
                     create_arxiv_tab()
 
             with gr.TabItem("Text Search", id="text search", visible=True):
+                from App_Function_Libraries.Gradio_UI.Search_Tab import create_search_tab, create_search_summaries_tab
                 create_search_tab()
                 create_search_summaries_tab()
 
             with gr.TabItem("RAG Chat/Search", id="RAG Chat Notes group", visible=True):
+                from App_Function_Libraries.Gradio_UI.RAG_Chat_tab import create_rag_tab
+                from App_Function_Libraries.Gradio_UI.RAG_QA_Chat_tab import create_rag_qa_chat_tab, \
+                    create_rag_qa_notes_management_tab, create_rag_qa_chat_management_tab
                 create_rag_tab()
                 create_rag_qa_chat_tab()
                 create_rag_qa_notes_management_tab()
                 create_rag_qa_chat_management_tab()
 
             with gr.TabItem("Chat with an LLM", id="LLM Chat group", visible=True):
+                from App_Function_Libraries.Gradio_UI.Chat_ui import create_chat_interface, \
+                    create_chat_interface_stacked, create_chat_interface_multi_api, create_chat_interface_four, \
+                    create_chat_management_tab
+                from App_Function_Libraries.Gradio_UI.Llamafile_tab import create_chat_with_llamafile_tab
+                from App_Function_Libraries.Gradio_UI.Chat_Workflows import chat_workflows_tab
                 create_chat_interface()
                 create_chat_interface_stacked()
                 create_chat_interface_multi_api()
@@ -305,6 +274,11 @@ def launch_ui(share_public=None, server_mode=False):
 
 
             with gr.TabItem("Character Chat", id="character chat group", visible=True):
+                from App_Function_Libraries.Gradio_UI.Character_Chat_tab import create_character_card_interaction_tab, \
+                    create_character_chat_mgmt_tab, create_custom_character_card_tab, \
+                    create_character_card_validation_tab, create_export_characters_tab
+                from App_Function_Libraries.Gradio_UI.Character_interaction_tab import \
+                    create_multiple_character_chat_tab, create_narrator_controlled_conversation_tab
                 create_character_card_interaction_tab()
                 create_character_chat_mgmt_tab()
                 create_custom_character_card_tab()
@@ -315,6 +289,8 @@ def launch_ui(share_public=None, server_mode=False):
 
 
             with gr.TabItem("View DB Items", id="view db items group", visible=True):
+                from App_Function_Libraries.Gradio_UI.View_DB_Items_tab import create_view_all_with_versions_tab, \
+                    create_viewing_tab, create_prompt_view_tab
                 # This one works
                 create_view_all_with_versions_tab()
                 # This one is WIP
@@ -323,6 +299,10 @@ def launch_ui(share_public=None, server_mode=False):
 
 
             with gr.TabItem("Prompts", id='view prompts group', visible=True):
+                from App_Function_Libraries.Gradio_UI.View_DB_Items_tab import create_prompt_view_tab
+                from App_Function_Libraries.Gradio_UI.Search_Tab import create_prompt_search_tab
+                from App_Function_Libraries.Gradio_UI.Media_edit import create_prompt_edit_tab, create_prompt_clone_tab
+                from App_Function_Libraries.Gradio_UI.Prompt_Suggestion_tab import create_prompt_suggestion_tab
                 create_prompt_view_tab()
                 create_prompt_search_tab()
                 create_prompt_edit_tab()
@@ -331,6 +311,9 @@ def launch_ui(share_public=None, server_mode=False):
 
 
             with gr.TabItem("Manage / Edit Existing Items", id="manage group", visible=True):
+                from App_Function_Libraries.Gradio_UI.Media_edit import create_media_edit_tab, \
+                    create_media_edit_and_clone_tab
+                from App_Function_Libraries.Gradio_UI.View_tab import create_manage_items_tab
                 create_media_edit_tab()
                 create_manage_items_tab()
                 create_media_edit_and_clone_tab()
@@ -339,6 +322,8 @@ def launch_ui(share_public=None, server_mode=False):
 
 
             with gr.TabItem("Embeddings Management", id="embeddings group", visible=True):
+                from App_Function_Libraries.Gradio_UI.Embeddings_tab import create_embeddings_tab, \
+                    create_view_embeddings_tab, create_purge_embeddings_tab
                 create_embeddings_tab()
                 create_view_embeddings_tab()
                 create_purge_embeddings_tab()
@@ -357,12 +342,19 @@ def launch_ui(share_public=None, server_mode=False):
 
 
             with gr.TabItem("Keywords", id="keywords group", visible=True):
+                from App_Function_Libraries.Gradio_UI.Keywords import create_view_keywords_tab, \
+                    create_add_keyword_tab, create_delete_keyword_tab, create_export_keywords_tab
                 create_view_keywords_tab()
                 create_add_keyword_tab()
                 create_delete_keyword_tab()
                 create_export_keywords_tab()
 
             with gr.TabItem("Import", id="import group", visible=True):
+                from App_Function_Libraries.Gradio_UI.Import_Functionality import create_import_item_tab, \
+                    create_import_obsidian_vault_tab, create_import_single_prompt_tab, \
+                    create_import_multiple_prompts_tab
+                from App_Function_Libraries.Gradio_UI.Media_wiki_tab import create_mediawiki_import_tab, \
+                    create_mediawiki_config_tab
                 create_import_item_tab()
                 create_import_obsidian_vault_tab()
                 create_import_single_prompt_tab()
@@ -371,39 +363,52 @@ def launch_ui(share_public=None, server_mode=False):
                 create_mediawiki_config_tab()
 
             with gr.TabItem("Export", id="export group", visible=True):
+                from App_Function_Libraries.Gradio_UI.Export_Functionality import create_export_tab
                 create_export_tab()
 
             with gr.TabItem("Backup Management", id="backup group", visible=True):
+                from App_Function_Libraries.Gradio_UI.Backup_Functionality import create_backup_tab, \
+                    create_view_backups_tab, create_restore_backup_tab
                 create_backup_tab()
                 create_view_backups_tab()
                 create_restore_backup_tab()
 
             with gr.TabItem("Utilities", id="util group", visible=True):
+                from App_Function_Libraries.Gradio_UI.Utilities import create_utilities_yt_video_tab, \
+                    create_utilities_yt_audio_tab, create_utilities_yt_timestamp_tab
                 create_utilities_yt_video_tab()
                 create_utilities_yt_audio_tab()
                 create_utilities_yt_timestamp_tab()
 
             with gr.TabItem("Local LLM", id="local llm group", visible=True):
+                from App_Function_Libraries.Gradio_UI.Llamafile_tab import create_chat_with_llamafile_tab
+                from App_Function_Libraries.Local_LLM.Local_LLM_ollama import create_ollama_tab
                 create_chat_with_llamafile_tab()
                 create_ollama_tab()
                 #create_huggingface_tab()
 
             with gr.TabItem("Trashcan", id="trashcan group", visible=True):
+                from App_Function_Libraries.Gradio_UI.Trash import create_search_and_mark_trash_tab, \
+                    create_view_trash_tab, create_delete_trash_tab, create_empty_trash_tab
                 create_search_and_mark_trash_tab()
                 create_view_trash_tab()
                 create_delete_trash_tab()
                 create_empty_trash_tab()
 
             with gr.TabItem("Evaluations", id="eval", visible=True):
+                from App_Function_Libraries.Gradio_UI.Evaluations_Benchmarks_tab import create_geval_tab, \
+                    create_infinite_bench_tab
                 create_geval_tab()
                 create_infinite_bench_tab()
                 # FIXME
                 #create_mmlu_pro_tab()
 
             with gr.TabItem("Introduction/Help", id="introduction group", visible=True):
+                from App_Function_Libraries.Gradio_UI.Introduction_tab import create_introduction_tab
                 create_introduction_tab()
 
             with gr.TabItem("Config Editor", id="config group"):
+                from App_Function_Libraries.Gradio_UI.Config_tab import create_config_editor_tab
                 create_config_editor_tab()
 
     # Launch the interface
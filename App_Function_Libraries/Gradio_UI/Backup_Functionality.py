@@ -1,13 +1,16 @@
 # Backup_Functionality.py
-# Functionality for exporting items as markdown files
+# Functionality for creating, listing and restoring database backups
 #
 # Imports:
 import os
-import shutil
+import sqlite3
 import gradio as gr
 #
 # Local Imports:
-from App_Function_Libraries.DB.DB_Manager import create_automated_backup, db_path, backup_dir
+from App_Function_Libraries.DB.Backup_Manager import BackupError, create_backup as create_incremental_backup, \
+    get_backup_settings, list_backups as list_incremental_backups, restore_backup as restore_incremental_backup, \
+    restore_database_file
+from App_Function_Libraries.DB.DB_Manager import db_path, backup_dir
 #
 # End of Imports
 #######################################################################################################################
@@ -15,28 +18,45 @@ from App_Function_Libraries.DB.DB_Manager import create_automated_backup, db_pat
 # Functions:
 
 def create_backup():
-    backup_file = create_automated_backup(db_path, backup_dir)
-    return f"Backup created: {backup_file}"
+    try:
+        manifest = create_incremental_backup()
+    except (BackupError, OSError) as e:
+        return f"Backup failed: {e}"
+    return (f"Backup created: {manifest['id']} ({', '.join(manifest['targets']) or 'no databases found'}; "
+            f"{manifest['bytes_written']} bytes of new data)")
 
 
 def list_backups():
-    backups = [f for f in os.listdir(backup_dir) if f.endswith('.db')]
+    backups = [f"{backup['id']}  {', '.join(backup['targets'])}" for backup in list_incremental_backups()]
+    # Single-file copies made by create_automated_backup
+    if os.path.isdir(backup_dir):
+        backups.extend(f for f in sorted(os.listdir(backup_dir)) if f.endswith('.db'))
     return "\n".join(backups)
 
 
 def restore_backup(backup_name: str) -> str:
-    backup_path_location: str = os.path.join(str(backup_dir), backup_name)
-    if os.path.exists(backup_path_location):
-        shutil.copy2(str(backup_path_location), str(db_path))
-        return f"Database restored from {backup_name}"
-    else:
-        return "Backup file not found"
+    backup_name = backup_name.strip().split()[0] if backup_name.strip() else ''
+    try:
+        if backup_name.endswith('.db'):
+            backup_path_location: str = os.path.join(str(backup_dir), os.path.basename(backup_name))
+            if not os.path.exists(backup_path_location):
+                return "Backup file not found"
+            restore_database_file(backup_path_location, str(db_path))
+            return f"Database restored from {backup_name}"
+        restored = restore_incremental_backup(backup_name)
+    except BackupError as e:
+        return f"Restore failed, nothing was changed: {e}"
+    except (OSError, sqlite3.Error) as e:
+        return f"Restore failed: {e}"
+    return f"Restored {', '.join(restored)} from {backup_name}"
 
 
 def create_backup_tab():
     with gr.Tab("Create Backup", visible=True):
         gr.Markdown("# Create a backup of the database")
-        gr.Markdown("This will create a backup of the database in the backup directory(the default backup directory is `/tldw_DB_Backups/')")
+        gr.Markdown("This will back up every database (media, prompts, character chats, RAG QA and the vector store) "
+                    f"to the backup directory (currently `{get_backup_settings()['backup_dir']}`). "
+                    "Only data changed since the previous backup is written.")
         with gr.Row():
             with gr.Column():
                 create_button = gr.Button("Create Backup")
@@ -60,7 +80,7 @@ def create_restore_backup_tab():
     with gr.TabItem("Restore Backup", visible=True):
         gr.Markdown("# Restore a backup of the database")
         with gr.Column():
-            backup_input = gr.Textbox(label="Backup Filename")
+            backup_input = gr.Textbox(label="Backup ID or Filename")
             restore_button = gr.Button("Restore")
         with gr.Column():
             restore_output = gr.Textbox(label="Result")
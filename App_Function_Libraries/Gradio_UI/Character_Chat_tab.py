@@ -21,7 +21,7 @@ import gradio as gr
 from App_Function_Libraries.Character_Chat.Character_Chat_Lib import validate_character_book, validate_v2_card, \
     replace_placeholders, replace_user_placeholder, extract_json_from_image, parse_character_book, \
     load_chat_and_character, load_chat_history, load_character_and_image, extract_character_id, load_character_wrapper
-from App_Function_Libraries.Chat import chat
+from App_Function_Libraries.Chat import chat, chat_stream
 from App_Function_Libraries.DB.Character_Chat_DB import (
     add_character_card,
     get_character_cards,
@@ -425,7 +425,8 @@ def create_character_card_interaction_tab():
                 temperature, user_name_val, auto_save
         ):
             if not char_data:
-                return history, "Please select a character first."
+                yield history, "Please select a character first."
+                return
 
             user_name_val = user_name_val or "User"
             char_name = char_data.get('name', 'AI Assistant')
@@ -459,8 +460,9 @@ def create_character_card_interaction_tab():
             user_message = replace_placeholders(user_message, char_name, user_name_val)
             full_message = f"{user_name_val}: {user_message}"
 
-            # Generate bot response
-            bot_message = chat(
+            # Stream the bot response into the chat as it arrives
+            bot_message = ""
+            for chunk in chat_stream(
                 full_message,
                 history,
                 media_content,
@@ -470,7 +472,9 @@ def create_character_card_interaction_tab():
                 prompt,
                 temperature,
                 system_message
-            )
+            ):
+                bot_message += chunk
+                yield history + [(user_message, replace_placeholders(bot_message, char_name, user_name_val))], ""
 
             # Replace placeholders in bot message
             bot_message = replace_placeholders(bot_message, char_name, user_name_val)
@@ -489,7 +493,7 @@ def create_character_card_interaction_tab():
                 else:
                     save_status = "Character ID not found; chat not saved."
 
-            return history, save_status
+            yield history, save_status
 
         def save_chat_history_to_db_wrapper(
             chat_history, conversation_id, media_content,
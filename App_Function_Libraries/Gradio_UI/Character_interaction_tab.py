@@ -240,7 +240,7 @@ def character_interaction(character1: str, character2: str, api_endpoint: str, a
 
         # FIXME - figure out why the double print is happening
         # Get response from the LLM
-        response = chat_wrapper(prompt, conversation, {}, [], api_endpoint, api_key, "", None, False, temperature, "")
+        response, _, _ = chat_wrapper(prompt, conversation, {}, [], api_endpoint, api_key, "", None, False, temperature, "")
 
         # Add the response to the conversation
         conversation.append((current_speaker['name'], response))
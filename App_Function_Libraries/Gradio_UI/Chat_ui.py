@@ -13,7 +13,7 @@ from datetime import datetime
 import gradio as gr
 #
 # Local Imports
-from App_Function_Libraries.Chat import chat, save_chat_history, update_chat_content, save_chat_history_to_db_wrapper
+from App_Function_Libraries.Chat import chat, chat_stream, save_chat_history, update_chat_content, save_chat_history_to_db_wrapper
 from App_Function_Libraries.DB.DB_Manager import add_chat_message, search_chat_conversations, create_chat_conversation, \
     get_chat_messages, update_chat_message, delete_chat_message, load_preset_prompts, db
 from App_Function_Libraries.Gradio_UI.Gradio_Shared import update_dropdown, update_user_prompt
@@ -81,29 +81,37 @@ def clear_chat_single():
     """
     return [], []
 
+def _start_chat_turn(message, history, media_content, selected_parts, custom_prompt, conversation_id,
+                     save_conversation):
+    """Save the user message (creating the conversation if needed) and build the message sent to the LLM."""
+    if save_conversation:
+        if conversation_id is None:
+            # Create a new conversation
+            media_id = media_content.get('id', None)
+            conversation_name = f"Chat about {media_content.get('title', 'Unknown Media')} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            conversation_id = create_chat_conversation(media_id, conversation_name)
+
+        # Add user message to the database
+        add_chat_message(conversation_id, "user", message)
+
+    # Include the selected parts and custom_prompt only for the first message
+    if not history and selected_parts:
+        message_body = "\n".join(selected_parts)
+        full_message = f"{custom_prompt}\n\n{message}\n\n{message_body}"
+    elif custom_prompt:
+        full_message = f"{custom_prompt}\n\n{message}"
+    else:
+        full_message = message
+    return conversation_id, full_message
+
+
 # FIXME - add additional features....
 def chat_wrapper(message, history, media_content, selected_parts, api_endpoint, api_key, custom_prompt, conversation_id,
                  save_conversation, temperature, system_prompt, max_tokens=None, top_p=None, frequency_penalty=None,
                  presence_penalty=None, stop_sequence=None):
     try:
-        if save_conversation:
-            if conversation_id is None:
-                # Create a new conversation
-                media_id = media_content.get('id', None)
-                conversation_name = f"Chat about {media_content.get('title', 'Unknown Media')} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                conversation_id = create_chat_conversation(media_id, conversation_name)
-
-            # Add user message to the database
-            user_message_id = add_chat_message(conversation_id, "user", message)
-
-        # Include the selected parts and custom_prompt only for the first message
-        if not history and selected_parts:
-            message_body = "\n".join(selected_parts)
-            full_message = f"{custom_prompt}\n\n{message}\n\n{message_body}"
-        elif custom_prompt:
-            full_message = f"{custom_prompt}\n\n{message}"
-        else:
-            full_message = message
+        conversation_id, full_message = _start_chat_turn(message, history, media_content, selected_parts,
+                                                         custom_prompt, conversation_id, save_conversation)
 
         # Generate bot response
         bot_message = chat(full_message, history, media_content, selected_parts, api_endpoint, api_key, custom_prompt,
@@ -123,6 +131,35 @@ def chat_wrapper(message, history, media_content, selected_parts, api_endpoint,
         logging.error(f"Error in chat wrapper: {str(e)}")
         return "An error occurred.", history, conversation_id
 
+
+def chat_wrapper_stream(message, history, media_content, selected_parts, api_endpoint, api_key, custom_prompt,
+                        conversation_id, save_conversation, temperature, system_prompt):
+    """
+    Streaming version of `chat_wrapper` for the Gradio chat bindings: yields (message box, chatbot history,
+    conversation id) as the response arrives, ending with the same values `chat_wrapper` returns.
+    """
+    try:
+        conversation_id, full_message = _start_chat_turn(message, history, media_content, selected_parts,
+                                                         custom_prompt, conversation_id, save_conversation)
+
+        # Stream the bot response into the chatbot as it arrives
+        bot_message = ""
+        for chunk in chat_stream(full_message, history, media_content, selected_parts, api_endpoint, api_key,
+                                 custom_prompt, temperature, system_prompt):
+            bot_message += chunk
+            yield gr.update(), history + [(message, bot_message)], conversation_id
+
+        logging.debug(f"Bot message being returned: {bot_message}")
+
+        if save_conversation:
+            # Add assistant message to the database
+            add_chat_message(conversation_id, "assistant", bot_message)
+
+        yield bot_message, history + [(message, bot_message)], conversation_id
+    except Exception as e:
+        logging.error(f"Error in chat wrapper: {str(e)}")
+        yield "An error occurred.", history, conversation_id
+
 def search_conversations(query):
     try:
         conversations = search_chat_conversations(query)
@@ -330,7 +367,7 @@ def create_chat_interface():
             outputs=[preset_prompt]
         )
         submit.click(
-            chat_wrapper,
+            chat_wrapper_stream,
             inputs=[msg, chatbot, media_content, selected_parts, api_endpoint, api_key, user_prompt, conversation_id,
                     save_conversation, temperature, system_prompt_input],
             outputs=[msg, chatbot, conversation_id]
@@ -503,7 +540,7 @@ def create_chat_interface_stacked():
         )
 
         submit.click(
-            chat_wrapper,
+            chat_wrapper_stream,
             inputs=[msg, chatbot, media_content, selected_parts, api_endpoint, api_key, user_prompt,
                     conversation_id, save_conversation, temp, system_prompt],
             outputs=[msg, chatbot, conversation_id]
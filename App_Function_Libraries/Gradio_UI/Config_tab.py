@@ -1,8 +1,9 @@
 import gradio as gr
 import configparser
 
-# FIXME
-CONFIG_PATH = './Config_Files/config.txt'
+from App_Function_Libraries.Utils.Utils import get_config_path, reload_config
+
+CONFIG_PATH = get_config_path()
 
 def load_config():
     config = configparser.ConfigParser()
@@ -12,6 +13,7 @@ def load_config():
 def save_config(config):
     with open(CONFIG_PATH, 'w') as configfile:
         config.write(configfile)
+    reload_config()
 
 def get_config_as_text():
     with open(CONFIG_PATH, 'r') as file:
@@ -21,6 +23,8 @@ def get_config_as_text():
 def save_config_from_text(text):
     with open(CONFIG_PATH, 'w') as file:
         file.write(text)
+    # Make the rest of the app pick up the new values without waiting for the mtime check
+    reload_config()
     return "Config saved successfully"
 
 
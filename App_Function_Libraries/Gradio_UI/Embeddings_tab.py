@@ -2,6 +2,7 @@
 # Description: This file contains the code for the RAG Chat tab in the Gradio UI
 #
 # Imports
+import itertools
 import json
 import logging
 #
@@ -11,9 +12,10 @@ import numpy as np
 from tqdm import tqdm
 #
 # Local Imports
-from App_Function_Libraries.DB.DB_Manager import get_all_content_from_database
-from App_Function_Libraries.RAG.ChromaDB_Library import chroma_client, \
-    store_in_chroma, situate_context
+from App_Function_Libraries.DB.DB_Manager import iter_all_content_from_database, get_media_content, get_media_title
+from App_Function_Libraries.RAG.ChromaDB_Library import vector_store, \
+    store_in_chroma, situate_context, stream_to_vector_store, reembed_orphaned_chunks
+from App_Function_Libraries.RAG.Dedup_Index import get_dedup_index, chunk_key
 from App_Function_Libraries.RAG.Embeddings_Create import create_embedding, create_embeddings_batch
 from App_Function_Libraries.Chunk_Lib import improved_chunking_process, chunk_for_embedding
 #
@@ -121,8 +123,10 @@ def create_embeddings_tab():
 
         def create_all_embeddings(provider, hf_model, openai_model, custom_model, api_url, method, max_size, overlap, adaptive):
             try:
-                all_content = get_all_content_from_database()
-                if not all_content:
+                # Streamed from the database in batches rather than loaded whole
+                all_content = iter_all_content_from_database()
+                first_item = next(all_content, None)
+                if first_item is None:
                     return "No content found in the database."
 
                 chunk_options = {
@@ -133,7 +137,7 @@ def create_embeddings_tab():
                 }
 
                 collection_name = "all_content_embeddings"
-                collection = chroma_client.get_or_create_collection(name=collection_name)
+                collection = vector_store.get_or_create_collection(name=collection_name)
 
                 # Determine the model to use
                 if provider == "huggingface":
@@ -143,33 +147,55 @@ def create_embeddings_tab():
                 else:
                     model = custom_model
 
-                for item in all_content:
-                    media_id = item['id']
-                    text = item['content']
-
-                    chunks = improved_chunking_process(text, chunk_options)
-                    for i, chunk in enumerate(chunks):
-                        chunk_text = chunk['text']
-                        chunk_id = f"doc_{media_id}_chunk_{i}"
-
-                        existing = collection.get(ids=[chunk_id])
-                        if existing['ids']:
-                            continue
-
-                        embedding = create_embedding(chunk_text, provider, model, api_url)
-                        metadata = {
-                            "media_id": str(media_id),
-                            "chunk_index": i,
-                            "total_chunks": len(chunks),
-                            "chunking_method": method,
-                            "max_chunk_size": max_size,
-                            "chunk_overlap": overlap,
-                            "adaptive_chunking": adaptive,
-                            "embedding_model": model,
-                            "embedding_provider": provider,
-                            **chunk['metadata']
-                        }
-                        store_in_chroma(collection_name, [chunk_text], [embedding], [chunk_id], [metadata])
+                dedup_index = get_dedup_index()
+                # Chunks registered as canonical in the dedup index; each needs its vector stored
+                registered = []
+
+                def records():
+                    for item in itertools.chain([first_item], all_content):
+                        media_id = item['id']
+                        text = item['content']
+
+                        chunks = improved_chunking_process(text, chunk_options)
+                        chunk_ids = [f"doc_{media_id}_chunk_{i}" for i in range(len(chunks))]
+                        existing_ids = set(collection.get(ids=chunk_ids, include=[])['ids']) if chunk_ids else set()
+                        for i, chunk in enumerate(chunks):
+                            chunk_text = chunk['text']
+                            chunk_id = chunk_ids[i]
+                            if chunk_id in existing_ids:
+                                continue
+                            if dedup_index is not None:
+                                if dedup_index.register(chunk_key(collection_name, chunk_id), chunk_text):
+                                    # Duplicate of an embedded chunk; linked to its vector instead of embedded again
+                                    continue
+                                registered.append(chunk_id)
+
+                            embedding = create_embedding(chunk_text, provider, model, api_url)
+                            metadata = {
+                                "media_id": str(media_id),
+                                "chunk_index": i,
+                                "total_chunks": len(chunks),
+                                "chunking_method": method,
+                                "max_chunk_size": max_size,
+                                "chunk_overlap": overlap,
+                                "adaptive_chunking": adaptive,
+                                "embedding_model": model,
+                                "embedding_provider": provider,
+                                **chunk['metadata']
+                            }
+                            yield chunk_id, chunk_text, embedding, metadata
+
+                # Upserts go out in bounded batches as chunks are embedded
+                try:
+                    stream_to_vector_store(collection_name, records())
+                except Exception:
+                    if registered:
+                        # Forget the canonical chunks whose vectors were not stored, so a retry embeds them
+                        stored = set(vector_store.get_or_create_collection(name=collection_name).get(
+                            ids=registered, include=[])['ids'])
+                        dedup_index.remove(chunk_key(collection_name, chunk_id) for chunk_id in registered
+                                           if chunk_id not in stored)
+                    raise
 
                 return "Embeddings created and stored successfully for all content."
             except Exception as e:
@@ -269,8 +295,8 @@ def create_view_embeddings_tab():
 
         def get_items_with_embedding_status():
             try:
-                items = get_all_content_from_database()
-                collection = chroma_client.get_or_create_collection(name="all_content_embeddings")
+                items = iter_all_content_from_database(columns=('id', 'title'))
+                collection = vector_store.get_or_create_collection(name="all_content_embeddings")
                 choices = []
                 new_item_mapping = {}
                 for item in items:
@@ -313,7 +339,7 @@ def create_view_embeddings_tab():
                     return f"Invalid item selected: {selected_item}", "", ""
 
                 item_title = selected_item.rsplit(' (', 1)[0]
-                collection = chroma_client.get_or_create_collection(name="all_content_embeddings")
+                collection = vector_store.get_or_create_collection(name="all_content_embeddings")
 
                 result = collection.get(ids=[f"doc_{item_id}_chunk_0"], include=["embeddings", "metadatas"])
                 logging.info(f"ChromaDB result for item '{item_title}' (ID: {item_id}): {result}")
@@ -345,9 +371,9 @@ def create_view_embeddings_tab():
                 if item_id is None:
                     return f"Invalid item selected: {selected_item}", "", ""
 
-                items = get_all_content_from_database()
-                item = next((item for item in items if item['id'] == item_id), None)
-                if not item:
+                try:
+                    item = {'id': item_id, 'content': get_media_content(item_id), 'title': get_media_title(item_id)}
+                except ValueError:
                     return f"Item not found: {item_id}", "", ""
 
                 chunk_options = {
@@ -360,11 +386,16 @@ def create_view_embeddings_tab():
                 logging.info(f"Chunking content for item: {item['title']} (ID: {item_id})")
                 chunks = chunk_for_embedding(item['content'], item['title'], chunk_options)
                 collection_name = "all_content_embeddings"
-                collection = chroma_client.get_or_create_collection(name=collection_name)
+                collection = vector_store.get_or_create_collection(name=collection_name)
 
                 # Delete existing embeddings for this item
                 existing_ids = [f"doc_{item_id}_chunk_{i}" for i in range(len(chunks))]
                 collection.delete(ids=existing_ids)
+                dedup_index = get_dedup_index()
+                if dedup_index is not None and \
+                        dedup_index.remove(chunk_key(collection_name, chunk_id) for chunk_id in existing_ids):
+                    # Duplicates of this item's chunks elsewhere need vectors of their own now
+                    reembed_orphaned_chunks()
                 logging.info(f"Deleted {len(existing_ids)} existing embeddings for item {item_id}")
 
                 texts, ids, metadatas = [], [], []
@@ -488,8 +519,11 @@ def create_purge_embeddings_tab():
         try:
             # It came to me in a dream....I literally don't remember how the fuck this works, cant find documentation...
             collection_name = "all_content_embeddings"
-            chroma_client.delete_collection(collection_name)
-            chroma_client.create_collection(collection_name)
+            vector_store.delete_collection(collection_name)
+            vector_store.create_collection(collection_name)
+            dedup_index = get_dedup_index()
+            if dedup_index is not None and dedup_index.remove_collection(collection_name):
+                reembed_orphaned_chunks()
             logging.info(f"All embeddings have been purged successfully.")
             return "All embeddings have been purged successfully."
         except Exception as e:
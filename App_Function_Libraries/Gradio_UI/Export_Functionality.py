@@ -4,12 +4,11 @@ import os
 import json
 import math
 import logging
-import shutil
-import tempfile
 from typing import List, Dict, Optional, Tuple
 import gradio as gr
-from App_Function_Libraries.DB.DB_Manager import DatabaseError
-from App_Function_Libraries.Gradio_UI.Gradio_Shared import fetch_item_details, fetch_items_by_keyword, browse_items
+from App_Function_Libraries.DB.DB_Manager import DatabaseError, iter_media_by_keyword
+from App_Function_Libraries.DB.Streaming_Export import safe_file_name, write_markdown_zip
+from App_Function_Libraries.Gradio_UI.Gradio_Shared import fetch_item_details, browse_items
 
 logger = logging.getLogger(__name__)
 
@@ -33,36 +32,20 @@ def export_item_as_markdown(media_id: int) -> Tuple[Optional[str], str]:
 
 def export_items_by_keyword(keyword: str) -> str:
     try:
-        items = fetch_items_by_keyword(keyword)
-        if not items:
+        # Items stream from the database in batches straight into the archive, one Markdown file each
+        zip_filename = f"export_keyword_{safe_file_name(keyword)}.zip"
+        final_zip_path = os.path.join(os.getcwd(), zip_filename)
+        count = write_markdown_zip(
+            final_zip_path, iter_media_by_keyword(keyword),
+            lambda item: f"# {item['title']}\n\n## Prompt\n{item['latest_prompt'] or ''}\n\n"
+                         f"## Summary\n{item['latest_summary'] or ''}\n\n## Content\n{item['content'] or ''}",
+            lambda item: f"{item['id']}_{safe_file_name(item['title'])}")
+        if not count:
+            os.remove(final_zip_path)
             logger.warning(f"No items found for keyword: {keyword}")
             return None
 
-        # Create a temporary directory to store individual markdown files
-        with tempfile.TemporaryDirectory() as temp_dir:
-            folder_name = f"export_keyword_{keyword}"
-            export_folder = os.path.join(temp_dir, folder_name)
-            os.makedirs(export_folder)
-
-            for item in items:
-                content, prompt, summary = fetch_item_details(item['id'])
-                markdown_content = f"# {item['title']}\n\n## Prompt\n{prompt}\n\n## Summary\n{summary}\n\n## Content\n{content}"
-
-                # Create individual markdown file for each item
-                file_name = f"{item['id']}_{item['title'][:50]}.md"  # Limit filename length
-                file_path = os.path.join(export_folder, file_name)
-                with open(file_path, "w", encoding='utf-8') as f:
-                    f.write(markdown_content)
-
-            # Create a zip file containing all markdown files
-            zip_filename = f"{folder_name}.zip"
-            shutil.make_archive(os.path.join(temp_dir, folder_name), 'zip', export_folder)
-
-            # Move the zip file to a location accessible by Gradio
-            final_zip_path = os.path.join(os.getcwd(), zip_filename)
-            shutil.move(os.path.join(temp_dir, zip_filename), final_zip_path)
-
-        logger.info(f"Successfully exported {len(items)} items for keyword '{keyword}' to {zip_filename}")
+        logger.info(f"Successfully exported {count} items for keyword '{keyword}' to {zip_filename}")
         return final_zip_path
     except Exception as e:
         logger.error(f"Error exporting items for keyword '{keyword}': {str(e)}")
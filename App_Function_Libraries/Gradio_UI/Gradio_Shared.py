@@ -84,7 +84,7 @@ def fetch_items_by_content(search_query: str):
     try:
         with db.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id, title, url FROM Media WHERE content LIKE ?", (f'%{search_query}%',))
+            cursor.execute("SELECT id, title, url FROM Media WHERE decompress_text(content) LIKE ?", (f'%{search_query}%',))
             results = cursor.fetchall()
             return results
     except sqlite3.Error as e:
@@ -105,7 +105,7 @@ def fetch_item_details_single(media_id: int):
                 LIMIT 1
             """, (media_id,))
             prompt_summary_result = cursor.fetchone()
-            cursor.execute("SELECT content FROM Media WHERE id = ?", (media_id,))
+            cursor.execute("SELECT decompress_text(content) FROM Media WHERE id = ?", (media_id,))
             content_result = cursor.fetchone()
 
             prompt = prompt_summary_result[0] if prompt_summary_result else ""
@@ -130,7 +130,7 @@ def fetch_item_details(media_id: int):
                 LIMIT 1
             """, (media_id,))
             prompt_summary_result = cursor.fetchone()
-            cursor.execute("SELECT content FROM Media WHERE id = ?", (media_id,))
+            cursor.execute("SELECT decompress_text(content) FROM Media WHERE id = ?", (media_id,))
             content_result = cursor.fetchone()
 
             prompt = prompt_summary_result[0] if prompt_summary_result else ""
@@ -10,7 +10,7 @@ import gradio as gr
 #
 # Local Imports
 from App_Function_Libraries.DB.DB_Manager import add_prompt, update_media_content, db, add_or_update_prompt, \
-    load_prompt_details, fetch_keywords_for_media, update_keywords_for_media
+    load_prompt_details, fetch_keywords_for_media, update_keywords_for_media, invalidate_keyword_media_index
 from App_Function_Libraries.Gradio_UI.Gradio_Shared import update_dropdown, update_prompt_dropdown
 from App_Function_Libraries.DB.SQLite_DB import fetch_item_details
 
@@ -182,6 +182,7 @@ def create_media_edit_and_clone_tab():
                         """, (new_media_id, new_title, content))
 
                         conn.commit()
+                    invalidate_keyword_media_index()
 
                     return f"Cloned item saved successfully with ID: {new_media_id}", gr.update(
                         visible=False), gr.update(visible=False)
@@ -2,6 +2,7 @@
 # Description: Gradio UI for RAG QA Chat
 #
 # Imports
+import asyncio
 import csv
 import logging
 import json
@@ -18,6 +19,7 @@ from App_Function_Libraries.DB.DB_Manager import DatabaseError, get_paginated_fi
 from App_Function_Libraries.DB.RAG_QA_Chat_DB import (
     save_notes,
     add_keywords_to_note,
+    set_keywords_for_note,
     start_new_conversation,
     save_message,
     search_conversations_by_keywords,
@@ -27,13 +29,13 @@ from App_Function_Libraries.DB.RAG_QA_Chat_DB import (
     get_notes_by_keywords,
     get_notes_by_keyword_collection,
     update_note,
-    clear_keywords_from_note, get_notes, get_keywords_for_note, delete_conversation, delete_note, execute_query,
+    get_notes, get_keywords_for_note, delete_conversation, delete_note, execute_query,
     add_keywords_to_conversation, fetch_all_notes, fetch_all_conversations, fetch_conversations_by_ids,
     fetch_notes_by_ids,
 )
 from App_Function_Libraries.PDF.PDF_Ingestion_Lib import extract_text_and_format_from_pdf
-from App_Function_Libraries.RAG.RAG_Library_2 import generate_answer, enhanced_rag_pipeline
-from App_Function_Libraries.RAG.RAG_QA_Chat import search_database, rag_qa_chat
+from App_Function_Libraries.RAG.RAG_Library_2 import agenerate_answer
+from App_Function_Libraries.RAG.RAG_QA_Chat import search_database, astream_rag_qa_chat
 #
 ########################################################################################################################
 #
@@ -212,9 +214,7 @@ def create_rag_qa_chat_tab():
                     note_id = save_notes(conversation_id, note_title_text, notes_content)
                     note_state_value["note_id"] = note_id
                 if keywords_content:
-                    # Clear existing keywords and add new ones
-                    clear_keywords_from_note(note_id)
-                    add_keywords_to_note(note_id, [kw.strip() for kw in keywords_content.split(',')])
+                    set_keywords_for_note(note_id, [kw.strip() for kw in keywords_content.split(',')])
 
                 logging.info("Notes and keywords saved successfully!")
                 return notes_content, note_state_value
@@ -366,7 +366,7 @@ def create_rag_qa_chat_tab():
             outputs=[search_results]
         )
 
-        def rephrase_question(history, latest_question, api_choice):
+        async def rephrase_question(history, latest_question, api_choice):
             logging.info("RAG QnA: Rephrasing question")
             conversation_history = "\n".join([f"User: {h[0]}\nAssistant: {h[1]}" for h in history[:-1]])
             prompt = f"""You are a helpful assistant. Given the conversation history and the latest question, resolve any ambiguous references in the latest question.
@@ -380,11 +380,13 @@ Latest Question:
 Rewritten Question:"""
 
             # Use the selected API to generate the rephrased question
-            rephrased_question = generate_answer(api_choice, prompt, "")
+            rephrased_question = await agenerate_answer(api_choice, prompt, "")
             logging.info(f"Rephrased question: {rephrased_question}")
             return rephrased_question.strip()
 
-        def rag_qa_chat_wrapper(message, history, context_source, existing_file, search_results, file_upload,
+        # Async generator so the LLM round-trips don't hold a Gradio worker thread; blocking DB/file work is
+        # pushed to a thread with asyncio.to_thread
+        async def rag_qa_chat_wrapper(message, history, context_source, existing_file, search_results, file_upload,
                                 convert_to_text, keywords, api_choice, use_query_rewriting, state_value,
                                 keywords_input, top_k_input, use_re_ranking):
             try:
@@ -401,7 +403,7 @@ Rewritten Question:"""
 
                 # Save the user's message
                 if conversation_id:
-                    save_message(conversation_id, "user", message)
+                    await asyncio.to_thread(save_message, conversation_id, "user", message)
                 else:
                     # Append to in-memory messages
                     conversation_messages.append(("user", message))
@@ -413,7 +415,7 @@ Rewritten Question:"""
 
                 # Only rephrase the question if it's not the first query and query rewriting is enabled
                 if len(history) > 0 and use_query_rewriting:
-                    rephrased_question = rephrase_question(history, message, api_choice)
+                    rephrased_question = await rephrase_question(history, message, api_choice)
                     logging.info(f"Original question: {message}")
                     logging.info(f"Rephrased question: {rephrased_question}")
                 else:
@@ -421,9 +423,8 @@ Rewritten Question:"""
                     logging.info(f"Using original question: {message}")
 
                 if context_source == "All Files in the Database":
-                    # Use the enhanced_rag_pipeline to search the entire database
-                    context = enhanced_rag_pipeline(rephrased_question, api_choice, keywords_input, top_k_input,
-                                                    use_re_ranking)
+                    # The streaming RAG pipeline below searches the entire database
+                    context = "all_files"
                     logging.info(f"Using enhanced_rag_pipeline for database search")
                 elif context_source == "Search Database":
                     context = f"media_id:{search_results.split('(ID: ')[1][:-1]}"
@@ -440,7 +441,7 @@ Rewritten Question:"""
 
                     if convert_to_text:
                         logging.info("Converting file to plain text")
-                        content = convert_file_to_text(file_path)
+                        content = await asyncio.to_thread(convert_file_to_text, file_path)
                     else:
                         logging.info("Reading file content")
                         with open(file_path, 'r', encoding='utf-8') as f:
@@ -455,7 +456,8 @@ Rewritten Question:"""
 
                     # Add the content to the database and get the media_id
                     logging.info("Adding content to database")
-                    result = add_media_with_keywords(
+                    result = await asyncio.to_thread(
+                        add_media_with_keywords,
                         url=file_name,
                         title=file_name,
                         media_type='document',
@@ -478,13 +480,19 @@ Rewritten Question:"""
                     logging.info(f"Context for uploaded file: {context}")
 
                 logging.info("Calling rag_qa_chat function")
-                new_history, response = rag_qa_chat(rephrased_question, history, context, api_choice)
+                # Work on a copy so the caller's history keeps its last turn if the stream yields nothing
+                new_history, response = list(history) + [(message, "")], ""
+                async for streamed_history, response in astream_rag_qa_chat(rephrased_question, history, context,
+                                                                             api_choice, keywords_input,
+                                                                             top_k_input, use_re_ranking):
+                    new_history = streamed_history[:-1] + [(message, response)]
+                    yield new_history, "", gr.update(visible=True), state_value
                 # Log first 100 chars of response
                 logging.info(f"Response received from rag_qa_chat: {response[:100]}...")
 
                 # Save assistant's response
                 if conversation_id:
-                    save_message(conversation_id, "assistant", response)
+                    await asyncio.to_thread(save_message, conversation_id, "assistant", response)
                 else:
                     conversation_messages.append(("assistant", response))
                     state_value["conversation_messages"] = conversation_messages
@@ -492,11 +500,7 @@ Rewritten Question:"""
                 # Update the state
                 state_value["conversation_messages"] = conversation_messages
 
-                # Safely update history
-                if new_history:
-                    new_history[-1] = (message, response)
-                else:
-                    new_history = [(message, response)]
+                new_history[-1] = (message, response)
 
                 gr.Info("Response generated successfully")
                 logging.info("rag_qa_chat_wrapper completed successfully")
@@ -532,7 +536,8 @@ Rewritten Question:"""
                 use_query_rewriting,
                 state,
                 keywords_input,
-                top_k_input
+                top_k_input,
+                use_re_ranking
             ],
             outputs=[chatbot, msg, loading_indicator, state],
         )
@@ -633,10 +638,8 @@ def create_rag_qa_notes_management_tab():
             if note_id:
                 update_note(note_id, title, content)
                 if keywords_str:
-                    # Clear existing keywords and add new ones
-                    clear_keywords_from_note(note_id)
                     keywords_list = [kw.strip() for kw in keywords_str.split(',')]
-                    add_keywords_to_note(note_id, keywords_list)
+                    set_keywords_for_note(note_id, keywords_list)
                 return gr.Info("Note updated successfully.")
             else:
                 # Create new note
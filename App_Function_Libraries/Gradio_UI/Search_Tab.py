@@ -12,9 +12,10 @@ import gradio as gr
 # Local Imports
 from App_Function_Libraries.DB.DB_Manager import view_database, search_and_display_items, get_all_document_versions, \
     fetch_item_details_single, fetch_paginated_data, fetch_item_details, get_latest_transcription
-from App_Function_Libraries.DB.SQLite_DB import search_prompts, get_document_version
+from App_Function_Libraries.DB.Pagination import PageQuery, read_generation
+from App_Function_Libraries.DB.SQLite_DB import search_prompts, get_document_version, paginator, get_prompts_db_path
 from App_Function_Libraries.Gradio_UI.Gradio_Shared import update_dropdown, update_detailed_view
-from App_Function_Libraries.Utils.Utils import get_database_path, format_text_with_line_breaks
+from App_Function_Libraries.Utils.Utils import format_text_with_line_breaks
 #
 ###################################################################################################
 #
@@ -225,31 +226,19 @@ def create_prompt_search_tab():
         # This is dirty and shouldn't be in the UI code, but it's a quick way to get the search working.
         # FIXME - SQL functions to be moved to DB_Manager
         def search_and_display_prompts(query, page, entries_per_page):
-            offset = (page - 1) * entries_per_page
             try:
                 # FIXME - SQL functions to be moved to DB_Manager
-                with sqlite3.connect(get_database_path('prompts.db')) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        SELECT p.name, p.details, p.system, p.user, GROUP_CONCAT(k.keyword, ', ') as keywords
-                        FROM Prompts p
-                        LEFT JOIN PromptKeywords pk ON p.id = pk.prompt_id
-                        LEFT JOIN Keywords k ON pk.keyword_id = k.id
-                        WHERE p.name LIKE ? OR p.details LIKE ? OR p.system LIKE ? OR p.user LIKE ? OR k.keyword LIKE ?
-                        GROUP BY p.id
-                        ORDER BY p.name
-                        LIMIT ? OFFSET ?
-                    ''', (f'%{query}%', f'%{query}%', f'%{query}%', f'%{query}%', f'%{query}%', entries_per_page, offset))
-                    prompts = cursor.fetchall()
-
-                    cursor.execute('''
-                        SELECT COUNT(DISTINCT p.id)
-                        FROM Prompts p
-                        LEFT JOIN PromptKeywords pk ON p.id = pk.prompt_id
-                        LEFT JOIN Keywords k ON pk.keyword_id = k.id
-                        WHERE p.name LIKE ? OR p.details LIKE ? OR p.system LIKE ? OR p.user LIKE ? OR k.keyword LIKE ?
-                    ''', (f'%{query}%', f'%{query}%', f'%{query}%', f'%{query}%', f'%{query}%'))
-                    total_prompts = cursor.fetchone()[0]
+                prompts_db_path = get_prompts_db_path()
+                page_query = PageQuery(
+                    "p.name, p.details, p.system, p.user, GROUP_CONCAT(k.keyword, ', ') as keywords",
+                    "Prompts p LEFT JOIN PromptKeywords pk ON p.id = pk.prompt_id "
+                    "LEFT JOIN Keywords k ON pk.keyword_id = k.id",
+                    (('p.name', 'ASC'), ('p.id', 'ASC')),
+                    where="p.name LIKE ? OR p.details LIKE ? OR p.system LIKE ? OR p.user LIKE ? OR k.keyword LIKE ?",
+                    params=(f'%{query}%',) * 5, group_by='p.id')
+                with sqlite3.connect(prompts_db_path) as conn:
+                    prompts, total_pages, total_prompts = paginator.fetch(conn, page_query, page, entries_per_page,
+                                                                          read_generation(conn), prompts_db_path)
 
                 results = ""
                 for prompt in prompts:
@@ -279,7 +268,6 @@ def create_prompt_search_tab():
                     </div>
                     """
 
-                total_pages = (total_prompts + entries_per_page - 1) // entries_per_page
                 pagination = f"Page {page} of {total_pages} (Total prompts: {total_prompts})"
 
                 return results, pagination, total_pages
@@ -8,7 +8,7 @@ import gradio as gr
 #
 # Local Imports
 from App_Function_Libraries.DB.DB_Manager import (
-    get_trashed_items, user_delete_item, empty_trash,
+    get_trashed_items, user_delete_item, purge_trash,
     get_transcripts, fetch_item_details,
     search_media_database, mark_as_trash,
 )
@@ -31,8 +31,10 @@ def delete_item(media_id, force):
 
 
 def empty_trash_ui(days):
-    deleted, remaining = empty_trash(days)
-    return f"Deleted {deleted} items. {remaining} items remain in trash."
+    report = purge_trash(days)
+    return (f"Deleted {report['media']} items ({sum(report['rows'].values())} rows, {report['vectors']} vectors). "
+            f"{report['remaining']} items remain in trash. Freed {report['freed_bytes'] / 1024:.0f} KiB, "
+            f"database file shrank by {report['reclaimed_bytes'] / 1024:.0f} KiB.")
 
 
 def get_media_transcripts(media_id):
@@ -32,6 +32,7 @@ import requests
 # Import 3rd-Party Libraries
 #
 # Import Local libraries
+from App_Function_Libraries.LLM_Providers.HTTP_Client import get_http_session
 from App_Function_Libraries.Utils.Utils import load_and_log_configs
 #
 #######################################################################################################################
@@ -95,7 +96,7 @@ def get_openai_embeddings(input_data: str, model: str) -> List[float]:
 
     try:
         logging.debug("OpenAI: Posting request to embeddings API")
-        response = requests.post('https://api.openai.com/v1/embeddings', headers=headers, json=request_data)
+        response = get_http_session().post('https://api.openai.com/v1/embeddings', headers=headers, json=request_data)
         logging.debug(f"Full API response data: {response}")
         if response.status_code == 200:
             response_data = response.json()
@@ -207,7 +208,7 @@ def chat_with_openai(api_key, input_data, custom_prompt_arg, temp=None, system_m
         }
 
         logging.debug("OpenAI: Posting request")
-        response = requests.post('https://api.openai.com/v1/chat/completions', headers=headers, json=data)
+        response = get_http_session().post('https://api.openai.com/v1/chat/completions', headers=headers, json=data)
         logging.debug(f"Full API response data: {response}")
         if response.status_code == 200:
             response_data = response.json()
@@ -325,7 +326,7 @@ def chat_with_anthropic(api_key, input_data, model, custom_prompt_arg, max_retri
         for attempt in range(max_retries):
             try:
                 logging.debug("Anthropic: Posting request to API")
-                response = requests.post('https://api.anthropic.com/v1/messages', headers=headers, json=data)
+                response = get_http_session().post('https://api.anthropic.com/v1/messages', headers=headers, json=data)
                 logging.debug(f"Anthropic: Full API response data: {response}")
 
                 # Check if the status code indicates success
@@ -440,7 +441,7 @@ def chat_with_cohere(api_key, input_data, model=None, custom_prompt_arg=None, sy
         print("cohere chat: Submitting request to API endpoint")
 
         try:
-            response = requests.post('https://api.cohere.ai/v2/chat', headers=headers, json=data)
+            response = get_http_session().post('https://api.cohere.ai/v2/chat', headers=headers, json=data)
             logging.debug(f"Cohere Chat: Raw API response: {response.text}")
         except requests.RequestException as e:
             logging.error(f"Cohere Chat: Error making API request: {str(e)}")
@@ -585,7 +586,7 @@ def chat_with_groq(api_key, input_data, custom_prompt_arg, temp=None, system_mes
 
         logging.debug("groq: Submitting request to API endpoint")
         print("groq: Submitting request to API endpoint")
-        response = requests.post('https://api.groq.com/openai/v1/chat/completions', headers=headers, json=data)
+        response = get_http_session().post('https://api.groq.com/openai/v1/chat/completions', headers=headers, json=data)
 
         response_data = response.json()
         logging.debug(f"Full API response data: {response_data}")
@@ -688,7 +689,7 @@ def chat_with_openrouter(api_key, input_data, custom_prompt_arg, temp=None, syst
     try:
         logging.debug("OpenRouter: Submitting request to API endpoint")
         print("OpenRouter: Submitting request to API endpoint")
-        response = requests.post(
+        response = get_http_session().post(
             url="https://openrouter.ai/api/v1/chat/completions",
             headers={
                 "Authorization": f"Bearer {openrouter_api_key}",
@@ -763,7 +764,7 @@ def chat_with_huggingface(api_key, input_data, custom_prompt_arg, system_prompt=
         }
 
         logging.debug("HuggingFace Chat: Submitting request...")
-        response = requests.post(API_URL, headers=headers, json=data)
+        response = get_http_session().post(API_URL, headers=headers, json=data)
         logging.debug(f"Full API response data: {response.text}")
 
         if response.status_code == 200:
@@ -912,7 +913,7 @@ def chat_with_deepseek(api_key, input_data, custom_prompt_arg, temp=0.1, system_
         logging.debug("DeepSeek: Posting request to API")
         for attempt in range(1, max_retries + 1):
             try:
-                response = requests.post('https://api.deepseek.com/chat/completions', headers=headers, json=payload, timeout=30)
+                response = get_http_session().post('https://api.deepseek.com/chat/completions', headers=headers, json=payload, timeout=30)
                 logging.debug(f"DeepSeek: Full API response: {response.status_code} - {response.text}")
 
                 if response.status_code == 200:
@@ -1024,7 +1025,7 @@ def chat_with_mistral(api_key, input_data, custom_prompt_arg, temp=None, system_
         }
 
         logging.debug("Mistral: Posting request")
-        response = requests.post('https://api.mistral.ai/v1/chat/completions', headers=headers, json=data)
+        response = get_http_session().post('https://api.mistral.ai/v1/chat/completions', headers=headers, json=data)
         logging.debug(f"Full API response data: {response}")
         if response.status_code == 200:
             response_data = response.json()
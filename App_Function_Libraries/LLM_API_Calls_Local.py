@@ -22,6 +22,7 @@ from typing import Union
 ####################
 # Import necessary libraries
 # Import Local
+from App_Function_Libraries.LLM_Providers.HTTP_Client import get_http_session
 from App_Function_Libraries.Utils.Utils import *
 #
 #######################################################################################################################
@@ -79,7 +80,7 @@ def chat_with_local_llm(input_data, custom_prompt_arg, temp, system_message=None
             "max_tokens": 28000,  # Adjust tokens as needed
         }
         logging.debug("Local LLM: Posting request")
-        response = requests.post('http://127.0.0.1:8080/v1/chat/completions', headers=headers, json=data)
+        response = get_http_session().post('http://127.0.0.1:8080/v1/chat/completions', headers=headers, json=data)
 
         if response.status_code == 200:
             response_data = response.json()
@@ -170,7 +171,7 @@ def chat_with_llama(input_data, custom_prompt, temp, api_url="http://127.0.0.1:8
 
         logging.debug("llama: Submitting request to API endpoint")
         print("llama: Submitting request to API endpoint")
-        response = requests.post(api_url, headers=headers, json=data)
+        response = get_http_session().post(api_url, headers=headers, json=data)
         response_data = response.json()
         logging.debug("API Response Data: %s", response_data)
 
@@ -264,7 +265,7 @@ def chat_with_kobold(input_data, api_key, custom_prompt_input, kobold_api_ip="ht
         print("kobold: Submitting request to API endpoint")
         kobold_api_ip = loaded_config_data['local_api_ip']['kobold']
         try:
-            response = requests.post(kobold_api_ip, headers=headers, json=data)
+            response = get_http_session().post(kobold_api_ip, headers=headers, json=data)
             logging.debug("kobold: API Response Status Code: %d", response.status_code)
 
             if response.status_code == 200:
@@ -294,7 +295,8 @@ def chat_with_kobold(input_data, api_key, custom_prompt_input, kobold_api_ip="ht
 
 # System prompt doesn't work. FIXME
 # https://github.com/oobabooga/text-generation-webui/wiki/12-%E2%80%90-OpenAI-API
-def chat_with_oobabooga(input_data, api_key, custom_prompt, api_url="http://127.0.0.1:5000/v1/chat/completions", system_prompt=None):
+def chat_with_oobabooga(input_data, api_key, custom_prompt, api_url="http://127.0.0.1:5000/v1/chat/completions", system_prompt=None,
+                        temp=None):
     loaded_config_data = load_and_log_configs()
     try:
         # API key validation
@@ -325,10 +327,12 @@ def chat_with_oobabooga(input_data, api_key, custom_prompt, api_url="http://127.
             "character": "Example",
             "messages": [{"role": "user", "content": ooba_prompt}]
         }
+        if temp is not None:
+            data["temperature"] = temp
 
         logging.debug("ooba: Submitting request to API endpoint")
         print("ooba: Submitting request to API endpoint")
-        response = requests.post(api_url, headers=headers, json=data, verify=False)
+        response = get_http_session().post(api_url, headers=headers, json=data, verify=False)
         logging.debug("ooba: API Response Data: %s", response)
 
         if response.status_code == 200:
@@ -347,7 +351,8 @@ def chat_with_oobabooga(input_data, api_key, custom_prompt, api_url="http://127.
 
 
 # FIXME - Install is more trouble than care to deal with right now.
-def chat_with_tabbyapi(input_data, custom_prompt_input, api_key=None, api_IP="http://127.0.0.1:5000/v1/chat/completions"):
+def chat_with_tabbyapi(input_data, custom_prompt_input, api_key=None, api_IP="http://127.0.0.1:5000/v1/chat/completions",
+                       temp=None):
     loaded_config_data = load_and_log_configs()
     model = loaded_config_data['models']['tabby']
     # API key validation
@@ -392,9 +397,11 @@ def chat_with_tabbyapi(input_data, custom_prompt_input, api_key=None, api_IP="ht
         'text': text,
         'model': 'tabby'  # Specify the model if needed
     }
+    if temp is not None:
+        data2['temperature'] = temp
     tabby_api_ip = loaded_config_data['local_api']['tabby']['ip']
     try:
-        response = requests.post(tabby_api_ip, headers=headers, json=data2)
+        response = get_http_session().post(tabby_api_ip, headers=headers, json=data2)
         response.raise_for_status()
         summary = response.json().get('summary', '')
         return summary
@@ -404,7 +411,7 @@ def chat_with_tabbyapi(input_data, custom_prompt_input, api_key=None, api_IP="ht
 
 
 # FIXME aphrodite engine - code was literally tab complete in one go from copilot... :/
-def chat_with_aphrodite(input_data, custom_prompt_input, api_key=None, api_IP="http://127.0.0.1:8080/completion"):
+def chat_with_aphrodite(input_data, custom_prompt_input, api_key=None, api_IP="http://127.0.0.1:8080/completion", temp=None):
     loaded_config_data = load_and_log_configs()
     model = loaded_config_data['models']['aphrodite']
     # API key validation
@@ -423,8 +430,10 @@ def chat_with_aphrodite(input_data, custom_prompt_input, api_key=None, api_IP="h
     data2 = {
         'text': input_data,
     }
+    if temp is not None:
+        data2['temperature'] = temp
     try:
-        response = requests.post(api_IP, headers=headers, json=data2)
+        response = get_http_session().post(api_IP, headers=headers, json=data2)
         response.raise_for_status()
         summary = response.json().get('summary', '')
         return summary
@@ -534,7 +543,7 @@ def chat_with_ollama(
             logging.debug("Ollama: Submitting request to API endpoint")
             print("Ollama: Submitting request to API endpoint")
             try:
-                response = requests.post(api_url, headers=headers, json=data_payload, timeout=30)
+                response = get_http_session().post(api_url, headers=headers, json=data_payload, timeout=30)
                 response.raise_for_status()  # Raises HTTPError for bad responses
                 response_data = response.json()
             except requests.exceptions.Timeout:
@@ -666,10 +675,12 @@ def chat_with_vllm(
                 {"role": "user", "content": f"{custom_prompt_input}\n\n{text}"}
             ]
         }
+        if temp is not None:
+            payload["temperature"] = temp
 
         # Make the API call
         logging.debug(f"vLLM: Sending request to {vllm_api_url}")
-        response = requests.post(vllm_api_url, headers=headers, json=payload)
+        response = get_http_session().post(vllm_api_url, headers=headers, json=payload)
 
         # Check for successful response
         response.raise_for_status()
@@ -786,7 +797,7 @@ def chat_with_custom_openai(api_key, input_data, custom_prompt_arg, temp=None, s
         custom_openai_url = loaded_config_data['Local_api_ip']['custom_openai_api_ip']
 
         logging.debug("Custom OpenAI API: Posting request")
-        response = requests.post(custom_openai_url, headers=headers, json=data)
+        response = get_http_session().post(custom_openai_url, headers=headers, json=data)
         logging.debug(f"Custom OpenAI API full API response data: {response}")
         if response.status_code == 200:
             response_data = response.json()
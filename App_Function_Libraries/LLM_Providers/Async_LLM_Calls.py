@@ -0,0 +1,279 @@
+# Async_LLM_Calls.py
+# Description: asyncio versions of the LLM dispatch functions (`achat`, `asummarize`, `aembed`, `astream_chat`).
+#
+# Providers with a shared wire format (see Provider_Endpoints.py) are called natively over a pooled
+# `httpx.AsyncClient`; every other provider runs its sync adapter in a worker thread so the public API is the
+# same for all of them. Each provider gets its own concurrency semaphore, and all calls honour asyncio
+# cancellation plus an optional overall timeout.
+#
+# Imports
+import asyncio
+import logging
+import os
+import time
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional
+#
+# External Imports
+import httpx
+#
+# Local Imports
+from App_Function_Libraries.DB.LLM_Cache_DB import acached_llm_call
+from App_Function_Libraries.LLM_Providers.HTTP_Client import load_http_client_settings, get_provider_concurrency
+from App_Function_Libraries.LLM_Providers.Provider_Endpoints import resolve_endpoint, build_chat_request, \
+    parse_chat_response, parse_stream_event, is_ndjson_stream, StreamEventDecoder, OPENAI_EMBEDDINGS_URL
+from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
+from App_Function_Libraries.Utils.Utils import load_and_log_configs
+#
+#######################################################################################################################
+#
+# Functions:
+
+# httpx.AsyncClient and asyncio.Semaphore are bound to the loop they were created on, so keep one set per loop
+_loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_loop_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _loop_clients.get(loop)
+    if client is None or client.is_closed:
+        settings = load_http_client_settings()
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings['read_timeout'], connect=settings['connect_timeout']),
+            limits=httpx.Limits(max_connections=settings['pool_maxsize'],
+                                max_keepalive_connections=settings['pool_connections']),
+            transport=httpx.AsyncHTTPTransport(retries=settings['max_retries']),
+        )
+        _loop_clients[loop] = client
+    return client
+
+
+async def close_async_http_client() -> None:
+    client = _loop_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def get_provider_semaphore(api_name: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphores = _loop_semaphores.setdefault(loop, {})
+    key = (api_name or '').lower()
+    if key not in semaphores:
+        semaphores[key] = asyncio.Semaphore(get_provider_concurrency(key))
+    return semaphores[key]
+
+
+def _uses_native_path(input_data: Any) -> bool:
+    # The sync adapters know how to unpack file paths, segment lists and JSON dicts; the native path only
+    # handles plain text.
+    return isinstance(input_data, str) and not os.path.isfile(input_data)
+
+
+async def _native_chat(api_name: str, input_data: str, prompt: Optional[str], temp: Optional[float],
+                       system_message: Optional[str], api_key: Optional[str], model: Optional[str]) -> Optional[str]:
+    endpoint = resolve_endpoint(api_name, api_key, model)
+    if endpoint is None:
+        return None
+    url, headers, payload = build_chat_request(endpoint, input_data, prompt, temp, system_message)
+    response = await get_async_http_client().post(url, headers=headers, json=payload)
+    if response.status_code != 200:
+        logging.error(f"{api_name}: Async request failed with status code {response.status_code}: {response.text}")
+        return f"{api_name}: Failed to process chat response. Status code: {response.status_code}"
+    return parse_chat_response(endpoint, response.json())
+
+
+def _cache_model(api_name: str, model: Optional[str]) -> Optional[str]:
+    # Match the sync dispatchers, which key the cache on the configured model for the provider
+    if model:
+        return model
+    loaded_config_data = load_and_log_configs()
+    return loaded_config_data['models'].get((api_name or '').lower()) if loaded_config_data else None
+
+
+def _provider_limited(api_name: str, call):
+    """`call` run under the provider's concurrency cap; only live provider calls count against it."""
+    async def limited_call():
+        async with get_provider_semaphore(api_name):
+            return await call()
+    return limited_call
+
+
+async def _run_limited(api_name: str, coro_factory, timeout: Optional[float], metric_prefix: str):
+    labels = {"api_name": (api_name or '').lower()}
+    log_counter(f"{metric_prefix}_attempt", labels=labels)
+    start_time = time.time()
+    try:
+        result = await asyncio.wait_for(coro_factory(), timeout) if timeout else await coro_factory()
+        log_histogram(f"{metric_prefix}_duration", time.time() - start_time, labels=labels)
+        log_counter(f"{metric_prefix}_success", labels=labels)
+        return result
+    except asyncio.CancelledError:
+        log_counter(f"{metric_prefix}_cancelled", labels=labels)
+        raise
+    except asyncio.TimeoutError:
+        log_counter(f"{metric_prefix}_timeout", labels=labels)
+        logging.error(f"{api_name}: Async call timed out after {timeout} seconds")
+        return f"{api_name}: Error: Request timed out after {timeout} seconds"
+    except Exception as e:
+        log_counter(f"{metric_prefix}_error", labels={**labels, "error": str(e)})
+        logging.error(f"{api_name}: Error in async call: {str(e)}", exc_info=True)
+        return f"An error occurred: {str(e)}"
+
+
+async def achat(api_endpoint: str, input_data: Any, prompt: Optional[str], temp: Optional[float] = None,
+                system_message: Optional[str] = None, api_key: Optional[str] = None, model: Optional[str] = None,
+                timeout: Optional[float] = None, force_cache: bool = False) -> str:
+    """Async counterpart of `chat_api_call`. Cancelling the awaiting task aborts the in-flight request."""
+    async def call():
+        if _uses_native_path(input_data):
+            response = await _native_chat(api_endpoint, input_data, prompt, temp, system_message, api_key, model)
+            if response is not None:
+                return response
+        # The uncached dispatcher - the cache lookup already happened in cached_call()
+        from App_Function_Libraries.Chat import _dispatch_chat_api_call
+        return await asyncio.to_thread(_dispatch_chat_api_call, api_endpoint, api_key, input_data, prompt, temp,
+                                       system_message)
+
+    async def cached_call():
+        # Cache hits skip the provider semaphore, so they never queue behind slow live calls
+        return await acached_llm_call(api_endpoint, _cache_model(api_endpoint, model), input_data, prompt, temp,
+                                      system_message, _provider_limited(api_endpoint, call), force_cache=force_cache)
+
+    return await _run_limited(api_endpoint, cached_call, timeout, "achat")
+
+
+async def asummarize(input_data: Any, custom_prompt_arg: Optional[str], api_name: str, api_key: Optional[str] = None,
+                     temp: Optional[float] = None, system_message: Optional[str] = None, model: Optional[str] = None,
+                     timeout: Optional[float] = None, force_cache: bool = False) -> str:
+    """Async counterpart of `summarize`."""
+    async def call():
+        if _uses_native_path(input_data):
+            response = await _native_chat(api_name, input_data, custom_prompt_arg, temp, system_message, api_key, model)
+            if response is not None:
+                return response
+        from App_Function_Libraries.Summarization.Summarization_General_Lib import _dispatch_summarize
+        return await asyncio.to_thread(_dispatch_summarize, input_data, custom_prompt_arg, api_name, api_key, temp,
+                                       system_message)
+
+    async def cached_call():
+        return await acached_llm_call(api_name, _cache_model(api_name, model), input_data, custom_prompt_arg, temp,
+                                      system_message, _provider_limited(api_name, call), force_cache=force_cache)
+
+    return await _run_limited(api_name, cached_call, timeout, "asummarize")
+
+
+async def astream_chat(api_endpoint: str, input_data: Any, prompt: Optional[str], temp: Optional[float] = None,
+                       system_message: Optional[str] = None, api_key: Optional[str] = None,
+                       model: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Yield response text as it arrives. Providers without a streaming wire format yield the complete response
+    once. Closing the iterator (or cancelling the consuming task) closes the underlying HTTP stream.
+    """
+    endpoint = resolve_endpoint(api_endpoint, api_key, model) if _uses_native_path(input_data) else None
+    if endpoint is None:
+        yield await achat(api_endpoint, input_data, prompt, temp, system_message, api_key, model)
+        return
+
+    labels = {"api_name": endpoint.name}
+    log_counter("astream_chat_attempt", labels=labels)
+    url, headers, payload = build_chat_request(endpoint, input_data, prompt, temp, system_message, stream=True)
+    start_time = time.time()
+    first_token = True
+    try:
+        async with get_provider_semaphore(api_endpoint):
+            async with get_async_http_client().stream("POST", url, headers=headers, json=payload) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    logging.error(f"{api_endpoint}: Stream request failed ({response.status_code}): {body[:500]!r}")
+                    yield f"{api_endpoint}: Failed to process chat response. Status code: {response.status_code}"
+                    return
+                async for event_data in _aiter_stream_events(endpoint, response.aiter_lines()):
+                    text, done = parse_stream_event(endpoint, event_data)
+                    if text:
+                        if first_token:
+                            log_histogram("llm_time_to_first_token", time.time() - start_time, labels=labels)
+                            first_token = False
+                        yield text
+                    if done:
+                        break
+    except Exception as e:
+        # Same as achat: transport and stream errors end the stream with an error chunk instead of raising
+        log_counter("astream_chat_error", labels={**labels, "error": str(e)})
+        logging.error(f"{api_endpoint}: Error in async stream: {str(e)}", exc_info=True)
+        yield f"An error occurred: {str(e)}"
+        return
+    log_histogram("astream_chat_duration", time.time() - start_time, labels=labels)
+    log_counter("astream_chat_success", labels=labels)
+
+
+async def _aiter_stream_events(endpoint, lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    # Async twin of Provider_Endpoints.iter_stream_events, with the same decoder
+    decoder = StreamEventDecoder(is_ndjson_stream(endpoint))
+    async for line in lines:
+        event = decoder.feed(line)
+        if event is not None:
+            yield event
+    event = decoder.flush()
+    if event is not None:
+        yield event
+
+
+async def aembed(texts: List[str], provider: Optional[str] = None, model: Optional[str] = None,
+                 api_url: Optional[str] = None, timeout: Optional[float] = None) -> List[List[float]]:
+    """
+    Async batch embedding. OpenAI and OpenAI-compatible local servers are called natively; other providers
+    (HuggingFace/ONNX models loaded in-process) run `create_embeddings_batch` in a worker thread.
+    """
+    loaded_config_data = load_and_log_configs() or {}
+    embedding_config = loaded_config_data.get('embedding_config', {})
+    provider = (provider or embedding_config.get('embedding_provider') or 'openai').lower()
+    model = model or embedding_config.get('embedding_model')
+
+    async def call():
+        if provider == 'openai':
+            api_key = loaded_config_data.get('api_keys', {}).get('openai')
+            response = await get_async_http_client().post(
+                OPENAI_EMBEDDINGS_URL,
+                headers={'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'},
+                json={"input": texts, "model": model})
+            response.raise_for_status()
+            return [item['embedding'] for item in sorted(response.json()['data'], key=lambda d: d['index'])]
+        if provider == 'local':
+            url = api_url or embedding_config.get('embedding_api_url')
+            if not url:
+                raise ValueError("No embedding_api_url configured for the local embedding provider")
+            api_key = embedding_config.get('embedding_api_key')
+            response = await get_async_http_client().post(
+                url, headers={"Authorization": f"Bearer {api_key}"}, json={"texts": texts, "model": model})
+            response.raise_for_status()
+            return response.json()['embeddings']
+        from App_Function_Libraries.RAG.Embeddings_Create import create_embeddings_batch
+        return await asyncio.to_thread(create_embeddings_batch, texts, provider, model, api_url)
+
+    labels = {"provider": provider, "model": model}
+    log_counter("aembed_attempt", labels=labels)
+    start_time = time.time()
+    # Unlike chat there is no error string to hand back in place of vectors, so failures are logged and re-raised
+    try:
+        async with get_provider_semaphore(f"embed-{provider}"):
+            result = await asyncio.wait_for(call(), timeout) if timeout else await call()
+    except asyncio.CancelledError:
+        log_counter("aembed_cancelled", labels=labels)
+        raise
+    except asyncio.TimeoutError:
+        log_counter("aembed_timeout", labels=labels)
+        logging.error(f"aembed: {provider} embedding request timed out after {timeout} seconds")
+        raise
+    except Exception as e:
+        log_counter("aembed_error", labels={**labels, "error": str(e)})
+        logging.error(f"aembed: Error creating {provider} embeddings: {str(e)}", exc_info=True)
+        raise
+    log_histogram("aembed_duration", time.time() - start_time, labels=labels)
+    log_counter("aembed_success", labels=labels)
+    return result
+
+#
+# End of Async_LLM_Calls.py
+#######################################################################################################################
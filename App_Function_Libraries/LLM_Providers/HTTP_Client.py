@@ -0,0 +1,134 @@
+# HTTP_Client.py
+# Description: Shared, pooled HTTP session used by every LLM provider adapter.
+#
+# Every `chat_with_*`/`summarize_with_*` function used to call `requests.post` directly, paying for a fresh
+# TCP+TLS handshake per request. They now share one keep-alive session with a bounded connection pool,
+# default connect/read timeouts and transport-level retries for connection errors (plus 429/5xx responses to GETs).
+#
+# Imports
+import logging
+import threading
+from typing import Optional, Tuple
+#
+# External Imports
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+#
+# Local Imports
+from App_Function_Libraries.Utils.Utils import load_comprehensive_config
+#
+#######################################################################################################################
+#
+# Functions:
+
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 300.0
+DEFAULT_POOL_CONNECTIONS = 20
+DEFAULT_POOL_MAXSIZE = 50
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+DEFAULT_PROVIDER_CONCURRENCY = 4
+
+_session_lock = threading.Lock()
+_http_session: Optional["PooledSession"] = None
+
+
+class PooledSession(requests.Session):
+    """requests.Session that applies a default (connect, read) timeout when the caller doesn't pass one."""
+
+    def __init__(self, default_timeout: Tuple[float, float]):
+        super().__init__()
+        self.default_timeout = default_timeout
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.default_timeout
+        return super().request(method, url, **kwargs)
+
+
+def load_http_client_settings() -> dict:
+    settings = {
+        'connect_timeout': DEFAULT_CONNECT_TIMEOUT,
+        'read_timeout': DEFAULT_READ_TIMEOUT,
+        'pool_connections': DEFAULT_POOL_CONNECTIONS,
+        'pool_maxsize': DEFAULT_POOL_MAXSIZE,
+        'max_retries': DEFAULT_MAX_RETRIES,
+        'backoff_factor': DEFAULT_BACKOFF_FACTOR,
+    }
+    try:
+        config = load_comprehensive_config()
+        if config.has_section('HTTP-Client'):
+            settings['connect_timeout'] = config.getfloat('HTTP-Client', 'connect_timeout', fallback=settings['connect_timeout'])
+            settings['read_timeout'] = config.getfloat('HTTP-Client', 'read_timeout', fallback=settings['read_timeout'])
+            settings['pool_connections'] = config.getint('HTTP-Client', 'pool_connections', fallback=settings['pool_connections'])
+            settings['pool_maxsize'] = config.getint('HTTP-Client', 'pool_maxsize', fallback=settings['pool_maxsize'])
+            settings['max_retries'] = config.getint('HTTP-Client', 'max_retries', fallback=settings['max_retries'])
+            settings['backoff_factor'] = config.getfloat('HTTP-Client', 'backoff_factor', fallback=settings['backoff_factor'])
+    except (FileNotFoundError, ValueError) as e:
+        logging.warning(f"HTTP Client: Using default settings, could not read [HTTP-Client] config: {e}")
+    return settings
+
+
+def get_provider_concurrency(api_name: str) -> int:
+    """Max in-flight requests per provider, from the [Async-LLM] config section (shared by sync fan-out too)."""
+    try:
+        config = load_comprehensive_config()
+        if config.has_section('Async-LLM'):
+            default = config.getint('Async-LLM', 'default_concurrency', fallback=DEFAULT_PROVIDER_CONCURRENCY)
+            return config.getint('Async-LLM', f'{(api_name or "").lower()}_concurrency', fallback=default)
+    except (FileNotFoundError, ValueError) as e:
+        logging.warning(f"HTTP Client: Could not read [Async-LLM] config, using defaults: {e}")
+    return DEFAULT_PROVIDER_CONCURRENCY
+
+
+def create_http_session(settings: Optional[dict] = None) -> PooledSession:
+    settings = settings or load_http_client_settings()
+    # Only retry connection failures and throttling/gateway statuses - a read timeout may mean the
+    # provider is still generating, and re-sending would double-bill the request. Status retries are limited
+    # to GETs: the provider adapters that retry a 429/5xx on their own do it for their POSTs, and retrying
+    # here too would multiply the attempts.
+    retry = Retry(
+        total=settings['max_retries'],
+        connect=settings['max_retries'],
+        read=0,
+        status=settings['max_retries'],
+        backoff_factor=settings['backoff_factor'],
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings['pool_connections'],
+        pool_maxsize=settings['pool_maxsize'],
+        max_retries=retry,
+    )
+    session = PooledSession((settings['connect_timeout'], settings['read_timeout']))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    logging.debug(f"HTTP Client: Created pooled session with settings {settings}")
+    return session
+
+
+def get_http_session() -> PooledSession:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _http_session
+    if _http_session is None:
+        with _session_lock:
+            if _http_session is None:
+                _http_session = create_http_session()
+    return _http_session
+
+
+def close_http_session() -> None:
+    global _http_session
+    with _session_lock:
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+
+#
+# End of HTTP_Client.py
+#######################################################################################################################
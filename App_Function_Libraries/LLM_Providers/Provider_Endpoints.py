@@ -0,0 +1,271 @@
+# Provider_Endpoints.py
+# Description: Endpoint resolution, request payloads and response/stream parsing for the HTTP LLM providers.
+#
+# The sync `chat_with_*` functions each build their own payloads; the async and streaming paths share these
+# helpers instead so that every wire format is described once.
+#
+# Imports
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+#
+# Local Imports
+from App_Function_Libraries.Utils.Utils import load_and_log_configs
+#
+#######################################################################################################################
+#
+# Functions:
+
+DEFAULT_SYSTEM_MESSAGE = "You are a helpful AI assistant who does whatever the user requests."
+DEFAULT_MAX_TOKENS = 4096
+
+# name -> (wire style, URL or config key under 'local_api_ip', api_keys config key, models config key)
+# Styles: 'openai' (chat/completions + SSE), 'anthropic' (messages + SSE), 'ollama' (native /api/chat + NDJSON),
+# 'llamacpp' (/completion + SSE) and 'kobold' (/api/v1/generate, SSE on /api/extra/generate/stream).
+PROVIDER_ENDPOINTS = {
+    'openai': ('openai', 'https://api.openai.com/v1/chat/completions', 'openai', 'openai'),
+    'groq': ('openai', 'https://api.groq.com/openai/v1/chat/completions', 'groq', 'groq'),
+    'openrouter': ('openai', 'https://openrouter.ai/api/v1/chat/completions', 'openrouter', 'openrouter'),
+    'deepseek': ('openai', 'https://api.deepseek.com/chat/completions', 'deepseek', 'deepseek'),
+    'mistral': ('openai', 'https://api.mistral.ai/v1/chat/completions', 'mistral', 'mistral'),
+    'anthropic': ('anthropic', 'https://api.anthropic.com/v1/messages', 'anthropic', 'anthropic'),
+    'vllm': ('openai', 'local:vllm', 'vllm', 'vllm'),
+    'ollama': ('openai', 'local:ollama', 'ollama', 'ollama'),
+    'llama.cpp': ('llamacpp', 'local:llama', 'llama', 'llama'),
+    'kobold': ('kobold', 'local:kobold', 'kobold', 'kobold'),
+    'custom-openai-api': ('openai', 'local:custom_openai_api_ip', 'custom_openai_api_key', 'openai'),
+    'custom-openai': ('openai', 'local:custom_openai_api_ip', 'custom_openai_api_key', 'openai'),
+}
+
+OPENAI_EMBEDDINGS_URL = 'https://api.openai.com/v1/embeddings'
+
+
+@dataclass
+class ProviderEndpoint:
+    name: str
+    style: str
+    url: str
+    api_key: Optional[str] = None
+    model: Optional[str] = None
+
+
+def resolve_endpoint(api_name: str, api_key: Optional[str] = None, model: Optional[str] = None,
+                     loaded_config_data: Optional[Dict[str, Any]] = None) -> Optional[ProviderEndpoint]:
+    """
+    Resolve URL, key and model for a provider with a known HTTP wire format.
+
+    Returns None for providers without a shared wire description (they keep using their sync adapter).
+    """
+    spec = PROVIDER_ENDPOINTS.get((api_name or '').lower())
+    if spec is None:
+        return None
+    style, url, key_name, model_name = spec
+    loaded_config_data = loaded_config_data or load_and_log_configs() or {}
+    if url.startswith('local:'):
+        url = loaded_config_data.get('local_api_ip', {}).get(url[len('local:'):])
+        if not url:
+            logging.warning(f"{api_name}: API URL not configured")
+            return None
+    if api_name.lower() == 'ollama' and '/api/' in url:
+        # Native Ollama endpoint (/api/chat) rather than its OpenAI-compatible /v1/chat/completions
+        style = 'ollama'
+    api_key = api_key or loaded_config_data.get('api_keys', {}).get(key_name)
+    model = model or loaded_config_data.get('models', {}).get(model_name)
+    return ProviderEndpoint(name=api_name.lower(), style=style, url=url, api_key=api_key, model=model)
+
+
+def build_chat_request(endpoint: ProviderEndpoint, input_text: str, prompt: Optional[str], temp: Optional[float],
+                       system_message: Optional[str], stream: bool = False,
+                       max_tokens: int = DEFAULT_MAX_TOKENS) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    user_content = f"{input_text} \n\n\n\n{prompt}" if prompt else f"{input_text}"
+    system_message = system_message or DEFAULT_SYSTEM_MESSAGE
+    temp = 0.7 if temp is None else float(temp)
+
+    if endpoint.style == 'anthropic':
+        headers = {
+            'x-api-key': endpoint.api_key or '',
+            'anthropic-version': '2023-06-01',
+            'Content-Type': 'application/json'
+        }
+        payload = {
+            "model": endpoint.model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": user_content}],
+            "temperature": temp,
+            "system": system_message,
+            "stream": stream,
+        }
+        return endpoint.url, headers, payload
+
+    headers = {'Content-Type': 'application/json'}
+    if endpoint.api_key and len(endpoint.api_key) > 5:
+        headers['Authorization'] = f'Bearer {endpoint.api_key}'
+
+    if endpoint.style == 'llamacpp':
+        payload = {
+            "prompt": f"{prompt} \n\n\n\n{input_text}" if prompt else f"{input_text}",
+            "system_prompt": system_message,
+            "temperature": temp,
+            "n_predict": max_tokens,
+            "stream": stream,
+        }
+        return endpoint.url, headers, payload
+
+    if endpoint.style == 'kobold':
+        payload = {
+            "max_context_length": 8096,
+            "max_length": max_tokens,
+            "prompt": f"{prompt}\n\n\n\n{input_text}" if prompt else f"{input_text}",
+            "temperature": temp,
+        }
+        url = endpoint.url
+        if stream:
+            url = url.replace('/api/v1/generate', '/api/extra/generate/stream')
+        return url, headers, payload
+
+    if endpoint.style == 'ollama':
+        payload = {
+            "model": endpoint.model,
+            "messages": [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": user_content}
+            ],
+            "options": {"temperature": temp, "num_predict": max_tokens},
+            "stream": stream,
+        }
+        return endpoint.url, headers, payload
+
+    payload = {
+        "model": endpoint.model,
+        "messages": [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_content}
+        ],
+        "max_tokens": max_tokens,
+        "temperature": temp,
+        "stream": stream,
+    }
+    return endpoint.url, headers, payload
+
+
+def parse_chat_response(endpoint: ProviderEndpoint, response_data: Dict[str, Any]) -> str:
+    if endpoint.style == 'anthropic':
+        content = response_data.get('content') or []
+        if content and isinstance(content, list):
+            return content[0].get('text', '').strip()
+        raise ValueError(f"{endpoint.name}: Unexpected response format from API")
+    if endpoint.style == 'llamacpp':
+        return response_data['content'].strip()
+    if endpoint.style == 'kobold':
+        results = response_data.get('results') or []
+        if results:
+            return results[0]['text'].strip()
+        raise ValueError(f"{endpoint.name}: Expected data not found in API response")
+    if endpoint.style == 'ollama':
+        return response_data.get('message', {}).get('content', '').strip()
+    choices = response_data.get('choices') or []
+    if choices:
+        return choices[0]['message']['content'].strip()
+    raise ValueError(f"{endpoint.name}: Chat response not found in the response data")
+
+
+def parse_stream_event(endpoint: ProviderEndpoint, event_data: str) -> Tuple[Optional[str], bool]:
+    """
+    Parse one stream event (an SSE `data:` payload, or an NDJSON line for native Ollama) into (text delta, done).
+    """
+    if event_data.strip() == '[DONE]':
+        return None, True
+    try:
+        event = json.loads(event_data)
+    except json.JSONDecodeError:
+        logging.debug(f"{endpoint.name}: Skipping non-JSON stream event: {event_data[:100]}")
+        return None, False
+
+    if endpoint.style == 'anthropic':
+        event_type = event.get('type')
+        if event_type == 'content_block_delta':
+            return event.get('delta', {}).get('text'), False
+        if event_type == 'message_stop':
+            return None, True
+        if event_type == 'error':
+            raise ValueError(f"{endpoint.name}: Stream error: {event.get('error')}")
+        return None, False
+
+    if endpoint.style == 'llamacpp':
+        return event.get('content'), bool(event.get('stop'))
+    if endpoint.style == 'kobold':
+        # Kobold just closes the stream when generation finishes
+        return event.get('token'), False
+    if endpoint.style == 'ollama':
+        if event.get('error'):
+            raise ValueError(f"{endpoint.name}: Stream error: {event['error']}")
+        return event.get('message', {}).get('content'), bool(event.get('done'))
+
+    choices = event.get('choices') or []
+    if not choices:
+        return None, False
+    delta = choices[0].get('delta') or {}
+    return delta.get('content'), choices[0].get('finish_reason') is not None
+
+
+class StreamEventDecoder:
+    """
+    Incremental framing of a streamed response, shared by the sync and async readers: `feed` each line as it
+    arrives and it returns an event payload once one is complete (else None); `flush` returns any trailing event.
+    SSE events are the joined `data:` lines up to a blank line, with `:` comment/keep-alive lines skipped; NDJSON
+    events are the non-blank lines.
+    """
+
+    def __init__(self, ndjson: bool = False):
+        self.ndjson = ndjson
+        self._buffer: List[str] = []
+
+    def feed(self, line: Any) -> Optional[str]:
+        if line is None:
+            return None
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        if self.ndjson:
+            return line.strip() or None
+        line = line.rstrip('\r\n')
+        if not line:
+            return self.flush()
+        if line.startswith('data:'):
+            self._buffer.append(line[5:].lstrip())
+        return None
+
+    def flush(self) -> Optional[str]:
+        if not self._buffer:
+            return None
+        event = "\n".join(self._buffer)
+        self._buffer = []
+        return event
+
+
+def iter_sse_data(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the `data:` payloads of a Server-Sent-Events stream, joining multi-line events."""
+    yield from _iter_events(StreamEventDecoder(), lines)
+
+
+def is_ndjson_stream(endpoint: ProviderEndpoint) -> bool:
+    return endpoint.style == 'ollama'
+
+
+def iter_stream_events(endpoint: ProviderEndpoint, lines: Iterable[str]) -> Iterator[str]:
+    """Yield the raw event payloads of a streamed response in the endpoint's framing (SSE or NDJSON)."""
+    yield from _iter_events(StreamEventDecoder(is_ndjson_stream(endpoint)), lines)
+
+
+def _iter_events(decoder: StreamEventDecoder, lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        event = decoder.feed(line)
+        if event is not None:
+            yield event
+    event = decoder.flush()
+    if event is not None:
+        yield event
+
+#
+# End of Provider_Endpoints.py
+#######################################################################################################################
@@ -0,0 +1,66 @@
+# Provider_Registry.py
+# Description: Request schema + name -> adapter registry used by `chat_api_call` and `summarize`.
+#
+# Each provider module registers an adapter that takes an `LLMRequest` and maps it onto that provider's
+# `chat_with_*`/`summarize_with_*` function. The dispatchers then look up the adapter by API name instead
+# of walking an if/elif chain.
+#
+# Imports
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+#
+#######################################################################################################################
+#
+# Functions:
+
+@dataclass
+class LLMRequest:
+    api_name: str
+    input_data: Any
+    prompt: Optional[str] = None
+    api_key: Optional[str] = None
+    temp: Optional[float] = None
+    system_message: Optional[str] = None
+    model: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+ProviderAdapter = Callable[[LLMRequest], Any]
+
+
+class ProviderRegistry:
+    """Case-insensitive mapping of API names (plus aliases) to provider adapters."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._adapters: Dict[str, ProviderAdapter] = {}
+
+    def register(self, name: str, adapter: ProviderAdapter, aliases: tuple = ()) -> None:
+        for key in (name, *aliases):
+            if key.lower() in self._adapters:
+                logging.debug(f"{self.kind} registry: Replacing adapter for '{key}'")
+            self._adapters[key.lower()] = adapter
+
+    def get(self, name: str) -> ProviderAdapter:
+        try:
+            return self._adapters[(name or '').lower()]
+        except KeyError:
+            raise ValueError(f"Unsupported API endpoint: {name}")
+
+    def __contains__(self, name: str) -> bool:
+        return (name or '').lower() in self._adapters
+
+    def names(self) -> List[str]:
+        return sorted(self._adapters)
+
+    def dispatch(self, request: LLMRequest) -> Any:
+        return self.get(request.api_name)(request)
+
+
+chat_providers = ProviderRegistry("chat")
+summarize_providers = ProviderRegistry("summarize")
+
+#
+# End of Provider_Registry.py
+#######################################################################################################################
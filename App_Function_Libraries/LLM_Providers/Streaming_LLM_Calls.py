@@ -0,0 +1,83 @@
+# Streaming_LLM_Calls.py
+# Description: Token streaming for the chat UIs - `stream_chat_api_call` yields response text as it arrives.
+#
+# Providers with a streaming wire format described in Provider_Endpoints.py (OpenAI-compatible, Anthropic,
+# native Ollama, llama.cpp and Kobold) are streamed over the shared keep-alive session. Every other provider
+# falls back to the blocking `chat_api_call` and yields its complete response once, so callers can always
+# treat the result as a generator.
+#
+# Imports
+import logging
+import os
+import time
+from typing import Any, Iterator, Optional
+#
+# External Imports
+import requests
+#
+# Local Imports
+from App_Function_Libraries.LLM_Providers.HTTP_Client import get_http_session
+from App_Function_Libraries.LLM_Providers.Provider_Endpoints import resolve_endpoint, build_chat_request, \
+    iter_stream_events, parse_stream_event
+from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
+#
+#######################################################################################################################
+#
+# Functions:
+
+def supports_streaming(api_endpoint: str, input_data: Any = "") -> bool:
+    if not isinstance(input_data, str) or os.path.isfile(input_data):
+        return False
+    return resolve_endpoint(api_endpoint) is not None
+
+
+def stream_chat_api_call(api_endpoint: str, api_key: Optional[str], input_data: Any, prompt: Optional[str],
+                         temp: Optional[float], system_message: Optional[str] = None,
+                         model: Optional[str] = None) -> Iterator[str]:
+    """
+    Streaming counterpart of `chat_api_call`; yields text deltas.
+
+    Closing the generator early (e.g. the user navigating away in Gradio) closes the HTTP response.
+    """
+    endpoint = None
+    if isinstance(input_data, str) and not os.path.isfile(input_data):
+        endpoint = resolve_endpoint(api_endpoint, api_key, model)
+    if endpoint is None:
+        from App_Function_Libraries.Chat import chat_api_call
+        yield chat_api_call(api_endpoint, api_key, input_data, prompt, temp, system_message)
+        return
+
+    labels = {"api_name": endpoint.name}
+    log_counter("llm_stream_attempt", labels=labels)
+    url, headers, payload = build_chat_request(endpoint, input_data, prompt, temp, system_message, stream=True)
+    start_time = time.time()
+    first_token = True
+    try:
+        with get_http_session().post(url, headers=headers, json=payload, stream=True) as response:
+            if response.status_code != 200:
+                logging.error(f"{api_endpoint}: Stream request failed with status code {response.status_code}: "
+                              f"{response.text[:500]}")
+                log_counter("llm_stream_error", labels={**labels, "error": str(response.status_code)})
+                yield f"{api_endpoint}: Failed to process chat response. Status code: {response.status_code}"
+                return
+            for event_data in iter_stream_events(endpoint, response.iter_lines(decode_unicode=True)):
+                text, done = parse_stream_event(endpoint, event_data)
+                if text:
+                    if first_token:
+                        log_histogram("llm_time_to_first_token", time.time() - start_time, labels=labels)
+                        first_token = False
+                    yield text
+                if done:
+                    break
+    except (requests.RequestException, ValueError) as e:
+        log_counter("llm_stream_error", labels={**labels, "error": str(e)})
+        logging.error(f"{api_endpoint}: Error while streaming chat response: {str(e)}")
+        yield f"{api_endpoint}: Error occurred while streaming chat response: {str(e)}"
+        return
+
+    log_histogram("llm_stream_duration", time.time() - start_time, labels=labels)
+    log_counter("llm_stream_success", labels=labels)
+
+#
+# End of Streaming_LLM_Calls.py
+#######################################################################################################################
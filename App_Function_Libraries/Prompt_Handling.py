@@ -5,7 +5,7 @@ import tempfile
 import zipfile
 import re
 
-from App_Function_Libraries.Utils.Utils import get_database_path
+from App_Function_Libraries.DB.SQLite_DB import get_prompts_db_path
 
 
 def import_prompt_from_file(file):
@@ -80,7 +80,7 @@ def import_prompt_data(name, details, system, user):
         return "Name and System fields are required."
 
     try:
-        conn = sqlite3.connect(get_database_path('prompts.db'))
+        conn = sqlite3.connect(get_prompts_db_path())
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO Prompts (name, details, system, user)
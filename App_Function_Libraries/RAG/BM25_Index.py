@@ -0,0 +1,262 @@
+# BM25_Index.py
+# Description: Incremental BM25 lexical search over an inverted index persisted in SQLite.
+#
+# Posting lists (term -> doc, term frequency) and per-document lengths live in a standalone SQLite DB, so the
+# index survives restarts and is updated document-by-document instead of being refit on every query. At query
+# time only the posting lists of the query terms are read, and scoring plus top-k selection are vectorized with
+# numpy. One DB can hold several named indexes, e.g. 'document' (one entry per media item) and 'chunk'.
+#
+# Imports
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+#
+# External Imports
+import numpy as np
+#
+# Local Imports
+from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
+from App_Function_Libraries.Utils.Utils import load_comprehensive_config, get_project_relative_path, \
+    get_database_path
+#
+#######################################################################################################################
+#
+# Functions:
+
+DEFAULT_BM25_SETTINGS = {
+    'index_path': None,
+    'k1': 1.5,
+    'b': 0.75,
+}
+
+SCHEMA_SQL = '''
+CREATE TABLE IF NOT EXISTS bm25_documents (
+    doc_num INTEGER PRIMARY KEY AUTOINCREMENT,
+    index_name TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    UNIQUE (index_name, doc_id)
+);
+
+CREATE TABLE IF NOT EXISTS bm25_postings (
+    index_name TEXT NOT NULL,
+    term TEXT NOT NULL,
+    doc_num INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (index_name, term, doc_num)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_bm25_postings_doc_num ON bm25_postings(doc_num);
+'''
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall((text or '').lower())
+
+
+def get_bm25_settings() -> Dict[str, object]:
+    settings = dict(DEFAULT_BM25_SETTINGS)
+    try:
+        config = load_comprehensive_config()
+        if config.has_section('BM25'):
+            settings['index_path'] = config.get('BM25', 'index_path', fallback=None)
+            settings['k1'] = config.getfloat('BM25', 'k1', fallback=settings['k1'])
+            settings['b'] = config.getfloat('BM25', 'b', fallback=settings['b'])
+    except (FileNotFoundError, ValueError) as e:
+        logging.warning(f"BM25: Could not read [BM25] config, using defaults: {e}")
+    settings['index_path'] = get_project_relative_path(settings['index_path']) if settings['index_path'] \
+        else get_database_path('bm25_index.db')
+    return settings
+
+
+class BM25Index:
+    """
+    A named BM25 index. Documents are (doc_id, text) pairs; adding an existing doc_id replaces it.
+
+    Document lengths are cached in memory (one array slot per document) and kept in step with every add/remove,
+    so a search costs one indexed range scan per query term.
+    """
+
+    def __init__(self, db_path: str, index_name: str = 'document', k1: float = 1.5, b: float = 0.75):
+        self.db_path = db_path
+        self.index_name = index_name
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA_SQL)
+        self._lengths: Optional[np.ndarray] = None
+        self._doc_ids: Dict[int, str] = {}
+        self._doc_nums: Dict[str, int] = {}
+        self._total_length = 0
+
+    def _load_stats(self) -> None:
+        if self._lengths is not None:
+            return
+        rows = self._conn.execute('SELECT doc_num, doc_id, length FROM bm25_documents WHERE index_name = ?',
+                                  (self.index_name,)).fetchall()
+        size = max((row[0] for row in rows), default=0) + 1
+        self._lengths = np.zeros(size, dtype=np.float64)
+        self._doc_ids = {}
+        self._doc_nums = {}
+        self._total_length = 0
+        for doc_num, doc_id, length in rows:
+            self._lengths[doc_num] = length
+            self._doc_ids[doc_num] = doc_id
+            self._doc_nums[doc_id] = doc_num
+            self._total_length += length
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load_stats()
+            return len(self._doc_ids)
+
+    def document_ids(self) -> Set[str]:
+        with self._lock:
+            self._load_stats()
+            return set(self._doc_nums)
+
+    def _remove(self, cursor, doc_id: str) -> None:
+        doc_num = self._doc_nums.pop(doc_id, None)
+        if doc_num is None:
+            return
+        cursor.execute('DELETE FROM bm25_postings WHERE doc_num = ?', (doc_num,))
+        cursor.execute('DELETE FROM bm25_documents WHERE doc_num = ?', (doc_num,))
+        del self._doc_ids[doc_num]
+        self._total_length -= int(self._lengths[doc_num])
+        self._lengths[doc_num] = 0
+
+    def add_documents(self, documents: Iterable[Tuple[str, str]]) -> int:
+        """Index (doc_id, text) pairs in one transaction, replacing any existing entries. Returns the count."""
+        start_time = time.time()
+        count = 0
+        with self._lock:
+            self._load_stats()
+            cursor = self._conn.cursor()
+            try:
+                for doc_id, text in documents:
+                    doc_id = str(doc_id)
+                    self._remove(cursor, doc_id)
+                    term_counts = Counter(tokenize(text))
+                    length = sum(term_counts.values())
+                    cursor.execute('INSERT INTO bm25_documents (index_name, doc_id, length) VALUES (?, ?, ?)',
+                                   (self.index_name, doc_id, length))
+                    doc_num = cursor.lastrowid
+                    cursor.executemany(
+                        'INSERT INTO bm25_postings (index_name, term, doc_num, tf) VALUES (?, ?, ?, ?)',
+                        [(self.index_name, term, doc_num, tf) for term, tf in term_counts.items()])
+                    if doc_num >= len(self._lengths):
+                        self._lengths = np.concatenate(
+                            [self._lengths, np.zeros(max(doc_num + 1 - len(self._lengths), len(self._lengths)))])
+                    self._lengths[doc_num] = length
+                    self._doc_ids[doc_num] = doc_id
+                    self._doc_nums[doc_id] = doc_num
+                    self._total_length += length
+                    count += 1
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                # The in-memory stats may be ahead of the DB now; reload them on next use
+                self._lengths = None
+                raise
+        log_histogram("bm25_index_add_duration", time.time() - start_time, labels={"index": self.index_name})
+        log_counter("bm25_index_documents_added", labels={"index": self.index_name}, value=count)
+        return count
+
+    def remove_documents(self, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._load_stats()
+            cursor = self._conn.cursor()
+            try:
+                for doc_id in doc_ids:
+                    self._remove(cursor, str(doc_id))
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                self._lengths = None
+                raise
+
+    def remove_documents_with_prefix(self, prefix: str) -> None:
+        """Remove every doc_id starting with `prefix` (e.g. all chunks of one document), via the doc_id index."""
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT doc_id FROM bm25_documents WHERE index_name = ? AND doc_id >= ? AND doc_id < ?',
+                (self.index_name, prefix, upper)).fetchall()
+        if rows:
+            self.remove_documents(row[0] for row in rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM bm25_postings WHERE index_name = ?', (self.index_name,))
+            self._conn.execute('DELETE FROM bm25_documents WHERE index_name = ?', (self.index_name,))
+            self._conn.commit()
+            self._lengths = None
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """Return up to top_k (doc_id, score) pairs, best first."""
+        start_time = time.time()
+        terms = set(tokenize(query))
+        with self._lock:
+            self._load_stats()
+            doc_count = len(self._doc_ids)
+            if not terms or doc_count == 0 or top_k <= 0:
+                return []
+            lengths = self._lengths
+            avg_length = self._total_length / doc_count or 1.0
+            scores = np.zeros(len(lengths), dtype=np.float64)
+            for term in terms:
+                postings = self._conn.execute(
+                    'SELECT doc_num, tf FROM bm25_postings WHERE index_name = ? AND term = ?',
+                    (self.index_name, term)).fetchall()
+                if not postings:
+                    continue
+                postings = np.asarray(postings, dtype=np.int64)
+                doc_nums, tf = postings[:, 0], postings[:, 1].astype(np.float64)
+                df = len(doc_nums)
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths[doc_nums] / avg_length)
+                scores[doc_nums] += idf * tf * (self.k1 + 1) / (tf + norm)
+            doc_ids = self._doc_ids
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        results = [(doc_ids[int(doc_num)], float(scores[doc_num])) for doc_num in candidates]
+        log_histogram("bm25_search_duration", time.time() - start_time, labels={"index": self.index_name})
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Shared indexes, keyed on (db path, index name)
+_indexes: Dict[Tuple[str, str], BM25Index] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_bm25_index(index_name: str = 'document', db_path: Optional[str] = None) -> BM25Index:
+    settings = get_bm25_settings()
+    db_path = db_path or settings['index_path']
+    key = (db_path, index_name)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = BM25Index(db_path, index_name, k1=settings['k1'], b=settings['b'])
+        return _indexes[key]
+
+#
+# End of BM25_Index.py
+#######################################################################################################################
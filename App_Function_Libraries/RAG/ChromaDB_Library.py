@@ -2,22 +2,30 @@
 # Description: Functions for managing embeddings in ChromaDB
 #
 # Imports:
+import hashlib
 import logging
-from typing import List, Dict, Any
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple, Optional, Iterable
 # 3rd-Party Imports:
-import chromadb
-from chromadb import Settings
 from itertools import islice
 import numpy as np
 #
 # Local Imports:
 from App_Function_Libraries.Chunk_Lib import chunk_for_embedding, chunk_options
-from App_Function_Libraries.DB.DB_Manager import get_unprocessed_media, mark_media_as_processed
+from App_Function_Libraries.DB.DB_Manager import iter_unprocessed_media, mark_media_as_processed
+from App_Function_Libraries.DB.LLM_Cache_DB import get_chunk_context_checkpoints, store_chunk_context_checkpoint, \
+    clear_chunk_context_checkpoints, is_cacheable_response
 from App_Function_Libraries.DB.SQLite_DB import process_chunks
+from App_Function_Libraries.LLM_Providers.HTTP_Client import get_provider_concurrency
+from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
+from App_Function_Libraries.RAG.Dedup_Index import get_dedup_index, chunk_key, split_chunk_key, parse_chunk_id
 from App_Function_Libraries.RAG.Embeddings_Create import create_embedding, create_embeddings_batch
+from App_Function_Libraries.RAG.RAPTOR_Index import build_raptor_tree, get_raptor_settings
+from App_Function_Libraries.RAG.Vector_Store import vector_store
 from App_Function_Libraries.Summarization.Summarization_General_Lib import summarize
-from App_Function_Libraries.Utils.Utils import get_database_path, ensure_directory_exists, \
-    load_comprehensive_config
+from App_Function_Libraries.Utils.Utils import load_comprehensive_config
 #
 #######################################################################################################################
 #
@@ -31,11 +39,6 @@ logger = logging.getLogger(__name__)
 # Load config
 config = load_comprehensive_config()
 #
-# ChromaDB settings
-chroma_db_path = config.get('Database', 'chroma_db_path', fallback=get_database_path('chroma_db'))
-ensure_directory_exists(chroma_db_path)
-chroma_client = chromadb.PersistentClient(path=chroma_db_path, settings=Settings(anonymized_telemetry=False))
-#
 # Embedding settings
 embedding_provider = config.get('Embeddings', 'embedding_provider', fallback='openai')
 embedding_model = config.get('Embeddings', 'embedding_model', fallback='text-embedding-3-small')
@@ -50,14 +53,14 @@ embedding_api_url = config.get('Embeddings', 'api_url', fallback='')
 
 # Function to preprocess and store all existing content in the database
 def preprocess_all_content(database, create_contextualized=True, api_name="gpt-3.5-turbo"):
-    unprocessed_media = get_unprocessed_media(db=database)
-    total_media = len(unprocessed_media)
+    # Streamed in batches: marking an item processed below does not disturb the rows still to come
+    unprocessed_media = iter_unprocessed_media(db=database)
 
     for index, row in enumerate(unprocessed_media, 1):
         media_id, content, media_type, file_name = row
         collection_name = f"{media_type}_{media_id}"
 
-        logger.info(f"Processing media {index} of {total_media}: ID {media_id}, Type {media_type}")
+        logger.info(f"Processing media {index}: ID {media_id}, Type {media_type}")
 
         try:
             process_and_store_content(
@@ -109,15 +112,102 @@ def situate_context(api_name, doc_content: str, chunk_content: str) -> str:
     Answer only with the succinct context and nothing else.
     """
 
-    response = summarize(chunk_context_prompt, doc_content_prompt, api_name, api_key=None, temp=0, system_message=None)
+    # The document goes in as the input and the chunk as the prompt: providers place the input first, so every
+    # chunk of a document shares the same (system prompt + document) prefix and provider-side prompt caching applies.
+    response = summarize(doc_content_prompt, chunk_context_prompt, api_name, api_key=None, temp=0, system_message=None)
     return response
 
 
+def get_contextual_chunking_settings() -> Dict[str, Any]:
+    return {
+        'max_document_chars': config.getint('Contextual-Chunking', 'max_document_chars', fallback=60000),
+        'window_chars': config.getint('Contextual-Chunking', 'window_chars', fallback=16000),
+        'max_retries': config.getint('Contextual-Chunking', 'max_retries', fallback=2),
+    }
+
+
+def contextual_document_key(api_name: str, content: str) -> str:
+    return hashlib.sha256(f"{(api_name or '').lower()}\x00{content}".encode('utf-8')).hexdigest()
+
+
+def document_window(content: str, chunk: Dict[str, Any], max_document_chars: int, window_chars: int) -> Tuple[int, str]:
+    """
+    Return (window start, text) to send as the document for a chunk. Short documents are sent whole; long ones
+    are cut into windows aligned on a fixed grid, so neighbouring chunks share the same window (and prompt prefix).
+    """
+    if len(content) <= max_document_chars:
+        return 0, content
+    metadata = chunk.get('metadata', {})
+    midpoint = (int(metadata.get('start_index', 0)) + int(metadata.get('end_index', 0))) // 2
+    step = max(window_chars // 2, 1)
+    window_start = max(0, (midpoint // step) * step - step // 2)
+    return window_start, content[window_start:window_start + window_chars]
+
+
+def contextualize_chunks(api_name: str, content: str, chunks: List[Dict[str, Any]],
+                         max_workers: int = None) -> List[str]:
+    """
+    Generate a situating context for every chunk, running requests concurrently (bounded by the provider's
+    [Async-LLM] concurrency). Finished chunks are checkpointed, so a failed run resumes with only the missing
+    chunks; raises RuntimeError if any chunk still fails after retries.
+    """
+    settings = get_contextual_chunking_settings()
+    document_key = contextual_document_key(api_name, content)
+    chunk_keys = [f"{i}:{hashlib.sha256(chunk['text'].encode('utf-8')).hexdigest()}" for i, chunk in enumerate(chunks)]
+    checkpoints = get_chunk_context_checkpoints(document_key)
+    contexts = [checkpoints.get(key) for key in chunk_keys]
+    pending = [i for i, context in enumerate(contexts) if context is None]
+    if len(pending) < len(chunks):
+        logger.info(f"Resuming contextualization: {len(chunks) - len(pending)} of {len(chunks)} chunks already done")
+        log_counter("contextual_chunks_resumed", labels={"api_name": api_name}, value=len(chunks) - len(pending))
+
+    windows = {i: document_window(content, chunks[i], settings['max_document_chars'], settings['window_chars'])
+               for i in pending}
+
+    def situate(i):
+        for attempt in range(settings['max_retries'] + 1):
+            try:
+                context = situate_context(api_name, windows[i][1], chunks[i]['text'])
+            except Exception as e:
+                context = f"Error: {str(e)}"
+            if is_cacheable_response(context):
+                store_chunk_context_checkpoint(document_key, chunk_keys[i], api_name, context)
+                return i, context
+            logger.warning(f"Contextualizing chunk {i} failed (attempt {attempt + 1}): {str(context)[:200]}")
+            if attempt < settings['max_retries']:
+                time.sleep(min(2 ** attempt, 30))
+        return i, None
+
+    # Send the first chunk of each window before the rest, so the shared document prefix is already in the
+    # provider's prompt cache when the remaining requests for that window go out.
+    first_per_window, rest = [], []
+    seen_windows = set()
+    for i in pending:
+        (rest if windows[i][0] in seen_windows else first_per_window).append(i)
+        seen_windows.add(windows[i][0])
+
+    start_time = time.time()
+    max_workers = max_workers or get_provider_concurrency(api_name)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch in (first_per_window, rest):
+            for i, context in executor.map(situate, batch):
+                contexts[i] = context
+    log_histogram("contextual_chunks_duration", time.time() - start_time, labels={"api_name": api_name})
+
+    failed = [i for i, context in enumerate(contexts) if context is None]
+    if failed:
+        log_counter("contextual_chunks_failed", labels={"api_name": api_name}, value=len(failed))
+        raise RuntimeError(f"Failed to contextualize {len(failed)} of {len(chunks)} chunks; completed chunks are "
+                           f"checkpointed and will be reused on the next run")
+    return contexts
+
+
 # FIXME - update all uses to reflect 'api_name' parameter
 def process_and_store_content(database, content: str, collection_name: str, media_id: int, file_name: str,
                               create_embeddings: bool = True, create_contextualized: bool = True, api_name: str = "gpt-3.5-turbo",
                               chunk_options = None, embedding_provider: str = None,
                               embedding_model: str = None, embedding_api_url: str = None):
+    dedup_index = None
     try:
         logger.info(f"Processing content for media_id {media_id} in collection {collection_name}")
 
@@ -127,41 +217,70 @@ def process_and_store_content(database, content: str, collection_name: str, medi
         process_chunks(database, chunks, media_id)
 
         if create_embeddings:
-            texts = []
-            contextualized_chunks = []
-            for chunk in chunks:
-                chunk_text = chunk['text']
-                if create_contextualized:
-                    context = situate_context(api_name, content, chunk_text)
-                    contextualized_text = f"{chunk_text}\n\nContextual Summary: {context}"
-                    contextualized_chunks.append(contextualized_text)
-                else:
-                    contextualized_chunks.append(chunk_text)
-                texts.append(chunk_text)  # Store original text for database
-
-            embeddings = create_embeddings_batch(contextualized_chunks, embedding_provider, embedding_model, embedding_api_url)
-            ids = [f"{media_id}_chunk_{i}" for i in range(1, len(chunks) + 1)]
-            metadatas = [{
-                "media_id": str(media_id),
-                "chunk_index": i,
-                "total_chunks": len(chunks),
-                "start_index": int(chunk['metadata']['start_index']),
-                "end_index": int(chunk['metadata']['end_index']),
-                "file_name": str(chunk['metadata']['file_name']),
-                "relative_position": float(chunk['metadata']['relative_position']),
-                "contextualized": create_contextualized,
-                "original_text": chunk['text'],
-                "contextual_summary": contextualized_chunks[i-1].split("\n\nContextual Summary: ")[-1] if create_contextualized else ""
-            } for i, chunk in enumerate(chunks, 1)]
-
-            store_in_chroma(collection_name, contextualized_chunks, embeddings, ids, metadatas)
+            # Exact and near-duplicates of already indexed chunks are linked to that chunk's vector in the dedup
+            # index instead of being contextualized and embedded again
+            numbered_chunks = list(enumerate(chunks, 1))
+            dedup_index = get_dedup_index()
+            if dedup_index is not None:
+                numbered_chunks = [(i, chunk) for i, chunk in numbered_chunks if dedup_index.register(
+                    chunk_key(collection_name, f"{media_id}_chunk_{i}"), chunk['text']) is None]
+                duplicate_ids = sorted(set(f"{media_id}_chunk_{i}" for i in range(1, len(chunks) + 1)) -
+                                       set(f"{media_id}_chunk_{i}" for i, _ in numbered_chunks))
+                if duplicate_ids:
+                    logger.info(f"Skipping {len(duplicate_ids)} of {len(chunks)} chunks already indexed as duplicates")
+                    log_counter("dedup_chunks_skipped", labels={"collection": collection_name},
+                                value=len(duplicate_ids))
+                    remove_stale_vectors(collection_name, duplicate_ids)
+
+            contexts = contextualize_chunks(api_name, content, [chunk for _, chunk in numbered_chunks]) \
+                if create_contextualized else None
+            batch_size = get_vector_ingest_settings()['upsert_batch_size']
+
+            def records():
+                # Embed one upsert batch at a time, so vectors for the whole document are never held at once
+                for batch_start in range(0, len(numbered_chunks), batch_size):
+                    batch = numbered_chunks[batch_start:batch_start + batch_size]
+                    texts = [f"{chunk['text']}\n\nContextual Summary: {contexts[batch_start + offset]}"
+                             if create_contextualized else chunk['text'] for offset, (_, chunk) in enumerate(batch)]
+                    embeddings = create_embeddings_batch(texts, embedding_provider, embedding_model, embedding_api_url)
+                    for offset, ((i, chunk), text, embedding) in enumerate(zip(batch, texts, embeddings)):
+                        yield f"{media_id}_chunk_{i}", text, embedding, {
+                            "media_id": str(media_id),
+                            "chunk_index": i,
+                            "total_chunks": len(chunks),
+                            "start_index": int(chunk['metadata']['start_index']),
+                            "end_index": int(chunk['metadata']['end_index']),
+                            "file_name": str(chunk['metadata']['file_name']),
+                            "relative_position": float(chunk['metadata']['relative_position']),
+                            "contextualized": create_contextualized,
+                            "original_text": chunk['text'],
+                            "contextual_summary": contexts[batch_start + offset] if create_contextualized else ""
+                        }
+
+            stream_to_vector_store(collection_name, records(), batch_size)
+            if create_contextualized:
+                clear_chunk_context_checkpoints(contextual_document_key(api_name, content))
+            # A re-ingested document may now have fewer chunks than before
+            remove_stale_vectors(collection_name, where={"$and": [{"media_id": str(media_id)},
+                                                                  {"chunk_index": {"$gt": len(chunks)}}]})
+
+            raptor_settings = get_raptor_settings()
+            if raptor_settings['enabled']:
+                try:
+                    build_raptor_tree(vector_store.get_collection(name=collection_name), media_id, api_name,
+                                      embedding_provider, embedding_model, embedding_api_url, raptor_settings)
+                except Exception as e:
+                    # The chunks are stored and searchable; the previous tree (if any) is left in place
+                    logger.error(f"Error building RAPTOR tree for media_id {media_id}: {str(e)}")
+                    log_counter("raptor_build_error", labels={"collection": collection_name})
 
             # Mark the media as processed
             mark_media_as_processed(database, media_id)
 
         # Update full-text search index
         database.execute_query(
-            "INSERT OR REPLACE INTO media_fts (rowid, title, content) SELECT id, title, content FROM Media WHERE id = ?",
+            "INSERT OR REPLACE INTO media_fts (rowid, title, content) "
+            "SELECT id, title, decompress_text(content) FROM Media WHERE id = ?",
             (media_id,)
         )
 
@@ -169,8 +288,24 @@ def process_and_store_content(database, content: str, collection_name: str, medi
 
     except Exception as e:
         logger.error(f"Error in process_and_store_content for media_id {media_id}: {str(e)}")
+        if dedup_index is not None:
+            # Chunks registered as canonical may not have vectors now; forget them so a retry embeds them
+            if dedup_index.remove_prefix(chunk_key(collection_name, f"{media_id}_chunk_")):
+                reembed_orphaned_chunks()
         raise
 
+
+def remove_stale_vectors(collection_name: str, ids: List[str] = None, where: Dict[str, Any] = None) -> None:
+    """Delete vectors left by a previous ingest: chunk ids now stored as duplicates, or chunks matching `where`."""
+    try:
+        collection = vector_store.get_collection(name=collection_name)
+    except Exception:
+        return
+    if ids:
+        collection.delete(ids=ids)
+    if where:
+        collection.delete(where=where)
+
 # Usage example:
 # process_and_store_content(db, content, "my_collection", 1, "example.txt", create_embeddings=True, create_summary=True, api_name="gpt-3.5-turbo")
 
@@ -185,7 +320,7 @@ def check_embedding_status(selected_item, item_mapping):
             return f"Invalid item selected: {selected_item}", ""
 
         item_title = selected_item.rsplit(' (', 1)[0]
-        collection = chroma_client.get_or_create_collection(name="all_content_embeddings")
+        collection = vector_store.get_or_create_collection(name="all_content_embeddings")
 
         result = collection.get(ids=[f"doc_{item_id}"], include=["embeddings", "metadatas"])
         logging.info(f"ChromaDB result for item '{item_title}' (ID: {item_id}): {result}")
@@ -208,100 +343,244 @@ def check_embedding_status(selected_item, item_mapping):
 
 def reset_chroma_collection(collection_name: str):
     try:
-        chroma_client.delete_collection(collection_name)
-        chroma_client.create_collection(collection_name)
+        vector_store.delete_collection(collection_name)
+        vector_store.create_collection(collection_name)
+        dedup_index = get_dedup_index()
+        if dedup_index is not None and dedup_index.remove_collection(collection_name):
+            reembed_orphaned_chunks()
         logging.info(f"Reset ChromaDB collection: {collection_name}")
     except Exception as e:
         logging.error(f"Error resetting ChromaDB collection: {str(e)}")
 
 
-#v2
-def store_in_chroma(collection_name: str, texts: List[str], embeddings: Any, ids: List[str],
-                    metadatas: List[Dict[str, Any]]):
-    # Convert embeddings to list if it's a numpy array
-    if isinstance(embeddings, np.ndarray):
-        embeddings = embeddings.tolist()
-    elif not isinstance(embeddings, list):
-        raise TypeError("Embeddings must be either a list or a numpy array")
+# Collection-level metadata key holding the embedding dimension, so ingest never has to read vectors back to check it
+EMBEDDING_DIMENSION_KEY = "embedding_dimension"
 
-    if not embeddings:
-        raise ValueError("No embeddings provided")
 
-    embedding_dim = len(embeddings[0])
+def get_vector_ingest_settings() -> Dict[str, Any]:
+    return {
+        'upsert_batch_size': config.getint('Embeddings', 'upsert_batch_size', fallback=1000),
+        'verify_upserts': config.getboolean('Embeddings', 'verify_upserts', fallback=False),
+        'verify_sample_size': config.getint('Embeddings', 'verify_sample_size', fallback=16),
+    }
 
-    logging.info(f"Storing embeddings in ChromaDB - Collection: {collection_name}")
-    logging.info(f"Number of embeddings: {len(embeddings)}, Dimension: {embedding_dim}")
 
+def get_collection_for_dimension(collection_name: str, embedding_dim: int):
+    """
+    Return the collection, creating it if needed, and recreating it if it holds embeddings of another dimension.
+    The dimension is read from collection metadata; only collections created before it was recorded fall back to
+    inspecting one stored embedding, after which the dimension is recorded.
+    """
     try:
-        # Attempt to get or create the collection
+        collection = vector_store.get_collection(name=collection_name)
+        logging.info(f"Existing collection '{collection_name}' found")
+    except Exception:
+        logging.info(f"Collection '{collection_name}' not found. Creating new collection")
+        collection = vector_store.create_collection(name=collection_name)
+        collection.modify(metadata={EMBEDDING_DIMENSION_KEY: embedding_dim})
+        return collection
+
+    existing_dim = collection.metadata.get(EMBEDDING_DIMENSION_KEY)
+    if existing_dim is None:
+        existing_embeddings = collection.get(limit=1, include=['embeddings'])['embeddings']
+        existing_dim = len(existing_embeddings[0]) if existing_embeddings is not None and len(existing_embeddings) \
+            else None
+    if existing_dim is not None and existing_dim != embedding_dim:
+        logging.warning(f"Embedding dimension mismatch. Existing: {existing_dim}, New: {embedding_dim}")
+        logging.warning("Deleting existing collection and creating a new one")
+        vector_store.delete_collection(name=collection_name)
+        collection = vector_store.create_collection(name=collection_name)
+    if collection.metadata.get(EMBEDDING_DIMENSION_KEY) != embedding_dim:
+        collection.modify(metadata={EMBEDDING_DIMENSION_KEY: embedding_dim})
+    return collection
+
+
+def verify_upsert_sample(collection, ids: List[str], sample_size: int) -> None:
+    """Read back a random sample of just-upserted ids and check their embeddings were stored."""
+    sample = random.sample(ids, min(sample_size, len(ids)))
+    results = collection.get(ids=sample, include=["embeddings"])
+    stored = dict(zip(results['ids'], results['embeddings']))
+    for doc_id in sample:
+        if stored.get(doc_id) is None:
+            raise ValueError(f"Failed to store embedding for {doc_id}")
+    logging.debug(f"Verified {len(sample)} of {len(ids)} upserted embeddings")
+
+
+def collection_embedding_settings(collection) -> Optional[Tuple[str, str]]:
+    """(provider, model) most of a sample of the collection's embeddings were made with, if recorded."""
+    sample_results = collection.get(limit=10, include=["metadatas"])
+    metadatas = [metadata for metadata in sample_results['metadatas'] or [] if metadata]
+    models = [metadata['embedding_model'] for metadata in metadatas if metadata.get('embedding_model')]
+    providers = [metadata['embedding_provider'] for metadata in metadatas if metadata.get('embedding_provider')]
+    if not models or not providers:
+        return None
+    return max(set(providers), key=providers.count), max(set(models), key=models.count)
+
+
+def reembed_orphaned_chunks() -> int:
+    """
+    Embed the duplicate chunks whose canonical chunk was removed (queued by Dedup_Index.remove), so they are
+    searchable again. Orphans that duplicate another indexed chunk are linked to it instead. Chunks that could not be
+    embedded stay queued for the next call. Returns the number of chunks embedded.
+    """
+    dedup_index = get_dedup_index()
+    if dedup_index is None:
+        return 0
+    orphans = dedup_index.pending_orphans()
+    if not orphans:
+        return 0
+    by_collection: Dict[str, List[Tuple[str, str, str]]] = {}
+    for key, text in orphans:
+        if text:
+            collection_name, chunk_id = split_chunk_key(key)
+            by_collection.setdefault(collection_name, []).append((key, chunk_id, text))
+    textless = [key for key, text in orphans if not text]
+    if textless:
+        # Duplicates indexed before their text was kept
+        logger.warning(f"{len(textless)} orphaned chunks have no stored text and cannot be re-embedded; embed their "
+                       f"media items again to restore them")
+        dedup_index.clear_orphans(textless)
+
+    embedded = 0
+    for collection_name, items in by_collection.items():
+        # Orphans duplicating each other (or another indexed chunk) need only one vector
+        to_embed = [(key, chunk_id, text) for key, chunk_id, text in items if dedup_index.register(key, text) is None]
+        if not to_embed:
+            continue
         try:
-            collection = chroma_client.get_collection(name=collection_name)
-            logging.info(f"Existing collection '{collection_name}' found")
-
-            # Check dimension of existing embeddings
-            existing_embeddings = collection.get(limit=1, include=['embeddings'])['embeddings']
-            if existing_embeddings:
-                existing_dim = len(existing_embeddings[0])
-                if existing_dim != embedding_dim:
-                    logging.warning(f"Embedding dimension mismatch. Existing: {existing_dim}, New: {embedding_dim}")
-                    logging.warning("Deleting existing collection and creating a new one")
-                    chroma_client.delete_collection(name=collection_name)
-                    collection = chroma_client.create_collection(name=collection_name)
-            else:
-                logging.info("No existing embeddings in the collection")
+            try:
+                collection = vector_store.get_collection(name=collection_name)
+            except Exception:
+                collection = None
+            settings = collection_embedding_settings(collection) if collection is not None else None
+            provider, model = settings or (embedding_provider, embedding_model)
+            embeddings = create_embeddings_batch([text for _, _, text in to_embed], provider, model,
+                                                 config.get('Embeddings', 'embedding_api_url', fallback=''))
+            existing_dim = collection.metadata.get(EMBEDDING_DIMENSION_KEY) if collection is not None else None
+            if existing_dim is not None and existing_dim != len(embeddings[0]):
+                # get_collection_for_dimension would replace the whole collection
+                raise ValueError(f"{model} embeddings have dimension {len(embeddings[0])}, the collection holds "
+                                 f"{existing_dim}")
+
+            def records():
+                for (key, chunk_id, text), embedding in zip(to_embed, embeddings):
+                    metadata = {"original_text": text, "embedding_provider": provider, "embedding_model": model,
+                                "reembedded_orphan": True}
+                    parsed = parse_chunk_id(chunk_id)
+                    if parsed:
+                        metadata.update(media_id=parsed[0], chunk_index=parsed[1])
+                    yield chunk_id, text, embedding, metadata
+
+            stream_to_vector_store(collection_name, records())
+            embedded += len(to_embed)
         except Exception as e:
-            logging.info(f"Collection '{collection_name}' not found. Creating new collection")
-            collection = chroma_client.create_collection(name=collection_name)
-
-        # Perform the upsert operation
+            logger.error(f"Error re-embedding {len(to_embed)} orphaned chunks in {collection_name}: {str(e)}")
+            log_counter("dedup_orphan_reembed_error", labels={"collection": collection_name})
+            # Forget the registrations (re-queueing anything linked to them since) and keep the chunks queued
+            dedup_index.remove([key for key, _, _ in to_embed])
+            dedup_index.queue_orphans((key, text) for key, _, text in to_embed)
+    if embedded:
+        log_counter("dedup_orphans_reembedded", value=embedded)
+        logger.info(f"Re-embedded {embedded} orphaned duplicate chunks")
+    return embedded
+
+
+def stream_to_vector_store(collection_name: str, records: Iterable[Tuple[str, str, Any, Dict[str, Any]]],
+                           batch_size: int = None):
+    """
+    Upsert (id, text, embedding, metadata) records into a collection in bounded batches, consuming `records`
+    lazily so memory use does not grow with the number of records. Returns the collection, or None if `records`
+    was empty.
+    """
+    settings = get_vector_ingest_settings()
+    batch_size = batch_size or settings['upsert_batch_size']
+    start_time = time.time()
+    collection = None
+    total = 0
+    for batch in batched(records, batch_size):
+        ids, texts, embeddings, metadatas = (list(column) for column in zip(*batch))
+        embeddings = [embedding.tolist() if isinstance(embedding, np.ndarray) else embedding
+                      for embedding in embeddings]
+        if collection is None:
+            logging.info(f"Storing embeddings in collection: {collection_name}, dimension: {len(embeddings[0])}")
+            collection = get_collection_for_dimension(collection_name, len(embeddings[0]))
         collection.upsert(
             documents=texts,
             embeddings=embeddings,
             ids=ids,
             metadatas=metadatas
         )
-        logging.info(f"Successfully upserted {len(embeddings)} embeddings")
+        if settings['verify_upserts']:
+            verify_upsert_sample(collection, ids, settings['verify_sample_size'])
+        total += len(ids)
+        log_counter("vector_store_ingest_batch", labels={"collection": collection_name})
+
+    log_histogram("vector_store_ingest_duration", time.time() - start_time, labels={"collection": collection_name})
+    log_counter("vector_store_ingest_records", labels={"collection": collection_name}, value=total)
+    logging.info(f"Successfully upserted {total} embeddings into '{collection_name}'")
+    return collection
 
-        # Verify all stored embeddings
-        results = collection.get(ids=ids, include=["documents", "embeddings", "metadatas"])
 
-        for i, doc_id in enumerate(ids):
-            if results['embeddings'][i] is None:
-                raise ValueError(f"Failed to store embedding for {doc_id}")
-            else:
-                logging.debug(f"Embedding stored successfully for {doc_id}")
-                logging.debug(f"Stored document preview: {results['documents'][i][:100]}...")
-                logging.debug(f"Stored metadata: {results['metadatas'][i]}")
+#v2
+def store_in_chroma(collection_name: str, texts: List[str], embeddings: Any, ids: List[str],
+                    metadatas: List[Dict[str, Any]]):
+    if not isinstance(embeddings, (np.ndarray, list)):
+        raise TypeError("Embeddings must be either a list or a numpy array")
 
-        logging.info("Successfully stored and verified all embeddings in ChromaDB")
+    if len(embeddings) == 0:
+        raise ValueError("No embeddings provided")
 
+    try:
+        return stream_to_vector_store(collection_name, zip(ids, texts, embeddings, metadatas))
     except Exception as e:
         logging.error(f"Error in store_in_chroma: {str(e)}")
         raise
 
-    return collection
-
 
 # Function to perform vector search using ChromaDB + Keywords from the media_db
 #v2
-def vector_search(collection_name: str, query: str, k: int = 10) -> List[Dict[str, Any]]:
+def _duplicate_stand_ins(collection_name: str,
+                         where: Optional[Dict[str, Any]]) -> Dict[Tuple[str, int], Tuple[str, str]]:
+    """
+    For a search filtered to some media ids: the chunks of this collection, as (media_id, chunk_index), whose vector
+    stands in for a duplicate chunk of one of those media (which has no vector of its own), mapped to that media id
+    and the chunk's own id.
+    """
+    condition = where.get('media_id') if where and len(where) == 1 else None
+    if isinstance(condition, dict) and set(condition) == {'$in'}:
+        wanted = set(condition['$in'])
+    elif isinstance(condition, str):
+        wanted = {condition}
+    else:
+        return {}
+    dedup_index = get_dedup_index()
+    if dedup_index is None:
+        return {}
+    stand_ins = {}
+    for duplicate_key, canonical_key in dedup_index.duplicate_links(chunk_key(collection_name, '')):
+        duplicate = parse_chunk_id(split_chunk_key(duplicate_key)[1])
+        canonical_id = split_chunk_key(canonical_key)[1]
+        canonical = parse_chunk_id(canonical_id)
+        if duplicate and canonical and duplicate[0] in wanted and canonical[0] not in wanted:
+            stand_ins.setdefault(canonical, (duplicate[0], canonical_id))
+    return stand_ins
+
+
+def vector_search(collection_name: str, query: str, k: int = 10,
+                  where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    `where` is a Chroma metadata filter applied inside the query, e.g. {"media_id": {"$in": ["1", "2"]}}. When it
+    filters on media ids, chunks of those media that were stored as duplicates are searched through the vectors of
+    the chunks they duplicate; such results carry the filtered media_id and a `duplicate_of` chunk id.
+    """
     try:
-        collection = chroma_client.get_collection(name=collection_name)
+        collection = vector_store.get_collection(name=collection_name)
 
-        # Fetch a sample of embeddings to check metadata
-        sample_results = collection.get(limit=10, include=["metadatas"])
-        if not sample_results['metadatas']:
-            raise ValueError("No metadata found in the collection")
-
-        # Check if all embeddings use the same model and provider
-        embedding_models = [metadata.get('embedding_model') for metadata in sample_results['metadatas'] if metadata.get('embedding_model')]
-        embedding_providers = [metadata.get('embedding_provider') for metadata in sample_results['metadatas'] if metadata.get('embedding_provider')]
-
-        if not embedding_models or not embedding_providers:
+        # Check which embedding model and provider a sample of the collection uses
+        settings = collection_embedding_settings(collection)
+        if settings is None:
             raise ValueError("Embedding model or provider information not found in metadata")
-
-        embedding_model = max(set(embedding_models), key=embedding_models.count)
-        embedding_provider = max(set(embedding_providers), key=embedding_providers.count)
+        embedding_provider, embedding_model = settings
 
         logging.info(f"Using embedding model: {embedding_model} from provider: {embedding_provider}")
 
@@ -312,17 +591,29 @@ def vector_search(collection_name: str, query: str, k: int = 10) -> List[Dict[st
         if isinstance(query_embedding, np.ndarray):
             query_embedding = query_embedding.tolist()
 
+        stand_ins = _duplicate_stand_ins(collection_name, where)
+        if stand_ins:
+            where = {"$or": [where] + [{"$and": [{"media_id": media_id}, {"chunk_index": chunk_index}]}
+                                       for media_id, chunk_index in sorted(stand_ins)]}
+        query_kwargs = {"where": where} if where else {}
         results = collection.query(
             query_embeddings=[query_embedding],
             n_results=k,
-            include=["documents", "metadatas"]
+            include=["documents", "metadatas"],
+            **query_kwargs
         )
 
         if not results['documents'][0]:
             logging.warning("No results found for the query")
             return []
 
-        return [{"content": doc, "metadata": meta} for doc, meta in zip(results['documents'][0], results['metadatas'][0])]
+        found = []
+        for doc, meta in zip(results['documents'][0], results['metadatas'][0]):
+            stand_in = stand_ins.get((meta.get('media_id'), meta.get('chunk_index'))) if stand_ins else None
+            if stand_in is not None:
+                meta = {**meta, "media_id": stand_in[0], "duplicate_of": stand_in[1]}
+            found.append({"content": doc, "metadata": meta})
+        return found
     except Exception as e:
         logging.error(f"Error in vector_search: {str(e)}", exc_info=True)
         raise
@@ -403,7 +694,7 @@ def schedule_embedding(media_id: int, content: str, media_name: str):
 #
 # Coverage:
 #
-#     Mocks dependencies: chunk_for_embedding, process_chunks, situate_context, create_embeddings_batch, and chroma_client.
+#     Mocks dependencies: chunk_for_embedding, process_chunks, situate_context, create_embeddings_batch, and vector_store.
 #     Simulates the scenario where the specified ChromaDB collection does not exist initially and needs to be created.
 #     Verifies that chunks are processed, embeddings are created, stored in ChromaDB, and database queries are executed correctly.
 #
@@ -0,0 +1,385 @@
+# Dedup_Index.py
+# Description: Exact and near-duplicate detection for chunk text, using MinHash signatures with LSH banding.
+#
+# At ingest, each chunk is registered under a key "<collection>/<chunk id>". A chunk whose normalised text matches
+# an indexed chunk exactly, or whose estimated Jaccard similarity (over word shingles) reaches the threshold, is
+# recorded as a duplicate linked to that canonical chunk and is not embedded again. Only canonical chunks (those
+# with their own vectors) are candidates for matching. The index lives in SQLite next to the other databases.
+#
+# A duplicate's text is kept, because removing its canonical chunk leaves it without a vector: such orphans are
+# queued in dedup_orphans and ChromaDB_Library.reembed_orphaned_chunks embeds them on their own.
+#
+# At retrieval, `collapse_near_duplicates` drops results that are near-duplicates of a result ranked above them,
+# so mirrored content does not take several reranker / context slots. Filtered vector searches use
+# `duplicate_links` to find the canonical vectors standing in for the duplicates of the media they search.
+#
+# Imports
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+#
+# External Imports
+import numpy as np
+#
+# Local Imports
+from App_Function_Libraries.Metrics.metrics_logger import log_counter
+from App_Function_Libraries.Utils.Utils import load_comprehensive_config, get_project_relative_path, \
+    get_database_path
+#
+#######################################################################################################################
+#
+# Functions:
+
+DEFAULT_DEDUP_SETTINGS = {
+    'enabled': True,
+    'collapse_results': True,
+    'index_path': None,
+    'threshold': 0.85,
+    'num_perm': 128,
+    'bands': 16,
+    'shingle_size': 5,
+}
+
+SCHEMA_SQL = '''
+CREATE TABLE IF NOT EXISTS dedup_chunks (
+    chunk_key TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    canonical_key TEXT,
+    chunk_text TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_dedup_chunks_content_hash ON dedup_chunks(content_hash);
+CREATE INDEX IF NOT EXISTS idx_dedup_chunks_canonical_key ON dedup_chunks(canonical_key);
+
+CREATE TABLE IF NOT EXISTS dedup_bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    chunk_key TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, chunk_key)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_dedup_bands_chunk_key ON dedup_bands(chunk_key);
+
+CREATE TABLE IF NOT EXISTS dedup_orphans (
+    chunk_key TEXT PRIMARY KEY,
+    chunk_text TEXT,
+    orphaned_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+'''
+
+# Chunk ids written by process_and_store_content ("<media_id>_chunk_<n>") and the Embeddings tab
+# ("doc_<media_id>_chunk_<n>")
+_CHUNK_ID_PATTERN = re.compile(r'^(?:doc_)?(\d+)_chunk_(\d+)$')
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Prime just above 2**32; with multipliers below 2**31 and 32-bit shingle hashes, a*x + b stays within uint64
+_MINHASH_PRIME = np.uint64(4294967311)
+
+
+def get_dedup_settings() -> Dict[str, Any]:
+    settings = dict(DEFAULT_DEDUP_SETTINGS)
+    try:
+        config = load_comprehensive_config()
+        if config.has_section('Deduplication'):
+            for key in ('enabled', 'collapse_results'):
+                settings[key] = config.getboolean('Deduplication', key, fallback=settings[key])
+            settings['index_path'] = config.get('Deduplication', 'index_path', fallback=None)
+            settings['threshold'] = config.getfloat('Deduplication', 'threshold', fallback=settings['threshold'])
+            for key in ('num_perm', 'bands', 'shingle_size'):
+                settings[key] = config.getint('Deduplication', key, fallback=settings[key])
+    except (FileNotFoundError, ValueError) as e:
+        logging.warning(f"Dedup_Index: Could not read [Deduplication] config, using defaults: {e}")
+    settings['index_path'] = get_project_relative_path(settings['index_path']) if settings['index_path'] \
+        else get_database_path('dedup_index.db')
+    return settings
+
+
+def normalize_tokens(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall((text or '').lower())
+
+
+def content_hash(text: str) -> str:
+    """Hash of the normalised token stream, so case and whitespace differences still count as exact duplicates."""
+    return hashlib.sha1(' '.join(normalize_tokens(text)).encode('utf-8')).hexdigest()
+
+
+def _permutations(num_perm: int) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(1)
+    a = rng.integers(1, 2 ** 31, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+_permutation_cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+
+def minhash_signature(text: str, num_perm: int = 128, shingle_size: int = 5) -> Optional[np.ndarray]:
+    """MinHash signature over word shingles, or None for text without any words."""
+    tokens = normalize_tokens(text)
+    if not tokens:
+        return None
+    if len(tokens) <= shingle_size:
+        shingles = {' '.join(tokens)}
+    else:
+        shingles = {' '.join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)}
+    hashes = np.fromiter((int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little')
+                          for shingle in shingles), dtype=np.uint64, count=len(shingles))
+    if num_perm not in _permutation_cache:
+        _permutation_cache[num_perm] = _permutations(num_perm)
+    a, b = _permutation_cache[num_perm]
+    return ((a[:, None] * hashes[None, :] + b[:, None]) % _MINHASH_PRIME).min(axis=1)
+
+
+def estimate_similarity(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return float(np.mean(signature_a == signature_b))
+
+
+class NearDuplicateIndex:
+    def __init__(self, db_path: str, threshold: float = 0.85, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 5):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.db_path = db_path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self._lock = threading.RLock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA_SQL)
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(dedup_chunks)')}
+        if 'chunk_text' not in columns:
+            # Indexes created before duplicate texts were kept
+            self._conn.execute('ALTER TABLE dedup_chunks ADD COLUMN chunk_text TEXT')
+            self._conn.commit()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        return minhash_signature(text, self.num_perm, self.shingle_size)
+
+    def _buckets(self, signature: np.ndarray) -> List[Tuple[int, int]]:
+        return [(band, int.from_bytes(hashlib.blake2b(
+            signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).digest(), 'little',
+            signed=True)) for band in range(self.bands)]
+
+    def find_duplicate(self, text: str, exclude_key: Optional[str] = None,
+                       signature: Optional[np.ndarray] = None) -> Optional[Tuple[str, float]]:
+        """Return (canonical chunk key, similarity) of the closest indexed duplicate of `text`, if any."""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT chunk_key FROM dedup_chunks WHERE content_hash = ? AND canonical_key IS NULL AND chunk_key != ?'
+                ' LIMIT 1', (content_hash(text), exclude_key or '')).fetchone()
+            if row:
+                return row[0], 1.0
+            candidates = set()
+            for band, bucket in self._buckets(signature):
+                candidates.update(key for (key,) in self._conn.execute(
+                    'SELECT chunk_key FROM dedup_bands WHERE band = ? AND bucket = ?', (band, bucket)))
+            candidates.discard(exclude_key)
+            best = None
+            for key in candidates:
+                stored = self._conn.execute('SELECT signature FROM dedup_chunks WHERE chunk_key = ?', (key,)).fetchone()
+                if stored is None:
+                    continue
+                similarity = estimate_similarity(signature, np.frombuffer(stored[0], dtype=np.uint64))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (key, similarity)
+            return best
+
+    def _delete(self, cursor, chunk_keys: List[str]) -> None:
+        cursor.executemany('DELETE FROM dedup_bands WHERE chunk_key = ?', [(key,) for key in chunk_keys])
+        cursor.executemany('DELETE FROM dedup_chunks WHERE chunk_key = ?', [(key,) for key in chunk_keys])
+
+    def register(self, chunk_key: str, text: str) -> Optional[str]:
+        """
+        Index a chunk. Returns the canonical chunk key if it duplicates an indexed chunk (the caller should then
+        skip embedding it), or None if it was indexed as a canonical chunk that needs its own vector.
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        with self._lock:
+            duplicate = self.find_duplicate(text, exclude_key=chunk_key, signature=signature)
+            cursor = self._conn.cursor()
+            try:
+                self._delete(cursor, [chunk_key])
+                # The chunk is being indexed again, so it is no longer waiting to be re-embedded
+                cursor.execute('DELETE FROM dedup_orphans WHERE chunk_key = ?', (chunk_key,))
+                cursor.execute('INSERT INTO dedup_chunks (chunk_key, content_hash, signature, canonical_key, '
+                               'chunk_text) VALUES (?, ?, ?, ?, ?)',
+                               (chunk_key, content_hash(text), signature.tobytes(),
+                                duplicate[0] if duplicate else None, text if duplicate else None))
+                if not duplicate:
+                    cursor.executemany('INSERT INTO dedup_bands (band, bucket, chunk_key) VALUES (?, ?, ?)',
+                                       [(band, bucket, chunk_key) for band, bucket in self._buckets(signature)])
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        if duplicate:
+            log_counter("dedup_chunk_duplicate", labels={"exact": str(duplicate[1] == 1.0)})
+            logging.debug(f"Chunk {chunk_key} duplicates {duplicate[0]} (similarity {duplicate[1]:.2f})")
+            return duplicate[0]
+        return None
+
+    def duplicates_of(self, canonical_key: str) -> List[str]:
+        """Keys of chunks that were linked to `canonical_key` instead of being embedded."""
+        with self._lock:
+            return [key for (key,) in self._conn.execute(
+                'SELECT chunk_key FROM dedup_chunks WHERE canonical_key = ?', (canonical_key,))]
+
+    def duplicate_links(self, canonical_prefix: str) -> List[Tuple[str, str]]:
+        """(duplicate key, canonical key) for every duplicate whose canonical key starts with `canonical_prefix`."""
+        upper = canonical_prefix[:-1] + chr(ord(canonical_prefix[-1]) + 1)
+        with self._lock:
+            return self._conn.execute(
+                'SELECT chunk_key, canonical_key FROM dedup_chunks WHERE canonical_key >= ? AND canonical_key < ?',
+                (canonical_prefix, upper)).fetchall()
+
+    def remove(self, chunk_keys: Iterable[str]) -> List[str]:
+        """
+        Remove chunks from the index. Duplicates linked to a removed canonical chunk no longer have a vector, so
+        they are dropped as well, queued in dedup_orphans with their text and returned; see pending_orphans.
+        """
+        chunk_keys = list(chunk_keys)
+        with self._lock:
+            orphans: Dict[str, Optional[str]] = {}
+            for start in range(0, len(chunk_keys), 500):
+                batch = chunk_keys[start:start + 500]
+                orphans.update(self._conn.execute(
+                    f"SELECT chunk_key, chunk_text FROM dedup_chunks "
+                    f"WHERE canonical_key IN ({','.join('?' * len(batch))})", batch))
+            for key in chunk_keys:
+                orphans.pop(key, None)
+            cursor = self._conn.cursor()
+            try:
+                self._delete(cursor, chunk_keys + sorted(orphans))
+                # Removed chunks are gone for good; there is nothing left to re-embed for them
+                cursor.executemany('DELETE FROM dedup_orphans WHERE chunk_key = ?', [(key,) for key in chunk_keys])
+                cursor.executemany('INSERT OR REPLACE INTO dedup_orphans (chunk_key, chunk_text) VALUES (?, ?)',
+                                   sorted(orphans.items()))
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        if orphans:
+            log_counter("dedup_chunk_orphaned", value=len(orphans))
+            logging.warning(f"Dedup_Index: {len(orphans)} duplicate chunks lost their canonical vector and were "
+                            f"queued to be embedded on their own")
+        return sorted(orphans)
+
+    def pending_orphans(self, limit: Optional[int] = None) -> List[Tuple[str, Optional[str]]]:
+        """(key, text) of orphaned duplicates still waiting for a vector of their own, oldest first."""
+        with self._lock:
+            return self._conn.execute('SELECT chunk_key, chunk_text FROM dedup_orphans ORDER BY orphaned_at, '
+                                      'chunk_key LIMIT ?', (-1 if limit is None else limit,)).fetchall()
+
+    def queue_orphans(self, orphans: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """Put (key, text) pairs (back) on the orphan queue, e.g. after re-embedding them failed."""
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO dedup_orphans (chunk_key, chunk_text) VALUES (?, ?)',
+                                   list(orphans))
+            self._conn.commit()
+
+    def clear_orphans(self, chunk_keys: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.executemany('DELETE FROM dedup_orphans WHERE chunk_key = ?', [(key,) for key in chunk_keys])
+            self._conn.commit()
+
+    def remove_prefix(self, prefix: str) -> List[str]:
+        """Remove every chunk whose key starts with `prefix`, e.g. one media item or a whole collection."""
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._lock:
+            # Queued orphans under the prefix are removed too
+            keys = [key for (key,) in self._conn.execute(
+                'SELECT chunk_key FROM dedup_chunks WHERE chunk_key >= ? AND chunk_key < ? UNION '
+                'SELECT chunk_key FROM dedup_orphans WHERE chunk_key >= ? AND chunk_key < ?',
+                (prefix, upper, prefix, upper))]
+        return self.remove(keys) if keys else []
+
+    def remove_collection(self, collection_name: str) -> List[str]:
+        return self.remove_prefix(chunk_key(collection_name, ''))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def chunk_key(collection_name: str, chunk_id: str) -> str:
+    return f"{collection_name}/{chunk_id}"
+
+
+def split_chunk_key(key: str) -> Tuple[str, str]:
+    """(collection name, chunk id) of a chunk key."""
+    collection_name, _, chunk_id = key.partition('/')
+    return collection_name, chunk_id
+
+
+def parse_chunk_id(chunk_id: str) -> Optional[Tuple[str, int]]:
+    """(media id, chunk index) encoded in a chunk id, matching the chunk's media_id and chunk_index metadata."""
+    match = _CHUNK_ID_PATTERN.match(chunk_id)
+    return (match.group(1), int(match.group(2))) if match else None
+
+
+_dedup_indexes: Dict[str, NearDuplicateIndex] = {}
+_dedup_indexes_lock = threading.Lock()
+
+
+def get_dedup_index(db_path: Optional[str] = None) -> Optional[NearDuplicateIndex]:
+    """The shared chunk dedup index, or None when [Deduplication] is disabled."""
+    settings = get_dedup_settings()
+    if not settings['enabled']:
+        return None
+    db_path = db_path or settings['index_path']
+    with _dedup_indexes_lock:
+        if db_path not in _dedup_indexes:
+            _dedup_indexes[db_path] = NearDuplicateIndex(db_path, settings['threshold'], settings['num_perm'],
+                                                         settings['bands'], settings['shingle_size'])
+        return _dedup_indexes[db_path]
+
+
+def collapse_near_duplicates(results: List[Dict[str, Any]], threshold: Optional[float] = None,
+                             text_key: str = 'content') -> List[Dict[str, Any]]:
+    """
+    Drop results that are exact or near-duplicates of an earlier result, keeping the first occurrence. Returns the
+    list unchanged when result collapsing is disabled in [Deduplication].
+    """
+    settings = get_dedup_settings()
+    if not settings['collapse_results'] or len(results) < 2:
+        return results
+    threshold = settings['threshold'] if threshold is None else threshold
+    kept, kept_signatures, kept_hashes = [], [], set()
+    for result in results:
+        text = str(result.get(text_key, ''))
+        signature = minhash_signature(text, settings['num_perm'], settings['shingle_size'])
+        if signature is None:
+            # Nothing to compare on
+            kept.append(result)
+            continue
+        text_hash = content_hash(text)
+        if text_hash in kept_hashes or (kept_signatures and
+                                        np.max(np.mean(np.vstack(kept_signatures) == signature, axis=1)) >= threshold):
+            continue
+        kept.append(result)
+        kept_hashes.add(text_hash)
+        kept_signatures.append(signature)
+    if len(kept) < len(results):
+        log_counter("dedup_results_collapsed", value=len(results) - len(kept))
+    return kept
+
+#
+# End of Dedup_Index.py
+#######################################################################################################################
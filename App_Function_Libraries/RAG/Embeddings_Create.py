@@ -11,16 +11,19 @@ from typing import List
 #
 # 3rd-Party Imports:
 import numpy as np
-import onnxruntime as ort
-import requests
-from transformers import AutoTokenizer, AutoModel
-import torch
 #
 # Local Imports:
+from App_Function_Libraries.Utils.Lazy_Loading import LazyModule
 from App_Function_Libraries.LLM_API_Calls import get_openai_embeddings
+from App_Function_Libraries.LLM_Providers.HTTP_Client import get_http_session
 from App_Function_Libraries.Utils.Utils import load_comprehensive_config
 from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
 #
+# Only the local embedders need these, and importing them takes seconds; they load on first use
+ort = LazyModule('onnxruntime')
+torch = LazyModule('torch')
+transformers = LazyModule('transformers')
+#
 #######################################################################################################################
 #
 # Functions:
@@ -67,13 +70,13 @@ class HuggingFaceEmbedder:
         # https://huggingface.co/docs/transformers/custom_models
         if self.model is None:
             # Pass cache_dir to from_pretrained to specify download directory
-            self.tokenizer = AutoTokenizer.from_pretrained(
+            self.tokenizer = transformers.AutoTokenizer.from_pretrained(
                 self.model_name,
                 trust_remote_code=True,
                 cache_dir=self.cache_dir,  # Specify cache directory
                 revision=commit_hashes.get(self.model_name, None)  # Pass commit hash
             )
-            self.model = AutoModel.from_pretrained(
+            self.model = transformers.AutoModel.from_pretrained(
                 self.model_name,
                 trust_remote_code=True,
                 cache_dir=self.cache_dir,  # Specify cache directory
@@ -144,7 +147,7 @@ class ONNXEmbedder:
         self.model_name = model_name
         self.model_path = os.path.join(onnx_model_dir, f"{model_name}.onnx")
         # https://huggingface.co/docs/transformers/custom_models
-        self.tokenizer = AutoTokenizer.from_pretrained(
+        self.tokenizer = transformers.AutoTokenizer.from_pretrained(
             model_name,
             trust_remote_code=True,
             cache_dir=onnx_model_dir,  # Ensure tokenizer uses the same directory
@@ -290,7 +293,7 @@ def create_embeddings_batch(texts: List[str],
             return [create_openai_embedding(text, model) for text in texts]
 
         elif provider.lower() == 'local':
-            response = requests.post(
+            response = get_http_session().post(
                 api_url,
                 json={"texts": texts, "model": model},
                 headers={"Authorization": f"Bearer {embedding_api_key}"}
@@ -358,8 +361,8 @@ def create_openai_embedding(text: str, model: str) -> List[float]:
 #
 #     def load_model(self):
 #         if self.model is None:
-#             self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-#             self.model = AutoModel.from_pretrained(self.model_name)
+#             self.tokenizer = transformers.AutoTokenizer.from_pretrained(self.model_name)
+#             self.model = transformers.AutoModel.from_pretrained(self.model_name)
 #             self.model.to(self.device)
 #         self.last_used_time = time.time()
 #         self.reset_timer()
@@ -527,7 +530,7 @@ def create_openai_embedding(text: str, model: str) -> List[float]:
 #     def __init__(self, model_name, model_dir, timeout_seconds=120):
 #         self.model_name = model_name
 #         self.model_path = os.path.join(model_dir, f"{model_name}.onnx")
-#         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+#         self.tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
 #         self.session = None
 #         self.timeout_seconds = timeout_seconds
 #         self.last_used_time = 0
@@ -1,6 +1,5 @@
 import numpy as np
 from typing import List, Tuple, Dict
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sentence_transformers import SentenceTransformer
 import math
@@ -10,11 +9,13 @@ import openai
 from transformers import T5ForConditionalGeneration, T5Tokenizer
 import torch
 import re
-import psycopg2
-from psycopg2.extras import execute_values
 import sqlite3
 import logging
 
+from App_Function_Libraries.DB.SQLite_DB import register_text_functions
+from App_Function_Libraries.RAG.BM25_Index import get_bm25_index
+from App_Function_Libraries.RAG.Vector_Store import VectorStore, get_vector_store
+
 
 
 ########################################################################################################################################################################################################################################
@@ -144,16 +145,13 @@ def process_media_chunks(db_connection, media_id: int, text: str):
 # To use this updated RAG system in your existing application:
 #
 # Install required packages:
-# pip install sentence-transformers psycopg2-binary scikit-learn transformers torch
-# Set up PostgreSQL with pgvector:
-#
-# Install PostgreSQL and the pgvector extension.
-# Create a new database for vector storage.
+# pip install sentence-transformers scikit-learn transformers torch
+# Pick a vector store backend in the [Vector-Store] section of config.txt (ChromaDB or the built-in local store).
 #
 # Update your main application to use the RAG system:
 #
 # Import the RAGSystem class from this new file.
-# Initialize the RAG system with your SQLite and PostgreSQL configurations.
+# Initialize the RAG system with your SQLite database (and optionally a VectorStore instance).
 # Use the vectorize_all_documents method to initially vectorize your existing documents.
 #
 #
@@ -205,25 +203,17 @@ VECTOR_DIM = 384  # Dimension of the chosen embedding model
 
 
 class RAGSystem:
-    def __init__(self, sqlite_path: str, pg_config: Dict[str, str], cache_size: int = 100):
+    def __init__(self, sqlite_path: str, vector_store: VectorStore = None, cache_size: int = 100,
+                 bm25_index_path: str = None, collection_name: str = 'rag_system_chunks'):
         self.sqlite_path = sqlite_path
-        self.pg_config = pg_config
+        self.vector_store = vector_store or get_vector_store()
+        self.collection = self.vector_store.get_or_create_collection(name=collection_name)
         self.model = SentenceTransformer(EMBEDDING_MODEL)
         self.cache_size = cache_size
-
-        self._init_postgres()
-
-    def _init_postgres(self):
-        with psycopg2.connect(**self.pg_config) as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                CREATE TABLE IF NOT EXISTS document_vectors (
-                    id SERIAL PRIMARY KEY,
-                    document_id INTEGER UNIQUE,
-                    vector vector(384)
-                )
-                """)
-            conn.commit()
+        # Persistent lexical indexes at document and chunk level (see BM25_Index.py)
+        self.bm25_index = get_bm25_index('document', bm25_index_path)
+        self.chunk_bm25_index = get_bm25_index('chunk', bm25_index_path)
+        self._bm25_synced = False
 
     @lru_cache(maxsize=100)
     def _get_embedding(self, text: str) -> np.ndarray:
@@ -231,17 +221,16 @@ class RAGSystem:
 
     def vectorize_document(self, doc_id: int, content: str):
         chunks = create_chunks(content, chunk_size=1000, overlap=100)
-        for chunk in chunks:
-            vector = self._get_embedding(chunk['text'])
-
-            with psycopg2.connect(**self.pg_config) as conn:
-                with conn.cursor() as cur:
-                    cur.execute("""
-                    INSERT INTO document_vectors (document_id, chunk_index, vector, metadata)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (document_id, chunk_index) DO UPDATE SET vector = EXCLUDED.vector
-                    """, (doc_id, chunk['index'], vector.tolist(), json.dumps(chunk)))
-                conn.commit()
+        self.index_document(doc_id, content, chunks)
+        if not chunks:
+            return
+        vectors = self.model.encode([chunk['text'] for chunk in chunks])
+        self.collection.upsert(
+            ids=[f"{doc_id}_chunk_{chunk['index']}" for chunk in chunks],
+            embeddings=vectors,
+            documents=[chunk['text'] for chunk in chunks],
+            metadatas=[{'document_id': doc_id, 'chunk_index': chunk['index']} for chunk in chunks]
+        )
 
     def vectorize_all_documents(self):
         with sqlite3.connect(self.sqlite_path) as sqlite_conn:
@@ -250,51 +239,65 @@ class RAGSystem:
                 self.vectorize_document(chunk['id'], chunk['text'])
             mark_chunks_as_processed(sqlite_conn, [chunk['id'] for chunk in unprocessed_chunks])
 
-    def semantic_search(self, query: str, top_k: int = 5) -> List[Tuple[int, int, float]]:
+    def semantic_search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """Return (document_id, similarity) pairs, scoring each document by its best-matching chunk."""
         query_vector = self._get_embedding(query)
-
-        with psycopg2.connect(**self.pg_config) as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                SELECT document_id, chunk_index, 1 - (vector <-> %s) AS similarity
-                FROM document_vectors
-                ORDER BY vector <-> %s ASC
-                LIMIT %s
-                """, (query_vector.tolist(), query_vector.tolist(), top_k))
-                results = cur.fetchall()
-
-        return results
+        # Over-fetch chunks so several hits from one document still leave top_k distinct documents
+        results = self.collection.query(query_embeddings=[query_vector], n_results=top_k * 4,
+                                        include=["metadatas"])
+        best: Dict[int, float] = {}
+        for metadata, distance in zip(results['metadatas'][0], results['distances'][0]):
+            doc_id = metadata['document_id']
+            best[doc_id] = max(best.get(doc_id, float('-inf')), 1 - distance)
+        return sorted(best.items(), key=lambda x: x[1], reverse=True)[:top_k]
 
     def get_document_content(self, doc_id: int) -> str:
         with sqlite3.connect(self.sqlite_path) as conn:
+            register_text_functions(conn)
             cur = conn.cursor()
-            cur.execute("SELECT content FROM media WHERE id = ?", (doc_id,))
+            cur.execute("SELECT decompress_text(content) FROM media WHERE id = ?", (doc_id,))
             result = cur.fetchone()
             return result[0] if result else ""
 
-    def bm25_search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+    def index_document(self, doc_id: int, content: str, chunks: List[Dict[str, Any]] = None):
+        """Add or replace a document (and its chunks) in the BM25 indexes."""
+        if chunks is None:
+            chunks = create_chunks(content, chunk_size=1000, overlap=100)
+        self.bm25_index.add_documents([(doc_id, content)])
+        self.chunk_bm25_index.remove_documents_with_prefix(f"{doc_id}_chunk_")
+        self.chunk_bm25_index.add_documents([(f"{doc_id}_chunk_{chunk['index']}", chunk['text']) for chunk in chunks])
+
+    def remove_document(self, doc_id: int):
+        self.collection.delete(where={'document_id': doc_id})
+        self.bm25_index.remove_documents([doc_id])
+        self.chunk_bm25_index.remove_documents_with_prefix(f"{doc_id}_chunk_")
+
+    def sync_bm25_index(self):
+        """Index media rows missing from the BM25 index and drop entries whose media row is gone."""
         with sqlite3.connect(self.sqlite_path) as conn:
+            # Media.content may be stored compressed
+            register_text_functions(conn)
             cur = conn.cursor()
-            cur.execute("SELECT id, content FROM media")
-            documents = cur.fetchall()
-
-        vectorizer = TfidfVectorizer(use_idf=True)
-        tfidf_matrix = vectorizer.fit_transform([doc[1] for doc in documents])
-
-        query_vector = vectorizer.transform([query])
-        doc_lengths = tfidf_matrix.sum(axis=1).A1
-        avg_doc_length = np.mean(doc_lengths)
+            cur.execute("SELECT id FROM media")
+            media_ids = {str(row[0]) for row in cur.fetchall()}
+            indexed_ids = self.bm25_index.document_ids()
+            for doc_id in indexed_ids - media_ids:
+                self.remove_document(int(doc_id))
+            for doc_id in sorted(media_ids - indexed_ids, key=int):
+                cur.execute("SELECT decompress_text(content) FROM media WHERE id = ?", (int(doc_id),))
+                self.index_document(int(doc_id), cur.fetchone()[0] or "")
+        self._bm25_synced = True
 
-        k1, b = 1.5, 0.75
-        scores = []
-        for i, doc_vector in enumerate(tfidf_matrix):
-            score = np.sum(
-                ((k1 + 1) * query_vector.multiply(doc_vector)).A1 /
-                (k1 * (1 - b + b * doc_lengths[i] / avg_doc_length) + query_vector.multiply(doc_vector).A1)
-            )
-            scores.append((documents[i][0], score))
+    def bm25_search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        if not self._bm25_synced:
+            self.sync_bm25_index()
+        return [(int(doc_id), score) for doc_id, score in self.bm25_index.search(query, top_k)]
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)[:top_k]
+    def bm25_chunk_search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """Chunk-level BM25; returns ("<doc_id>_chunk_<index>", score) pairs."""
+        if not self._bm25_synced:
+            self.sync_bm25_index()
+        return self.chunk_bm25_index.search(query, top_k)
 
     def combine_search_results(self, bm25_results: List[Tuple[int, float]], vector_results: List[Tuple[int, float]],
                                alpha: float = 0.5) -> List[Tuple[int, float]]:
@@ -371,14 +374,10 @@ class RAGSystem:
 # Example usage
 if __name__ == "__main__":
     sqlite_path = "path/to/your/sqlite/database.db"
-    pg_config = {
-        "dbname": "your_db_name",
-        "user": "your_username",
-        "password": "your_password",
-        "host": "localhost"
-    }
-
-    rag_system = RAGSystem(sqlite_path, pg_config)
+
+    # Uses the vector store configured in [Vector-Store]; pass e.g. LocalVectorStore(path, index_type='hnsw')
+    # to override it
+    rag_system = RAGSystem(sqlite_path)
 
     # Vectorize all documents (run this once or periodically)
     rag_system.vectorize_all_documents()
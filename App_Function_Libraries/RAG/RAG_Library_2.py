@@ -2,27 +2,31 @@
 # Description: This script contains the main RAG pipeline function and related functions for the RAG pipeline.
 #
 # Import necessary modules and functions
+import asyncio
 import configparser
 import logging
 import os
 import time
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
 
 from App_Function_Libraries.DB.Character_Chat_DB import get_character_chats, perform_full_text_search_chat, \
     fetch_keywords_for_chats
 #
 # Local Imports
-from App_Function_Libraries.RAG.ChromaDB_Library import process_and_store_content, vector_search, chroma_client
+from App_Function_Libraries.RAG.ChromaDB_Library import process_and_store_content, vector_search, vector_store
+from App_Function_Libraries.RAG.Dedup_Index import collapse_near_duplicates
 from App_Function_Libraries.RAG.RAG_Persona_Chat import perform_vector_search_chat
+from App_Function_Libraries.RAG.RAG_Query_Cache import get_rag_query_cache, rag_query_cache_key
+from App_Function_Libraries.RAG.Reranker import rerank_results
 from App_Function_Libraries.Summarization.Local_Summarization_Lib import summarize_with_custom_openai
 from App_Function_Libraries.Web_Scraping.Article_Extractor_Lib import scrape_article
-from App_Function_Libraries.DB.DB_Manager import search_db, fetch_keywords_for_media
+from App_Function_Libraries.DB.DB_Manager import search_db, fetch_media_ids_for_keywords
+from App_Function_Libraries.LLM_Providers.Async_LLM_Calls import asummarize, astream_chat
 from App_Function_Libraries.Utils.Utils import load_comprehensive_config
 from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
 #
 # 3rd-Party Imports
 import openai
-from flashrank import Ranker, RerankRequest
 #
 ########################################################################################################################
 #
@@ -117,96 +121,204 @@ config.read('config.txt')
 
 # RAG Search with keyword filtering
 # FIXME - Update each called function to support modifiable top-k results
-def enhanced_rag_pipeline(query: str, api_choice: str, keywords: str = None, top_k=10, apply_re_ranking=True) -> Dict[str, Any]:
-    log_counter("enhanced_rag_pipeline_attempt", labels={"api_choice": api_choice})
-    start_time = time.time()
-    try:
-        # Load embedding provider from config, or fallback to 'openai'
-        embedding_provider = config.get('Embeddings', 'provider', fallback='openai')
+def retrieve_rag_context(query: str, keywords: str = None, top_k=10, apply_re_ranking=True,
+                         reranker_backend: str = None, reranker_model: str = None, rerank_top_n: int = None):
+    """
+    Retrieval half of `enhanced_rag_pipeline`: keyword filter, vector + full-text search and optional re-ranking.
 
-        # Log the provider used
-        logging.debug(f"Using embedding provider: {embedding_provider}")
+    Returns (all_results, context) where context is the joined content of the top_k results. The reranker
+    backend ('flashrank', 'cross-encoder' or 'none'), model and candidate cap override the [Reranker] config.
+    Results are served from the [RAG-Query-Cache] LRU until the media DB or vector store changes.
+    """
+    query_cache = get_rag_query_cache()
+    cache_key = None
+    if query_cache is not None:
+        cache_key = rag_query_cache_key(query, keywords, top_k,
+                                        (apply_re_ranking, reranker_backend, reranker_model, rerank_top_n))
+        cached = query_cache.get(cache_key)
+        if cached is not None:
+            logging.debug("retrieve_rag_context - Serving results from the RAG query cache")
+            all_results, context = cached
+            return list(all_results), context
+
+    # Load embedding provider from config, or fallback to 'openai'
+    embedding_provider = config.get('Embeddings', 'provider', fallback='openai')
+
+    # Log the provider used
+    logging.debug(f"Using embedding provider: {embedding_provider}")
+
+    # Process keywords if provided
+    keyword_list = [k.strip().lower() for k in keywords.split(',')] if keywords else []
+    logging.debug(f"\n\nenhanced_rag_pipeline - Keywords: {keyword_list}")
+
+    # Fetch relevant media IDs based on keywords if keywords are provided
+    relevant_media_ids = fetch_relevant_media_ids(keyword_list) if keyword_list else None
+    logging.debug(f"\n\nenhanced_rag_pipeline - relevant media IDs: {relevant_media_ids}")
+
+    # Perform vector search
+    vector_results = perform_vector_search(query, relevant_media_ids)
+    logging.debug(f"\n\nenhanced_rag_pipeline - Vector search results: {vector_results}")
+
+    # Perform full-text search
+    fts_results = perform_full_text_search(query, relevant_media_ids)
+    logging.debug("\n\nenhanced_rag_pipeline - Full-text search results:")
+    logging.debug(
+        "\n\nenhanced_rag_pipeline - Full-text search results:\n" + "\n".join(
+            [str(item) for item in fts_results]) + "\n"
+    )
+
+    # Combine results, dropping near-duplicates (mirrors, re-uploads) before they take reranker slots
+    all_results = collapse_near_duplicates(vector_results + fts_results)
+
+    if apply_re_ranking:
+        logging.debug(f"\nenhanced_rag_pipeline - Applying Re-Ranking")
+        # Backend/model/top-N default to the [Reranker] config section
+        all_results = rerank_results(query, all_results, backend=reranker_backend, model=reranker_model,
+                                     top_n=rerank_top_n)
+        logging.debug(f"\n\nenhanced_rag_pipeline - Reranked results: {all_results}")
+
+    # Extract content from results (top 10 by default)
+    context = "\n".join([result['content'] for result in all_results[:top_k]])
+    logging.debug(f"Context length: {len(context)}")
+    logging.debug(f"Context: {context[:200]}")
+    if cache_key is not None:
+        query_cache.put(cache_key, (list(all_results), context))
+    return all_results, context
+
+
+def _rag_pipeline_result(query: str, keywords: str, all_results, context: str, answer: str) -> Dict[str, Any]:
+    if not all_results:
+        logging.info(f"No results found. Query: {query}, Keywords: {keywords}")
+        return {
+            "answer": "No relevant information based on your query and keywords were found in the database. Your query has been directly passed to the LLM, and here is its answer: \n\n" + answer,
+            "context": "No relevant information based on your query and keywords were found in the database. The only context used was your query: \n\n" + query
+        }
+    return {
+        "answer": answer,
+        "context": context
+    }
 
-        # Process keywords if provided
-        keyword_list = [k.strip().lower() for k in keywords.split(',')] if keywords else []
-        logging.debug(f"\n\nenhanced_rag_pipeline - Keywords: {keyword_list}")
 
-        # Fetch relevant media IDs based on keywords if keywords are provided
-        relevant_media_ids = fetch_relevant_media_ids(keyword_list) if keyword_list else None
-        logging.debug(f"\n\nenhanced_rag_pipeline - relevant media IDs: {relevant_media_ids}")
+def enhanced_rag_pipeline(query: str, api_choice: str, keywords: str = None, top_k=10, apply_re_ranking=True,
+                          reranker_backend: str = None, reranker_model: str = None,
+                          rerank_top_n: int = None) -> Dict[str, Any]:
+    log_counter("enhanced_rag_pipeline_attempt", labels={"api_choice": api_choice})
+    start_time = time.time()
+    try:
+        all_results, context = retrieve_rag_context(query, keywords, top_k, apply_re_ranking, reranker_backend,
+                                                    reranker_model, rerank_top_n)
 
-        # Perform vector search
-        vector_results = perform_vector_search(query, relevant_media_ids)
-        logging.debug(f"\n\nenhanced_rag_pipeline - Vector search results: {vector_results}")
+        # Generate answer using the selected API
+        answer = generate_answer(api_choice, context, query)
 
-        # Perform full-text search
-        fts_results = perform_full_text_search(query, relevant_media_ids)
-        logging.debug("\n\nenhanced_rag_pipeline - Full-text search results:")
-        logging.debug(
-            "\n\nenhanced_rag_pipeline - Full-text search results:\n" + "\n".join(
-                [str(item) for item in fts_results]) + "\n"
-        )
+        # Metrics
+        pipeline_duration = time.time() - start_time
+        log_histogram("enhanced_rag_pipeline_duration", pipeline_duration, labels={"api_choice": api_choice})
+        log_counter("enhanced_rag_pipeline_success", labels={"api_choice": api_choice})
+        return _rag_pipeline_result(query, keywords, all_results, context, answer)
 
-        # Combine results
-        all_results = vector_results + fts_results
+    except Exception as e:
+        # Metrics
+        log_counter("enhanced_rag_pipeline_error", labels={"api_choice": api_choice, "error": str(e)})
+        logging.error(f"Error in enhanced_rag_pipeline: {str(e)}")
+        return {
+            "answer": "An error occurred while processing your request.",
+            "context": ""
+        }
 
-        if apply_re_ranking:
-            logging.debug(f"\nenhanced_rag_pipeline - Applying Re-Ranking")
-            # FIXME - add option to use re-ranking at call time
-            # FIXME - specify model + add param to modify at call time
-            # FIXME - add option to set a custom top X results
-            # You can specify a model if necessary, e.g., model_name="ms-marco-MiniLM-L-12-v2"
-            if all_results:
-                ranker = Ranker()
 
-                # Prepare passages for re-ranking
-                passages = [{"id": i, "text": result['content']} for i, result in enumerate(all_results)]
-                rerank_request = RerankRequest(query=query, passages=passages)
+async def aenhanced_rag_pipeline(query: str, api_choice: str, keywords: str = None, top_k=10,
+                                 apply_re_ranking=True, reranker_backend: str = None, reranker_model: str = None,
+                                 rerank_top_n: int = None) -> Dict[str, Any]:
+    """Async `enhanced_rag_pipeline`: retrieval runs in a worker thread, answer generation on the event loop."""
+    log_counter("enhanced_rag_pipeline_attempt", labels={"api_choice": api_choice})
+    start_time = time.time()
+    try:
+        all_results, context = await asyncio.to_thread(retrieve_rag_context, query, keywords, top_k,
+                                                     apply_re_ranking, reranker_backend, reranker_model,
+                                                     rerank_top_n)
+        answer = await agenerate_answer(api_choice, context, query)
 
-                # Rerank the results
-                reranked_results = ranker.rerank(rerank_request)
+        pipeline_duration = time.time() - start_time
+        log_histogram("enhanced_rag_pipeline_duration", pipeline_duration, labels={"api_choice": api_choice})
+        log_counter("enhanced_rag_pipeline_success", labels={"api_choice": api_choice})
+        return _rag_pipeline_result(query, keywords, all_results, context, answer)
 
-                # Sort results based on the re-ranking score
-                reranked_results = sorted(reranked_results, key=lambda x: x['score'], reverse=True)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        log_counter("enhanced_rag_pipeline_error", labels={"api_choice": api_choice, "error": str(e)})
+        logging.error(f"Error in aenhanced_rag_pipeline: {str(e)}")
+        return {
+            "answer": "An error occurred while processing your request.",
+            "context": ""
+        }
 
-                # Log reranked results
-                logging.debug(f"\n\nenhanced_rag_pipeline - Reranked results: {reranked_results}")
 
-                # Update all_results based on reranking
-                all_results = [all_results[result['id']] for result in reranked_results]
+async def agenerate_answer(api_choice: str, context: str, query: str) -> str:
+    """
+    Async `generate_answer`. Goes through the summarize provider registry, so the UI names used here
+    ("OpenAI", "Llama.cpp", "custom_openai_api", ...) are normalised to registry names.
+    """
+    log_counter("generate_answer_attempt", labels={"api_choice": api_choice})
+    start_time = time.time()
+    prompt = f"Context: {context}\n\nQuestion: {query}"
+    try:
+        answer = await asummarize(prompt, "", api_choice.replace('_', '-'))
+        log_histogram("generate_answer_duration", time.time() - start_time, labels={"api_choice": api_choice})
+        log_counter("generate_answer_success", labels={"api_choice": api_choice})
+        return answer
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        log_counter("generate_answer_error", labels={"api_choice": api_choice, "error": str(e)})
+        logging.error(f"Error in agenerate_answer: {str(e)}")
+        return "An error occurred while generating the answer."
 
-        # Extract content from results (top 10 by default)
-        context = "\n".join([result['content'] for result in all_results[:top_k]])
-        logging.debug(f"Context length: {len(context)}")
-        logging.debug(f"Context: {context[:200]}")
+async def astream_generate_answer(api_choice: str, context: str, query: str) -> AsyncIterator[str]:
+    """Streaming `agenerate_answer`: yields answer text as the provider produces it."""
+    log_counter("generate_answer_attempt", labels={"api_choice": api_choice})
+    start_time = time.time()
+    prompt = f"Context: {context}\n\nQuestion: {query}"
+    try:
+        async for chunk in astream_chat(api_choice.replace('_', '-'), prompt, ""):
+            yield chunk
+        log_histogram("generate_answer_duration", time.time() - start_time, labels={"api_choice": api_choice})
+        log_counter("generate_answer_success", labels={"api_choice": api_choice})
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        log_counter("generate_answer_error", labels={"api_choice": api_choice, "error": str(e)})
+        logging.error(f"Error in astream_generate_answer: {str(e)}")
+        yield "An error occurred while generating the answer."
 
-        # Generate answer using the selected API
-        answer = generate_answer(api_choice, context, query)
 
+async def astream_enhanced_rag_pipeline(query: str, api_choice: str, keywords: str = None, top_k=10,
+                                        apply_re_ranking=True, reranker_backend: str = None,
+                                        reranker_model: str = None, rerank_top_n: int = None) -> AsyncIterator[str]:
+    """Streaming `aenhanced_rag_pipeline`: retrieval runs first, then the answer is yielded as it is generated."""
+    log_counter("enhanced_rag_pipeline_attempt", labels={"api_choice": api_choice})
+    start_time = time.time()
+    try:
+        all_results, context = await asyncio.to_thread(retrieve_rag_context, query, keywords, top_k,
+                                                     apply_re_ranking, reranker_backend, reranker_model,
+                                                     rerank_top_n)
         if not all_results:
             logging.info(f"No results found. Query: {query}, Keywords: {keywords}")
-            return {
-                "answer": "No relevant information based on your query and keywords were found in the database. Your query has been directly passed to the LLM, and here is its answer: \n\n" + answer,
-                "context": "No relevant information based on your query and keywords were found in the database. The only context used was your query: \n\n" + query
-            }
-        # Metrics
+            yield "No relevant information based on your query and keywords were found in the database. Your query has been directly passed to the LLM, and here is its answer: \n\n"
+        async for chunk in astream_generate_answer(api_choice, context, query):
+            yield chunk
+
         pipeline_duration = time.time() - start_time
         log_histogram("enhanced_rag_pipeline_duration", pipeline_duration, labels={"api_choice": api_choice})
         log_counter("enhanced_rag_pipeline_success", labels={"api_choice": api_choice})
-        return {
-            "answer": answer,
-            "context": context
-        }
-
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
-        # Metrics
         log_counter("enhanced_rag_pipeline_error", labels={"api_choice": api_choice, "error": str(e)})
-        logging.error(f"Error in enhanced_rag_pipeline: {str(e)}")
-        logging.error(f"Error in enhanced_rag_pipeline: {str(e)}")
-        return {
-            "answer": "An error occurred while processing your request.",
-            "context": ""
-        }
+        logging.error(f"Error in astream_enhanced_rag_pipeline: {str(e)}")
+        yield "An error occurred while processing your request."
+
 
 # Need to write a test for this function FIXME
 def generate_answer(api_choice: str, context: str, query: str) -> str:
@@ -336,19 +448,25 @@ def generate_answer(api_choice: str, context: str, query: str) -> str:
         logging.error(f"Error in generate_answer: {str(e)}")
         return "An error occurred while generating the answer."
 
+def media_id_filter(relevant_media_ids) -> Optional[Dict[str, Any]]:
+    # Chroma stores media_id as a string in the chunk metadata
+    if relevant_media_ids is None:
+        return None
+    return {"media_id": {"$in": sorted({str(media_id) for media_id in relevant_media_ids})}}
+
+
 def perform_vector_search(query: str, relevant_media_ids: List[str] = None, top_k=10) -> List[Dict[str, Any]]:
     log_counter("perform_vector_search_attempt")
     start_time = time.time()
-    all_collections = chroma_client.list_collections()
+    if relevant_media_ids is not None and not relevant_media_ids:
+        # Keyword filter matched no media
+        return []
+    where = media_id_filter(relevant_media_ids)
+    all_collections = vector_store.list_collections()
     vector_results = []
     try:
-        for collection in all_collections:
-            collection_results = vector_search(collection.name, query, k=top_k)
-            filtered_results = [
-                result for result in collection_results
-                if relevant_media_ids is None or result['metadata'].get('media_id') in relevant_media_ids
-            ]
-            vector_results.extend(filtered_results)
+        for collection_name in all_collections:
+            vector_results.extend(vector_search(collection_name, query, k=top_k, where=where))
         search_duration = time.time() - start_time
         log_histogram("perform_vector_search_duration", search_duration)
         log_counter("perform_vector_search_success", labels={"result_count": len(vector_results)})
@@ -362,14 +480,15 @@ def perform_full_text_search(query: str, relevant_media_ids: List[str] = None, f
     log_counter("perform_full_text_search_attempt")
     start_time = time.time()
     try:
-        fts_results = search_db(query, ["content"], "", page=1, results_per_page=fts_top_k or 10)
+        # The media id restriction is applied inside the SQL query
+        fts_results = search_db(query, ["content"], "", page=1, results_per_page=fts_top_k or 10,
+                                media_ids=relevant_media_ids)
         filtered_fts_results = [
             {
                 "content": result['content'],
                 "metadata": {"media_id": result['id']}
             }
             for result in fts_results
-            if relevant_media_ids is None or result['id'] in relevant_media_ids
         ]
         search_duration = time.time() - start_time
         log_histogram("perform_full_text_search_duration", search_duration)
@@ -385,14 +504,13 @@ def fetch_relevant_media_ids(keywords: List[str], top_k=10) -> List[int]:
     log_counter("fetch_relevant_media_ids_attempt", labels={"keyword_count": len(keywords)})
     start_time = time.time()
     relevant_ids = set()
-    for keyword in keywords:
+    if keywords:
         try:
-            media_ids = fetch_keywords_for_media(keyword)
-            relevant_ids.update(media_ids)
+            # Served from the in-memory keyword index; at most one DB query when the index is cold
+            relevant_ids = fetch_media_ids_for_keywords(keywords)
         except Exception as e:
             log_counter("fetch_relevant_media_ids_error", labels={"error": str(e)})
-            logging.error(f"Error fetching relevant media IDs for keyword '{keyword}': {str(e)}")
-            # Continue processing other keywords
+            logging.error(f"Error fetching relevant media IDs for keywords {keywords}: {str(e)}")
 
     fetch_duration = time.time() - start_time
     log_histogram("fetch_relevant_media_ids_duration", fetch_duration)
@@ -406,6 +524,7 @@ def filter_results_by_keywords(results: List[Dict[str, Any]], keywords: List[str
     if not keywords:
         return results
 
+    allowed_media_ids = {str(media_id) for media_id in fetch_media_ids_for_keywords(keywords)}
     filtered_results = []
     for result in results:
         try:
@@ -422,8 +541,7 @@ def filter_results_by_keywords(results: List[Dict[str, Any]], keywords: List[str
                 logging.warning(f"No media_id found in metadata: {metadata}")
                 continue
 
-            media_keywords = fetch_keywords_for_media(media_id)
-            if any(keyword.lower() in [mk.lower() for mk in media_keywords] for keyword in keywords):
+            if str(media_id) in allowed_media_ids:
                 filtered_results.append(result)
         except Exception as e:
             logging.error(f"Error processing result: {result}. Error: {str(e)}")
@@ -452,7 +570,9 @@ def extract_media_id_from_result(result: str) -> Optional[int]:
 #
 # Chat RAG
 
-def enhanced_rag_pipeline_chat(query: str, api_choice: str, character_id: int, keywords: Optional[str] = None) -> Dict[str, Any]:
+def enhanced_rag_pipeline_chat(query: str, api_choice: str, character_id: int, keywords: Optional[str] = None,
+                               apply_re_ranking=True, reranker_backend: str = None, reranker_model: str = None,
+                               rerank_top_n: int = None) -> Dict[str, Any]:
     """
     Enhanced RAG pipeline tailored for the Character Chat tab.
 
@@ -461,6 +581,8 @@ def enhanced_rag_pipeline_chat(query: str, api_choice: str, character_id: int, k
         api_choice (str): The API to use for generating the response.
         character_id (int): The ID of the character being interacted with.
         keywords (Optional[str]): Comma-separated keywords to filter search results.
+        apply_re_ranking (bool): Whether to rerank the combined search results.
+        reranker_backend, reranker_model, rerank_top_n: Override the [Reranker] config for this call.
 
     Returns:
         Dict[str, Any]: Contains the generated answer and the context used.
@@ -507,28 +629,13 @@ def enhanced_rag_pipeline_chat(query: str, api_choice: str, character_id: int, k
         logging.debug("\n".join([str(item) for item in fts_results]))
 
         # Combine results
-        all_results = vector_results + fts_results
+        all_results = collapse_near_duplicates(vector_results + fts_results)
 
-        apply_re_ranking = True
         if apply_re_ranking:
             logging.debug("enhanced_rag_pipeline_chat - Applying Re-Ranking")
-            ranker = Ranker()
-
-            # Prepare passages for re-ranking
-            passages = [{"id": i, "text": result['content']} for i, result in enumerate(all_results)]
-            rerank_request = RerankRequest(query=query, passages=passages)
-
-            # Rerank the results
-            reranked_results = ranker.rerank(rerank_request)
-
-            # Sort results based on the re-ranking score
-            reranked_results = sorted(reranked_results, key=lambda x: x['score'], reverse=True)
-
-            # Log reranked results
-            logging.debug(f"enhanced_rag_pipeline_chat - Reranked results: {reranked_results}")
-
-            # Update all_results based on reranking
-            all_results = [all_results[result['id']] for result in reranked_results]
+            all_results = rerank_results(query, all_results, backend=reranker_backend, model=reranker_model,
+                                         top_n=rerank_top_n)
+            logging.debug(f"enhanced_rag_pipeline_chat - Reranked results: {all_results}")
 
         # Extract context from top results (limit to top 10)
         context = "\n".join([result['content'] for result in all_results[:10]])
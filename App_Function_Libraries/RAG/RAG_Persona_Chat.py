@@ -2,15 +2,21 @@
 # Description: Functions for RAG Persona Chat
 #
 # Imports
+import hashlib
 import logging
-from typing import List, Dict, Any, Tuple
+import time
+from typing import List, Dict, Any, Tuple, Optional
 #
 # External Imports
 #
 # Local Imports
-from App_Function_Libraries.RAG.Embeddings_Create import create_embedding, embedding_provider, embedding_model, \
-    embedding_api_url
-from App_Function_Libraries.RAG.ChromaDB_Library import chroma_client, store_in_chroma
+from App_Function_Libraries.DB.Character_Chat_DB import get_character_chat_by_id
+from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
+from App_Function_Libraries.RAG.Embeddings_Create import create_embedding, create_embeddings_batch, \
+    embedding_provider, embedding_model, embedding_api_url
+from App_Function_Libraries.RAG.ChromaDB_Library import vector_store, batched, get_vector_ingest_settings, \
+    stream_to_vector_store
+from App_Function_Libraries.Utils.Utils import load_comprehensive_config
 #
 #######################################################################################################################
 #
@@ -39,7 +45,7 @@ def perform_vector_search_chat(query: str, relevant_chat_ids: List[int], k: int
         query_embedding = create_embedding(query, embedding_provider, embedding_model, embedding_api_url)
 
         # Get the collection
-        collection = chroma_client.get_collection(name=collection_name)
+        collection = vector_store.get_collection(name=collection_name)
 
         # Perform the vector search
         results = collection.query(
@@ -63,40 +69,90 @@ def perform_vector_search_chat(query: str, relevant_chat_ids: List[int], k: int
         return []
 
 
-def embed_and_store_chat(chat_id: int, chat_history: List[Tuple[str, str]], conversation_name: str):
+CHAT_EMBEDDINGS_COLLECTION = "all_chat_embeddings"
+
+
+def chat_turn_id(chat_id: int, message_index: int) -> str:
+    return f"chat_{chat_id}_msg_{message_index}"
+
+
+def _turn_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def auto_embed_chats_enabled() -> bool:
+    return load_comprehensive_config().getboolean('Embeddings', 'embed_chat_history', fallback=True)
+
+
+def get_indexed_chat_turns(chat_id: int) -> Dict[str, Dict[str, Any]]:
+    """Metadata of the turns of `chat_id` already in the chat collection, keyed by document id."""
+    if CHAT_EMBEDDINGS_COLLECTION not in vector_store.list_collections():
+        return {}
+    collection = vector_store.get_collection(name=CHAT_EMBEDDINGS_COLLECTION)
+    existing = collection.get(where={"chat_id": chat_id}, include=["metadatas"])
+    return dict(zip(existing['ids'], existing['metadatas'] or [{}] * len(existing['ids'])))
+
+
+def embed_and_store_chat(chat_id: int, chat_history: List[Tuple[str, str]], conversation_name: Optional[str] = None):
     """
-    Embed and store chat messages in ChromaDB.
+    Embed and store chat messages in ChromaDB, incrementally.
+
+    Only turns that are new, edited, or were embedded with another model are embedded; they are sent to the
+    embedding client in batches and upserted together. Turns beyond the end of `chat_history` (e.g. after a
+    message was removed) are deleted.
 
     Args:
         chat_id (int): The ID of the chat.
         chat_history (List[Tuple[str, str]]): List of (user_message, bot_response) tuples.
-        conversation_name (str): The name of the conversation.
+        conversation_name (str): The name of the conversation. Looked up from the chat DB when omitted.
+
+    Returns:
+        int: The number of turns embedded.
     """
+    start_time = time.time()
     try:
+        if conversation_name is None:
+            chat = get_character_chat_by_id(chat_id)
+            conversation_name = chat['conversation_name'] if chat else ""
+
+        indexed = get_indexed_chat_turns(chat_id)
+        pending = []
         for idx, (user_msg, bot_msg) in enumerate(chat_history, 1):
             # Combine user and bot messages for context
             combined_content = f"User: {user_msg}\nBot: {bot_msg}"
-
-            # Create embedding
-            embedding = create_embedding(combined_content, embedding_provider, embedding_model, embedding_api_url)
-
-            # Unique identifier for ChromaDB
-            document_id = f"chat_{chat_id}_msg_{idx}"
-
-            # Metadata with chat_id
-            metadata = {"chat_id": chat_id, "message_index": idx, "conversation_name": conversation_name}
-
-            # Store in ChromaDB
-            store_in_chroma(
-                collection_name="all_chat_embeddings",
-                texts=[combined_content],
-                embeddings=[embedding],
-                ids=[document_id],
-                metadatas=[metadata]
-            )
-            logging.debug(f"Stored chat message {idx} of chat ID {chat_id} in ChromaDB.")
+            document_id = chat_turn_id(chat_id, idx)
+            content_hash = _turn_hash(combined_content)
+            stored = indexed.get(document_id) or {}
+            if stored.get("content_hash") == content_hash and stored.get("embedding_model") == embedding_model:
+                continue
+            metadata = {"chat_id": chat_id, "message_index": idx, "conversation_name": conversation_name,
+                        "content_hash": content_hash, "embedding_model": embedding_model}
+            pending.append((document_id, combined_content, metadata))
+
+        current_ids = {chat_turn_id(chat_id, idx) for idx in range(1, len(chat_history) + 1)}
+        stale_ids = [doc_id for doc_id in indexed if doc_id not in current_ids]
+        if stale_ids:
+            vector_store.get_collection(name=CHAT_EMBEDDINGS_COLLECTION).delete(ids=stale_ids)
+
+        if pending:
+            def records():
+                batch_size = get_vector_ingest_settings()['upsert_batch_size']
+                for batch in batched(pending, batch_size):
+                    embeddings = create_embeddings_batch([content for _, content, _ in batch], embedding_provider,
+                                                         embedding_model, embedding_api_url)
+                    for (document_id, content, metadata), embedding in zip(batch, embeddings):
+                        yield document_id, content, embedding, metadata
+
+            stream_to_vector_store(CHAT_EMBEDDINGS_COLLECTION, records())
+
+        log_counter("chat_turns_embedded", value=len(pending))
+        log_histogram("embed_and_store_chat_duration", time.time() - start_time)
+        logging.debug(f"Embedded {len(pending)} of {len(chat_history)} turns of chat ID {chat_id} "
+                      f"({len(stale_ids)} stale turns removed).")
+        return len(pending)
     except Exception as e:
         logging.error(f"Error embedding and storing chat ID {chat_id}: {e}")
+        return 0
 
 #
 # End of RAG_Persona_Chat.py
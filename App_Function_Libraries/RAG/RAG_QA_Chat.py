@@ -5,6 +5,7 @@
 #
 #
 # External Imports
+import asyncio
 import json
 import logging
 import tempfile
@@ -13,7 +14,8 @@ from typing import List, Tuple, IO, Union
 #
 # Local Imports
 from App_Function_Libraries.DB.DB_Manager import db, search_db, DatabaseError, get_media_content
-from App_Function_Libraries.RAG.RAG_Library_2 import generate_answer, enhanced_rag_pipeline
+from App_Function_Libraries.RAG.RAG_Library_2 import generate_answer, enhanced_rag_pipeline, agenerate_answer, \
+    aenhanced_rag_pipeline, astream_generate_answer, astream_enhanced_rag_pipeline
 from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
 #
 ########################################################################################################################
@@ -28,7 +30,7 @@ def rag_qa_chat(query, history, context, api_choice, keywords=None, apply_re_ran
         if isinstance(context, str):
             log_counter("rag_qa_chat_string_context")
             # Use the answer and context directly from enhanced_rag_pipeline
-            result = enhanced_rag_pipeline(query, api_choice, keywords, apply_re_ranking)
+            result = enhanced_rag_pipeline(query, api_choice, keywords, apply_re_ranking=apply_re_ranking)
             answer = result['answer']
         else:
             log_counter("rag_qa_chat_no_context")
@@ -50,6 +52,66 @@ def rag_qa_chat(query, history, context, api_choice, keywords=None, apply_re_ran
         return history + [(query, "An error occurred while processing your request.")], "An error occurred while processing your request."
 
 
+async def arag_qa_chat(query, history, context, api_choice, keywords=None, apply_re_ranking=False):
+    """Async `rag_qa_chat` for the Gradio event loop; LLM calls are awaited rather than run on a worker thread."""
+    log_counter("rag_qa_chat_attempt", labels={"api_choice": api_choice})
+    start_time = time.time()
+
+    try:
+        if isinstance(context, str):
+            log_counter("rag_qa_chat_string_context")
+            result = await aenhanced_rag_pipeline(query, api_choice, keywords, apply_re_ranking=apply_re_ranking)
+            answer = result['answer']
+        else:
+            log_counter("rag_qa_chat_no_context")
+            answer = await agenerate_answer(api_choice, "", query)
+
+        new_history = history + [(query, answer)]
+
+        duration = time.time() - start_time
+        log_histogram("rag_qa_chat_duration", duration, labels={"api_choice": api_choice})
+        log_counter("rag_qa_chat_success", labels={"api_choice": api_choice})
+
+        return new_history, answer
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        log_counter("rag_qa_chat_error", labels={"api_choice": api_choice, "error": str(e)})
+        logging.error(f"Error in arag_qa_chat: {str(e)}")
+        return history + [(query, "An error occurred while processing your request.")], "An error occurred while processing your request."
+
+
+
+
+async def astream_rag_qa_chat(query, history, context, api_choice, keywords=None, top_k=10, apply_re_ranking=True):
+    """
+    Streaming `arag_qa_chat`. Yields (history, answer so far) after every chunk so the UI can render
+    the answer while it is being generated.
+    """
+    log_counter("rag_qa_chat_attempt", labels={"api_choice": api_choice})
+    start_time = time.time()
+    answer = ""
+    try:
+        if isinstance(context, str):
+            log_counter("rag_qa_chat_string_context")
+            stream = astream_enhanced_rag_pipeline(query, api_choice, keywords, top_k, apply_re_ranking)
+        else:
+            log_counter("rag_qa_chat_no_context")
+            stream = astream_generate_answer(api_choice, "", query)
+
+        async for chunk in stream:
+            answer += chunk
+            yield history + [(query, answer)], answer
+
+        duration = time.time() - start_time
+        log_histogram("rag_qa_chat_duration", duration, labels={"api_choice": api_choice})
+        log_counter("rag_qa_chat_success", labels={"api_choice": api_choice})
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        log_counter("rag_qa_chat_error", labels={"api_choice": api_choice, "error": str(e)})
+        logging.error(f"Error in astream_rag_qa_chat: {str(e)}")
+        yield history + [(query, "An error occurred while processing your request.")], "An error occurred while processing your request."
 
 
 def save_chat_history(history: List[Tuple[str, str]]) -> str:
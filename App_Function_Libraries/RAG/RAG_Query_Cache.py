@@ -0,0 +1,144 @@
+# RAG_Query_Cache.py
+# Description: In-memory LRU cache of RAG retrieval results (search + rerank output and the assembled context).
+#
+# Entries are keyed on the normalised query, keywords, top_k and retrieval options plus the current index
+# generation: the media DB generation (bumped by triggers on Media/Keywords/MediaKeywords writes) combined with
+# the vector store write generation. Any ingest, edit or embedding change therefore moves the key, and stale
+# entries are never served; they simply age out of the LRU.
+#
+# Imports
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+#
+# Local Imports
+from App_Function_Libraries.DB.DB_Manager import get_media_index_generation
+from App_Function_Libraries.Metrics.metrics_logger import log_counter
+from App_Function_Libraries.RAG.Vector_Store import get_vector_store_generation
+from App_Function_Libraries.Utils.Utils import load_comprehensive_config
+#
+#######################################################################################################################
+#
+# Functions:
+
+DEFAULT_RAG_QUERY_CACHE_SETTINGS = {
+    'enabled': True,
+    'max_entries': 256,
+    'max_megabytes': 64,
+}
+
+
+def get_rag_query_cache_settings() -> Dict[str, Any]:
+    settings = dict(DEFAULT_RAG_QUERY_CACHE_SETTINGS)
+    try:
+        config = load_comprehensive_config()
+        if config.has_section('RAG-Query-Cache'):
+            settings['enabled'] = config.getboolean('RAG-Query-Cache', 'enabled', fallback=settings['enabled'])
+            for key in ('max_entries', 'max_megabytes'):
+                settings[key] = config.getint('RAG-Query-Cache', key, fallback=settings[key])
+    except (FileNotFoundError, ValueError) as e:
+        logging.warning(f"RAG_Query_Cache: Could not read [RAG-Query-Cache] config, using defaults: {e}")
+    return settings
+
+
+def normalize_query(query: str) -> str:
+    return ' '.join((query or '').lower().split())
+
+
+def normalize_keywords(keywords: Optional[str]) -> Tuple[str, ...]:
+    return tuple(sorted({keyword.strip().lower() for keyword in (keywords or '').split(',') if keyword.strip()}))
+
+
+def current_index_generation() -> Tuple[int, int]:
+    return get_media_index_generation(), get_vector_store_generation()
+
+
+def _estimate_size(value: Any) -> int:
+    """Rough byte size of a cached value: the text it holds dominates."""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_estimate_size(item) for item in value.values()) + 64
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_size(item) for item in value) + 16
+    return 16
+
+
+class RAGQueryCache:
+    """Thread-safe LRU bounded by both entry count and estimated size."""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                log_counter("rag_query_cache_miss")
+                return None
+            self._entries.move_to_end(key)
+        log_counter("rag_query_cache_hit")
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        evicted = 0
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                evicted += 1
+        if evicted:
+            log_counter("rag_query_cache_eviction", value=evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_rag_query_cache: Optional[RAGQueryCache] = None
+_rag_query_cache_lock = threading.Lock()
+
+
+def get_rag_query_cache() -> Optional[RAGQueryCache]:
+    """The shared retrieval cache, or None when disabled in [RAG-Query-Cache]."""
+    global _rag_query_cache
+    settings = get_rag_query_cache_settings()
+    if not settings['enabled']:
+        return None
+    with _rag_query_cache_lock:
+        if _rag_query_cache is None:
+            _rag_query_cache = RAGQueryCache(settings['max_entries'], settings['max_megabytes'] * 1024 * 1024)
+        return _rag_query_cache
+
+
+def rag_query_cache_key(query: str, keywords: Optional[str], top_k: int, options: Iterable[Any] = ()) -> Tuple:
+    return (normalize_query(query), normalize_keywords(keywords), top_k, tuple(options), current_index_generation())
+
+
+def clear_rag_query_cache() -> None:
+    if _rag_query_cache is not None:
+        _rag_query_cache.clear()
+
+#
+# End of RAG_Query_Cache.py
+#######################################################################################################################
@@ -0,0 +1,286 @@
+# RAPTOR_Index.py
+# Description: RAPTOR (Recursive Abstractive Processing for Tree-Organized Retrieval) index for long documents.
+#
+# The chunk embeddings of a document are clustered, each cluster is summarized by an LLM, the summaries are
+# embedded and clustered again, level by level, until a level fits in a single root node. Summary nodes are stored
+# in the same collection as the chunks, carrying the document's media_id plus `raptor_level` / `raptor_children`
+# metadata. Retrieval therefore uses the "collapsed tree": one vector query over chunks and summaries together,
+# whose cost does not depend on the depth of the tree.
+#
+# Node ids are derived from a hash of the node's children, so rebuilding a tree after the document changes only
+# summarizes and embeds the clusters whose contents changed; everything else is reused and stale nodes are deleted.
+#
+# Imports
+import hashlib
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+#
+# External Imports
+import numpy as np
+#
+# Local Imports
+from App_Function_Libraries.DB.LLM_Cache_DB import is_cacheable_response
+from App_Function_Libraries.LLM_Providers.HTTP_Client import get_provider_concurrency
+from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
+from App_Function_Libraries.RAG.Embeddings_Create import create_embeddings_batch
+from App_Function_Libraries.RAG.Vector_Store import VectorCollection
+from App_Function_Libraries.Summarization.Summarization_General_Lib import summarize
+from App_Function_Libraries.Utils.Utils import load_comprehensive_config
+#
+#######################################################################################################################
+#
+# Functions:
+
+DEFAULT_RAPTOR_SETTINGS = {
+    'enabled': False,
+    'min_chunks': 24,
+    'cluster_size': 8,
+    'max_levels': 4,
+    'clustering': 'kmeans',
+    'reduction': 'pca',
+    'reduced_dimensions': 10,
+    'max_summary_input_chars': 12000,
+    'max_retries': 2,
+}
+
+RAPTOR_SUMMARY_PROMPT = ("Write a concise summary of the following passages. Keep names, numbers, dates and key "
+                         "facts, so the summary can be used to answer questions about any of them. Answer only "
+                         "with the summary.")
+
+
+def get_raptor_settings() -> Dict[str, Any]:
+    settings = dict(DEFAULT_RAPTOR_SETTINGS)
+    try:
+        config = load_comprehensive_config()
+        if config.has_section('RAPTOR'):
+            settings['enabled'] = config.getboolean('RAPTOR', 'enabled', fallback=settings['enabled'])
+            for key in ('min_chunks', 'cluster_size', 'max_levels', 'reduced_dimensions', 'max_summary_input_chars',
+                        'max_retries'):
+                settings[key] = config.getint('RAPTOR', key, fallback=settings[key])
+            for key in ('clustering', 'reduction'):
+                settings[key] = config.get('RAPTOR', key, fallback=settings[key]).strip().lower()
+    except (FileNotFoundError, ValueError) as e:
+        logging.warning(f"RAPTOR_Index: Could not read [RAPTOR] config, using defaults: {e}")
+    settings['cluster_size'] = max(settings['cluster_size'], 2)
+    return settings
+
+
+def reduce_dimensions(points: np.ndarray, method: str = 'pca', dimensions: int = 10, seed: int = 0) -> np.ndarray:
+    """Project points to a few dimensions before clustering ('pca', 'umap' if umap-learn is installed, or 'none')."""
+    if method == 'none' or dimensions <= 0 or points.shape[1] <= dimensions or len(points) <= dimensions + 1:
+        return points
+    if method == 'umap':
+        try:
+            import umap
+            neighbours = max(2, min(15, len(points) - 1))
+            return umap.UMAP(n_components=dimensions, n_neighbors=neighbours, metric='cosine',
+                             random_state=seed).fit_transform(points)
+        except ImportError:
+            logging.warning("RAPTOR_Index: umap-learn is not installed; falling back to PCA")
+    centered = points - points.mean(axis=0)
+    _, _, components = np.linalg.svd(centered, full_matrices=False)
+    return centered @ components[:dimensions].T
+
+
+def kmeans(points: np.ndarray, k: int, seed: int = 0, iterations: int = 50) -> np.ndarray:
+    """Vectorized k-means with k-means++ seeding; returns a cluster label per point."""
+    rng = np.random.default_rng(seed)
+    squared_norms = np.einsum('ij,ij->i', points, points)
+    centroids = [points[rng.integers(len(points))]]
+    closest = np.full(len(points), np.inf)
+    for _ in range(1, k):
+        closest = np.minimum(closest, squared_norms - 2 * points @ centroids[-1] + centroids[-1] @ centroids[-1])
+        weights = np.clip(closest, 0, None)
+        total = weights.sum()
+        centroids.append(points[rng.choice(len(points), p=weights / total)] if total > 0
+                         else points[rng.integers(len(points))])
+    centroids = np.array(centroids)
+
+    labels = np.zeros(len(points), dtype=np.int64)
+    for iteration in range(iterations):
+        distances = squared_norms[:, None] - 2 * points @ centroids.T + np.einsum('ij,ij->i', centroids, centroids)
+        new_labels = distances.argmin(axis=1)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, points)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():
+            # Re-seed empty clusters with the points farthest from their centroid
+            farthest = np.argsort(-distances[np.arange(len(points)), labels])[:int(empty.sum())]
+            centroids[empty] = points[farthest]
+    return labels
+
+
+def cluster_embeddings(embeddings: np.ndarray, cluster_size: int = 8, method: str = 'kmeans',
+                       reduction: str = 'pca', reduced_dimensions: int = 10, seed: int = 0) -> List[List[int]]:
+    """
+    Group row indices of `embeddings` into clusters of roughly `cluster_size` members. Clusters are returned in
+    document order (by their first member) and oversized clusters are split again, so every summary input stays
+    bounded. 'gmm' clustering needs scikit-learn and falls back to k-means without it.
+    """
+    count = len(embeddings)
+    if count <= cluster_size:
+        return [list(range(count))]
+    points = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    points = reduce_dimensions(points, reduction, reduced_dimensions, seed)
+    k = math.ceil(count / cluster_size)
+
+    labels = None
+    if method == 'gmm':
+        try:
+            from sklearn.mixture import GaussianMixture
+            labels = GaussianMixture(n_components=k, covariance_type='diag', random_state=seed).fit_predict(points)
+        except ImportError:
+            logging.warning("RAPTOR_Index: scikit-learn is not installed; falling back to k-means")
+    if labels is None:
+        labels = kmeans(points, k, seed)
+
+    clusters: List[List[int]] = []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label).tolist()
+        if len(members) > 2 * cluster_size and len(members) < count:
+            clusters.extend([[members[i] for i in sub] for sub in
+                             cluster_embeddings(embeddings[members], cluster_size, method, reduction,
+                                                reduced_dimensions, seed)])
+        elif len(members) > 2 * cluster_size:
+            # Clustering made no progress (e.g. identical embeddings): split in document order
+            clusters.extend(members[i:i + cluster_size] for i in range(0, len(members), cluster_size))
+        else:
+            clusters.append(members)
+    return sorted(clusters, key=min)
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def raptor_node_id(media_id, level: int, node_hash: str) -> str:
+    return f"{media_id}_raptor_L{level}_{node_hash[:16]}"
+
+
+def summarize_clusters(api_name: str, inputs: Sequence[str], max_retries: int = 2,
+                       max_workers: int = None) -> List[str]:
+    """Summarize cluster texts concurrently (bounded by the provider's [Async-LLM] concurrency)."""
+    def summarize_one(text):
+        for attempt in range(max_retries + 1):
+            try:
+                summary = summarize(text, RAPTOR_SUMMARY_PROMPT, api_name, api_key=None, temp=0, system_message=None)
+            except Exception as e:
+                summary = f"Error: {str(e)}"
+            if is_cacheable_response(summary):
+                return summary.strip()
+            logging.warning(f"RAPTOR_Index: Summarizing cluster failed (attempt {attempt + 1}): {str(summary)[:200]}")
+            if attempt < max_retries:
+                time.sleep(min(2 ** attempt, 30))
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers or get_provider_concurrency(api_name)) as executor:
+        summaries = list(executor.map(summarize_one, inputs))
+    failed = sum(summary is None for summary in summaries)
+    if failed:
+        log_counter("raptor_summaries_failed", labels={"api_name": api_name}, value=failed)
+        raise RuntimeError(f"Failed to summarize {failed} of {len(inputs)} RAPTOR clusters")
+    return summaries
+
+
+def build_raptor_tree(collection: VectorCollection, media_id, api_name: str, embedding_provider: str = None,
+                      embedding_model: str = None, embedding_api_url: str = None,
+                      settings: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Build or incrementally update the RAPTOR tree over the chunks of `media_id` stored in `collection`.
+
+    Documents with fewer than `min_chunks` chunks get no tree (any existing one is removed). Returns the number of
+    summary nodes in the tree. Nothing is written unless every level was built, so a failed run leaves the
+    previous tree in place.
+    """
+    settings = settings or get_raptor_settings()
+    config = load_comprehensive_config()
+    embedding_provider = embedding_provider or config.get('Embeddings', 'embedding_provider', fallback='openai')
+    embedding_model = embedding_model or config.get('Embeddings', 'embedding_model',
+                                                    fallback='text-embedding-3-small')
+    embedding_api_url = embedding_api_url or config.get('Embeddings', 'embedding_api_url', fallback='')
+    start_time = time.time()
+
+    stored = collection.get(where={"media_id": str(media_id)}, include=["documents", "embeddings", "metadatas"])
+    leaves, existing_nodes = [], {}
+    for doc_id, document, embedding, metadata in zip(stored['ids'], stored['documents'], stored['embeddings'],
+                                                     stored['metadatas']):
+        metadata = metadata or {}
+        if metadata.get('raptor_level'):
+            existing_nodes[doc_id] = (document, embedding)
+        else:
+            text = metadata.get('original_text') or document
+            leaves.append({'id': doc_id, 'text': text, 'embedding': embedding, 'hash': _text_hash(document),
+                           'order': metadata.get('chunk_index', 0), 'file_name': metadata.get('file_name', '')})
+    leaves.sort(key=lambda leaf: leaf['order'])
+
+    nodes: List[Dict[str, Any]] = []
+    if len(leaves) >= settings['min_chunks']:
+        current = leaves
+        level = 0
+        while len(current) > 1 and level < settings['max_levels']:
+            level += 1
+            clusters = cluster_embeddings(np.asarray([item['embedding'] for item in current], dtype=np.float32),
+                                          settings['cluster_size'], settings['clustering'], settings['reduction'],
+                                          settings['reduced_dimensions'])
+            level_nodes = []
+            for members in clusters:
+                children = [current[i] for i in members]
+                node_hash = _text_hash(f"{level}\x00" + "\x00".join(child['hash'] for child in children))
+                node_id = raptor_node_id(media_id, level, node_hash)
+                document, embedding = existing_nodes.get(node_id, (None, None))
+                level_nodes.append({'id': node_id, 'hash': node_hash, 'text': document, 'embedding': embedding,
+                                    'children': children, 'level': level})
+
+            pending = [node for node in level_nodes if node['text'] is None or node['embedding'] is None]
+            if pending:
+                inputs = ["\n\n".join(child['text'] for child in node['children'])
+                          [:settings['max_summary_input_chars']] for node in pending]
+                summaries = summarize_clusters(api_name, inputs, settings['max_retries'])
+                embeddings = create_embeddings_batch(summaries, embedding_provider, embedding_model,
+                                                     embedding_api_url)
+                for node, summary, embedding in zip(pending, summaries, embeddings):
+                    node['text'], node['embedding'] = summary, embedding
+            log_counter("raptor_nodes_summarized", labels={"api_name": api_name}, value=len(pending))
+            log_counter("raptor_nodes_reused", labels={"api_name": api_name}, value=len(level_nodes) - len(pending))
+            nodes.extend(level_nodes)
+            current = level_nodes
+
+    if nodes:
+        file_name = leaves[0]['file_name']
+        top_level = nodes[-1]['level']
+        collection.upsert(
+            ids=[node['id'] for node in nodes],
+            documents=[node['text'] for node in nodes],
+            embeddings=[node['embedding'].tolist() if isinstance(node['embedding'], np.ndarray)
+                        else list(node['embedding']) for node in nodes],
+            metadatas=[{
+                "media_id": str(media_id),
+                "raptor_level": node['level'],
+                "raptor_children": ",".join(child['id'] for child in node['children']),
+                "raptor_root": node['level'] == top_level,
+                "file_name": file_name,
+                "original_text": node['text'],
+                "embedding_provider": embedding_provider,
+                "embedding_model": embedding_model,
+            } for node in nodes]
+        )
+    stale_ids = sorted(set(existing_nodes) - {node['id'] for node in nodes})
+    if stale_ids:
+        collection.delete(ids=stale_ids)
+
+    log_histogram("raptor_build_duration", time.time() - start_time, labels={"api_name": api_name})
+    logging.info(f"RAPTOR tree for media_id {media_id}: {len(nodes)} summary nodes over {len(leaves)} chunks, "
+                 f"{len(stale_ids)} stale nodes removed")
+    return len(nodes)
+
+#
+# End of RAPTOR_Index.py
+#######################################################################################################################
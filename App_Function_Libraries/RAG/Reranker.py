@@ -0,0 +1,191 @@
+# Reranker.py
+# Description: Resident cross-encoder reranking for the RAG pipelines, with a (query, passage) -> score cache.
+#
+# The reranker model is loaded once per (backend, model) and kept in memory, candidates are truncated to a
+# configurable top-N and scored in batches, and scores are cached so repeated queries over the same passages
+# (query rewriting, regenerate, paging) skip the model entirely.
+#
+# Backends: 'flashrank' (FlashRank ONNX rankers), 'cross-encoder' (sentence-transformers CrossEncoder) or 'none'.
+#
+# Imports
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+#
+# Local Imports
+from App_Function_Libraries.Metrics.metrics_logger import log_counter, log_histogram
+from App_Function_Libraries.Utils.Utils import load_comprehensive_config
+#
+#######################################################################################################################
+#
+# Functions:
+
+DEFAULT_RERANKER_SETTINGS = {
+    'backend': 'flashrank',
+    'flashrank_model': 'ms-marco-TinyBERT-L-2-v2',
+    'cross_encoder_model': 'cross-encoder/ms-marco-MiniLM-L-6-v2',
+    'model_dir': None,
+    'top_n': 50,
+    'batch_size': 32,
+    'max_passage_chars': 2000,
+    'score_cache_size': 20000,
+}
+
+RERANKER_BACKENDS = ('flashrank', 'cross-encoder', 'none')
+
+
+def get_reranker_settings() -> Dict[str, Any]:
+    settings = dict(DEFAULT_RERANKER_SETTINGS)
+    try:
+        config = load_comprehensive_config()
+        if config.has_section('Reranker'):
+            for key in ('backend', 'flashrank_model', 'cross_encoder_model', 'model_dir'):
+                settings[key] = config.get('Reranker', key, fallback=settings[key]) or settings[key]
+            for key in ('top_n', 'batch_size', 'max_passage_chars', 'score_cache_size'):
+                settings[key] = config.getint('Reranker', key, fallback=settings[key])
+    except (FileNotFoundError, ValueError) as e:
+        logging.warning(f"Reranker: Could not read [Reranker] config, using defaults: {e}")
+    settings['backend'] = settings['backend'].lower()
+    return settings
+
+
+class FlashRankReranker:
+    def __init__(self, model_name: str, cache_dir: Optional[str] = None):
+        from flashrank import Ranker
+        kwargs = {'model_name': model_name}
+        if cache_dir:
+            kwargs['cache_dir'] = cache_dir
+        self.model_name = model_name
+        self.ranker = Ranker(**kwargs)
+
+    def score(self, query: str, passages: List[str]) -> List[float]:
+        from flashrank import RerankRequest
+        request = RerankRequest(query=query, passages=[{"id": i, "text": text} for i, text in enumerate(passages)])
+        scores = [0.0] * len(passages)
+        for item in self.ranker.rerank(request):
+            scores[item['id']] = float(item['score'])
+        return scores
+
+
+class CrossEncoderReranker:
+    def __init__(self, model_name: str, cache_dir: Optional[str] = None):
+        from sentence_transformers import CrossEncoder
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, cache_folder=cache_dir) if cache_dir else CrossEncoder(model_name)
+
+    def score(self, query: str, passages: List[str]) -> List[float]:
+        return [float(score) for score in self.model.predict([(query, text) for text in passages])]
+
+
+_reranker_classes = {
+    'flashrank': FlashRankReranker,
+    'cross-encoder': CrossEncoderReranker,
+}
+
+# Loaded models, keyed on (backend, model name)
+_rerankers: Dict[Tuple[str, str], Any] = {}
+_rerankers_lock = threading.Lock()
+
+# LRU of (backend, model, query hash, passage hash) -> score
+_score_cache: "OrderedDict[Tuple[str, str, str, str], float]" = OrderedDict()
+_score_cache_lock = threading.Lock()
+
+
+def get_reranker(backend: str, model_name: str, cache_dir: Optional[str] = None):
+    key = (backend, model_name)
+    reranker = _rerankers.get(key)
+    if reranker is not None:
+        return reranker
+    with _rerankers_lock:
+        reranker = _rerankers.get(key)
+        if reranker is None:
+            log_counter("reranker_model_load_attempt", labels={"backend": backend, "model": model_name})
+            start_time = time.time()
+            reranker = _reranker_classes[backend](model_name, cache_dir)
+            _rerankers[key] = reranker
+            log_histogram("reranker_model_load_duration", time.time() - start_time,
+                          labels={"backend": backend, "model": model_name})
+    return reranker
+
+
+def unload_rerankers() -> None:
+    with _rerankers_lock:
+        _rerankers.clear()
+
+
+def clear_rerank_score_cache() -> None:
+    with _score_cache_lock:
+        _score_cache.clear()
+
+
+def _hash_text(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def score_passages(query: str, passages: List[str], backend: Optional[str] = None, model: Optional[str] = None,
+                   settings: Optional[Dict[str, Any]] = None) -> List[float]:
+    """Score (query, passage) pairs, serving repeats from the score cache and batching the rest."""
+    settings = settings or get_reranker_settings()
+    backend = (backend or settings['backend']).lower()
+    model = model or settings['flashrank_model' if backend == 'flashrank' else 'cross_encoder_model']
+    passages = [text[:settings['max_passage_chars']] for text in passages]
+
+    query_hash = _hash_text(query)
+    keys = [(backend, model, query_hash, _hash_text(text)) for text in passages]
+    scores: List[Optional[float]] = [None] * len(passages)
+    with _score_cache_lock:
+        for i, key in enumerate(keys):
+            if key in _score_cache:
+                _score_cache.move_to_end(key)
+                scores[i] = _score_cache[key]
+    missing = [i for i, score in enumerate(scores) if score is None]
+    log_counter("reranker_score_cache_hit", labels={"backend": backend}, value=len(passages) - len(missing))
+
+    if missing:
+        reranker = get_reranker(backend, model, settings['model_dir'])
+        batch_size = max(settings['batch_size'], 1)
+        start_time = time.time()
+        for batch_start in range(0, len(missing), batch_size):
+            batch = missing[batch_start:batch_start + batch_size]
+            for i, score in zip(batch, reranker.score(query, [passages[i] for i in batch])):
+                scores[i] = score
+        log_histogram("reranker_score_duration", time.time() - start_time,
+                      labels={"backend": backend, "model": model})
+        with _score_cache_lock:
+            for i in missing:
+                _score_cache[keys[i]] = scores[i]
+            while len(_score_cache) > settings['score_cache_size']:
+                _score_cache.popitem(last=False)
+    return scores
+
+
+def rerank_results(query: str, results: List[Dict[str, Any]], backend: Optional[str] = None,
+                   model: Optional[str] = None, top_n: Optional[int] = None,
+                   text_key: str = 'content') -> List[Dict[str, Any]]:
+    """
+    Reorder search results by reranker score. Only the first `top_n` candidates are scored; any beyond that keep
+    their original order after the reranked ones. With backend 'none' the results are returned unchanged.
+    """
+    settings = get_reranker_settings()
+    backend = (backend or settings['backend']).lower()
+    if backend == 'none' or not results:
+        return results
+    if backend not in _reranker_classes:
+        raise ValueError(f"Unsupported reranker backend: {backend}. Choose one of {', '.join(RERANKER_BACKENDS)}")
+    top_n = top_n or settings['top_n']
+    candidates, overflow = results[:top_n], results[top_n:]
+
+    log_counter("reranker_attempt", labels={"backend": backend})
+    start_time = time.time()
+    scores = score_passages(query, [str(result[text_key]) for result in candidates], backend, model, settings)
+    ranked = [result for _, result in sorted(zip(scores, candidates), key=lambda pair: pair[0], reverse=True)]
+    log_histogram("reranker_duration", time.time() - start_time, labels={"backend": backend})
+    log_counter("reranker_success", labels={"backend": backend})
+    return ranked + overflow
+
+#
+# End of Reranker.py
+#######################################################################################################################
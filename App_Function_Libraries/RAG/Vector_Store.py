@@ -0,0 +1,757 @@
+# Vector_Store.py
+# Description: Backend-neutral vector store interface used by the RAG modules, with a ChromaDB backend and a
+# built-in local backend.
+#
+# Collections expose the Chroma-style surface the rest of the code already uses (add/upsert/delete/get/query/count
+# with `where` metadata filters), so swapping backends is a config change ([Vector-Store] in config.txt):
+#
+# - 'chroma': a thin adapter over chromadb.PersistentClient.
+# - 'local':  float32 (or int8-quantized) embeddings in a memory-mapped matrix, with ids/documents/metadata in a
+#             sidecar SQLite table. Queries are exact vectorized scans ('flat'), or go through an HNSW graph
+#             ('hnsw', needs the optional `hnswlib` package) that is persisted next to the matrix.
+#
+# Imports
+import atexit
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+#
+# External Imports
+import numpy as np
+#
+# Local Imports
+from App_Function_Libraries.Metrics.metrics_logger import log_counter
+from App_Function_Libraries.Utils.Lazy_Loading import LazyObject
+from App_Function_Libraries.Utils.Utils import load_comprehensive_config, get_project_relative_path, \
+    get_database_path
+#
+#######################################################################################################################
+#
+# Functions:
+
+DEFAULT_VECTOR_STORE_SETTINGS = {
+    'backend': 'chroma',
+    'chroma_db_path': None,
+    'local_path': None,
+    'index_type': 'flat',
+    'quantization': 'none',
+    'hnsw_m': 16,
+    'hnsw_ef_construction': 200,
+    'hnsw_ef_search': 64,
+}
+
+VECTOR_STORE_BACKENDS = ('chroma', 'local')
+
+DEFAULT_INCLUDE = ("documents", "metadatas")
+
+# Bumped by every write through any backend in this process; lets result caches detect that vectors changed
+_write_generation = 0
+_write_generation_lock = threading.Lock()
+
+
+def note_vector_store_write() -> None:
+    global _write_generation
+    with _write_generation_lock:
+        _write_generation += 1
+
+
+def get_vector_store_generation() -> int:
+    return _write_generation
+
+
+def get_vector_store_settings() -> Dict[str, Any]:
+    settings = dict(DEFAULT_VECTOR_STORE_SETTINGS)
+    try:
+        config = load_comprehensive_config()
+        settings['chroma_db_path'] = config.get('Database', 'chroma_db_path', fallback=None)
+        if config.has_section('Vector-Store'):
+            for key in ('backend', 'local_path', 'index_type', 'quantization'):
+                settings[key] = config.get('Vector-Store', key, fallback=settings[key]) or settings[key]
+            for key in ('hnsw_m', 'hnsw_ef_construction', 'hnsw_ef_search'):
+                settings[key] = config.getint('Vector-Store', key, fallback=settings[key])
+    except (FileNotFoundError, ValueError) as e:
+        logging.warning(f"Vector_Store: Could not read [Vector-Store] config, using defaults: {e}")
+    settings['backend'] = settings['backend'].lower()
+    settings['chroma_db_path'] = settings['chroma_db_path'] or get_database_path('chroma_db')
+    settings['local_path'] = get_project_relative_path(settings['local_path']) if settings['local_path'] \
+        else get_database_path('vector_store')
+    return settings
+
+
+def matches_where(metadata: Optional[Dict[str, Any]], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma-style metadata filter ($and/$or, $eq/$ne/$gt/$gte/$lt/$lte/$in/$nin) in Python."""
+    if not where:
+        return True
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == '$and':
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+            continue
+        if key == '$or':
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+            continue
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        for operator, operand in condition.items():
+            if operator == '$eq':
+                ok = value == operand
+            elif operator == '$ne':
+                ok = value != operand
+            elif operator == '$in':
+                ok = value in operand
+            elif operator == '$nin':
+                ok = value not in operand
+            elif operator in ('$gt', '$gte', '$lt', '$lte'):
+                if value is None:
+                    return False
+                ok = {'$gt': value > operand, '$gte': value >= operand,
+                      '$lt': value < operand, '$lte': value <= operand}[operator]
+            else:
+                raise ValueError(f"Unsupported where operator: {operator}")
+            if not ok:
+                return False
+    return True
+
+
+class VectorCollection(ABC):
+    """A named set of (id, embedding, document, metadata) records. Results use Chroma's dict layout."""
+    name: str
+
+    @abstractmethod
+    def add(self, ids: List[str], embeddings: Any, documents: Optional[List[str]] = None,
+            metadatas: Optional[List[Dict[str, Any]]] = None) -> None:
+        ...
+
+    @abstractmethod
+    def upsert(self, ids: List[str], embeddings: Any, documents: Optional[List[str]] = None,
+               metadatas: Optional[List[Dict[str, Any]]] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None, offset: Optional[int] = None,
+            include: Sequence[str] = DEFAULT_INCLUDE) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def query(self, query_embeddings: Any, n_results: int = 10, where: Optional[Dict[str, Any]] = None,
+              include: Sequence[str] = DEFAULT_INCLUDE) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @property
+    @abstractmethod
+    def metadata(self) -> Dict[str, Any]:
+        """Collection-level metadata, e.g. the embedding dimension recorded at creation."""
+
+    @abstractmethod
+    def modify(self, metadata: Dict[str, Any]) -> None:
+        """Merge `metadata` into the collection-level metadata."""
+
+
+class VectorStore(ABC):
+    @abstractmethod
+    def list_collections(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def get_collection(self, name: str) -> VectorCollection:
+        """Return an existing collection; raises ValueError if it does not exist."""
+
+    @abstractmethod
+    def create_collection(self, name: str) -> VectorCollection:
+        ...
+
+    @abstractmethod
+    def get_or_create_collection(self, name: str) -> VectorCollection:
+        ...
+
+    @abstractmethod
+    def delete_collection(self, name: str) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+#######################################################################################################################
+#
+# ChromaDB backend
+
+class ChromaVectorCollection(VectorCollection):
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        self._collection.add(ids=ids, embeddings=_as_list(embeddings), documents=documents, metadatas=metadatas)
+        note_vector_store_write()
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        self._collection.upsert(ids=ids, embeddings=_as_list(embeddings), documents=documents, metadatas=metadatas)
+        note_vector_store_write()
+
+    def delete(self, ids=None, where=None):
+        self._collection.delete(ids=ids, where=where)
+        note_vector_store_write()
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=DEFAULT_INCLUDE):
+        return self._collection.get(ids=ids, where=where, limit=limit, offset=offset, include=list(include))
+
+    def query(self, query_embeddings, n_results=10, where=None, include=DEFAULT_INCLUDE):
+        kwargs = {"where": where} if where else {}
+        include = list(include) + ([] if "distances" in include else ["distances"])
+        return self._collection.query(query_embeddings=_as_list(query_embeddings), n_results=n_results,
+                                      include=include, **kwargs)
+
+    def count(self):
+        return self._collection.count()
+
+    @property
+    def metadata(self):
+        return dict(self._collection.metadata or {})
+
+    def modify(self, metadata):
+        # Chroma rejects changes to the hnsw:* index settings, so only pass the other keys back
+        merged = {key: value for key, value in self.metadata.items() if not key.startswith('hnsw:')}
+        merged.update(metadata)
+        self._collection.modify(metadata=merged)
+
+
+class ChromaVectorStore(VectorStore):
+    def __init__(self, path: str):
+        import chromadb
+        from chromadb import Settings
+        os.makedirs(path, exist_ok=True)
+        self.client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+
+    def list_collections(self):
+        # chromadb < 0.6 returns Collection objects, later versions return names
+        return [getattr(collection, 'name', collection) for collection in self.client.list_collections()]
+
+    def get_collection(self, name):
+        try:
+            return ChromaVectorCollection(self.client.get_collection(name=name))
+        except Exception as e:
+            raise ValueError(f"Collection {name} does not exist: {e}")
+
+    def create_collection(self, name):
+        return ChromaVectorCollection(self.client.create_collection(name=name))
+
+    def get_or_create_collection(self, name):
+        return ChromaVectorCollection(self.client.get_or_create_collection(name=name))
+
+    def delete_collection(self, name):
+        self.client.delete_collection(name=name)
+        note_vector_store_write()
+
+    def close(self):
+        # Stops the client's system, which closes its SQLite database and segment files
+        self.client.clear_system_cache()
+
+
+def _as_list(embeddings: Any) -> Any:
+    return embeddings.tolist() if isinstance(embeddings, np.ndarray) else embeddings
+
+
+#######################################################################################################################
+#
+# Local backend
+
+_COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
+_INITIAL_CAPACITY = 1024
+_SCAN_BLOCK_ROWS = 65536
+
+LOCAL_SCHEMA_SQL = '''
+CREATE TABLE IF NOT EXISTS vectors (
+    row INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    document TEXT,
+    metadata TEXT
+);
+
+CREATE TABLE IF NOT EXISTS collection_info (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+'''
+
+
+class LocalVectorCollection(VectorCollection):
+    """
+    Embeddings are L2-normalised and stored row-wise in `vectors.f32` (or `vectors.i8` + `scales.f32` with int8
+    quantization); distances are cosine distances. Row numbers are stable ids shared by the matrix, the SQLite
+    sidecar and the HNSW graph, and rows freed by deletes are reused.
+    """
+
+    def __init__(self, path: str, name: str, index_type: str = 'flat', quantization: str = 'none',
+                 hnsw_m: int = 16, hnsw_ef_construction: int = 200, hnsw_ef_search: int = 64):
+        self.path = path
+        self.name = name
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(path, 'meta.db'), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(LOCAL_SCHEMA_SQL)
+        info = dict(self._conn.execute('SELECT key, value FROM collection_info').fetchall())
+        # The storage format is fixed when the collection is created
+        self.quantization = info.get('quantization', quantization)
+        self.dim: Optional[int] = int(info['dim']) if 'dim' in info else None
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+        if 'quantization' not in info:
+            self._set_info('quantization', self.quantization)
+        if self.quantization not in ('none', 'int8'):
+            raise ValueError(f"Unsupported quantization: {self.quantization}")
+
+        self._capacity = int(info.get('capacity', 0))
+        self._matrix: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._hnsw = None
+        self._hnsw_dirty = False
+        self._load_rows()
+        if self.dim is not None:
+            self._open_matrix()
+            if self.index_type == 'hnsw':
+                self._open_hnsw()
+
+    # Storage ----------------------------------------------------------------------------------------------------
+
+    def _set_info(self, key: str, value: Any) -> None:
+        self._conn.execute('INSERT OR REPLACE INTO collection_info (key, value) VALUES (?, ?)', (key, str(value)))
+        self._conn.commit()
+
+    def _load_rows(self) -> None:
+        self._row_of: Dict[str, int] = {}
+        self._metadata: Dict[int, Dict[str, Any]] = {}
+        for row, doc_id, metadata in self._conn.execute('SELECT row, id, metadata FROM vectors'):
+            self._row_of[doc_id] = row
+            self._metadata[row] = json.loads(metadata) if metadata else {}
+        self._next_row = max(self._metadata, default=-1) + 1
+        self._free_rows = sorted(set(range(self._next_row)) - set(self._metadata), reverse=True)
+        self._live = np.zeros(max(self._capacity, 1), dtype=bool)
+        if self._metadata:
+            self._live[list(self._metadata)] = True
+
+    def _matrix_files(self):
+        suffix = 'i8' if self.quantization == 'int8' else 'f32'
+        return os.path.join(self.path, f'vectors.{suffix}'), os.path.join(self.path, 'scales.f32')
+
+    def _open_matrix(self) -> None:
+        matrix_path, scales_path = self._matrix_files()
+        dtype = np.int8 if self.quantization == 'int8' else np.float32
+        files = [(matrix_path, self.dim, dtype)]
+        if self.quantization == 'int8':
+            files.append((scales_path, 1, np.float32))
+        # Grow the backing files in place; truncate() extends with zeros without rewriting existing rows
+        for path, width, item_dtype in files:
+            expected = self._capacity * width * np.dtype(item_dtype).itemsize
+            with open(path, 'ab') as f:
+                if f.tell() < expected:
+                    f.truncate(expected)
+        self._matrix = np.memmap(matrix_path, dtype=dtype, mode='r+', shape=(self._capacity, self.dim))
+        if self.quantization == 'int8':
+            self._scales = np.memmap(scales_path, dtype=np.float32, mode='r+', shape=(self._capacity,))
+
+    def _ensure_capacity(self, rows_needed: int) -> None:
+        if rows_needed <= self._capacity:
+            return
+        capacity = max(self._capacity, _INITIAL_CAPACITY)
+        while capacity < rows_needed:
+            capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        if self._scales is not None:
+            self._scales.flush()
+            self._scales = None
+        self._capacity = capacity
+        self._set_info('capacity', capacity)
+        self._open_matrix()
+        live = np.zeros(capacity, dtype=bool)
+        live[:len(self._live)] = self._live
+        self._live = live
+        if self._hnsw is not None and self._hnsw.get_max_elements() < capacity:
+            self._hnsw.resize_index(capacity)
+
+    def _write_vectors(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        if self.quantization == 'int8':
+            scales = np.abs(vectors).max(axis=1)
+            scales[scales == 0] = 1.0
+            self._matrix[rows] = np.round(vectors / scales[:, None] * 127).astype(np.int8)
+            self._scales[rows] = scales
+        else:
+            self._matrix[rows] = vectors
+
+    def _read_vectors(self, rows: np.ndarray) -> np.ndarray:
+        if self.quantization == 'int8':
+            return self._matrix[rows].astype(np.float32) * (self._scales[rows] / 127)[:, None]
+        return np.asarray(self._matrix[rows], dtype=np.float32)
+
+    # HNSW -------------------------------------------------------------------------------------------------------
+
+    def _hnsw_path(self) -> str:
+        return os.path.join(self.path, 'hnsw.bin')
+
+    def _open_hnsw(self) -> None:
+        try:
+            import hnswlib
+        except ImportError:
+            logging.warning("Vector_Store: hnswlib is not installed; falling back to flat search")
+            self.index_type = 'flat'
+            return
+        info = dict(self._conn.execute('SELECT key, value FROM collection_info').fetchall())
+        index = hnswlib.Index(space='cosine', dim=self.dim)
+        if os.path.exists(self._hnsw_path()) and info.get('hnsw_saved_generation') == info.get('generation', '0'):
+            index.load_index(self._hnsw_path(), max_elements=max(self._capacity, 1))
+        else:
+            # Missing or stale (e.g. the process died before it was saved): rebuild from the matrix
+            index.init_index(max_elements=max(self._capacity, 1), ef_construction=self.hnsw_ef_construction,
+                             M=self.hnsw_m)
+            rows = np.array(sorted(self._metadata), dtype=np.int64)
+            if len(rows):
+                index.add_items(self._read_vectors(rows), rows)
+            self._hnsw_dirty = True
+            log_counter("vector_store_hnsw_rebuild", labels={"collection": self.name})
+        self._hnsw = index
+
+    def _bump_generation(self) -> None:
+        generation = int(dict(self._conn.execute(
+            "SELECT key, value FROM collection_info WHERE key = 'generation'").fetchall()).get('generation', 0))
+        self._set_info('generation', generation + 1)
+        self._hnsw_dirty = self._hnsw is not None
+        note_vector_store_write()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+            if self._scales is not None:
+                self._scales.flush()
+            if self._hnsw is not None and self._hnsw_dirty:
+                self._hnsw.save_index(self._hnsw_path())
+                generation = dict(self._conn.execute('SELECT key, value FROM collection_info').fetchall()).get(
+                    'generation', '0')
+                self._set_info('hnsw_saved_generation', generation)
+                self._hnsw_dirty = False
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._matrix = None
+            self._scales = None
+            self._hnsw = None
+            self._conn.close()
+
+    # Writes -----------------------------------------------------------------------------------------------------
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        with self._lock:
+            existing = [doc_id for doc_id in ids if doc_id in self._row_of]
+            if existing:
+                raise ValueError(f"IDs already exist in collection {self.name}: {existing[:5]}")
+            self.upsert(ids, embeddings, documents, metadatas)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("Expected one embedding per id")
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate ids in upsert")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._set_info('dim', self.dim)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match collection dimension "
+                                 f"{self.dim}")
+            rows = []
+            for doc_id in ids:
+                row = self._row_of.get(doc_id)
+                if row is None:
+                    if self._free_rows:
+                        row = self._free_rows.pop()
+                    else:
+                        row = self._next_row
+                        self._next_row += 1
+                rows.append(row)
+            rows = np.array(rows, dtype=np.int64)
+            self._ensure_capacity(int(rows.max()) + 1)
+            if self.index_type == 'hnsw' and self._hnsw is None:
+                self._open_hnsw()
+
+            self._write_vectors(rows, vectors)
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO vectors (row, id, document, metadata) VALUES (?, ?, ?, ?)',
+                [(int(row), doc_id, document, json.dumps(metadata) if metadata else None)
+                 for row, doc_id, document, metadata in zip(rows, ids, documents, metadatas)])
+            self._conn.commit()
+            for row, doc_id, metadata in zip(rows, ids, metadatas):
+                self._row_of[doc_id] = int(row)
+                self._metadata[int(row)] = metadata or {}
+            self._live[rows] = True
+            if self._hnsw is not None:
+                self._hnsw.add_items(vectors, rows)
+            self._bump_generation()
+        log_counter("vector_store_upsert", labels={"backend": "local"}, value=len(ids))
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            if ids is None and where is None:
+                return
+            candidates = ids if ids is not None else list(self._row_of)
+            rows = [self._row_of[doc_id] for doc_id in candidates if doc_id in self._row_of
+                    and matches_where(self._metadata[self._row_of[doc_id]], where)]
+            if not rows:
+                return
+            self._conn.executemany('DELETE FROM vectors WHERE row = ?', [(row,) for row in rows])
+            self._conn.commit()
+            for row in rows:
+                if self._hnsw is not None:
+                    self._hnsw.mark_deleted(row)
+                del self._metadata[row]
+            self._row_of = {doc_id: row for doc_id, row in self._row_of.items() if row in self._metadata}
+            self._live[rows] = False
+            self._free_rows = sorted(set(self._free_rows) | set(rows), reverse=True)
+            self._bump_generation()
+
+    # Reads ------------------------------------------------------------------------------------------------------
+
+    def count(self):
+        return len(self._row_of)
+
+    @property
+    def metadata(self):
+        row = self._conn.execute("SELECT value FROM collection_info WHERE key = 'metadata'").fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def modify(self, metadata):
+        with self._lock:
+            self._set_info('metadata', json.dumps({**self.metadata, **metadata}))
+
+    def _rows_for_where(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        if not where:
+            return np.flatnonzero(self._live[:self._next_row])
+        return np.array(sorted(row for row, metadata in self._metadata.items() if matches_where(metadata, where)),
+                        dtype=np.int64)
+
+    def _fetch(self, rows: Sequence[int], include: Sequence[str]) -> Dict[str, List[Any]]:
+        records = {}
+        rows = [int(row) for row in rows]
+        for start in range(0, len(rows), 900):
+            batch = rows[start:start + 900]
+            query = f"SELECT row, id, document, metadata FROM vectors WHERE row IN ({','.join('?' * len(batch))})"
+            for row, doc_id, document, metadata in self._conn.execute(query, batch):
+                records[row] = (doc_id, document, json.loads(metadata) if metadata else {})
+        rows = [row for row in rows if row in records]
+        result = {'ids': [records[row][0] for row in rows]}
+        result['documents'] = [records[row][1] for row in rows] if 'documents' in include else None
+        result['metadatas'] = [records[row][2] for row in rows] if 'metadatas' in include else None
+        result['embeddings'] = self._read_vectors(np.array(rows, dtype=np.int64)).tolist() \
+            if 'embeddings' in include and rows else ([] if 'embeddings' in include else None)
+        return result
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=DEFAULT_INCLUDE):
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_of[doc_id] for doc_id in ids if doc_id in self._row_of
+                        and matches_where(self._metadata[self._row_of[doc_id]], where)]
+            else:
+                rows = self._rows_for_where(where).tolist()
+            rows = rows[offset or 0:]
+            if limit is not None:
+                rows = rows[:limit]
+            return self._fetch(rows, include)
+
+    def _flat_scores(self, rows: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        scores = np.empty((len(queries), len(rows)), dtype=np.float32)
+        contiguous = len(rows) and rows[-1] - rows[0] + 1 == len(rows)
+        for start in range(0, len(rows), _SCAN_BLOCK_ROWS):
+            block_rows = rows[start:start + _SCAN_BLOCK_ROWS]
+            if contiguous:
+                block = self._matrix[block_rows[0]:block_rows[-1] + 1]
+                if self.quantization == 'int8':
+                    block = block.astype(np.float32) * (self._scales[block_rows[0]:block_rows[-1] + 1] / 127)[:, None]
+            else:
+                block = self._read_vectors(block_rows)
+            scores[:, start:start + len(block_rows)] = queries @ np.asarray(block, dtype=np.float32).T
+        return scores
+
+    def query(self, query_embeddings, n_results=10, where=None, include=DEFAULT_INCLUDE):
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+        result = {'ids': [], 'documents': [], 'metadatas': [], 'distances': [], 'embeddings': []}
+        with self._lock:
+            if self.dim is None or not self._row_of:
+                for key in result:
+                    result[key] = [[] for _ in queries]
+                return result
+            if queries.shape[1] != self.dim:
+                raise ValueError(f"Query dimension {queries.shape[1]} does not match collection dimension {self.dim}")
+            rows = self._rows_for_where(where)
+            k = min(n_results, len(rows))
+            # HNSW for unfiltered and broad filters; exact scans when the filter leaves few candidates
+            use_hnsw = self._hnsw is not None and k > 0 and len(rows) > max(20 * k, 0.1 * len(self._row_of))
+            if use_hnsw:
+                self._hnsw.set_ef(max(self.hnsw_ef_search, k))
+                allowed = None
+                if where:
+                    mask = np.zeros(self._capacity, dtype=bool)
+                    mask[rows] = True
+                    allowed = lambda label: bool(mask[label])
+                labels, distances = self._hnsw.knn_query(queries, k=k, filter=allowed)
+                hits = [(labels[i].astype(np.int64), distances[i]) for i in range(len(queries))]
+            else:
+                scores = self._flat_scores(rows, queries) if k else np.empty((len(queries), 0))
+                hits = []
+                for query_scores in scores:
+                    top = np.argpartition(-query_scores, k - 1)[:k] if 0 < k < len(rows) else np.arange(k)
+                    top = top[np.argsort(-query_scores[top], kind='stable')]
+                    hits.append((rows[top], 1 - query_scores[top]))
+            for hit_rows, hit_distances in hits:
+                fetched = self._fetch(hit_rows, include)
+                result['ids'].append(fetched['ids'])
+                result['documents'].append(fetched['documents'])
+                result['metadatas'].append(fetched['metadatas'])
+                result['embeddings'].append(fetched['embeddings'])
+                result['distances'].append([float(distance) for distance in hit_distances])
+        for key in ('documents', 'metadatas', 'embeddings'):
+            if key not in include:
+                result[key] = None
+        return result
+
+
+class LocalVectorStore(VectorStore):
+    def __init__(self, path: str, index_type: str = 'flat', quantization: str = 'none', hnsw_m: int = 16,
+                 hnsw_ef_construction: int = 200, hnsw_ef_search: int = 64):
+        if index_type not in ('flat', 'hnsw'):
+            raise ValueError(f"Unsupported index type: {index_type}")
+        self.path = path
+        self._options = dict(index_type=index_type, quantization=quantization, hnsw_m=hnsw_m,
+                             hnsw_ef_construction=hnsw_ef_construction, hnsw_ef_search=hnsw_ef_search)
+        self._collections: Dict[str, LocalVectorCollection] = {}
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _collection_path(self, name: str) -> str:
+        if not _COLLECTION_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid collection name: {name}")
+        return os.path.join(self.path, name)
+
+    def list_collections(self):
+        return sorted(entry for entry in os.listdir(self.path)
+                      if os.path.exists(os.path.join(self.path, entry, 'meta.db')))
+
+    def _open(self, name: str) -> LocalVectorCollection:
+        if name not in self._collections:
+            self._collections[name] = LocalVectorCollection(self._collection_path(name), name, **self._options)
+        return self._collections[name]
+
+    def get_collection(self, name):
+        with self._lock:
+            if name not in self._collections and \
+                    not os.path.exists(os.path.join(self._collection_path(name), 'meta.db')):
+                raise ValueError(f"Collection {name} does not exist")
+            return self._open(name)
+
+    def create_collection(self, name):
+        with self._lock:
+            if name in self._collections or os.path.exists(os.path.join(self._collection_path(name), 'meta.db')):
+                raise ValueError(f"Collection {name} already exists")
+            return self._open(name)
+
+    def get_or_create_collection(self, name):
+        with self._lock:
+            return self._open(name)
+
+    def delete_collection(self, name):
+        with self._lock:
+            collection = self._collections.pop(name, None)
+            if collection is not None:
+                collection.close()
+            path = self._collection_path(name)
+            if not os.path.exists(path):
+                raise ValueError(f"Collection {name} does not exist")
+            shutil.rmtree(path)
+        note_vector_store_write()
+
+    def close(self):
+        with self._lock:
+            for collection in self._collections.values():
+                collection.close()
+            self._collections.clear()
+
+
+def create_vector_store(backend: Optional[str] = None, settings: Optional[Dict[str, Any]] = None) -> VectorStore:
+    settings = settings or get_vector_store_settings()
+    backend = (backend or settings['backend']).lower()
+    if backend == 'chroma':
+        return ChromaVectorStore(settings['chroma_db_path'])
+    if backend == 'local':
+        return LocalVectorStore(settings['local_path'], index_type=settings['index_type'],
+                                quantization=settings['quantization'], hnsw_m=settings['hnsw_m'],
+                                hnsw_ef_construction=settings['hnsw_ef_construction'],
+                                hnsw_ef_search=settings['hnsw_ef_search'])
+    raise ValueError(f"Unsupported vector store backend: {backend}. Choose one of {', '.join(VECTOR_STORE_BACKENDS)}")
+
+
+_vector_store: Optional[VectorStore] = None
+_vector_store_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    """The process-wide vector store configured in [Vector-Store]."""
+    global _vector_store
+    with _vector_store_lock:
+        if _vector_store is None:
+            _vector_store = create_vector_store()
+            atexit.register(_vector_store.close)
+        return _vector_store
+
+
+# The store as a module-level name, opened on first use
+vector_store = LazyObject(get_vector_store, 'vector store')
+
+
+def reset_vector_store() -> None:
+    """Close the process-wide vector store (before its files are replaced, say); the next use opens it again."""
+    global _vector_store
+    with _vector_store_lock:
+        if _vector_store is not None:
+            atexit.unregister(_vector_store.close)
+            _vector_store.close()
+            _vector_store = None
+        vector_store._lazy_reset()
+    note_vector_store_write()
+
+#
+# End of Vector_Store.py
+#######################################################################################################################
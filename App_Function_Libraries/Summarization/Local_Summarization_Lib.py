@@ -27,6 +27,7 @@ from typing import Union
 import requests
 # Import 3rd-party Libraries
 # Import Local
+from App_Function_Libraries.LLM_Providers.HTTP_Client import get_http_session
 from App_Function_Libraries.Utils.Utils import load_and_log_configs, extract_text_from_segments
 #
 #######################################################################################################################
@@ -106,7 +107,7 @@ def summarize_with_local_llm(input_data, custom_prompt_arg, temp, system_message
             "max_tokens": 28000,  # Adjust tokens as needed
         }
         logging.debug("Local LLM: Posting request")
-        response = requests.post('http://127.0.0.1:8080/v1/chat/completions', headers=headers, json=data)
+        response = get_http_session().post('http://127.0.0.1:8080/v1/chat/completions', headers=headers, json=data)
 
         if response.status_code == 200:
             response_data = response.json()
@@ -204,7 +205,7 @@ def summarize_with_llama(input_data, custom_prompt, api_key=None, temp=None, sys
 
         logging.debug("llama: Submitting request to API endpoint")
         print("llama: Submitting request to API endpoint")
-        response = requests.post(api_url, headers=headers, json=data)
+        response = get_http_session().post(api_url, headers=headers, json=data)
         response_data = response.json()
         logging.debug("API Response Data: %s", response_data)
 
@@ -300,7 +301,7 @@ def summarize_with_kobold(input_data, api_key, custom_prompt_input,  system_mess
         print("Kobold Summarization: Submitting request to API endpoint")
         kobold_api_ip = loaded_config_data['local_api_ip']['kobold']
         try:
-            response = requests.post(kobold_api_ip, headers=headers, json=data)
+            response = get_http_session().post(kobold_api_ip, headers=headers, json=data)
             logging.debug("Kobold Summarization: API Response Status Code: %d", response.status_code)
 
             if response.status_code == 200:
@@ -402,10 +403,12 @@ def summarize_with_oobabooga(input_data, api_key, custom_prompt, system_message=
             "messages": [{"role": "user", "content": ooba_prompt}],
             "system_message": system_message,
         }
+        if temp is not None:
+            data["temperature"] = temp
 
         logging.debug("ooba: Submitting request to API endpoint")
         print("ooba: Submitting request to API endpoint")
-        response = requests.post(api_url, headers=headers, json=data, verify=False)
+        response = get_http_session().post(api_url, headers=headers, json=data, verify=False)
         logging.debug("ooba: API Response Data: %s", response)
 
         if response.status_code == 200:
@@ -501,7 +504,7 @@ def summarize_with_tabbyapi(input_data, custom_prompt_input, system_message=None
             'messages': input_data
         }
 
-        response = requests.post(tabby_api_ip, headers=headers, json=data2)
+        response = get_http_session().post(tabby_api_ip, headers=headers, json=data2)
 
         if response.status_code == 200:
             response_json = response.json()
@@ -612,10 +615,12 @@ def summarize_with_vllm(
                 {"role": "user", "content": f"{custom_prompt_input}\n\n{text}"}
             ]
         }
+        if temp is not None:
+            payload["temperature"] = temp
 
         # Make the API call
         logging.debug(f"vLLM: Sending request to {vllm_api_url}")
-        response = requests.post(vllm_api_url, headers=headers, json=payload)
+        response = get_http_session().post(vllm_api_url, headers=headers, json=payload)
 
         # Check for successful response
         response.raise_for_status()
@@ -743,7 +748,7 @@ def summarize_with_ollama(
             logging.debug("Ollama: Submitting request to API endpoint")
             print("Ollama: Submitting request to API endpoint")
             try:
-                response = requests.post(api_url, headers=headers, json=data_payload, timeout=30)
+                response = get_http_session().post(api_url, headers=headers, json=data_payload, timeout=30)
                 response.raise_for_status()  # Raises HTTPError for bad responses
                 response_data = response.json()
             except requests.exceptions.Timeout:
@@ -897,7 +902,7 @@ def summarize_with_custom_openai(api_key, input_data, custom_prompt_arg, temp=No
         custom_openai_url = loaded_config_data['Local_api_ip']['custom_openai_api_ip']
 
         logging.debug("Custom OpenAI API: Posting request")
-        response = requests.post(custom_openai_url, headers=headers, json=data)
+        response = get_http_session().post(custom_openai_url, headers=headers, json=data)
         logging.debug(f"Custom OpenAI API full API response data: {response}")
         if response.status_code == 200:
             response_data = response.json()
@@ -33,6 +33,9 @@ from App_Function_Libraries.Summarization.Local_Summarization_Lib import summari
     summarize_with_oobabooga, summarize_with_tabbyapi, summarize_with_vllm, summarize_with_local_llm, \
     summarize_with_ollama, summarize_with_custom_openai
 from App_Function_Libraries.DB.DB_Manager import add_media_to_database
+from App_Function_Libraries.DB.LLM_Cache_DB import cached_llm_call
+from App_Function_Libraries.LLM_Providers.HTTP_Client import get_http_session
+from App_Function_Libraries.LLM_Providers.Provider_Registry import LLMRequest, summarize_providers
 # Import Local
 from App_Function_Libraries.Utils.Utils import load_and_log_configs, load_comprehensive_config, sanitize_filename, \
     clean_youtube_url, create_download_directory, is_valid_url
@@ -52,52 +55,62 @@ def summarize(
     api_name: str,
     api_key: Optional[str],
     temp: Optional[float],
-    system_message: Optional[str]
+    system_message: Optional[str],
+    force_cache: bool = False
 ) -> str:
     try:
         logging.debug(f"api_name type: {type(api_name)}, value: {api_name}")
-        if api_name.lower() == "openai":
-            return summarize_with_openai(api_key, input_data, custom_prompt_arg, temp, system_message)
-        elif api_name.lower() == "anthropic":
-            return summarize_with_anthropic(api_key, input_data, custom_prompt_arg, temp, system_message)
-        elif api_name.lower() == "cohere":
-            return summarize_with_cohere(api_key, input_data, custom_prompt_arg, temp, system_message)
-        elif api_name.lower() == "groq":
-            return summarize_with_groq(api_key, input_data, custom_prompt_arg, temp, system_message)
-        elif api_name.lower() == "huggingface":
-            return summarize_with_huggingface(api_key, input_data, custom_prompt_arg, temp)
-        elif api_name.lower() == "openrouter":
-            return summarize_with_openrouter(api_key, input_data, custom_prompt_arg, temp, system_message)
-        elif api_name.lower() == "deepseek":
-            return summarize_with_deepseek(api_key, input_data, custom_prompt_arg, temp, system_message)
-        elif api_name.lower() == "mistral":
-            return summarize_with_mistral(api_key, input_data, custom_prompt_arg, temp, system_message)
-        elif api_name.lower() == "llama.cpp":
-            return summarize_with_llama(input_data, custom_prompt_arg, api_key, temp, system_message)
-        elif api_name.lower() == "kobold":
-            return summarize_with_kobold(input_data, api_key, custom_prompt_arg, temp, system_message)
-        elif api_name.lower() == "ooba":
-            return summarize_with_oobabooga(input_data, api_key, custom_prompt_arg, temp, system_message)
-        elif api_name.lower() == "tabbyapi":
-            return summarize_with_tabbyapi(input_data, custom_prompt_arg, temp, system_message)
-        elif api_name.lower() == "vllm":
-            return summarize_with_vllm(input_data, custom_prompt_arg, None, system_message)
-        elif api_name.lower() == "local-llm":
-            return summarize_with_local_llm(input_data, custom_prompt_arg, temp, system_message)
-        elif api_name.lower() == "huggingface":
-            return summarize_with_huggingface(api_key, input_data, custom_prompt_arg, temp, )#system_message)
-        elif api_name.lower() == "custom-openai":
-            return summarize_with_custom_openai(api_key, input_data, custom_prompt_arg, temp, system_message)
-        elif api_name.lower() == "ollama":
-            return summarize_with_ollama(input_data, custom_prompt_arg, None, api_key, temp, system_message)
-        else:
-            return f"Error: Invalid API Name {api_name}"
+        loaded_config_data = load_and_log_configs()
+        cache_model = loaded_config_data['models'].get(api_name.lower()) if loaded_config_data else None
+        return cached_llm_call(
+            api_name, cache_model, input_data, custom_prompt_arg, temp, system_message,
+            lambda: _dispatch_summarize(input_data, custom_prompt_arg, api_name, api_key, temp, system_message),
+            force_cache=force_cache
+        )
+    except Exception as e:
+        logging.error(f"Error in summarize function: {str(e)}", exc_info=True)
+        return f"Error: {str(e)}"
+
 
+def _dispatch_summarize(input_data, custom_prompt_arg, api_name, api_key, temp, system_message):
+    if api_name not in summarize_providers:
+        return f"Error: Invalid API Name {api_name}"
+    try:
+        request = LLMRequest(api_name=api_name, input_data=input_data, prompt=custom_prompt_arg, api_key=api_key,
+                             temp=temp, system_message=system_message)
+        return summarize_providers.dispatch(request)
     except Exception as e:
         logging.error(f"Error in summarize function: {str(e)}", exc_info=True)
         return f"Error: {str(e)}"
 
 
+# Provider adapters for summarize - each maps the shared LLMRequest onto the provider's own signature
+summarize_providers.register("openai", lambda r: summarize_with_openai(r.api_key, r.input_data, r.prompt, r.temp, r.system_message))
+summarize_providers.register("anthropic", lambda r: summarize_with_anthropic(r.api_key, r.input_data, r.prompt, r.temp, r.system_message))
+summarize_providers.register("cohere", lambda r: summarize_with_cohere(r.api_key, r.input_data, r.prompt, r.temp, r.system_message))
+summarize_providers.register("groq", lambda r: summarize_with_groq(r.api_key, r.input_data, r.prompt, r.temp, r.system_message))
+summarize_providers.register("huggingface", lambda r: summarize_with_huggingface(r.api_key, r.input_data, r.prompt, r.temp))
+summarize_providers.register("openrouter", lambda r: summarize_with_openrouter(r.api_key, r.input_data, r.prompt, r.temp, r.system_message))
+summarize_providers.register("deepseek", lambda r: summarize_with_deepseek(r.api_key, r.input_data, r.prompt, r.temp, r.system_message))
+summarize_providers.register("mistral", lambda r: summarize_with_mistral(r.api_key, r.input_data, r.prompt, r.temp, r.system_message))
+summarize_providers.register("llama.cpp", lambda r: summarize_with_llama(r.input_data, r.prompt, api_key=r.api_key, temp=r.temp,
+                                                                         system_message=r.system_message))
+summarize_providers.register("kobold", lambda r: summarize_with_kobold(r.input_data, r.api_key, r.prompt, system_message=r.system_message,
+                                                                       temp=r.temp))
+summarize_providers.register("ooba", lambda r: summarize_with_oobabooga(r.input_data, r.api_key, r.prompt, system_message=r.system_message,
+                                                                        temp=r.temp))
+summarize_providers.register("tabbyapi", lambda r: summarize_with_tabbyapi(r.input_data, r.prompt, system_message=r.system_message,
+                                                                           api_key=r.api_key, temp=r.temp))
+summarize_providers.register("vllm", lambda r: summarize_with_vllm(r.input_data, r.prompt, api_key=r.api_key, model=r.model,
+                                                                   system_prompt=r.system_message, temp=r.temp))
+summarize_providers.register("local-llm", lambda r: summarize_with_local_llm(r.input_data, r.prompt, r.temp, r.system_message))
+summarize_providers.register("custom-openai", lambda r: summarize_with_custom_openai(r.api_key, r.input_data, r.prompt, r.temp,
+                                                                                     r.system_message),
+                             aliases=("custom-openai-api",))
+summarize_providers.register("ollama", lambda r: summarize_with_ollama(r.input_data, r.prompt, api_url=None, api_key=r.api_key,
+                                                                       temp=r.temp, system_message=r.system_message, model=r.model))
+
+
 def extract_text_from_segments(segments):
     logging.debug(f"Segments received: {segments}")
     logging.debug(f"Type of segments: {type(segments)}")
@@ -207,7 +220,7 @@ def summarize_with_openai(api_key, input_data, custom_prompt_arg, temp=None, sys
         }
 
         logging.debug("OpenAI: Posting request")
-        response = requests.post('https://api.openai.com/v1/chat/completions', headers=headers, json=data)
+        response = get_http_session().post('https://api.openai.com/v1/chat/completions', headers=headers, json=data)
 
         if response.status_code == 200:
             response_data = response.json()
@@ -331,7 +344,7 @@ def summarize_with_anthropic(api_key, input_data, custom_prompt_arg, temp=None,
         for attempt in range(max_retries):
             try:
                 logging.debug("anthropic: Posting request to API")
-                response = requests.post('https://api.anthropic.com/v1/messages', headers=headers, json=data)
+                response = get_http_session().post('https://api.anthropic.com/v1/messages', headers=headers, json=data)
 
                 # Check if the status code indicates success
                 if response.status_code == 200:
@@ -462,7 +475,7 @@ def summarize_with_cohere(api_key, input_data, custom_prompt_arg, temp=None, sys
         }
 
         logging.debug("cohere: Submitting request to API endpoint")
-        response = requests.post('https://api.cohere.ai/v1/chat', headers=headers, json=data)
+        response = get_http_session().post('https://api.cohere.ai/v1/chat', headers=headers, json=data)
         response_data = response.json()
         logging.debug("API Response Data: %s", response_data)
 
@@ -577,7 +590,7 @@ def summarize_with_groq(api_key, input_data, custom_prompt_arg, temp=None, syste
 
         logging.debug("groq: Submitting request to API endpoint")
         print("groq: Submitting request to API endpoint")
-        response = requests.post('https://api.groq.com/openai/v1/chat/completions', headers=headers, json=data)
+        response = get_http_session().post('https://api.groq.com/openai/v1/chat/completions', headers=headers, json=data)
 
         response_data = response.json()
         logging.debug("API Response Data: %s", response_data)
@@ -678,7 +691,7 @@ def summarize_with_openrouter(api_key, input_data, custom_prompt_arg, temp=None,
     try:
         logging.debug("OpenRouter: Submitting request to API endpoint")
         print("OpenRouter: Submitting request to API endpoint")
-        response = requests.post(
+        response = get_http_session().post(
             url="https://openrouter.ai/api/v1/chat/completions",
             headers={
                 "Authorization": f"Bearer {openrouter_api_key}",
@@ -788,7 +801,7 @@ def summarize_with_huggingface(api_key, input_data, custom_prompt_arg, temp=None
         }
 
         logging.debug("huggingface: Submitting request...")
-        response = requests.post(API_URL, headers=headers, json=data)
+        response = get_http_session().post(API_URL, headers=headers, json=data)
 
         if response.status_code == 200:
             print(response.json())
@@ -892,7 +905,7 @@ def summarize_with_deepseek(api_key, input_data, custom_prompt_arg, temp=None, s
         }
 
         logging.debug("DeepSeek: Posting request")
-        response = requests.post('https://api.deepseek.com/chat/completions', headers=headers, json=data)
+        response = get_http_session().post('https://api.deepseek.com/chat/completions', headers=headers, json=data)
 
         if response.status_code == 200:
             response_data = response.json()
@@ -1003,7 +1016,7 @@ def summarize_with_mistral(api_key, input_data, custom_prompt_arg, temp=None, sy
         }
 
         logging.debug("Mistral: Posting request")
-        response = requests.post('https://api.mistral.ai/v1/chat/completions', headers=headers, json=data)
+        response = get_http_session().post('https://api.mistral.ai/v1/chat/completions', headers=headers, json=data)
 
         if response.status_code == 200:
             response_data = response.json()
@@ -1209,10 +1222,10 @@ def save_transcription_and_summary(transcription_text, summary_text, download_pa
         return None, None
 
 
-def summarize_chunk(api_name, text, custom_prompt_input, api_key, temp=None, system_message=None):
+def summarize_chunk(api_name, text, custom_prompt_input, api_key, temp=None, system_message=None, force_cache=False):
     logging.debug("Entered 'summarize_chunk' function")
     try:
-        result = summarize(text, custom_prompt_input, api_name, api_key, temp, system_message)
+        result = summarize(text, custom_prompt_input, api_name, api_key, temp, system_message, force_cache)
         if result is None or result.startswith("Error:"):
             logging.warning(f"Summarization with {api_name} failed: {result}")
             return None
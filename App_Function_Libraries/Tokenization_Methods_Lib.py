@@ -4,10 +4,12 @@
 # This library is used to handle tokenization of text for summarization.
 #
 ####
-import tiktoken
+from typing import List
 
 # Import Local
-from typing import List
+from App_Function_Libraries.Utils.Lazy_Loading import LazyModule
+
+tiktoken = LazyModule('tiktoken')
 
 ####################
 # Function List
@@ -0,0 +1,138 @@
+# Lazy_Loading.py
+# Description: Deferred imports and on-first-use objects.
+#
+# Importing a library module should not load torch, open a database or start a client: `summarize.py --help` and
+# small CLI runs pay for everything that happens at import time. LazyModule stands in for a module and imports it
+# on first attribute access; LazyObject stands in for a value (a tokenizer, a client, a vector store) and creates it
+# on first use. Both keep the module-level names the rest of the code (and the tests' patches) already use. run_once
+# wraps setup (a database schema) that used to run at import so it runs before the first use instead.
+#
+# Imports
+import functools
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+#
+#######################################################################################################################
+#
+# Functions:
+
+# One lock for all proxies: loading one can load another (a factory using a LazyModule), which an RLock allows
+_load_lock = threading.RLock()
+
+
+class LazyModule:
+    """
+    A module imported the first time one of its attributes is used, e.g. `torch = LazyModule('torch')`.
+    `on_import(module)` runs once, before anything else gets the module.
+    """
+
+    def __init__(self, name: str, on_import: Optional[Callable[[Any], None]] = None):
+        self._lazy_name = name
+        self._lazy_on_import = on_import
+        self._lazy_module = None
+
+    def _lazy_load(self):
+        if self._lazy_module is None:
+            with _load_lock:
+                if self._lazy_module is None:
+                    start_time = time.time()
+                    module = importlib.import_module(self._lazy_name)
+                    if self._lazy_on_import is not None:
+                        self._lazy_on_import(module)
+                    self._lazy_module = module
+                    logging.debug(f"Imported {self._lazy_name} on first use in {time.time() - start_time:.2f}s")
+        return self._lazy_module
+
+    def __getattr__(self, attr):
+        if attr.startswith('_lazy_'):
+            raise AttributeError(attr)
+        return getattr(self._lazy_load(), attr)
+
+    def __dir__(self):
+        return dir(self._lazy_load())
+
+    def __repr__(self):
+        state = 'loaded' if self._lazy_module is not None else 'not loaded'
+        return f"<LazyModule {self._lazy_name} ({state})>"
+
+
+class LazyObject:
+    """
+    The value `factory()` returns, created the first time it is used (attribute access or call). If the factory
+    raises, the next use tries again.
+    """
+
+    def __init__(self, factory: Callable[[], Any], description: Optional[str] = None):
+        self._lazy_factory = factory
+        self._lazy_description = description or getattr(factory, '__name__', 'object')
+        self._lazy_value = None
+        self._lazy_created = False
+
+    def _lazy_resolve(self):
+        if not self._lazy_created:
+            with _load_lock:
+                if not self._lazy_created:
+                    start_time = time.time()
+                    self._lazy_value = self._lazy_factory()
+                    self._lazy_created = True
+                    logging.debug(f"Created {self._lazy_description} on first use in {time.time() - start_time:.2f}s")
+        return self._lazy_value
+
+    def __getattr__(self, attr):
+        if attr.startswith('_lazy_'):
+            raise AttributeError(attr)
+        return getattr(self._lazy_resolve(), attr)
+
+    def __call__(self, *args, **kwargs):
+        return self._lazy_resolve()(*args, **kwargs)
+
+    def _lazy_reset(self) -> None:
+        """Forget the value; the next use calls the factory again."""
+        with _load_lock:
+            self._lazy_value = None
+            self._lazy_created = False
+
+    def __repr__(self):
+        if self._lazy_created:
+            return repr(self._lazy_value)
+        return f"<LazyObject {self._lazy_description} (not created)>"
+
+
+def run_once(func: Callable[..., None]) -> Callable[..., None]:
+    """
+    For setup done on first use (creating a database schema, say): the first call runs `func`, later calls return
+    at once. A call that raises is retried next time. Calls `func` makes back into itself return immediately.
+    """
+    lock = threading.RLock()
+    state = {'done': False, 'running': False}
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if state['done']:
+            return
+        with lock:
+            if state['done'] or state['running']:
+                return
+            state['running'] = True
+            try:
+                func(*args, **kwargs)
+                state['done'] = True
+            finally:
+                state['running'] = False
+    return wrapper
+
+
+def is_loaded(proxy: Any) -> bool:
+    """Whether a LazyModule has been imported or a LazyObject created (anything else counts as loaded)."""
+    if isinstance(proxy, LazyModule):
+        return proxy._lazy_module is not None
+    if isinstance(proxy, LazyObject):
+        return proxy._lazy_created
+    return True
+
+#
+# End of Lazy_Loading.py
+#######################################################################################################################
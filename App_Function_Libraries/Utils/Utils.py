@@ -26,9 +26,11 @@ import logging
 import os
 import re
 import tempfile
+import threading
 import time
 import uuid
 from datetime import timedelta
+from types import MappingProxyType
 from typing import Union, AnyStr
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 #
@@ -97,32 +99,106 @@ def cleanup_downloads():
 #
 
 
-def load_comprehensive_config():
-    # Get the directory of the current script (Utils.py)
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    logging.debug(f"Current directory: {current_dir}")
+# config.txt is parsed once and shared as a read-only snapshot. Readers go through `_config_state`, which is
+# replaced as a whole under `_config_lock`, so concurrent readers always see a complete (mtime, parser, snapshot).
+_config_lock = threading.Lock()
+_config_state = (None, None, None)
 
-    # Go up two levels to the project root directory (tldw)
-    project_root = os.path.dirname(os.path.dirname(current_dir))
-    logging.debug(f"Project root directory: {project_root}")
 
-    # Construct the path to the config file
-    config_path = os.path.join(project_root, 'Config_Files', 'config.txt')
-    logging.debug(f"Config file path: {config_path}")
+class FrozenConfigParser(configparser.ConfigParser):
+    """ConfigParser that rejects changes once frozen - the cached instance is shared by every caller."""
+    _frozen = False
+
+    def freeze(self):
+        self._frozen = True
+        return self
+
+    def _check_writable(self):
+        if self._frozen:
+            raise TypeError("The cached config is read-only; edit Config_Files/config.txt and call reload_config()")
+
+    def set(self, section, option, value=None):
+        self._check_writable()
+        super().set(section, option, value)
+
+    def add_section(self, section):
+        self._check_writable()
+        super().add_section(section)
+
+    def remove_section(self, section):
+        self._check_writable()
+        return super().remove_section(section)
+
+    def remove_option(self, section, option):
+        self._check_writable()
+        return super().remove_option(section, option)
+
+    def read(self, filenames, encoding=None):
+        self._check_writable()
+        return super().read(filenames, encoding)
+
+    def read_string(self, string, source='<string>'):
+        self._check_writable()
+        super().read_string(string, source)
+
+    def read_dict(self, dictionary, source='<dict>'):
+        self._check_writable()
+        super().read_dict(dictionary, source)
+
+
+def get_config_path():
+    # Project root is two levels up from this file (App_Function_Libraries/Utils)
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(project_root, 'Config_Files', 'config.txt')
+
+
+def _config_file_version(config_path):
+    stat = os.stat(config_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_comprehensive_config():
+    """
+    Return the parsed config.txt. The file is only re-read when its mtime/size changes (or after
+    `reload_config()`); otherwise every caller gets the same read-only parser.
+    """
+    global _config_state
+    config_path = get_config_path()
 
     # Check if the config file exists
     if not os.path.exists(config_path):
         logging.error(f"Config file not found at {config_path}")
         raise FileNotFoundError(f"Config file not found at {config_path}")
 
-    # Read the config file
-    config = configparser.ConfigParser()
-    config.read(config_path)
+    version = _config_file_version(config_path)
+    cached_version, cached_config, _ = _config_state
+    if cached_config is not None and cached_version == version:
+        return cached_config
 
-    # Log the sections found in the config file
-    logging.debug("load_comprehensive_config(): Sections found in config: {config.sections()}")
+    with _config_lock:
+        cached_version, cached_config, _ = _config_state
+        if cached_config is not None and cached_version == version:
+            return cached_config
+        config = FrozenConfigParser()
+        config.read(config_path)
+        config.freeze()
+        _config_state = (version, config, None)
+        logging.debug(f"load_comprehensive_config(): Loaded {config_path}, sections: {config.sections()}")
+        return config
 
-    return config
+
+def reload_config():
+    """Drop the cached config so the next access re-reads config.txt (used by the Config tab after saving)."""
+    global _config_state
+    with _config_lock:
+        _config_state = (None, None, None)
+    return load_and_log_configs()
+
+
+def _freeze_config_value(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze_config_value(item) for key, item in value.items()})
+    return value
 
 
 def get_project_root():
@@ -162,8 +238,34 @@ def ensure_directory_exists(path):
 
 # FIXME - update to include prompt path in return statement
 def load_and_log_configs():
+    """
+    Return the config as a read-only nested mapping. Built once per config.txt version and shared between
+    callers; use `reload_config()` to force a re-read.
+    """
+    global _config_state
     try:
         config = load_comprehensive_config()
+    except Exception as e:
+        logging.error(f"Error loading config: {str(e)}")
+        return None
+    version, cached_config, snapshot = _config_state
+    if cached_config is config and snapshot is not None:
+        return snapshot
+
+    with _config_lock:
+        version, cached_config, snapshot = _config_state
+        if cached_config is config and snapshot is not None:
+            return snapshot
+        snapshot = _build_config_snapshot(config)
+        if snapshot is not None:
+            snapshot = _freeze_config_value(snapshot)
+            if cached_config is config:
+                _config_state = (version, config, snapshot)
+        return snapshot
+
+
+def _build_config_snapshot(config):
+    try:
         if config is None:
             logging.error("Config is None, cannot proceed")
             return None
@@ -31,13 +31,16 @@ from urllib.parse import urlparse, parse_qs
 
 import unicodedata
 # 3rd-Party Imports
-import yt_dlp
 
 from App_Function_Libraries.DB.DB_Manager import check_media_and_whisper_model
+from App_Function_Libraries.Utils.Lazy_Loading import LazyModule
 
 
 # Import Local
 #
+# yt_dlp loads all of its extractors on import; defer that until something is downloaded
+yt_dlp = LazyModule('yt_dlp')
+#
 #######################################################################################################################
 # Function Definitions
 #
@@ -1,30 +1,36 @@
+import asyncio
+
 from app.core.logging import logger
 from App_Function_Libraries.Video_DL_Ingestion_Lib import extract_metadata, download_video
 from App_Function_Libraries.Summarization.Summarization_General_Lib import perform_transcription, perform_summarization, save_transcription_and_summary
 from App_Function_Libraries.Utils.Utils import convert_to_seconds, create_download_directory, extract_text_from_segments
-from App_Function_Libraries.DB_Manager import add_media_to_database
+from App_Function_Libraries.DB.DB_Manager import add_media_to_database
 
 async def process_video_task(url, whisper_model, custom_prompt, api_name, api_key, keywords, diarize,
                              start_time, end_time, include_timestamps, keep_original_video):
+    # Every step below is blocking (yt-dlp, whisper, LLM HTTP, SQLite), so each runs in a worker thread to keep
+    # the server's event loop free for other requests.
     try:
         # Create download path
-        download_path = create_download_directory("Video_Downloads")
+        download_path = await asyncio.to_thread(create_download_directory, "Video_Downloads")
         logger.info(f"Download path created at: {download_path}")
 
         # Extract video information
-        video_metadata = extract_metadata(url, use_cookies=False, cookies=None)
+        video_metadata = await asyncio.to_thread(extract_metadata, url, use_cookies=False, cookies=None)
         if not video_metadata:
             raise ValueError(f"Failed to extract metadata for {url}")
 
         # Download video
-        video_file_path = download_video(url, download_path, video_metadata, False, whisper_model)
+        video_file_path = await asyncio.to_thread(download_video, url, download_path, video_metadata, False,
+                                                  whisper_model)
         if not video_file_path:
             raise ValueError(f"Failed to download video/audio from {url}")
 
         # Perform transcription
         start_seconds = convert_to_seconds(start_time) if start_time else 0
         end_seconds = convert_to_seconds(end_time) if end_time else None
-        audio_file_path, segments = perform_transcription(video_file_path, start_seconds, whisper_model, False, diarize)
+        audio_file_path, segments = await asyncio.to_thread(perform_transcription, video_file_path, start_seconds,
+                                                            whisper_model, False, diarize)
 
         if audio_file_path is None or segments is None:
             raise ValueError("Transcription failed or segments not available.")
@@ -36,13 +42,16 @@ async def process_video_task(url, whisper_model, custom_prompt, api_name, api_ke
 
         # Perform summarization
         full_text_with_metadata = f"{video_metadata}\n\n{transcription_text}"
-        summary_text = perform_summarization(api_name, full_text_with_metadata, custom_prompt, api_key)
+        summary_text = await asyncio.to_thread(perform_summarization, api_name, full_text_with_metadata, custom_prompt,
+                                             api_key)
 
         # Save transcription and summary
-        json_file_path, summary_file_path = save_transcription_and_summary(full_text_with_metadata, summary_text, download_path, video_metadata)
+        json_file_path, summary_file_path = await asyncio.to_thread(
+            save_transcription_and_summary, full_text_with_metadata, summary_text, download_path, video_metadata)
 
         # Add to database
-        add_media_to_database(video_metadata['webpage_url'], video_metadata, full_text_with_metadata, summary_text, keywords, custom_prompt, whisper_model)
+        await asyncio.to_thread(add_media_to_database, video_metadata['webpage_url'], video_metadata,
+                                full_text_with_metadata, summary_text, keywords, custom_prompt, whisper_model)
 
         # Clean up files if not keeping original video
         if not keep_original_video:
@@ -0,0 +1,220 @@
+# test_async_llm_calls.py
+# Tests for the async LLM dispatch: native httpx path vs. worker-thread fallback, per-provider concurrency,
+# timeouts, cancellation and the response cache.
+#
+import asyncio
+import os
+import sys
+import threading
+import types
+#
+import httpx
+import pytest
+
+# Add the project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from App_Function_Libraries.DB import LLM_Cache_DB
+from App_Function_Libraries.LLM_Providers import Async_LLM_Calls
+from App_Function_Libraries.LLM_Providers.Async_LLM_Calls import achat, aembed, astream_chat, asummarize
+from App_Function_Libraries.LLM_Providers.Provider_Endpoints import ProviderEndpoint
+
+
+OPENAI = ProviderEndpoint(name="openai", style="openai", url="https://example/v1/chat/completions",
+                          api_key="sk-test-key", model="gpt-test")
+
+
+class FakeProvider:
+    """httpx handler answering chat requests, counting the requests in flight at once."""
+
+    def __init__(self, delay=0.0, lines=None, error=None):
+        self.delay = delay
+        self.lines = lines
+        self.error = error
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.release = None
+
+    async def __call__(self, request):
+        self.requests += 1
+        number = self.requests
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.release is not None:
+                await self.release.wait()
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.in_flight -= 1
+        if self.lines is not None:
+            return httpx.Response(200, content="\n".join(self.lines).encode())
+        return httpx.Response(200, json={"choices": [{"message": {"content": f"reply {number}"}}]})
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    fake = FakeProvider()
+    clients = {}
+
+    def client():
+        loop = asyncio.get_running_loop()
+        if loop not in clients:
+            clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+        return clients[loop]
+
+    monkeypatch.setattr(Async_LLM_Calls, "get_async_http_client", client)
+    monkeypatch.setattr(Async_LLM_Calls, "resolve_endpoint",
+                        lambda api_name, api_key=None, model=None: OPENAI if api_name == "openai" else None)
+    monkeypatch.setattr(Async_LLM_Calls, "get_provider_concurrency", lambda api_name: 2)
+    monkeypatch.setattr(LLM_Cache_DB, "get_cache_settings", lambda: dict(LLM_Cache_DB.DEFAULT_CACHE_SETTINGS))
+    return fake
+
+
+@pytest.fixture
+def sync_dispatch(monkeypatch):
+    """Stand-ins for the sync dispatchers the fallback path runs in a worker thread."""
+    threads = []
+
+    def dispatch(api_name, *args):
+        threads.append(threading.get_ident())
+        return f"sync {api_name}"
+
+    monkeypatch.setitem(sys.modules, "App_Function_Libraries.Chat",
+                        types.SimpleNamespace(_dispatch_chat_api_call=lambda endpoint, *args: dispatch(endpoint)))
+    monkeypatch.setitem(sys.modules, "App_Function_Libraries.Summarization.Summarization_General_Lib",
+                        types.SimpleNamespace(_dispatch_summarize=lambda data, prompt, api_name, *args:
+                                              dispatch(api_name)))
+    return threads
+
+
+def test_native_providers_are_called_over_httpx(provider, sync_dispatch):
+    assert asyncio.run(achat("openai", "text", "prompt", model="gpt-test")) == "reply 1"
+    assert asyncio.run(asummarize("text", "prompt", "openai", model="gpt-test")) == "reply 2"
+    assert provider.requests == 2 and sync_dispatch == []
+
+
+def test_other_providers_fall_back_to_a_worker_thread(provider, sync_dispatch, tmp_path):
+    assert asyncio.run(achat("kobold", "text", "prompt", model="m")) == "sync kobold"
+    # File paths need the sync adapters' unpacking even for native providers
+    path = tmp_path / "transcript.json"
+    path.write_text("{}")
+    assert asyncio.run(asummarize(str(path), "prompt", "openai", model="gpt-test")) == "sync openai"
+    assert provider.requests == 0
+    assert threading.get_ident() not in sync_dispatch and len(sync_dispatch) == 2
+
+
+def test_concurrency_is_capped_per_provider(provider):
+    provider.delay = 0.02
+
+    async def run():
+        return await asyncio.gather(*(achat("openai", f"text {i}", "prompt", model="gpt-test") for i in range(8)))
+
+    replies = asyncio.run(run())
+    assert len(set(replies)) == 8
+    assert provider.max_in_flight == 2
+
+
+def test_timeout_returns_an_error_and_frees_the_slot(provider):
+    provider.delay = 1
+
+    async def run():
+        timed_out = await achat("openai", "text", "prompt", model="gpt-test", timeout=0.05)
+        provider.delay = 0
+        return timed_out, await achat("openai", "text", "prompt", model="gpt-test", timeout=1)
+
+    timed_out, reply = asyncio.run(run())
+    assert "timed out" in timed_out
+    assert reply.startswith("reply")
+    assert provider.in_flight == 0
+
+
+def test_cancelling_a_call_aborts_the_request(provider):
+    async def run():
+        provider.release = asyncio.Event()
+        task = asyncio.create_task(achat("openai", "text", "prompt", model="gpt-test"))
+        while provider.in_flight == 0:
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert provider.in_flight == 0
+        provider.release = None
+        return await achat("openai", "text", "prompt", model="gpt-test")
+
+    assert asyncio.run(run()).startswith("reply")
+
+
+def test_cache_hits_do_not_wait_for_the_provider_slot(provider, tmp_path, monkeypatch):
+    monkeypatch.setattr(LLM_Cache_DB, "llm_cache_db_path", str(tmp_path / "llm_cache.db"))
+    monkeypatch.setattr(LLM_Cache_DB, "_schema_ready", False)
+    monkeypatch.setattr(LLM_Cache_DB, "get_cache_settings",
+                        lambda: dict(LLM_Cache_DB.DEFAULT_CACHE_SETTINGS, enabled=True))
+    monkeypatch.setattr(Async_LLM_Calls, "get_provider_concurrency", lambda api_name: 1)
+    key = LLM_Cache_DB.make_cache_key("openai", "gpt-test", None, "prompt", "cached text", 0)
+    LLM_Cache_DB.store_cached_response(key, "openai", "gpt-test", "cached reply")
+
+    async def run():
+        provider.release = asyncio.Event()
+        live = asyncio.create_task(achat("openai", "live text", "prompt", temp=0, model="gpt-test"))
+        while provider.in_flight == 0:
+            await asyncio.sleep(0)
+        cached = await asyncio.wait_for(achat("openai", "cached text", "prompt", temp=0, model="gpt-test"), 1)
+        provider.release.set()
+        return cached, await live
+
+    cached, live = asyncio.run(run())
+    assert cached == "cached reply"
+    assert live.startswith("reply")
+
+
+def test_stream_yields_text_as_it_arrives(provider):
+    provider.lines = ['data: {"choices":[{"delta":{"content":"Hel"},"finish_reason":null}]}', '',
+                      ': keep-alive', '',
+                      'data: {"choices":[{"delta":{"content":"lo"},"finish_reason":"stop"}]}', '']
+
+    async def run():
+        return [chunk async for chunk in astream_chat("openai", "text", "prompt", model="gpt-test")]
+
+    assert asyncio.run(run()) == ["Hel", "lo"]
+
+
+def test_stream_transport_error_yields_an_error_chunk(provider):
+    provider.error = httpx.ConnectError("connection refused")
+
+    async def run():
+        return [chunk async for chunk in astream_chat("openai", "text", "prompt", model="gpt-test")]
+
+    chunks = asyncio.run(run())
+    assert len(chunks) == 1 and chunks[0].startswith("An error occurred") and "connection refused" in chunks[0]
+    assert provider.in_flight == 0
+
+
+def test_aembed_is_capped_and_raises_on_timeout(provider, monkeypatch):
+    monkeypatch.setattr(Async_LLM_Calls, "load_and_log_configs",
+                        lambda: {"embedding_config": {"embedding_provider": "local", "embedding_model": "m",
+                                                      "embedding_api_url": "https://example/embed"}})
+
+    async def handler(request):
+        provider.in_flight += 1
+        provider.max_in_flight = max(provider.max_in_flight, provider.in_flight)
+        await asyncio.sleep(provider.delay)
+        provider.in_flight -= 1
+        return httpx.Response(200, json={"embeddings": [[1.0, 0.0]]})
+
+    monkeypatch.setattr(Async_LLM_Calls, "get_async_http_client",
+                        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    provider.delay = 0.02
+
+    async def run():
+        return await asyncio.gather(*(aembed([f"text {i}"]) for i in range(6)))
+
+    assert asyncio.run(run()) == [[[1.0, 0.0]]] * 6
+    assert provider.max_in_flight == 2
+
+    provider.delay = 1
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(aembed(["text"], timeout=0.05))
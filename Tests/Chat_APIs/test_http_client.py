@@ -0,0 +1,52 @@
+# test_http_client.py
+# Tests for the pooled HTTP session shared by the provider adapters (timeouts and transport retries).
+#
+import os
+import sys
+from unittest import mock
+#
+import pytest
+
+# Add the project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from App_Function_Libraries.LLM_Providers.HTTP_Client import RETRY_STATUS_CODES, PooledSession, create_http_session
+
+
+SETTINGS = {'connect_timeout': 3.0, 'read_timeout': 30.0, 'pool_connections': 2, 'pool_maxsize': 4,
+            'max_retries': 3, 'backoff_factor': 0.5}
+
+
+@pytest.fixture
+def retry():
+    session = create_http_session(dict(SETTINGS))
+    yield session.get_adapter('https://example.com').max_retries
+    session.close()
+
+
+def test_retry_settings(retry):
+    assert retry.allowed_methods == frozenset(['GET'])
+    assert set(retry.status_forcelist) == set(RETRY_STATUS_CODES)
+    assert retry.read == 0
+    assert retry.connect == retry.status == retry.total == 3
+    assert retry.respect_retry_after_header and not retry.raise_on_status
+
+
+def test_post_is_not_retried_on_status(retry):
+    assert not retry.is_retry('POST', 429)
+    assert not retry.is_retry('POST', 503)
+    assert retry.is_retry('GET', 429)
+    assert not retry.is_retry('GET', 500)
+
+
+def test_default_timeout_only_when_none_is_given():
+    session = PooledSession((3.0, 30.0))
+    with mock.patch('requests.Session.request') as request:
+        session.request('POST', 'https://example.com')
+        assert request.call_args.kwargs['timeout'] == (3.0, 30.0)
+        session.request('POST', 'https://example.com', timeout=None)
+        assert request.call_args.kwargs['timeout'] == (3.0, 30.0)
+        session.request('POST', 'https://example.com', timeout=5)
+        assert request.call_args.kwargs['timeout'] == 5
+    session.close()
@@ -0,0 +1,79 @@
+# test_provider_endpoints.py
+# Tests for the shared request/stream helpers used by the async and streaming LLM paths.
+#
+import asyncio
+import os
+import sys
+#
+import pytest
+
+# Add the project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from App_Function_Libraries.LLM_Providers.Provider_Endpoints import ProviderEndpoint, build_chat_request, \
+    iter_sse_data, iter_stream_events, parse_stream_event
+
+
+OPENAI = ProviderEndpoint(name="openai", style="openai", url="https://example/v1/chat/completions",
+                          api_key="sk-test-key", model="gpt-test")
+ANTHROPIC = ProviderEndpoint(name="anthropic", style="anthropic", url="https://example/v1/messages",
+                             api_key="key", model="claude-test")
+
+
+def test_build_openai_request():
+    url, headers, payload = build_chat_request(OPENAI, "text", "summarize", 0.2, "sys", stream=True)
+    assert url == OPENAI.url
+    assert headers['Authorization'] == "Bearer sk-test-key"
+    assert payload['messages'][0] == {"role": "system", "content": "sys"}
+    assert payload['messages'][1]['content'] == "text \n\n\n\nsummarize"
+    assert payload['stream'] is True and payload['temperature'] == 0.2
+
+
+def test_iter_sse_data_joins_and_skips_comments():
+    lines = [": keep-alive", "data: {\"a\":", "data: 1}", "", b"data: [DONE]", ""]
+    assert list(iter_sse_data(lines)) == ["{\"a\":\n1}", "[DONE]"]
+
+
+def test_async_reader_frames_events_like_the_sync_one():
+    from App_Function_Libraries.LLM_Providers.Async_LLM_Calls import _aiter_stream_events
+    lines = [": keep-alive", "data: {\"a\":", "data: 1}", "", ":", "data: [DONE]"]
+
+    async def aiter_lines():
+        for line in lines:
+            yield line
+
+    async def collect():
+        return [event async for event in _aiter_stream_events(OPENAI, aiter_lines())]
+
+    assert asyncio.run(collect()) == list(iter_stream_events(OPENAI, lines)) == ["{\"a\":\n1}", "[DONE]"]
+
+
+def test_parse_openai_stream_events():
+    assert parse_stream_event(OPENAI, '{"choices":[{"delta":{"content":"Hi"},"finish_reason":null}]}') == ("Hi", False)
+    assert parse_stream_event(OPENAI, '{"choices":[{"delta":{},"finish_reason":"stop"}]}') == (None, True)
+    assert parse_stream_event(OPENAI, "[DONE]") == (None, True)
+
+
+def test_parse_anthropic_stream_events():
+    assert parse_stream_event(ANTHROPIC, '{"type":"content_block_delta","delta":{"text":"Hi"}}') == ("Hi", False)
+    assert parse_stream_event(ANTHROPIC, '{"type":"message_stop"}') == (None, True)
+    with pytest.raises(ValueError):
+        parse_stream_event(ANTHROPIC, '{"type":"error","error":{"message":"overloaded"}}')
+
+
+def test_local_stream_styles():
+    llama = ProviderEndpoint(name="llama.cpp", style="llamacpp", url="http://127.0.0.1:8080/completion")
+    kobold = ProviderEndpoint(name="kobold", style="kobold", url="http://127.0.0.1:5001/api/v1/generate")
+    ollama = ProviderEndpoint(name="ollama", style="ollama", url="http://127.0.0.1:11434/api/chat", model="llama3")
+
+    assert parse_stream_event(llama, '{"content":"Hi","stop":false}') == ("Hi", False)
+    assert parse_stream_event(llama, '{"content":"","stop":true}') == ("", True)
+
+    url, _, _ = build_chat_request(kobold, "text", "prompt", None, None, stream=True)
+    assert url == "http://127.0.0.1:5001/api/extra/generate/stream"
+    assert parse_stream_event(kobold, '{"token":"Hi"}') == ("Hi", False)
+
+    lines = ['{"message":{"content":"Hel"},"done":false}', '', '{"message":{"content":"lo"},"done":true}']
+    events = list(iter_stream_events(ollama, lines))
+    assert [parse_stream_event(ollama, e) for e in events] == [("Hel", False), ("lo", True)]
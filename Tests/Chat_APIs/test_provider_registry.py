@@ -0,0 +1,33 @@
+# test_provider_registry.py
+# Tests for the LLM provider registry used by chat_api_call/summarize dispatch.
+#
+import os
+import sys
+#
+import pytest
+
+# Add the project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from App_Function_Libraries.LLM_Providers.Provider_Registry import LLMRequest, ProviderRegistry
+
+
+def test_register_and_dispatch_is_case_insensitive():
+    registry = ProviderRegistry("chat")
+    registry.register("OpenAI", lambda r: f"{r.prompt}:{r.input_data}")
+    assert "openai" in registry
+    assert registry.dispatch(LLMRequest(api_name="OPENAI", input_data="text", prompt="summarize")) == "summarize:text"
+
+
+def test_aliases_share_adapter():
+    registry = ProviderRegistry("summarize")
+    registry.register("custom-openai", lambda r: "ok", aliases=("custom-openai-api",))
+    assert registry.get("custom-openai-api") is registry.get("custom-openai")
+    assert registry.names() == ["custom-openai", "custom-openai-api"]
+
+
+def test_unknown_provider_raises_value_error():
+    registry = ProviderRegistry("chat")
+    with pytest.raises(ValueError, match="Unsupported API endpoint: nope"):
+        registry.dispatch(LLMRequest(api_name="nope", input_data=""))
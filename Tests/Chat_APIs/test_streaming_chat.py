@@ -0,0 +1,123 @@
+# test_streaming_chat.py
+# End-to-end tests for the streamed chat path: a fake streaming HTTP response driven through
+# `stream_chat_api_call`, `chat_stream` and the Gradio `chat_wrapper_stream` generator.
+#
+import os
+import sys
+#
+import pytest
+import requests
+
+# Add the project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from App_Function_Libraries.Chat import chat_stream
+from App_Function_Libraries.LLM_Providers import Streaming_LLM_Calls
+from App_Function_Libraries.LLM_Providers.Provider_Endpoints import ProviderEndpoint
+
+
+OPENAI = ProviderEndpoint(name="openai", style="openai", url="https://example/v1/chat/completions",
+                          api_key="sk-test-key", model="gpt-test")
+
+SSE_LINES = ['data: {"choices":[{"delta":{"content":"Hel"},"finish_reason":null}]}', '',
+             ': keep-alive', '',
+             'data: {"choices":[{"delta":{"content":"lo"},"finish_reason":null}]}', '',
+             'data: {"choices":[{"delta":{"content":"!"},"finish_reason":"stop"}]}', '',
+             'data: [DONE]', '']
+
+
+class FakeStreamingResponse:
+    """Stands in for a `requests` response opened with stream=True; optionally fails after `fail_after` lines."""
+
+    def __init__(self, lines, status_code=200, fail_after=None):
+        self.lines = lines
+        self.status_code = status_code
+        self.fail_after = fail_after
+        self.text = ""
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed = True
+
+    def iter_lines(self, decode_unicode=False):
+        for number, line in enumerate(self.lines):
+            if number == self.fail_after:
+                raise requests.ConnectionError("connection reset by peer")
+            yield line
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    def post(self, url, headers=None, json=None, stream=False):
+        self.requests.append({"url": url, "json": json, "stream": stream})
+        return self.response
+
+
+@pytest.fixture
+def stream_response(monkeypatch):
+    """Serve `SSE_LINES` (or whatever the test puts on the response) to the streaming chat call."""
+    response = FakeStreamingResponse(list(SSE_LINES))
+    session = FakeSession(response)
+    monkeypatch.setattr(Streaming_LLM_Calls, "get_http_session", lambda: session)
+    monkeypatch.setattr(Streaming_LLM_Calls, "resolve_endpoint",
+                        lambda api_name, api_key=None, model=None: OPENAI if api_name == "openai" else None)
+    return response
+
+
+def test_chat_stream_yields_deltas_over_a_streamed_request(stream_response):
+    chunks = list(chat_stream("hi", [], {}, [], "openai", "sk-test-key", None, 0.5))
+    assert chunks == ["Hel", "lo", "!"]
+    assert stream_response.closed
+
+
+def test_chat_stream_mid_stream_error_yields_an_error_message(stream_response):
+    stream_response.fail_after = 4
+    chunks = list(chat_stream("hi", [], {}, [], "openai", "sk-test-key", None, 0.5))
+    assert chunks[0] == "Hel"
+    assert len(chunks) == 2 and "Error occurred while streaming" in chunks[1]
+    assert "connection reset by peer" in chunks[1]
+    assert stream_response.closed
+
+
+def test_chat_stream_reports_a_failed_status(stream_response):
+    stream_response.status_code = 500
+    chunks = list(chat_stream("hi", [], {}, [], "openai", "sk-test-key", None, 0.5))
+    assert len(chunks) == 1 and "Status code: 500" in chunks[0]
+
+
+def _run_chat_wrapper_stream(history):
+    pytest.importorskip("gradio")
+    from App_Function_Libraries.Gradio_UI.Chat_ui import chat_wrapper_stream
+    return list(chat_wrapper_stream("hi", history, {}, [], "openai", "sk-test-key", None, None, False, 0.5, None))
+
+
+def test_chat_wrapper_stream_builds_up_the_history(stream_response):
+    history = [("earlier", "answer")]
+    updates = _run_chat_wrapper_stream(history)
+
+    partial_histories = [chatbot for _, chatbot, _ in updates[:-1]]
+    assert partial_histories == [history + [("hi", "Hel")],
+                                 history + [("hi", "Hello")],
+                                 history + [("hi", "Hello!")]]
+    assert updates[-1] == ("Hello!", history + [("hi", "Hello!")], None)
+    # The Gradio state passed in is not mutated
+    assert history == [("earlier", "answer")]
+
+
+def test_chat_wrapper_stream_mid_stream_error_ends_with_an_error_message(stream_response):
+    stream_response.fail_after = 4
+    history = [("earlier", "answer")]
+    updates = _run_chat_wrapper_stream(history)
+
+    assert updates[0][1] == history + [("hi", "Hel")]
+    bot_message, chatbot, conversation_id = updates[-1]
+    assert bot_message.startswith("Hel") and "connection reset by peer" in bot_message
+    assert chatbot == history + [("hi", bot_message)]
+    assert stream_response.closed
@@ -4,7 +4,7 @@
 # Imports
 import os
 import sys
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, call
 # Third-party library imports
 import pytest
 #
@@ -21,9 +21,11 @@ print(f"Project root added to sys.path: {project_root}")
 # Local Imports
 from App_Function_Libraries.RAG.ChromaDB_Library import (
     preprocess_all_content, process_and_store_content, check_embedding_status,
-    reset_chroma_collection, vector_search, store_in_chroma, batched, situate_context, schedule_embedding,
-    embedding_api_url
+    reset_chroma_collection, vector_search, store_in_chroma, stream_to_vector_store, batched, situate_context, schedule_embedding,
+    embedding_api_url, contextualize_chunks, document_window, reembed_orphaned_chunks
 )
+from App_Function_Libraries.RAG.Dedup_Index import NearDuplicateIndex
+from App_Function_Libraries.RAG.Vector_Store import LocalVectorStore
 #
 ############################################
 # Fixtures for Reusable Mocking and Setup
@@ -54,11 +56,9 @@ def mock_collection():
     return mock_col
 
 @pytest.fixture
-def mock_chroma_client():
-    with patch('App_Function_Libraries.RAG.ChromaDB_Library.chromadb.PersistentClient') as mock_client_class:
-        mock_client = MagicMock()
-        mock_client_class.return_value = mock_client
-        yield mock_client
+def mock_vector_store():
+    with patch('App_Function_Libraries.RAG.ChromaDB_Library.vector_store') as mock_store:
+        yield mock_store
 
 @pytest.fixture
 def mock_database(mocker):
@@ -87,8 +87,8 @@ def mock_mark_media_processed(mocker):
     return mocker.patch("App_Function_Libraries.RAG.ChromaDB_Library.mark_media_as_processed")
 
 def test_preprocess_all_content(mock_unprocessed_media, mock_process_and_store, mock_mark_media_processed, mock_database, mocker):
-    # Mock get_unprocessed_media to return unprocessed media
-    mocker.patch('App_Function_Libraries.RAG.ChromaDB_Library.get_unprocessed_media', return_value=mock_unprocessed_media)
+    # Mock iter_unprocessed_media to stream unprocessed media
+    mocker.patch('App_Function_Libraries.RAG.ChromaDB_Library.iter_unprocessed_media', return_value=iter(mock_unprocessed_media))
 
     preprocess_all_content(database=mock_database, create_contextualized=False)
 
@@ -132,13 +132,14 @@ def mock_situate_context(mocker):
     return mocker.patch("App_Function_Libraries.RAG.ChromaDB_Library.situate_context", return_value="Context for chunk")
 
 
-@patch('App_Function_Libraries.RAG.ChromaDB_Library.chroma_client')
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.get_dedup_index', return_value=None)
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.vector_store')
 @patch('App_Function_Libraries.RAG.ChromaDB_Library.create_embeddings_batch')
 @patch('App_Function_Libraries.RAG.ChromaDB_Library.situate_context')
 @patch('App_Function_Libraries.RAG.ChromaDB_Library.chunk_for_embedding')
 @patch('App_Function_Libraries.RAG.ChromaDB_Library.process_chunks')
 def test_process_and_store_content(mock_process_chunks, mock_chunk_for_embedding, mock_situate_context,
-                                   mock_create_embeddings_batch, mock_chroma_client):
+                                   mock_create_embeddings_batch, mock_vector_store, mock_get_dedup_index):
     mock_database = MagicMock()
     mock_chunk_for_embedding.return_value = [{
         'text': 'Chunk 1',
@@ -152,8 +153,8 @@ def test_process_and_store_content(mock_process_chunks, mock_chunk_for_embedding
     mock_situate_context.return_value = "Contextualized chunk"
     mock_create_embeddings_batch.return_value = [[0.1, 0.2, 0.3]]
     mock_collection = MagicMock()
-    mock_chroma_client.get_collection.side_effect = Exception("Collection not found")
-    mock_chroma_client.create_collection.return_value = mock_collection
+    mock_vector_store.get_collection.side_effect = Exception("Collection not found")
+    mock_vector_store.create_collection.return_value = mock_collection
 
     process_and_store_content(
         database=mock_database,
@@ -170,27 +171,123 @@ def test_process_and_store_content(mock_process_chunks, mock_chunk_for_embedding
     mock_situate_context.assert_called_once()
     mock_create_embeddings_batch.assert_called_once()
 
-    # Check if get_collection was called
-    mock_chroma_client.get_collection.assert_called_once_with(name="test_collection")
+    # get_collection is called to store the chunks, then to remove vectors past the new chunk count
+    assert mock_vector_store.get_collection.call_args_list == [call(name="test_collection")] * 2
 
     # Check if create_collection was called after get_collection raised an exception
-    mock_chroma_client.create_collection.assert_called_once_with(name="test_collection")
+    mock_vector_store.create_collection.assert_called_once_with(name="test_collection")
 
     mock_collection.upsert.assert_called_once()
 
     # Check for both execute_query calls
     assert mock_database.execute_query.call_count == 2
     mock_database.execute_query.assert_any_call('UPDATE Media SET vector_processing = 1 WHERE id = ?', (1,))
-    mock_database.execute_query.assert_any_call('INSERT OR REPLACE INTO media_fts (rowid, title, content) SELECT id, title, content FROM Media WHERE id = ?', (1,))
+    mock_database.execute_query.assert_any_call('INSERT OR REPLACE INTO media_fts (rowid, title, content) SELECT id, title, decompress_text(content) FROM Media WHERE id = ?', (1,))
+
+
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.vector_store')
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.create_embeddings_batch')
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.chunk_for_embedding')
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.process_chunks')
+def test_process_and_store_content_skips_duplicate_chunks(mock_process_chunks, mock_chunk_for_embedding,
+                                                          mock_create_embeddings_batch, mock_vector_store, tmp_path):
+    dedup_index = NearDuplicateIndex(str(tmp_path / "dedup.db"))
+    text = "the quick brown fox jumps over the lazy dog near the river bank at dawn"
+    chunk_metadata = {'start_index': 0, 'end_index': 10, 'file_name': 'test.mp4', 'relative_position': 0.5}
+    mock_chunk_for_embedding.return_value = [{'text': text, 'metadata': chunk_metadata},
+                                             {'text': "something else entirely", 'metadata': chunk_metadata},
+                                             {'text': text.upper(), 'metadata': chunk_metadata}]
+    mock_create_embeddings_batch.side_effect = lambda texts, *args: [[0.1, 0.2]] * len(texts)
+    mock_collection = MagicMock()
+    mock_collection.metadata = {"embedding_dimension": 2}
+    mock_vector_store.get_collection.return_value = mock_collection
+
+    with patch('App_Function_Libraries.RAG.ChromaDB_Library.get_dedup_index', return_value=dedup_index):
+        process_and_store_content(database=MagicMock(), content="Test Content", collection_name="videos",
+                                  media_id=1, file_name="test.mp4", create_embeddings=True,
+                                  create_contextualized=False)
+
+    # The third chunk repeats the first, so only two chunks are embedded
+    assert mock_create_embeddings_batch.call_args.args[0] == [text, "something else entirely"]
+    assert mock_collection.upsert.call_args.kwargs['ids'] == ["1_chunk_1", "1_chunk_2"]
+    mock_collection.delete.assert_any_call(ids=["1_chunk_3"])
+    # Chunks past the end of the re-ingested document are removed
+    mock_collection.delete.assert_any_call(where={"$and": [{"media_id": "1"}, {"chunk_index": {"$gt": 3}}]})
+    assert dedup_index.duplicates_of("videos/1_chunk_1") == ["videos/1_chunk_3"]
+    dedup_index.close()
+
+
+ARTICLE = ("The committee met on Tuesday to review the proposed budget for the coming fiscal year and asked staff to "
+           "prepare a detailed report on deferred repairs before the next session in March.")
+
+
+@pytest.fixture
+def local_store(tmp_path):
+    store = LocalVectorStore(str(tmp_path / "vectors"))
+    dedup_index = NearDuplicateIndex(str(tmp_path / "dedup.db"))
+    with patch('App_Function_Libraries.RAG.ChromaDB_Library.vector_store', store), \
+            patch('App_Function_Libraries.RAG.ChromaDB_Library.get_dedup_index', return_value=dedup_index):
+        yield store, dedup_index
+    dedup_index.close()
+    store.close()
+
+
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.create_embeddings_batch')
+def test_reembed_orphaned_chunks(mock_create_embeddings_batch, local_store):
+    store, dedup_index = local_store
+    metadata = {"embedding_model": "m", "embedding_provider": "p"}
+    store.create_collection("docs").add(["1_chunk_1", "4_chunk_1"], [[1.0, 0.0], [0.5, 0.5]],
+                                        documents=[ARTICLE, "unrelated"],
+                                        metadatas=[{"media_id": "1", "chunk_index": 1, **metadata},
+                                                   {"media_id": "4", "chunk_index": 1, **metadata}])
+    dedup_index.register("docs/1_chunk_1", ARTICLE)
+    dedup_index.register("docs/2_chunk_3", ARTICLE)
+    dedup_index.register("docs/3_chunk_1", ARTICLE.upper())
+    dedup_index.remove(["docs/1_chunk_1"])
+    store.get_collection("docs").delete(ids=["1_chunk_1"])
+
+    # A failed embedding call leaves the orphans queued
+    mock_create_embeddings_batch.side_effect = ConnectionError("provider down")
+    assert reembed_orphaned_chunks() == 0
+    assert [key for key, _ in dedup_index.pending_orphans()] == ["docs/2_chunk_3", "docs/3_chunk_1"]
+
+    # The two orphans duplicate each other, so one of them is embedded with the collection's model
+    mock_create_embeddings_batch.side_effect = lambda texts, *args: [[0.0, 1.0]] * len(texts)
+    assert reembed_orphaned_chunks() == 1
+    assert mock_create_embeddings_batch.call_args.args[:3] == ([ARTICLE], "p", "m")
+    stored = store.get_collection("docs").get(ids=["2_chunk_3"], include=["metadatas"])
+    assert stored['metadatas'][0]['media_id'] == "2" and stored['metadatas'][0]['chunk_index'] == 3
+    assert dedup_index.pending_orphans() == []
+    assert dedup_index.duplicates_of("docs/2_chunk_3") == ["docs/3_chunk_1"]
+
+
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.create_embedding', return_value=[1.0, 0.0])
+def test_vector_search_finds_duplicates_through_their_canonical_chunk(mock_create_embedding, local_store):
+    store, dedup_index = local_store
+    metadata = {"embedding_model": "m", "embedding_provider": "p"}
+    store.create_collection("docs").add(
+        ["1_chunk_1", "1_chunk_2", "2_chunk_1"], [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]],
+        documents=[ARTICLE, "other text", "media two"],
+        metadatas=[{"media_id": "1", "chunk_index": 1, **metadata}, {"media_id": "1", "chunk_index": 2, **metadata},
+                   {"media_id": "2", "chunk_index": 1, **metadata}])
+    dedup_index.register("docs/1_chunk_1", ARTICLE)
+    # Media 3 was ingested into another collection, but its only chunk duplicates media 1's first chunk
+    dedup_index.register("videos_3/3_chunk_1", ARTICLE)
+
+    results = vector_search("docs", "budget", k=5, where={"media_id": {"$in": ["2", "3"]}})
+    assert [(r['metadata']['media_id'], r['metadata'].get('duplicate_of')) for r in results] == \
+        [("3", "1_chunk_1"), ("2", None)]
+    # Unfiltered searches are unchanged
+    assert [r['metadata']['media_id'] for r in vector_search("docs", "budget", k=5)] == ["1", "1", "2"]
 
 ##############################
 # Test: check_embedding_status
 ##############################
 
-@patch('App_Function_Libraries.RAG.ChromaDB_Library.chroma_client')
-def test_check_embedding_status(mock_chroma_client):
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.vector_store')
+def test_check_embedding_status(mock_vector_store):
     mock_collection = MagicMock()
-    mock_chroma_client.get_or_create_collection.return_value = mock_collection
+    mock_vector_store.get_or_create_collection.return_value = mock_collection
     mock_collection.get.return_value = {'ids': ['id1', 'id2'],
                                         'embeddings': [[0.1, 0.2], [0.3, 0.4]],
                                         'metadatas': [{"key1": "value1"}, {"key2": "value2"}]}
@@ -198,33 +295,30 @@ def test_check_embedding_status(mock_chroma_client):
     status, details = check_embedding_status("Test Item", {"Test Item": 1})
 
     assert "Embedding exists" in status, f"Expected embedding to exist, got status: {status}"
-    mock_chroma_client.get_or_create_collection.assert_called_once_with(name="all_content_embeddings")
+    mock_vector_store.get_or_create_collection.assert_called_once_with(name="all_content_embeddings")
 
 ##############################
 # Test: reset_chroma_collection
 ##############################
 
-@patch('App_Function_Libraries.RAG.ChromaDB_Library.chroma_client')
-def test_reset_chroma_collection(mock_chroma_client):
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.get_dedup_index')
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.vector_store')
+def test_reset_chroma_collection(mock_vector_store, mock_get_dedup_index):
     reset_chroma_collection("test_collection")
 
-    mock_chroma_client.delete_collection.assert_called_once_with("test_collection")
-    mock_chroma_client.create_collection.assert_called_once_with("test_collection")
+    mock_vector_store.delete_collection.assert_called_once_with("test_collection")
+    mock_vector_store.create_collection.assert_called_once_with("test_collection")
+    mock_get_dedup_index.return_value.remove_collection.assert_called_once_with("test_collection")
 
 ##############################
 # Test: store_in_chroma
 ##############################
 
-@patch('App_Function_Libraries.RAG.ChromaDB_Library.chroma_client')
-def test_store_in_chroma(mock_chroma_client):
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.vector_store')
+def test_store_in_chroma(mock_vector_store):
     mock_collection = MagicMock()
-    mock_chroma_client.get_collection.return_value = mock_collection
-    mock_collection.get.return_value = {
-        'ids': ['id1', 'id2'],
-        'embeddings': [[0.1, 0.2], [0.3, 0.4]],
-        'metadatas': [{"key1": "value1"}, {"key2": "value2"}],
-        'documents': ["Text 1", "Text 2"]
-    }
+    mock_collection.metadata = {"embedding_dimension": 2}
+    mock_vector_store.get_collection.return_value = mock_collection
 
     store_in_chroma(
         collection_name="test_collection",
@@ -234,13 +328,57 @@ def test_store_in_chroma(mock_chroma_client):
         metadatas=[{"key1": "value1"}, {"key2": "value2"}]
     )
 
-    mock_chroma_client.get_collection.assert_called_once_with(name="test_collection")
+    mock_vector_store.get_collection.assert_called_once_with(name="test_collection")
     mock_collection.upsert.assert_called_once_with(
         documents=["Text 1", "Text 2"],
         embeddings=[[0.1, 0.2], [0.3, 0.4]],
         ids=["id1", "id2"],
         metadatas=[{"key1": "value1"}, {"key2": "value2"}]
     )
+    # The dimension comes from collection metadata and nothing is read back after the upsert
+    mock_collection.get.assert_not_called()
+
+
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.vector_store')
+def test_store_in_chroma_recreates_collection_on_dimension_mismatch(mock_vector_store):
+    old_collection = MagicMock()
+    old_collection.metadata = {"embedding_dimension": 3}
+    new_collection = MagicMock()
+    new_collection.metadata = {}
+    mock_vector_store.get_collection.return_value = old_collection
+    mock_vector_store.create_collection.return_value = new_collection
+
+    collection = store_in_chroma("test_collection", ["Text 1"], [[0.1, 0.2]], ["id1"], [{}])
+
+    assert collection is new_collection
+    mock_vector_store.delete_collection.assert_called_once_with(name="test_collection")
+    new_collection.modify.assert_called_once_with(metadata={"embedding_dimension": 2})
+    old_collection.upsert.assert_not_called()
+    new_collection.upsert.assert_called_once()
+
+
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.get_vector_ingest_settings')
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.vector_store')
+def test_stream_to_vector_store_batches_and_samples(mock_vector_store, mock_settings):
+    mock_settings.return_value = {'upsert_batch_size': 2, 'verify_upserts': True, 'verify_sample_size': 1}
+    mock_collection = MagicMock()
+    mock_collection.metadata = {"embedding_dimension": 2}
+    mock_collection.get.side_effect = lambda ids, include: {'ids': ids, 'embeddings': [[0.0, 0.0]] * len(ids)}
+    mock_vector_store.get_collection.return_value = mock_collection
+    consumed = []
+
+    def records():
+        for i in range(5):
+            consumed.append(i)
+            yield f"id{i}", f"Text {i}", [float(i), 1.0], {"i": i}
+
+    stream_to_vector_store("test_collection", records())
+
+    assert consumed == list(range(5))
+    assert [len(call.kwargs['ids']) for call in mock_collection.upsert.call_args_list] == [2, 2, 1]
+    # Verification reads back one sampled id per batch, embeddings only
+    assert [len(call.kwargs['ids']) for call in mock_collection.get.call_args_list] == [1, 1, 1]
+    assert all(call.kwargs['include'] == ["embeddings"] for call in mock_collection.get.call_args_list)
 
 ##############################
 # Test: vector_search
@@ -251,11 +389,11 @@ def mock_create_embedding(mocker):
     """Fixture to mock create_embedding."""
     return mocker.patch("App_Function_Libraries.RAG.ChromaDB_Library.create_embedding", return_value=[0.1, 0.2])
 
-@patch('App_Function_Libraries.RAG.ChromaDB_Library.chroma_client')
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.vector_store')
 @patch('App_Function_Libraries.RAG.ChromaDB_Library.create_embedding')
-def test_vector_search(mock_create_embedding, mock_chroma_client):
+def test_vector_search(mock_create_embedding, mock_vector_store):
     mock_collection = MagicMock()
-    mock_chroma_client.get_collection.return_value = mock_collection
+    mock_vector_store.get_collection.return_value = mock_collection
     mock_collection.get.return_value = {
         'metadatas': [{'embedding_model': 'test_model', 'embedding_provider': 'test_provider'}]
     }
@@ -267,7 +405,7 @@ def test_vector_search(mock_create_embedding, mock_chroma_client):
 
     results = vector_search("test_collection", "query text")
 
-    mock_chroma_client.get_collection.assert_called_once_with(name="test_collection")
+    mock_vector_store.get_collection.assert_called_once_with(name="test_collection")
     mock_collection.get.assert_called_once_with(limit=10, include=["metadatas"])
     mock_create_embedding.assert_called_once_with("query text", 'test_provider', 'test_model', embedding_api_url)
     mock_collection.query.assert_called_once()
@@ -289,6 +427,49 @@ def test_batched(iterable, batch_size, expected_batches):
     batches = list(batched(iterable, batch_size))
     assert batches == expected_batches
 
+##############################
+# Test: contextualize_chunks
+##############################
+
+def test_document_window_shares_windows_between_neighbours():
+    content = "x" * 1000
+    near_a = {'metadata': {'start_index': 210, 'end_index': 260}}
+    near_b = {'metadata': {'start_index': 260, 'end_index': 300}}
+    assert document_window(content, near_a, 2000, 200) == (0, content)
+    start_a, window_a = document_window(content, near_a, 500, 200)
+    start_b, window_b = document_window(content, near_b, 500, 200)
+    assert start_a == start_b and window_a == window_b and len(window_a) == 200
+    assert start_a <= 210 and start_a + 200 >= 300
+
+
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.store_chunk_context_checkpoint')
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.get_chunk_context_checkpoints')
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.situate_context')
+def test_contextualize_chunks_resumes_from_checkpoints(mock_situate_context, mock_get_checkpoints, mock_store):
+    import hashlib
+    chunks = [{'text': 'first chunk', 'metadata': {}}, {'text': 'second chunk', 'metadata': {}}]
+    done_key = f"0:{hashlib.sha256(b'first chunk').hexdigest()}"
+    mock_get_checkpoints.return_value = {done_key: "cached context"}
+    mock_situate_context.return_value = "fresh context"
+
+    contexts = contextualize_chunks("openai", "doc", chunks, max_workers=2)
+
+    assert contexts == ["cached context", "fresh context"]
+    mock_situate_context.assert_called_once_with("openai", "doc", "second chunk")
+    mock_store.assert_called_once()
+
+
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.get_contextual_chunking_settings',
+       return_value={'max_document_chars': 60000, 'window_chars': 16000, 'max_retries': 0})
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.store_chunk_context_checkpoint')
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.get_chunk_context_checkpoints', return_value={})
+@patch('App_Function_Libraries.RAG.ChromaDB_Library.situate_context', return_value="OpenAI: Error: rate limited")
+def test_contextualize_chunks_raises_on_failed_chunks(mock_situate_context, mock_get_checkpoints, mock_store,
+                                                      mock_settings):
+    with pytest.raises(RuntimeError):
+        contextualize_chunks("openai", "doc", [{'text': 'chunk', 'metadata': {}}], max_workers=1)
+    mock_store.assert_not_called()
+
 #
 # End of File
 ####################################################################################################
@@ -19,21 +19,28 @@ from App_Function_Libraries.RAG.RAG_Library_2 import (
 )
 
 
+def sql_filtered_search_db(rows: List[Dict[str, Any]]):
+    """search_db stand-in that applies the media_ids restriction the way the SQL query does."""
+    def search_db(query, fields, keywords, page=1, results_per_page=10, media_ids=None):
+        if media_ids is None:
+            return rows
+        allowed = {str(media_id) for media_id in media_ids}
+        return [row for row in rows if str(row['id']) in allowed]
+    return search_db
+
+
 class TestRAGFunctions(unittest.TestCase):
     """
     Unit tests for RAG-related functions.
     """
 
-    @patch('App_Function_Libraries.RAG.RAG_Library_2.fetch_keywords_for_media')
-    def test_fetch_relevant_media_ids_success(self, mock_fetch_keywords_for_media):
+    @patch('App_Function_Libraries.RAG.RAG_Library_2.fetch_media_ids_for_keywords')
+    def test_fetch_relevant_media_ids_success(self, mock_fetch_media_ids_for_keywords):
         """
         Test fetch_relevant_media_ids with valid keywords.
         """
-        # Setup mock return values
-        mock_fetch_keywords_for_media.side_effect = lambda keyword: {
-            'geography': [1, 2],
-            'cities': [2, 3, 4]
-        }.get(keyword, [])
+        # Setup mock return value: the union served by the keyword index
+        mock_fetch_media_ids_for_keywords.return_value = {1, 2, 3, 4}
 
         # Input keywords
         keywords = ['geography', 'cities']
@@ -44,29 +51,27 @@ class TestRAGFunctions(unittest.TestCase):
         # Expected result is the union of media_ids: [1,2,3,4]
         self.assertEqual(sorted(result), [1, 2, 3, 4])
 
-        # Assert fetch_keywords_for_media was called correctly
-        mock_fetch_keywords_for_media.assert_any_call('geography')
-        mock_fetch_keywords_for_media.assert_any_call('cities')
-        self.assertEqual(mock_fetch_keywords_for_media.call_count, 2)
+        # All keywords are resolved in a single index lookup
+        mock_fetch_media_ids_for_keywords.assert_called_once_with(keywords)
 
-    @patch('App_Function_Libraries.RAG.RAG_Library_2.fetch_keywords_for_media')
-    def test_fetch_relevant_media_ids_empty_keywords(self, mock_fetch_keywords_for_media):
+    @patch('App_Function_Libraries.RAG.RAG_Library_2.fetch_media_ids_for_keywords')
+    def test_fetch_relevant_media_ids_empty_keywords(self, mock_fetch_media_ids_for_keywords):
         """
         Test fetch_relevant_media_ids with an empty keywords list.
         """
         keywords = []
         result = fetch_relevant_media_ids(keywords)
         self.assertEqual(result, [])
-        mock_fetch_keywords_for_media.assert_not_called()
+        mock_fetch_media_ids_for_keywords.assert_not_called()
 
-    @patch('App_Function_Libraries.RAG.RAG_Library_2.fetch_keywords_for_media')
+    @patch('App_Function_Libraries.RAG.RAG_Library_2.fetch_media_ids_for_keywords')
     @patch('App_Function_Libraries.RAG.RAG_Library_2.logging')
-    def test_fetch_relevant_media_ids_exception(self, mock_logging, mock_fetch_keywords_for_media):
+    def test_fetch_relevant_media_ids_exception(self, mock_logging, mock_fetch_media_ids_for_keywords):
         """
-        Test fetch_relevant_media_ids when fetch_keywords_for_media raises an exception.
+        Test fetch_relevant_media_ids when the keyword index lookup raises an exception.
         """
         # Configure the mock to raise an exception
-        mock_fetch_keywords_for_media.side_effect = Exception("Database error")
+        mock_fetch_media_ids_for_keywords.side_effect = Exception("Database error")
 
         keywords = ['geography', 'cities']
         result = fetch_relevant_media_ids(keywords)
@@ -74,27 +79,24 @@ class TestRAGFunctions(unittest.TestCase):
         # The function should return an empty list upon exception
         self.assertEqual(result, [])
 
-        # Assert that errors were logged for both keywords
-        mock_logging.error.assert_any_call("Error fetching relevant media IDs for keyword 'geography': Database error")
-        mock_logging.error.assert_any_call("Error fetching relevant media IDs for keyword 'cities': Database error")
-        self.assertEqual(mock_logging.error.call_count, 2)
+        # Assert that the error was logged once
+        mock_logging.error.assert_called_once_with(
+            "Error fetching relevant media IDs for keywords ['geography', 'cities']: Database error")
 
     @patch('App_Function_Libraries.RAG.RAG_Library_2.vector_search')
-    @patch('App_Function_Libraries.RAG.RAG_Library_2.chroma_client')
-    def test_perform_vector_search_with_relevant_media_ids(self, mock_chroma_client, mock_vector_search):
+    @patch('App_Function_Libraries.RAG.RAG_Library_2.vector_store')
+    def test_perform_vector_search_with_relevant_media_ids(self, mock_vector_store, mock_vector_search):
         """
         Test perform_vector_search with relevant_media_ids provided.
         """
-        # Setup mock chroma_client to return a list of collections
-        mock_collection = MagicMock()
-        mock_collection.name = 'collection1'
-        mock_chroma_client.list_collections.return_value = [mock_collection]
+        # Setup mock vector_store to return a list of collection names
+        mock_vector_store.list_collections.return_value = ['collection1']
 
         # Setup mock vector_search to return search results
+        # Chroma applies the where clause, so only matching media come back
         mock_vector_search.return_value = [
-            {'content': 'Document 1', 'metadata': {'media_id': 1}},
-            {'content': 'Document 2', 'metadata': {'media_id': 2}},
-            {'content': 'Document 3', 'metadata': {'media_id': 3}},
+            {'content': 'Document 1', 'metadata': {'media_id': '1'}},
+            {'content': 'Document 3', 'metadata': {'media_id': '3'}},
         ]
 
         # Input parameters
@@ -104,29 +106,27 @@ class TestRAGFunctions(unittest.TestCase):
         # Call the function
         result = perform_vector_search(query, relevant_media_ids)
 
-        # Expected to filter out media_id 2
         expected = [
-            {'content': 'Document 1', 'metadata': {'media_id': 1}},
-            {'content': 'Document 3', 'metadata': {'media_id': 3}},
+            {'content': 'Document 1', 'metadata': {'media_id': '1'}},
+            {'content': 'Document 3', 'metadata': {'media_id': '3'}},
         ]
         self.assertEqual(result, expected)
 
-        # Assert chroma_client.list_collections was called once
-        mock_chroma_client.list_collections.assert_called_once()
+        # Assert vector_store.list_collections was called once
+        mock_vector_store.list_collections.assert_called_once()
 
-        # Assert vector_search was called with correct arguments
-        mock_vector_search.assert_called_once_with('collection1', query, k=10)
+        # The media filter is pushed down into the Chroma query (media_id is stored as a string)
+        mock_vector_search.assert_called_once_with('collection1', query, k=10,
+                                                   where={'media_id': {'$in': ['1', '3']}})
 
     @patch('App_Function_Libraries.RAG.RAG_Library_2.vector_search')
-    @patch('App_Function_Libraries.RAG.RAG_Library_2.chroma_client')
-    def test_perform_vector_search_without_relevant_media_ids(self, mock_chroma_client, mock_vector_search):
+    @patch('App_Function_Libraries.RAG.RAG_Library_2.vector_store')
+    def test_perform_vector_search_without_relevant_media_ids(self, mock_vector_store, mock_vector_search):
         """
         Test perform_vector_search without relevant_media_ids (None).
         """
-        # Setup mock chroma_client to return a list of collections
-        mock_collection = MagicMock()
-        mock_collection.name = 'collection1'
-        mock_chroma_client.list_collections.return_value = [mock_collection]
+        # Setup mock vector_store to return a list of collection names
+        mock_vector_store.list_collections.return_value = ['collection1']
 
         # Setup mock vector_search to return search results
         mock_vector_search.return_value = [
@@ -148,11 +148,11 @@ class TestRAGFunctions(unittest.TestCase):
         ]
         self.assertEqual(result, expected)
 
-        # Assert chroma_client.list_collections was called once
-        mock_chroma_client.list_collections.assert_called_once()
+        # Assert vector_store.list_collections was called once
+        mock_vector_store.list_collections.assert_called_once()
 
-        # Assert vector_search was called with correct arguments
-        mock_vector_search.assert_called_once_with('collection1', query, k=10)
+        # Assert vector_search was called without a filter
+        mock_vector_search.assert_called_once_with('collection1', query, k=10, where=None)
 
     @patch('App_Function_Libraries.RAG.RAG_Library_2.search_db')
     def test_perform_full_text_search_with_relevant_media_ids(self, mock_search_db):
@@ -160,11 +160,11 @@ class TestRAGFunctions(unittest.TestCase):
         Test perform_full_text_search with relevant_media_ids provided.
         """
         # Setup mock search_db to return search results
-        mock_search_db.return_value = [
+        mock_search_db.side_effect = sql_filtered_search_db([
             {'content': 'Full text document 1', 'id': 1},
             {'content': 'Full text document 2', 'id': 2},
             {'content': 'Full text document 3', 'id': 3},
-        ]
+        ])
 
         # Input parameters
         query = 'full text query'
@@ -182,7 +182,7 @@ class TestRAGFunctions(unittest.TestCase):
 
         # Assert search_db was called with correct arguments
         mock_search_db.assert_called_once_with(
-            query, ['content'], '', page=1, results_per_page=10)
+            query, ['content'], '', page=1, results_per_page=10, media_ids=relevant_media_ids)
 
     @patch('App_Function_Libraries.RAG.RAG_Library_2.search_db')
     def test_perform_full_text_search_without_relevant_media_ids(self, mock_search_db):
@@ -190,10 +190,10 @@ class TestRAGFunctions(unittest.TestCase):
         Test perform_full_text_search without relevant_media_ids (None).
         """
         # Setup mock search_db to return search results
-        mock_search_db.return_value = [
+        mock_search_db.side_effect = sql_filtered_search_db([
             {'content': 'Full text document 1', 'id': 1},
             {'content': 'Full text document 2', 'id': 2},
-        ]
+        ])
 
         # Input parameters
         query = 'full text query'
@@ -211,7 +211,7 @@ class TestRAGFunctions(unittest.TestCase):
 
         # Assert search_db was called with correct arguments
         mock_search_db.assert_called_once_with(
-            query, ['content'], '', page=1, results_per_page=10)
+            query, ['content'], '', page=1, results_per_page=10, media_ids=relevant_media_ids)
 
     @patch('App_Function_Libraries.RAG.RAG_Library_2.search_db')
     def test_perform_full_text_search_empty_results(self, mock_search_db):
@@ -234,43 +234,28 @@ class TestRAGFunctions(unittest.TestCase):
 
         # Assert search_db was called with correct arguments
         mock_search_db.assert_called_once_with(
-            query, ['content'], '', page=1, results_per_page=10)
+            query, ['content'], '', page=1, results_per_page=10, media_ids=relevant_media_ids)
 
-    @patch('App_Function_Libraries.RAG.RAG_Library_2.fetch_keywords_for_media')
-    @patch('App_Function_Libraries.RAG.RAG_Library_2.logging')
-    def test_fetch_relevant_media_ids_partial_failure(self, mock_logging, mock_fetch_keywords_for_media):
+    @patch('App_Function_Libraries.RAG.RAG_Library_2.vector_store')
+    @patch('App_Function_Libraries.RAG.RAG_Library_2.vector_search')
+    def test_perform_vector_search_no_matching_media(self, mock_vector_search, mock_vector_store):
         """
-        Test fetch_relevant_media_ids when fetch_keywords_for_media partially fails.
+        Test perform_vector_search when the keyword filter matched no media.
         """
+        result = perform_vector_search('sample query', [])
 
-        # Configure the mock to raise an exception for one keyword
-        def side_effect(keyword):
-            if keyword == 'geography':
-                return [1, 2]
-            elif keyword == 'cities':
-                raise Exception("Database error")
-            return []
-
-        mock_fetch_keywords_for_media.side_effect = side_effect
-
-        keywords = ['geography', 'cities']
-        result = fetch_relevant_media_ids(keywords)
-
-        # The function should still return media_ids for 'geography' and skip 'cities'
-        self.assertEqual(sorted(result), [1, 2])
-
-        # Assert that an error was logged for 'cities'
-        mock_logging.error.assert_called_once_with(
-            "Error fetching relevant media IDs for keyword 'cities': Database error")
+        self.assertEqual(result, [])
+        mock_vector_store.list_collections.assert_not_called()
+        mock_vector_search.assert_not_called()
 
-    @patch('App_Function_Libraries.RAG.RAG_Library_2.chroma_client')
+    @patch('App_Function_Libraries.RAG.RAG_Library_2.vector_store')
     @patch('App_Function_Libraries.RAG.RAG_Library_2.vector_search')
-    def test_perform_vector_search_no_collections(self, mock_vector_search, mock_chroma_client):
+    def test_perform_vector_search_no_collections(self, mock_vector_search, mock_vector_store):
         """
         Test perform_vector_search when there are no collections.
         """
-        # Setup mock chroma_client to return an empty list of collections
-        mock_chroma_client.list_collections.return_value = []
+        # Setup mock vector_store to return an empty list of collections
+        mock_vector_store.list_collections.return_value = []
 
         # Input parameters
         query = 'sample query'
@@ -283,23 +268,19 @@ class TestRAGFunctions(unittest.TestCase):
         expected = []
         self.assertEqual(result, expected)
 
-        # Assert chroma_client.list_collections was called once
-        mock_chroma_client.list_collections.assert_called_once()
+        # Assert vector_store.list_collections was called once
+        mock_vector_store.list_collections.assert_called_once()
 
         # Assert vector_search was not called since there are no collections
         mock_vector_search.assert_not_called()
 
-    @patch('App_Function_Libraries.RAG.RAG_Library_2.fetch_keywords_for_media')
-    def test_fetch_relevant_media_ids_duplicate_media_ids(self, mock_fetch_keywords_for_media):
+    @patch('App_Function_Libraries.RAG.RAG_Library_2.fetch_media_ids_for_keywords')
+    def test_fetch_relevant_media_ids_duplicate_media_ids(self, mock_fetch_media_ids_for_keywords):
         """
         Test fetch_relevant_media_ids with duplicate media_ids across keywords.
         """
-        # Setup mock return values with overlapping media_ids
-        mock_fetch_keywords_for_media.side_effect = lambda keyword: {
-            'science': [1, 2, 3],
-            'technology': [3, 4, 5],
-            'engineering': [5, 6],
-        }.get(keyword, [])
+        # The index returns a set, so media tagged with several keywords appear once
+        mock_fetch_media_ids_for_keywords.return_value = {1, 2, 3} | {3, 4, 5} | {5, 6}
 
         # Input keywords
         keywords = ['science', 'technology', 'engineering']
@@ -309,12 +290,8 @@ class TestRAGFunctions(unittest.TestCase):
 
         # Expected result is the unique union of media_ids: [1,2,3,4,5,6]
         self.assertEqual(sorted(result), [1, 2, 3, 4, 5, 6])
-
-        # Assert fetch_keywords_for_media was called correctly
-        mock_fetch_keywords_for_media.assert_any_call('science')
-        mock_fetch_keywords_for_media.assert_any_call('technology')
-        mock_fetch_keywords_for_media.assert_any_call('engineering')
-        self.assertEqual(mock_fetch_keywords_for_media.call_count, 3)
+        self.assertEqual(len(result), 6)
+        mock_fetch_media_ids_for_keywords.assert_called_once_with(keywords)
 
     @patch('App_Function_Libraries.RAG.RAG_Library_2.search_db')
     def test_perform_full_text_search_case_insensitive_filtering(self, mock_search_db):
@@ -322,11 +299,11 @@ class TestRAGFunctions(unittest.TestCase):
         Test perform_full_text_search with case-insensitive filtering of media_ids.
         """
         # Setup mock search_db to return mixed-case media_ids
-        mock_search_db.return_value = [
+        mock_search_db.side_effect = sql_filtered_search_db([
             {'content': 'Full text document 1', 'id': '1'},
             {'content': 'Full text document 2', 'id': '2'},
             {'content': 'Full text document 3', 'id': '3'},
-        ]
+        ])
 
         # Input parameters with media_ids as strings
         query = 'full text query'
@@ -344,7 +321,7 @@ class TestRAGFunctions(unittest.TestCase):
 
         # Assert search_db was called with correct arguments
         mock_search_db.assert_called_once_with(
-            query, ['content'], '', page=1, results_per_page=10)
+            query, ['content'], '', page=1, results_per_page=10, media_ids=relevant_media_ids)
 
     @patch('App_Function_Libraries.RAG.RAG_Library_2.search_db')
     def test_perform_full_text_search_multiple_pages(self, mock_search_db):
@@ -353,13 +330,13 @@ class TestRAGFunctions(unittest.TestCase):
         Note: The current implementation fetches only the first page.
         """
         # Setup mock search_db to return results from the first page
-        mock_search_db.return_value = [
+        mock_search_db.side_effect = sql_filtered_search_db([
             {'content': 'Full text document 1', 'id': 1},
             {'content': 'Full text document 2', 'id': 2},
             {'content': 'Full text document 3', 'id': 3},
             {'content': 'Full text document 4', 'id': 4},
             {'content': 'Full text document 5', 'id': 5},
-        ]
+        ])
 
         # Input parameters
         query = 'full text query'
@@ -380,34 +357,32 @@ class TestRAGFunctions(unittest.TestCase):
 
         # Assert search_db was called with correct arguments
         mock_search_db.assert_called_once_with(
-            query, ['content'], '', page=1, results_per_page=10)
+            query, ['content'], '', page=1, results_per_page=10, media_ids=relevant_media_ids)
 
-    @patch('App_Function_Libraries.RAG.RAG_Library_2.chroma_client')
+    @patch('App_Function_Libraries.RAG.RAG_Library_2.vector_store')
     @patch('App_Function_Libraries.RAG.RAG_Library_2.vector_search')
-    def test_perform_vector_search_multiple_collections(self, mock_vector_search, mock_chroma_client):
+    def test_perform_vector_search_multiple_collections(self, mock_vector_search, mock_vector_store):
         """
         Test perform_vector_search with multiple collections.
         """
-        # Setup mock chroma_client to return multiple collections
-        mock_collection1 = MagicMock()
-        mock_collection1.name = 'collection1'
-        mock_collection2 = MagicMock()
-        mock_collection2.name = 'collection2'
-        mock_chroma_client.list_collections.return_value = [mock_collection1, mock_collection2]
+        # Setup mock vector_store to return multiple collections
+        mock_vector_store.list_collections.return_value = ['collection1', 'collection2']
 
         # Setup mock vector_search to return different results for each collection
-        def vector_search_side_effect(collection_name, query, k):
-            if collection_name == 'collection1':
-                return [
-                    {'content': 'Collection1 Document 1', 'metadata': {'media_id': 1}},
-                    {'content': 'Collection1 Document 2', 'metadata': {'media_id': 2}},
-                ]
-            elif collection_name == 'collection2':
-                return [
-                    {'content': 'Collection2 Document 1', 'metadata': {'media_id': 3}},
-                    {'content': 'Collection2 Document 2', 'metadata': {'media_id': 4}},
-                ]
-            return []
+        def vector_search_side_effect(collection_name, query, k, where=None):
+            results = {
+                'collection1': [
+                    {'content': 'Collection1 Document 1', 'metadata': {'media_id': '1'}},
+                    {'content': 'Collection1 Document 2', 'metadata': {'media_id': '2'}},
+                ],
+                'collection2': [
+                    {'content': 'Collection2 Document 1', 'metadata': {'media_id': '3'}},
+                    {'content': 'Collection2 Document 2', 'metadata': {'media_id': '4'}},
+                ],
+            }.get(collection_name, [])
+            # Emulate Chroma's $in metadata filter
+            allowed = where['media_id']['$in'] if where else None
+            return [r for r in results if allowed is None or r['metadata']['media_id'] in allowed]
 
         mock_vector_search.side_effect = vector_search_side_effect
 
@@ -420,17 +395,18 @@ class TestRAGFunctions(unittest.TestCase):
 
         # Expected to filter and include media_id 2 and 3
         expected = [
-            {'content': 'Collection1 Document 2', 'metadata': {'media_id': 2}},
-            {'content': 'Collection2 Document 1', 'metadata': {'media_id': 3}},
+            {'content': 'Collection1 Document 2', 'metadata': {'media_id': '2'}},
+            {'content': 'Collection2 Document 1', 'metadata': {'media_id': '3'}},
         ]
         self.assertEqual(result, expected)
 
-        # Assert chroma_client.list_collections was called once
-        mock_chroma_client.list_collections.assert_called_once()
+        # Assert vector_store.list_collections was called once
+        mock_vector_store.list_collections.assert_called_once()
 
-        # Assert vector_search was called twice with correct arguments
-        mock_vector_search.assert_any_call('collection1', query, k=10)
-        mock_vector_search.assert_any_call('collection2', query, k=10)
+        # Assert vector_search was called twice with the pushed-down filter
+        where = {'media_id': {'$in': ['2', '3']}}
+        mock_vector_search.assert_any_call('collection1', query, k=10, where=where)
+        mock_vector_search.assert_any_call('collection2', query, k=10, where=where)
         self.assertEqual(mock_vector_search.call_count, 2)
 
     @patch('App_Function_Libraries.RAG.RAG_Library_2.search_db')
@@ -439,12 +415,12 @@ class TestRAGFunctions(unittest.TestCase):
         Test perform_full_text_search where some media_ids do not match the relevant_media_ids.
         """
         # Setup mock search_db to return search results
-        mock_search_db.return_value = [
+        mock_search_db.side_effect = sql_filtered_search_db([
             {'content': 'Full text document 1', 'id': 1},
             {'content': 'Full text document 2', 'id': 2},
             {'content': 'Full text document 3', 'id': 3},
             {'content': 'Full text document 4', 'id': 4},
-        ]
+        ])
 
         # Input parameters
         query = 'full text query'
@@ -462,7 +438,7 @@ class TestRAGFunctions(unittest.TestCase):
 
         # Assert search_db was called with correct arguments
         mock_search_db.assert_called_once_with(
-            query, ['content'], '', page=1, results_per_page=10)
+            query, ['content'], '', page=1, results_per_page=10, media_ids=relevant_media_ids)
 
 
 if __name__ == '__main__':
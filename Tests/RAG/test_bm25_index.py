@@ -0,0 +1,101 @@
+# test_bm25_index.py
+# Description: Tests for the persistent BM25 index in App_Function_Libraries/RAG/BM25_Index.py
+#
+# Imports
+import math
+import os
+import sys
+#
+# Third-party library imports
+import pytest
+#
+####################################################################################################
+#
+# Add the project root (parent directory of App_Function_Libraries) to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+# Local Imports
+from App_Function_Libraries.RAG.BM25_Index import BM25Index, tokenize
+#
+####################################################################################################
+
+DOCS = [
+    ("1", "the cat sat on the mat"),
+    ("2", "dogs and cats are pets"),
+    ("3", "the quick brown fox jumps over the lazy dog"),
+]
+
+
+def reference_bm25(query, docs, k1=1.5, b=0.75):
+    tokenized = {doc_id: tokenize(text) for doc_id, text in docs}
+    avg_length = sum(len(tokens) for tokens in tokenized.values()) / len(tokenized)
+    scores = {}
+    for doc_id, tokens in tokenized.items():
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in other for other in tokenized.values())
+            tf = tokens.count(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(tokenized) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avg_length))
+        if score:
+            scores[doc_id] = score
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+@pytest.fixture
+def index(tmp_path):
+    bm25 = BM25Index(str(tmp_path / "bm25.db"), 'document')
+    bm25.add_documents(DOCS)
+    yield bm25
+    bm25.close()
+
+
+def test_search_matches_reference_scores(index):
+    results = index.search("the dog", top_k=10)
+    expected = reference_bm25("the dog", DOCS)
+    assert [doc_id for doc_id, _ in results] == [doc_id for doc_id, _ in expected]
+    for (_, score), (_, expected_score) in zip(results, expected):
+        assert score == pytest.approx(expected_score)
+
+
+def test_top_k_and_unknown_terms(index):
+    assert len(index.search("the cat dog", top_k=1)) == 1
+    assert index.search("zebra", top_k=5) == []
+
+
+def test_update_and_remove_are_incremental(index):
+    index.add_documents([("2", "a zebra")])
+    assert len(index) == 3
+    assert [doc_id for doc_id, _ in index.search("zebra")] == ["2"]
+    assert index.search("pets") == []
+
+    index.remove_documents(["2"])
+    assert len(index) == 2
+    assert index.search("zebra") == []
+    # Corpus statistics (document count, average length) follow the removal
+    remaining = [(doc_id, text) for doc_id, text in DOCS if doc_id != "2"]
+    results = index.search("the lazy cat")
+    expected = reference_bm25("the lazy cat", remaining)
+    assert [doc_id for doc_id, _ in results] == [doc_id for doc_id, _ in expected]
+    assert [score for _, score in results] == pytest.approx([score for _, score in expected])
+
+
+def test_index_persists_and_namespaces_are_separate(tmp_path):
+    path = str(tmp_path / "bm25.db")
+    documents = BM25Index(path, 'document')
+    chunks = BM25Index(path, 'chunk')
+    documents.add_documents(DOCS)
+    chunks.add_documents([("1_chunk_0", "the cat"), ("1_chunk_1", "sat on the mat"), ("10_chunk_0", "mat")])
+    documents.close()
+
+    reopened = BM25Index(path, 'document')
+    assert reopened.document_ids() == {"1", "2", "3"}
+    assert [doc_id for doc_id, _ in reopened.search("fox")] == ["3"]
+    reopened.close()
+
+    chunks.remove_documents_with_prefix("1_chunk_")
+    assert chunks.document_ids() == {"10_chunk_0"}
+    chunks.close()
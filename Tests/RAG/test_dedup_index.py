@@ -0,0 +1,125 @@
+# test_dedup_index.py
+# Description: Tests for the chunk near-duplicate index in App_Function_Libraries/RAG/Dedup_Index.py
+#
+# Imports
+import os
+import sys
+#
+# Third-party library imports
+import pytest
+#
+####################################################################################################
+#
+# Add the project root (parent directory of App_Function_Libraries) to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+# Local Imports
+from App_Function_Libraries.RAG import Dedup_Index
+from App_Function_Libraries.RAG.Dedup_Index import NearDuplicateIndex, minhash_signature, estimate_similarity, \
+    collapse_near_duplicates, chunk_key, parse_chunk_id
+#
+####################################################################################################
+
+ARTICLE = ("The committee met on Tuesday to review the proposed budget for the coming fiscal year. Members raised "
+           "concerns about rising maintenance costs for the city's aging bridges and asked staff to prepare a "
+           "detailed report on deferred repairs, expected inspection schedules and available federal grants before "
+           "the next session in March.")
+MIRROR = ARTICLE.replace("Tuesday", "Wednesday") + " Subscribe for more local news."
+UNRELATED = ("Preheat the oven to 200 degrees, toss the vegetables with olive oil, salt and pepper, and roast them "
+             "for thirty minutes until the edges are caramelised and crisp.")
+
+
+@pytest.fixture
+def index(tmp_path):
+    dedup_index = NearDuplicateIndex(str(tmp_path / "dedup.db"), threshold=0.7)
+    yield dedup_index
+    dedup_index.close()
+
+
+def test_minhash_estimates_jaccard():
+    assert estimate_similarity(minhash_signature(ARTICLE), minhash_signature(ARTICLE.upper())) == 1.0
+    assert estimate_similarity(minhash_signature(ARTICLE), minhash_signature(MIRROR)) > 0.7
+    assert estimate_similarity(minhash_signature(ARTICLE), minhash_signature(UNRELATED)) < 0.2
+    assert minhash_signature("  ...  ") is None
+
+
+def test_register_links_exact_and_near_duplicates(index):
+    assert index.register("video_1/1_chunk_1", ARTICLE) is None
+    assert index.register("video_2/2_chunk_1", "  " + ARTICLE.lower()) == "video_1/1_chunk_1"
+    assert index.register("podcast_3/3_chunk_1", MIRROR) == "video_1/1_chunk_1"
+    assert index.register("video_4/4_chunk_1", UNRELATED) is None
+    assert sorted(index.duplicates_of("video_1/1_chunk_1")) == ["podcast_3/3_chunk_1", "video_2/2_chunk_1"]
+
+    # Re-registering a canonical chunk does not match itself
+    assert index.register("video_1/1_chunk_1", ARTICLE) is None
+
+
+def test_duplicates_only_match_canonical_chunks(index):
+    index.register("a/1_chunk_1", ARTICLE)
+    index.register("b/2_chunk_1", ARTICLE)
+    # The second copy has no vector of its own, so a third copy links to the first
+    assert index.register("c/3_chunk_1", ARTICLE) == "a/1_chunk_1"
+
+
+def test_removing_canonical_drops_its_duplicates(index):
+    index.register("docs/1_chunk_1", ARTICLE)
+    index.register("docs/1_chunk_2", UNRELATED)
+    index.register("other/2_chunk_1", ARTICLE)
+
+    orphans = index.remove_prefix(chunk_key("docs", "1_chunk_"))
+    assert orphans == ["other/2_chunk_1"]
+    assert index.find_duplicate(ARTICLE) is None
+    # The orphan is queued with its text so it can be embedded on its own
+    assert index.pending_orphans() == [("other/2_chunk_1", ARTICLE)]
+    # With nothing left to link to, the next copy becomes canonical, and is no longer waiting
+    assert index.register("other/2_chunk_1", ARTICLE) is None
+    assert index.pending_orphans() == []
+
+
+def test_orphan_queue_forgets_removed_chunks(index):
+    index.register("docs/1_chunk_1", ARTICLE)
+    index.register("other/2_chunk_1", ARTICLE)
+    index.remove(["docs/1_chunk_1"])
+    index.queue_orphans([("other/3_chunk_1", None)])
+    assert [key for key, _ in index.pending_orphans()] == ["other/2_chunk_1", "other/3_chunk_1"]
+    # An orphan whose own media is purged later has nothing left to re-embed
+    index.remove_prefix(chunk_key("other", "2_chunk_"))
+    assert index.pending_orphans(limit=5) == [("other/3_chunk_1", None)]
+    index.clear_orphans(["other/3_chunk_1"])
+    assert index.pending_orphans() == []
+
+
+def test_duplicate_links_by_canonical_collection(index):
+    index.register("docs/1_chunk_1", ARTICLE)
+    index.register("docs/1_chunk_2", UNRELATED)
+    index.register("other/2_chunk_1", MIRROR)
+    index.register("docs/3_chunk_4", UNRELATED.upper())
+    assert sorted(index.duplicate_links(chunk_key("docs", ""))) == [("docs/3_chunk_4", "docs/1_chunk_2"),
+                                                                   ("other/2_chunk_1", "docs/1_chunk_1")]
+    assert index.duplicate_links(chunk_key("other", "")) == []
+    assert parse_chunk_id("doc_12_chunk_0") == ("12", 0) and parse_chunk_id("12_chunk_3") == ("12", 3)
+    assert parse_chunk_id("raptor_ab12") is None
+
+
+def test_remove_collection_leaves_other_collections(index):
+    index.register("docs/1_chunk_1", ARTICLE)
+    index.register("docs2/1_chunk_1", UNRELATED)
+    index.remove_collection("docs")
+    assert index.find_duplicate(ARTICLE) is None
+    assert index.find_duplicate(UNRELATED) == ("docs2/1_chunk_1", 1.0)
+
+
+def test_collapse_near_duplicates_keeps_first(monkeypatch):
+    settings = dict(Dedup_Index.DEFAULT_DEDUP_SETTINGS, threshold=0.7)
+    monkeypatch.setattr(Dedup_Index, 'get_dedup_settings', lambda: dict(settings))
+    results = [{'content': ARTICLE, 'metadata': {'media_id': '1'}},
+               {'content': UNRELATED, 'metadata': {'media_id': '2'}},
+               {'content': MIRROR, 'metadata': {'media_id': '3'}},
+               {'content': '', 'metadata': {'media_id': '4'}},
+               {'content': '', 'metadata': {'media_id': '5'}}]
+    collapsed = collapse_near_duplicates(results)
+    assert [r['metadata']['media_id'] for r in collapsed] == ['1', '2', '4', '5']
+
+    settings['collapse_results'] = False
+    assert collapse_near_duplicates(results) is results
@@ -0,0 +1,71 @@
+# test_rag_persona_chat.py
+# Description: Tests for incremental chat embedding in App_Function_Libraries/RAG/RAG_Persona_Chat.py
+#
+# Imports
+import os
+import sys
+#
+# Third-party library imports
+import pytest
+#
+####################################################################################################
+#
+# Add the project root (parent directory of App_Function_Libraries) to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+# Local Imports
+from App_Function_Libraries.RAG import ChromaDB_Library, RAG_Persona_Chat
+from App_Function_Libraries.RAG.RAG_Persona_Chat import embed_and_store_chat, CHAT_EMBEDDINGS_COLLECTION
+from App_Function_Libraries.RAG.Vector_Store import LocalVectorStore
+#
+####################################################################################################
+
+
+@pytest.fixture
+def embedding_calls(tmp_path, monkeypatch):
+    store = LocalVectorStore(str(tmp_path))
+    monkeypatch.setattr(ChromaDB_Library, 'vector_store', store)
+    monkeypatch.setattr(RAG_Persona_Chat, 'vector_store', store)
+    calls = []
+
+    def fake_embeddings_batch(texts, provider, model, api_url):
+        calls.append(list(texts))
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+    monkeypatch.setattr(RAG_Persona_Chat, 'create_embeddings_batch', fake_embeddings_batch)
+    yield calls
+    store.close()
+
+
+def _stored_ids(chat_id):
+    collection = RAG_Persona_Chat.vector_store.get_collection(CHAT_EMBEDDINGS_COLLECTION)
+    return sorted(collection.get(where={"chat_id": chat_id})['ids'])
+
+
+def test_embeds_whole_history_in_one_batch(embedding_calls):
+    history = [(f"question {i}", f"answer {i}") for i in range(1, 6)]
+    assert embed_and_store_chat(7, history, "chat") == 5
+    assert len(embedding_calls) == 1 and len(embedding_calls[0]) == 5
+    assert _stored_ids(7) == [f"chat_7_msg_{i}" for i in range(1, 6)]
+
+
+def test_only_new_and_edited_turns_are_embedded(embedding_calls):
+    history = [("hi", "hello"), ("how are you", "fine")]
+    embed_and_store_chat(7, history, "chat")
+    embedding_calls.clear()
+
+    assert embed_and_store_chat(7, history, "chat") == 0
+    assert embedding_calls == []
+
+    history = [("hi", "hello there"), ("how are you", "fine"), ("bye", "goodbye")]
+    assert embed_and_store_chat(7, history, "chat") == 2
+    assert embedding_calls == [["User: hi\nBot: hello there", "User: bye\nBot: goodbye"]]
+
+
+def test_removed_turns_are_deleted(embedding_calls):
+    embed_and_store_chat(7, [("a", "b"), ("c", "d"), ("e", "f")], "chat")
+    embed_and_store_chat(8, [("a", "b")], "other")
+    embed_and_store_chat(7, [("a", "b")], "chat")
+    assert _stored_ids(7) == ["chat_7_msg_1"]
+    assert _stored_ids(8) == ["chat_8_msg_1"]
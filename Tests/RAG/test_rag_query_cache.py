@@ -0,0 +1,77 @@
+# test_rag_query_cache.py
+# Description: Tests for the RAG retrieval result cache in App_Function_Libraries/RAG/RAG_Query_Cache.py
+#
+# Imports
+import os
+import sys
+#
+# Third-party library imports
+import pytest
+#
+####################################################################################################
+#
+# Add the project root (parent directory of App_Function_Libraries) to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+# Local Imports
+from App_Function_Libraries.RAG import RAG_Query_Cache
+from App_Function_Libraries.RAG.RAG_Query_Cache import RAGQueryCache, rag_query_cache_key
+#
+####################################################################################################
+
+
+@pytest.fixture
+def generation(monkeypatch):
+    state = {'media': 0, 'vectors': 0}
+    monkeypatch.setattr(RAG_Query_Cache, 'get_media_index_generation', lambda: state['media'])
+    monkeypatch.setattr(RAG_Query_Cache, 'get_vector_store_generation', lambda: state['vectors'])
+    return state
+
+
+def test_key_normalizes_query_and_keywords(generation):
+    assert rag_query_cache_key("  What is   RAG? ", "Python, ai", 10) == \
+        rag_query_cache_key("what is rag?", " AI ,python,", 10)
+    assert rag_query_cache_key("what is rag?", None, 10) != rag_query_cache_key("what is rag?", None, 5)
+    assert rag_query_cache_key("q", None, 10, (True, 'flashrank')) != rag_query_cache_key("q", None, 10, (False,))
+
+
+def test_generation_change_invalidates(generation):
+    cache = RAGQueryCache()
+    cache.put(rag_query_cache_key("q", None, 10), (["result"], "context"))
+    assert cache.get(rag_query_cache_key("q", None, 10)) == (["result"], "context")
+
+    generation['media'] += 1
+    assert cache.get(rag_query_cache_key("q", None, 10)) is None
+    cache.put(rag_query_cache_key("q", None, 10), (["fresh"], "context"))
+    generation['vectors'] += 1
+    assert cache.get(rag_query_cache_key("q", None, 10)) is None
+
+
+def test_lru_evicts_least_recently_used():
+    cache = RAGQueryCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert len(cache) == 2
+
+
+def test_byte_budget_bounds_memory():
+    cache = RAGQueryCache(max_entries=100, max_bytes=1000)
+    cache.put("big", "x" * 600)
+    cache.put("bigger", "y" * 600)
+    assert cache.get("big") is None
+    assert cache.size_bytes <= 1000
+
+    # Values larger than the whole budget are never stored
+    cache.put("huge", "z" * 5000)
+    assert cache.get("huge") is None
+    assert cache.get("bigger") == "y" * 600
+
+    cache.put("bigger", "short")
+    assert cache.size_bytes == len("short")
+    cache.clear()
+    assert len(cache) == 0 and cache.size_bytes == 0
@@ -0,0 +1,143 @@
+# test_raptor_index.py
+# Description: Tests for the RAPTOR tree index in App_Function_Libraries/RAG/RAPTOR_Index.py
+#
+# Imports
+import os
+import sys
+#
+# Third-party library imports
+import numpy as np
+import pytest
+#
+####################################################################################################
+#
+# Add the project root (parent directory of App_Function_Libraries) to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+# Local Imports
+from App_Function_Libraries.RAG import RAPTOR_Index
+from App_Function_Libraries.RAG.RAPTOR_Index import build_raptor_tree, cluster_embeddings, kmeans
+from App_Function_Libraries.RAG.Vector_Store import LocalVectorStore
+#
+####################################################################################################
+
+SETTINGS = dict(RAPTOR_Index.DEFAULT_RAPTOR_SETTINGS, enabled=True, min_chunks=10, cluster_size=4, max_retries=0)
+
+
+def _clustered_vectors(clusters=6, per_cluster=5, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = np.repeat(np.arange(clusters), per_cluster)
+    return (centers[labels] + 0.05 * rng.normal(size=(len(labels), dim))).astype(np.float32), labels
+
+
+@pytest.fixture
+def collection(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    yield store.get_or_create_collection("docs")
+    store.close()
+
+
+@pytest.fixture
+def summaries(monkeypatch):
+    calls = []
+
+    def fake_summarize(text, prompt, api_name, **kwargs):
+        calls.append(text)
+        return f"summary of {len(text.split())} words"
+
+    def fake_embeddings_batch(texts, provider, model, api_url):
+        rng = np.random.default_rng(len(calls))
+        return rng.normal(size=(len(texts), 32)).astype(np.float32)
+
+    monkeypatch.setattr(RAPTOR_Index, 'summarize', fake_summarize)
+    monkeypatch.setattr(RAPTOR_Index, 'create_embeddings_batch', fake_embeddings_batch)
+    monkeypatch.setattr(RAPTOR_Index, 'get_provider_concurrency', lambda api_name: 4)
+    return calls
+
+
+def _store_chunks(collection, vectors, media_id="1"):
+    collection.upsert(ids=[f"{media_id}_chunk_{i}" for i in range(1, len(vectors) + 1)], embeddings=vectors,
+                      documents=[f"chunk {i} text" for i in range(1, len(vectors) + 1)],
+                      metadatas=[{"media_id": media_id, "chunk_index": i} for i in range(1, len(vectors) + 1)])
+
+
+def _tree(collection, media_id="1"):
+    stored = collection.get(where={"media_id": media_id})
+    return {doc_id: metadata for doc_id, metadata in zip(stored['ids'], stored['metadatas'])
+            if metadata.get('raptor_level')}
+
+
+def test_kmeans_recovers_separated_clusters():
+    vectors, labels = _clustered_vectors()
+    found = kmeans(vectors, 6)
+    # Same partition up to label names
+    assert len({(a, b) for a, b in zip(labels, found)}) == 6
+
+
+def test_cluster_embeddings_bounds_cluster_size():
+    vectors, _ = _clustered_vectors(clusters=2, per_cluster=40)
+    clusters = cluster_embeddings(vectors, cluster_size=8)
+    assert sorted(i for members in clusters for i in members) == list(range(80))
+    assert max(len(members) for members in clusters) <= 16
+    assert clusters == sorted(clusters, key=min)
+    assert cluster_embeddings(vectors[:5], cluster_size=8) == [[0, 1, 2, 3, 4]]
+
+
+def test_build_tree_levels_and_root(collection, summaries):
+    vectors, _ = _clustered_vectors()
+    _store_chunks(collection, vectors)
+    node_count = build_raptor_tree(collection, "1", "openai", "p", "m", "u", SETTINGS)
+
+    tree = _tree(collection)
+    assert node_count == len(tree) == len(summaries)
+    roots = [metadata for metadata in tree.values() if metadata['raptor_root']]
+    assert len(roots) == 1 and roots[0]['raptor_level'] == max(m['raptor_level'] for m in tree.values())
+    leaf_children = [child for metadata in tree.values() if metadata['raptor_level'] == 1
+                     for child in metadata['raptor_children'].split(',')]
+    assert sorted(leaf_children) == sorted(f"1_chunk_{i}" for i in range(1, 31))
+
+
+def test_rebuild_only_summarizes_changed_clusters(collection, summaries):
+    vectors, _ = _clustered_vectors()
+    _store_chunks(collection, vectors)
+    build_raptor_tree(collection, "1", "openai", "p", "m", "u", SETTINGS)
+    first_tree = _tree(collection)
+    summaries.clear()
+
+    assert build_raptor_tree(collection, "1", "openai", "p", "m", "u", SETTINGS) == len(first_tree)
+    assert summaries == []
+
+    collection.upsert(ids=["1_chunk_3"], embeddings=[vectors[2]], documents=["edited chunk"],
+                      metadatas=[{"media_id": "1", "chunk_index": 3}])
+    build_raptor_tree(collection, "1", "openai", "p", "m", "u", SETTINGS)
+    second_tree = _tree(collection)
+    # Only the path from the edited chunk to the root changes
+    assert 0 < len(summaries) < len(first_tree)
+    assert len(set(first_tree) - set(second_tree)) == len(summaries)
+
+
+def test_small_documents_get_no_tree(collection, summaries):
+    vectors, _ = _clustered_vectors()
+    _store_chunks(collection, vectors)
+    build_raptor_tree(collection, "1", "openai", "p", "m", "u", SETTINGS)
+    collection.delete(ids=[f"1_chunk_{i}" for i in range(10, 31)])
+
+    assert build_raptor_tree(collection, "1", "openai", "p", "m", "u", SETTINGS) == 0
+    assert _tree(collection) == {}
+    assert collection.count() == 9
+
+
+def test_failed_summaries_leave_previous_tree(collection, summaries, monkeypatch):
+    vectors, _ = _clustered_vectors()
+    _store_chunks(collection, vectors)
+    build_raptor_tree(collection, "1", "openai", "p", "m", "u", SETTINGS)
+    tree = _tree(collection)
+
+    monkeypatch.setattr(RAPTOR_Index, 'summarize', lambda *args, **kwargs: "Error: rate limited")
+    collection.upsert(ids=["1_chunk_1"], embeddings=[vectors[0]], documents=["edited"],
+                      metadatas=[{"media_id": "1", "chunk_index": 1}])
+    with pytest.raises(RuntimeError):
+        build_raptor_tree(collection, "1", "openai", "p", "m", "u", SETTINGS)
+    assert _tree(collection) == tree
@@ -0,0 +1,91 @@
+# test_reranker.py
+# Description: Tests for the resident reranker service in App_Function_Libraries/RAG/Reranker.py
+#
+# Imports
+import os
+import sys
+#
+# Third-party library imports
+import pytest
+#
+####################################################################################################
+#
+# Add the project root (parent directory of App_Function_Libraries) to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+# Local Imports
+from App_Function_Libraries.RAG import Reranker
+from App_Function_Libraries.RAG.Reranker import rerank_results, clear_rerank_score_cache, unload_rerankers
+#
+####################################################################################################
+
+
+class FakeScorer:
+    """Scores a passage by how many query words it contains; records every batch it is asked to score."""
+    instances = 0
+
+    def __init__(self, model_name, cache_dir=None):
+        FakeScorer.instances += 1
+        self.model_name = model_name
+        self.calls = []
+
+    def score(self, query, passages):
+        self.calls.append(list(passages))
+        words = set(query.lower().split())
+        return [float(sum(word in words for word in text.lower().split())) for text in passages]
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    settings = dict(Reranker.DEFAULT_RERANKER_SETTINGS, backend='flashrank', top_n=3, batch_size=2)
+    monkeypatch.setattr(Reranker, 'get_reranker_settings', lambda: dict(settings))
+    monkeypatch.setitem(Reranker._reranker_classes, 'flashrank', FakeScorer)
+    FakeScorer.instances = 0
+    unload_rerankers()
+    clear_rerank_score_cache()
+    yield
+    unload_rerankers()
+    clear_rerank_score_cache()
+
+
+def _results(*texts):
+    return [{'content': text, 'metadata': {'id': i}} for i, text in enumerate(texts)]
+
+
+def test_rerank_orders_by_score(fake_backend):
+    results = _results("nothing here", "paris is a city", "capital of france is paris")
+    reranked = rerank_results("capital of france paris", results)
+    assert [r['metadata']['id'] for r in reranked] == [2, 1, 0]
+
+
+def test_model_is_resident_and_scores_are_cached(fake_backend):
+    results = _results("capital of france", "paris", "berlin")
+    rerank_results("capital of france", results)
+    rerank_results("capital of france", results)
+
+    assert FakeScorer.instances == 1
+    scorer = Reranker._rerankers[('flashrank', Reranker.DEFAULT_RERANKER_SETTINGS['flashrank_model'])]
+    # Three passages at batch_size 2 -> two batches on the first call, none on the second
+    assert [len(batch) for batch in scorer.calls] == [2, 1]
+
+
+def test_only_top_n_candidates_are_scored(fake_backend):
+    results = _results("a", "b", "c match", "d match", "e match")
+    reranked = rerank_results("match", results)
+
+    scorer = Reranker._rerankers[('flashrank', Reranker.DEFAULT_RERANKER_SETTINGS['flashrank_model'])]
+    assert sum(len(batch) for batch in scorer.calls) == 3
+    # The scored candidates are reordered; results past top_n keep their original order at the end
+    assert [r['metadata']['id'] for r in reranked] == [2, 0, 1, 3, 4]
+
+
+def test_backend_none_is_passthrough(fake_backend):
+    results = _results("b", "a")
+    assert rerank_results("a", results, backend='none') is results
+    assert FakeScorer.instances == 0
+
+
+def test_unknown_backend_raises(fake_backend):
+    with pytest.raises(ValueError):
+        rerank_results("a", _results("a"), backend='colbert')
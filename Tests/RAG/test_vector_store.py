@@ -0,0 +1,158 @@
+# test_vector_store.py
+# Description: Tests for the local vector store backend in App_Function_Libraries/RAG/Vector_Store.py
+#
+# Imports
+import os
+import sys
+#
+# Third-party library imports
+import numpy as np
+import pytest
+#
+####################################################################################################
+#
+# Add the project root (parent directory of App_Function_Libraries) to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+# Local Imports
+from App_Function_Libraries.RAG.Vector_Store import LocalVectorStore, matches_where
+#
+####################################################################################################
+
+
+def _vectors(count, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+
+def _exact_top_k(vectors, query, k):
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normed @ (query / np.linalg.norm(query))
+    return [f"id{i}" for i in np.argsort(-scores)[:k]]
+
+
+def _populate(collection, vectors):
+    collection.upsert(ids=[f"id{i}" for i in range(len(vectors))], embeddings=vectors,
+                      documents=[f"doc {i}" for i in range(len(vectors))],
+                      metadatas=[{"media_id": str(i % 5), "position": i} for i in range(len(vectors))])
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+def test_flat_query_matches_exact_search(tmp_path, quantization):
+    store = LocalVectorStore(str(tmp_path), quantization=quantization)
+    collection = store.get_or_create_collection("docs")
+    vectors = _vectors(300)
+    _populate(collection, vectors)
+
+    query = _vectors(1, seed=1)[0]
+    results = collection.query(query_embeddings=[query], n_results=5)
+
+    expected = _exact_top_k(vectors, query, 5)
+    if quantization == "none":
+        assert results['ids'][0] == expected
+    else:
+        assert len(set(results['ids'][0]) & set(expected)) >= 4
+    assert results['documents'][0][0] == f"doc {results['ids'][0][0][2:]}"
+    assert results['distances'][0] == sorted(results['distances'][0])
+    store.close()
+
+
+def test_where_filter_restricts_results(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    collection = store.get_or_create_collection("docs")
+    _populate(collection, _vectors(50))
+
+    results = collection.query(query_embeddings=[_vectors(1, seed=2)[0]], n_results=20,
+                               where={"media_id": {"$in": ["1", "3"]}})
+    assert len(results['ids'][0]) == 20
+    assert {metadata['media_id'] for metadata in results['metadatas'][0]} <= {"1", "3"}
+    assert collection.get(where={"$and": [{"media_id": "2"}, {"position": {"$lt": 20}}]})['ids'] == \
+        ["id2", "id7", "id12", "id17"]
+    store.close()
+
+
+def test_upsert_replaces_and_delete_frees_rows(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    collection = store.get_or_create_collection("docs")
+    vectors = _vectors(10)
+    _populate(collection, vectors)
+
+    collection.upsert(ids=["id3"], embeddings=[vectors[7]], documents=["replaced"], metadatas=[{"media_id": "x"}])
+    assert collection.count() == 10
+    assert collection.get(ids=["id3"])['documents'] == ["replaced"]
+    with pytest.raises(ValueError):
+        collection.add(ids=["id3"], embeddings=[vectors[0]])
+
+    collection.delete(where={"media_id": "x"})
+    collection.delete(ids=["id0", "missing"])
+    assert collection.count() == 8
+    assert "id3" not in collection.query(query_embeddings=[vectors[7]], n_results=10)['ids'][0]
+
+    collection.add(ids=["new"], embeddings=[vectors[0]])
+    assert collection.count() == 9
+    assert collection.query(query_embeddings=[vectors[0]], n_results=1)['ids'][0] == ["new"]
+    store.close()
+
+
+def test_collections_persist_across_reopen(tmp_path):
+    store = LocalVectorStore(str(tmp_path), quantization="int8")
+    vectors = _vectors(40)
+    _populate(store.create_collection("docs"), vectors)
+    with pytest.raises(ValueError):
+        store.create_collection("docs")
+    store.close()
+
+    # The storage format is fixed per collection, not by the store that reopens it
+    reopened = LocalVectorStore(str(tmp_path))
+    assert reopened.list_collections() == ["docs"]
+    collection = reopened.get_collection("docs")
+    assert collection.quantization == "int8"
+    assert collection.count() == 40
+    assert collection.query(query_embeddings=[vectors[11]], n_results=1)['ids'][0] == ["id11"]
+
+    reopened.delete_collection("docs")
+    assert reopened.list_collections() == []
+    with pytest.raises(ValueError):
+        reopened.get_collection("docs")
+    reopened.close()
+
+
+def test_hnsw_index_recall_and_persistence(tmp_path):
+    pytest.importorskip("hnswlib")
+    store = LocalVectorStore(str(tmp_path), index_type="hnsw")
+    collection = store.get_or_create_collection("docs")
+    vectors = _vectors(2000, dim=32)
+    _populate(collection, vectors)
+    assert collection._hnsw is not None
+
+    queries = _vectors(20, dim=32, seed=3)
+    results = collection.query(query_embeddings=queries, n_results=10)
+    recall = np.mean([len(set(ids) & set(_exact_top_k(vectors, query, 10))) / 10
+                      for ids, query in zip(results['ids'], queries)])
+    assert recall >= 0.9
+
+    collection.delete(ids=["id5"])
+    assert "id5" not in collection.query(query_embeddings=[vectors[5]], n_results=10)['ids'][0]
+    store.close()
+
+    reopened = LocalVectorStore(str(tmp_path), index_type="hnsw").get_collection("docs")
+    assert os.path.exists(os.path.join(str(tmp_path), "docs", "hnsw.bin"))
+    assert reopened.query(query_embeddings=[vectors[6]], n_results=1)['ids'][0] == ["id6"]
+    assert "id5" not in reopened.query(query_embeddings=[vectors[5]], n_results=10)['ids'][0]
+    reopened.close()
+
+
+def test_invalid_collection_name_is_rejected(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.get_or_create_collection("../escape")
+
+
+def test_matches_where_operators():
+    metadata = {"media_id": "3", "position": 4}
+    assert matches_where(metadata, None)
+    assert matches_where(metadata, {"media_id": "3"})
+    assert matches_where(metadata, {"position": {"$gte": 4, "$lt": 5}})
+    assert not matches_where(metadata, {"media_id": {"$nin": ["3"]}})
+    assert matches_where(metadata, {"$or": [{"media_id": "9"}, {"position": {"$ne": 1}}]})
+    assert not matches_where(metadata, {"missing": {"$gt": 1}})
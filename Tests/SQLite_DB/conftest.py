@@ -95,8 +95,11 @@ def empty_db():
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 media_id INTEGER NOT NULL,
                 version_number INTEGER NOT NULL,
-                content TEXT NOT NULL,
+                content TEXT,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                storage TEXT NOT NULL DEFAULT 'full',
+                base_version INTEGER,
+                data BLOB,
                 FOREIGN KEY(media_id) REFERENCES Media(id)
             )
         ''')
@@ -0,0 +1,149 @@
+# test_backup_manager.py
+# Description: Tests for the online, incremental backups in App_Function_Libraries/DB/Backup_Manager.py
+#
+# Imports
+import os
+import sqlite3
+#
+# Third-party library imports
+import pytest
+#
+# Local Imports
+from App_Function_Libraries.DB.Backup_Manager import DEFAULT_BACKUP_SETTINGS, TARGET_DIRECTORY, TARGET_SQLITE, \
+    BackupError, BackupStore, create_backup, list_backups, restore_backup, verify_backup
+#
+####################################################################################################
+
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT id, body FROM Items ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def setup(tmp_path):
+    media_path = str(tmp_path / "data" / "media.db")
+    os.makedirs(os.path.dirname(media_path))
+    conn = sqlite3.connect(media_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE Items (id INTEGER PRIMARY KEY, body TEXT)")
+    conn.execute("CREATE TABLE IndexGeneration (id INTEGER PRIMARY KEY, generation INTEGER NOT NULL)")
+    conn.execute("INSERT INTO IndexGeneration VALUES (1, 5)")
+    conn.executemany("INSERT INTO Items (body) VALUES (?)", [(f"item {i} " * 40,) for i in range(2000)])
+    conn.commit()
+
+    store_dir = tmp_path / "data" / "chroma"
+    os.makedirs(store_dir / "segment")
+    (store_dir / "segment" / "vectors.bin").write_bytes(os.urandom(10000))
+    store_conn = sqlite3.connect(str(store_dir / "chroma.sqlite3"))
+    store_conn.execute("CREATE TABLE t (x)")
+    store_conn.execute("INSERT INTO t VALUES (1)")
+    store_conn.commit()
+    store_conn.close()
+
+    settings = {**DEFAULT_BACKUP_SETTINGS, 'backup_dir': str(tmp_path / "backups"), 'chunk_pages': 4}
+    targets = {'media': {'kind': TARGET_SQLITE, 'path': media_path},
+               'chroma': {'kind': TARGET_DIRECTORY, 'path': str(store_dir)},
+               'missing': {'kind': TARGET_SQLITE, 'path': str(tmp_path / "nope.db")}}
+    yield conn, media_path, settings, targets
+    conn.close()
+
+
+def test_repeat_backups_only_write_changed_pages(setup):
+    conn, media_path, settings, targets = setup
+    first = create_backup(settings=settings, targets=targets)
+    assert sorted(first['targets']) == ['chroma', 'media']
+    assert first['bytes_written'] > 0
+
+    conn.execute("UPDATE Items SET body = 'changed' WHERE id = 1000")
+    conn.commit()
+    second = create_backup(settings=settings, targets=targets)
+    assert 0 < second['bytes_written'] < first['bytes_written'] / 10
+    assert [backup['id'] for backup in list_backups(settings)] == [second['id'], first['id']]
+    verify_backup(second['id'], settings)
+
+
+def test_restore_is_verified_and_bumps_generation(setup):
+    conn, media_path, settings, targets = setup
+    expected = _rows(media_path)
+    backup = create_backup(['media'], settings=settings, targets=targets)
+    conn.execute("DELETE FROM Items WHERE id > 10")
+    conn.execute("UPDATE IndexGeneration SET generation = 9")
+    conn.commit()
+
+    assert restore_backup(backup['id'], settings=settings) == ['media']
+    # The app's own connection sees the restored database
+    assert conn.execute("SELECT id, body FROM Items ORDER BY id").fetchall() == expected
+    assert conn.execute("SELECT generation FROM IndexGeneration").fetchone()[0] == 10
+
+
+def test_corrupt_backup_leaves_live_data_alone(setup):
+    conn, media_path, settings, targets = setup
+    backup = create_backup(settings=settings, targets=targets)
+    conn.execute("DELETE FROM Items WHERE id > 10")
+    conn.commit()
+    store = BackupStore(settings['backup_dir'])
+    digest = backup['targets']['media']['files']['media.db']['chunks'][3]
+    os.remove(store._object_path(digest))
+
+    with pytest.raises(BackupError):
+        restore_backup(backup['id'], settings=settings)
+    assert len(_rows(media_path)) == 10
+    assert not [name for name in os.listdir(os.path.dirname(media_path)) if name.startswith('.restore')]
+
+
+def test_directory_round_trip_and_prune(setup):
+    conn, media_path, settings, targets = setup
+    store_dir = targets['chroma']['path']
+    vectors = open(os.path.join(store_dir, "segment", "vectors.bin"), 'rb').read()
+    backup = create_backup(['chroma'], settings=settings, targets=targets)
+    os.remove(os.path.join(store_dir, "segment", "vectors.bin"))
+    open(os.path.join(store_dir, "stray.bin"), 'wb').close()
+
+    restore_backup(backup['id'], ['chroma'], settings=settings)
+    assert sorted(os.listdir(store_dir)) == ['chroma.sqlite3', 'segment']
+    assert open(os.path.join(store_dir, "segment", "vectors.bin"), 'rb').read() == vectors
+
+    for _ in range(3):
+        create_backup(['media'], settings={**settings, 'keep_backups': 1}, targets=targets)
+    assert len(list_backups(settings)) == 1
+    with pytest.raises(BackupError):
+        restore_backup(backup['id'], settings=settings)
+
+
+def test_restore_of_backup_without_generation_table(setup):
+    conn, media_path, settings, targets = setup
+    conn.execute("DROP TABLE IndexGeneration")
+    conn.commit()
+    backup = create_backup(['media'], settings=settings, targets=targets)
+    # The live database has since been migrated
+    conn.execute("CREATE TABLE IndexGeneration (id INTEGER PRIMARY KEY, generation INTEGER NOT NULL)")
+    conn.execute("INSERT INTO IndexGeneration VALUES (1, 7)")
+    conn.execute("DELETE FROM Items WHERE id > 10")
+    conn.commit()
+
+    restore_backup(backup['id'], settings=settings)
+    assert len(_rows(media_path)) == 2000
+    assert conn.execute("SELECT generation FROM IndexGeneration").fetchone()[0] == 8
+
+
+def test_restoring_the_vector_store_reopens_it(setup, tmp_path, monkeypatch):
+    from App_Function_Libraries.RAG import Vector_Store
+    conn, media_path, settings, targets = setup
+    store_dir = str(tmp_path / "data" / "vector_store")
+    monkeypatch.setattr(Vector_Store, "create_vector_store", lambda: Vector_Store.LocalVectorStore(store_dir))
+    Vector_Store.reset_vector_store()
+    collection = Vector_Store.vector_store.get_or_create_collection("notes")
+    collection.add(ids=["a"], embeddings=[[1.0, 0.0]], documents=["first"], metadatas=[{}])
+    backup = create_backup(['vector_store'], settings=settings,
+                           targets={'vector_store': {'kind': TARGET_DIRECTORY, 'path': store_dir}})
+    collection.add(ids=["b"], embeddings=[[0.0, 1.0]], documents=["second"], metadatas=[{}])
+
+    restore_backup(backup['id'], settings=settings)
+    try:
+        assert Vector_Store.vector_store.get_collection("notes").count() == 1
+    finally:
+        Vector_Store.reset_vector_store()
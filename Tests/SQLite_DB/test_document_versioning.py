@@ -11,6 +11,8 @@ from App_Function_Libraries.DB.SQLite_DB import (
     get_all_document_versions,
     delete_document_version,
     rollback_to_version,
+    compact_document_versions,
+    document_version_cache,
     DatabaseError,
 )
 #
@@ -37,6 +39,9 @@ def mock_db():
             version_number INTEGER NOT NULL,
             content TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            storage TEXT NOT NULL DEFAULT 'full',
+            base_version INTEGER,
+            data BLOB,
             FOREIGN KEY (media_id) REFERENCES Media(id)
         )
     ''')
@@ -52,9 +57,11 @@ def mock_db():
 
 @pytest.fixture
 def mock_get_connection(mock_db):
+    document_version_cache.invalidate()
     with patch('App_Function_Libraries.DB.SQLite_DB.db.get_connection') as mock:
         mock.return_value = mock_db
         yield mock
+    document_version_cache.invalidate()
 
 
 def test_create_document_version(mock_get_connection):
@@ -72,7 +79,8 @@ def test_create_document_version(mock_get_connection):
     assert result is not None
     assert result[1] == media_id
     assert result[2] == 1
-    assert result[3] == content
+    assert result[5] == 'snapshot'
+    assert get_document_version(media_id, 1)['content'] == content
 
 
 def test_create_document_version_invalid_media_id(mock_get_connection):
@@ -161,3 +169,68 @@ def test_rollback_to_version(mock_get_connection):
     latest_version = get_document_version(media_id)
     assert latest_version['version_number'] == 3
     assert latest_version['content'] == content1
+
+
+# Delta storage
+TRANSCRIPT = "".join(f"Speaker {i % 3} said sentence number {i} about the budget. " for i in range(400))
+
+
+def _stored_versions(connection, media_id=1):
+    cursor = connection.cursor()
+    cursor.execute("SELECT version_number, storage, base_version, content, data FROM DocumentVersions "
+                   "WHERE media_id = ? ORDER BY version_number", (media_id,))
+    return cursor.fetchall()
+
+
+def _edits(count):
+    return [TRANSCRIPT.replace(f"number {i} ", f"number {i} (edited) ") for i in range(1, count + 1)]
+
+
+def test_versions_are_stored_as_deltas_with_periodic_snapshots(mock_get_connection):
+    contents = _edits(12)
+    with patch('App_Function_Libraries.DB.SQLite_DB.get_document_version_settings',
+               return_value={'snapshot_interval': 5}):
+        for content in contents:
+            create_document_version(1, content)
+
+    rows = _stored_versions(mock_get_connection.return_value)
+    assert [row[1] for row in rows] == ['snapshot', 'delta', 'delta', 'delta', 'delta'] * 2 + ['snapshot', 'delta']
+    assert all(row[3] is None for row in rows)
+    assert sum(len(row[4]) for row in rows) < len(TRANSCRIPT) // 2
+
+    # Reads bypass the cache and rebuild every version from its snapshot
+    document_version_cache.invalidate()
+    for number, content in enumerate(contents, 1):
+        assert get_document_version(1, number)['content'] == content
+    assert [v['content'] for v in get_all_document_versions(1)] == contents[::-1]
+
+
+def test_deleting_a_delta_base_keeps_later_versions(mock_get_connection):
+    contents = _edits(4)
+    for content in contents:
+        create_document_version(1, content)
+
+    assert 'success' in delete_document_version(1, 2)
+    document_version_cache.invalidate()
+    assert get_document_version(1, 3)['content'] == contents[2]
+    assert get_document_version(1, 4)['content'] == contents[3]
+    assert [row[1] for row in _stored_versions(mock_get_connection.return_value)] == ['snapshot', 'snapshot', 'delta']
+
+    result = rollback_to_version(1, 1)
+    assert result['new_version_number'] == 5
+    assert get_document_version(1)['content'] == contents[0]
+
+
+def test_compact_document_versions_converts_full_rows(mock_get_connection):
+    contents = _edits(6)
+    cursor = mock_get_connection.return_value.cursor()
+    cursor.executemany("INSERT INTO DocumentVersions (media_id, version_number, content) VALUES (1, ?, ?)",
+                       list(enumerate(contents, 1)))
+    mock_get_connection.return_value.commit()
+
+    stats = compact_document_versions()
+    assert stats['versions'] == 6 and stats['bytes_after'] < stats['bytes_before'] // 4
+    assert [row[1] for row in _stored_versions(mock_get_connection.return_value)] == \
+        ['snapshot'] + ['delta'] * 5
+    assert [v['content'] for v in get_all_document_versions(1)] == contents[::-1]
+    assert compact_document_versions()['versions'] == 0
@@ -13,7 +13,7 @@ from App_Function_Libraries.DB.SQLite_DB import (
     add_media_with_keywords, ingest_article_to_db, add_keyword, delete_keyword,
     fetch_all_keywords, keywords_browser_interface, display_keywords,
     export_keywords_to_csv, fetch_keywords_for_media, update_keywords_for_media,
-    InputError, DatabaseError
+    fetch_media_ids_for_keywords, invalidate_keyword_media_index, InputError, DatabaseError
 )
 #
 ###################################################################################################
@@ -281,3 +281,31 @@ def test_update_keywords_for_media(mock_get_connection):
     assert "new2" in updated_keywords
     assert "test" not in updated_keywords
     assert "article" not in updated_keywords
+
+
+# Tests for the in-memory keyword -> media_id index
+def test_keyword_media_index_tracks_keyword_changes(mock_get_connection):
+    invalidate_keyword_media_index()
+    media_id, _ = add_media_with_keywords(
+        url="http://example.com",
+        title="Test Article",
+        media_type="article",
+        content="This is a test article content.",
+        keywords="Test,article",
+        prompt="Test prompt",
+        summary="Test summary",
+        transcription_model=None,
+        author="Test Author",
+        ingestion_date="2023-06-01"
+    )
+    assert fetch_media_ids_for_keywords(["TEST", "missing"]) == {media_id}
+
+    # Served from memory: no further queries until keywords change
+    mock_get_connection.reset_mock()
+    assert fetch_media_ids_for_keywords(["article"]) == {media_id}
+    mock_get_connection.assert_not_called()
+
+    update_keywords_for_media(media_id, ["new1"])
+    assert fetch_media_ids_for_keywords(["test"]) == set()
+    assert fetch_media_ids_for_keywords(["new1"]) == {media_id}
+    invalidate_keyword_media_index()
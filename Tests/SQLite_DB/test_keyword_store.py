@@ -0,0 +1,113 @@
+# test_keyword_store.py
+# Description: Tests for App_Function_Libraries/DB/Keyword_Store.py and bulk_update_keywords_for_media
+#
+# Imports
+import sqlite3
+#
+# Third-party library imports
+import pytest
+#
+# Local Imports
+from App_Function_Libraries.DB import SQLite_DB
+from App_Function_Libraries.DB.Keyword_Store import KeywordStore, LinkTable
+from App_Function_Libraries.DB.SQLite_DB import Database, bulk_update_keywords_for_media, create_tables
+#
+####################################################################################################
+
+LINKS = LinkTable('MediaKeywords', 'media_id')
+
+
+def _connect(path):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS Keywords (id INTEGER PRIMARY KEY AUTOINCREMENT, keyword TEXT NOT NULL UNIQUE);
+        CREATE TABLE IF NOT EXISTS MediaKeywords (id INTEGER PRIMARY KEY AUTOINCREMENT, media_id INTEGER NOT NULL,
+                                                  keyword_id INTEGER NOT NULL);
+        CREATE VIRTUAL TABLE IF NOT EXISTS keyword_fts USING fts5(keyword);
+    ''')
+    return conn
+
+
+def _linked(conn, media_id):
+    return sorted(row[0] for row in conn.execute(
+        "SELECT k.keyword FROM MediaKeywords mk JOIN Keywords k ON k.id = mk.keyword_id WHERE mk.media_id = ?",
+        (media_id,)))
+
+
+@pytest.fixture
+def conn(tmp_path):
+    connection = _connect(str(tmp_path / "keywords.db"))
+    yield connection
+    connection.close()
+
+
+def test_keyword_ids_upsert_and_index(conn):
+    store = KeywordStore('Keywords', fts_table='keyword_fts')
+    first = store.keyword_ids(conn, ['a', 'b', 'a', ''])
+    assert sorted(first) == ['a', 'b']
+    again = store.keyword_ids(conn, ['b', 'c'])
+    assert again['b'] == first['b']
+    assert conn.execute("SELECT COUNT(*) FROM Keywords").fetchone()[0] == 3
+    assert sorted(conn.execute("SELECT rowid, keyword FROM keyword_fts").fetchall()) == \
+        sorted(conn.execute("SELECT id, keyword FROM Keywords").fetchall())
+
+
+def test_link_keywords_writes_only_the_difference(conn):
+    store = KeywordStore('Keywords')
+    assert store.link_keywords(conn, LINKS, {1: ['a', 'b'], 2: ['b']}) == (3, 0)
+    assert store.link_keywords(conn, LINKS, {1: ['b', 'c'], 2: ['b']}) == (1, 1)
+    assert _linked(conn, 1) == ['b', 'c'] and _linked(conn, 2) == ['b']
+    # Without replace, existing links are kept and repeats are not linked twice
+    assert store.link_keywords(conn, LINKS, {1: ['a', 'b']}, replace=False) == (1, 0)
+    assert _linked(conn, 1) == ['a', 'b', 'c']
+
+
+def test_stale_cached_ids_are_resolved_again(conn, tmp_path):
+    store = KeywordStore('Keywords')
+    store.link_keywords(conn, LINKS, {1: ['a', 'b']})
+    conn.commit()
+    # Another process deletes a keyword; its id is then taken by a different keyword
+    other = _connect(str(tmp_path / "keywords.db"))
+    other.execute("DELETE FROM MediaKeywords")
+    other.execute("DELETE FROM Keywords WHERE keyword = 'a'")
+    other.execute("DELETE FROM sqlite_sequence")
+    other.execute("INSERT INTO Keywords (id, keyword) VALUES (1, 'z')")
+    other.commit()
+    other.close()
+
+    assert store.link_keywords(conn, LINKS, {2: ['a', 'b']}) == (2, 0)
+    assert _linked(conn, 2) == ['a', 'b']
+    assert conn.execute("SELECT keyword FROM Keywords WHERE id = 1").fetchone()[0] == 'z'
+
+
+def test_case_insensitive_table_links_each_keyword_once(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "prompts.db"))
+    conn.executescript('''
+        CREATE TABLE Keywords (id INTEGER PRIMARY KEY AUTOINCREMENT, keyword TEXT NOT NULL UNIQUE COLLATE NOCASE);
+        CREATE TABLE PromptKeywords (prompt_id INTEGER, keyword_id INTEGER, PRIMARY KEY (prompt_id, keyword_id));
+    ''')
+    store = KeywordStore('Keywords', case_insensitive=True)
+    links = LinkTable('PromptKeywords', 'prompt_id')
+    assert store.link_keywords(conn, links, {1: ['Draft', 'draft', 'Final']}) == (2, 0)
+    assert store.keyword_ids(conn, ['DRAFT'])['DRAFT'] == store.keyword_ids(conn, ['Draft'])['Draft']
+    assert conn.execute("SELECT COUNT(*) FROM Keywords").fetchone()[0] == 2
+    conn.close()
+
+
+def test_bulk_update_keywords_for_media(tmp_path, monkeypatch):
+    database = Database(str(tmp_path / "media.db"))
+    create_tables(database)
+    monkeypatch.setattr(SQLite_DB, "db", database)
+    with database.get_connection() as connection:
+        connection.executemany("INSERT INTO Media (title, type, content, author, ingestion_date) "
+                               "VALUES (?, 'article', 'text', 'someone', '2024-01-01')", [("one",), ("two",)])
+    bulk_update_keywords_for_media({1: ['Alpha', 'beta'], 2: ['beta']})
+    with database.get_connection() as connection:
+        # Keywords are stored as given, like the per-item update always did
+        assert _linked(connection, 1) == ['Alpha', 'beta']
+    assert bulk_update_keywords_for_media({1: ['beta', 'gamma'], 2: []}) == (1, 2)
+    with database.get_connection() as connection:
+        assert _linked(connection, 1) == ['beta', 'gamma']
+        assert _linked(connection, 2) == []
+    assert SQLite_DB.get_keyword_media_index().get('beta') == frozenset({1})
+    database.close_connection()
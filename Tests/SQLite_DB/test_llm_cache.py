@@ -0,0 +1,62 @@
+# tests/test_llm_cache.py
+import pytest
+from unittest.mock import MagicMock
+#
+from App_Function_Libraries.DB import LLM_Cache_DB
+from App_Function_Libraries.DB.LLM_Cache_DB import (
+    cached_llm_call, make_cache_key, evict_cache_entries, get_llm_cache_stats, store_cached_response
+)
+#
+###################################################################################################
+#
+# Set up the test fixtures
+
+@pytest.fixture
+def cache_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(LLM_Cache_DB, 'llm_cache_db_path', str(tmp_path / 'llm_cache.db'))
+    monkeypatch.setattr(LLM_Cache_DB, '_schema_ready', False)
+    settings = dict(LLM_Cache_DB.DEFAULT_CACHE_SETTINGS, enabled=True)
+    monkeypatch.setattr(LLM_Cache_DB, 'get_cache_settings', lambda: dict(settings))
+    return settings
+
+
+def test_make_cache_key_is_stable_and_sensitive():
+    key = make_cache_key("OpenAI", "gpt-4o", "sys", "prompt", "input", 0)
+    assert key == make_cache_key("openai", "gpt-4o", "sys", "prompt", "input", 0.0)
+    assert key != make_cache_key("openai", "gpt-4o", "sys", "prompt", "other input", 0)
+    assert key != make_cache_key("openai", "gpt-4o-mini", "sys", "prompt", "input", 0)
+
+
+def test_cached_llm_call_hit_and_miss(cache_db):
+    call_fn = MagicMock(return_value="A summary")
+    first = cached_llm_call("openai", "gpt-4o", "input", "prompt", 0, None, call_fn)
+    second = cached_llm_call("openai", "gpt-4o", "input", "prompt", 0, None, call_fn)
+    assert first == second == "A summary"
+    assert call_fn.call_count == 1
+    assert get_llm_cache_stats()['entries'] == 1
+
+
+def test_cached_llm_call_bypasses_nonzero_temperature(cache_db):
+    call_fn = MagicMock(return_value="A summary")
+    cached_llm_call("openai", "gpt-4o", "input", "prompt", 0.7, None, call_fn)
+    cached_llm_call("openai", "gpt-4o", "input", "prompt", 0.7, None, call_fn)
+    assert call_fn.call_count == 2
+
+    cached_llm_call("openai", "gpt-4o", "input", "prompt", 0.7, None, call_fn, force_cache=True)
+    cached_llm_call("openai", "gpt-4o", "input", "prompt", 0.7, None, call_fn, force_cache=True)
+    assert call_fn.call_count == 3
+
+
+def test_cached_llm_call_does_not_store_errors(cache_db):
+    call_fn = MagicMock(return_value="OpenAI: Failed to process chat response. Status code: 500")
+    cached_llm_call("openai", "gpt-4o", "input", "prompt", 0, None, call_fn)
+    cached_llm_call("openai", "gpt-4o", "input", "prompt", 0, None, call_fn)
+    assert call_fn.call_count == 2
+
+
+def test_evict_cache_entries_enforces_max_entries(cache_db):
+    for i in range(5):
+        store_cached_response(f"key-{i}", "openai", "gpt-4o", f"response {i}")
+    evicted = evict_cache_entries(ttl_seconds=0, max_entries=2, max_size_mb=0)
+    assert evicted == 3
+    assert get_llm_cache_stats()['entries'] == 2
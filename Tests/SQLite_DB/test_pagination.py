@@ -0,0 +1,85 @@
+# test_pagination.py
+# Description: Tests for keyset pagination in App_Function_Libraries/DB/Pagination.py
+#
+# Imports
+import random
+import sqlite3
+#
+# Third-party library imports
+import pytest
+#
+# Local Imports
+from App_Function_Libraries.DB.Pagination import PageQuery, Paginator, generation_schema_sql, read_generation
+#
+####################################################################################################
+
+
+@pytest.fixture
+def conn():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE Media (id INTEGER PRIMARY KEY, title TEXT, ingestion_date TEXT)")
+    connection.execute("CREATE TABLE MediaKeywords (media_id INTEGER, keyword TEXT)")
+    for statement in generation_schema_sql((('Media', ('INSERT', 'UPDATE', 'DELETE')),)):
+        connection.execute(statement)
+    rng = random.Random(0)
+    for media_id in range(1, 301):
+        # Repeated and missing dates exercise the tie-breaking and NULL handling of the seek conditions
+        date = None if media_id % 17 == 0 else f"2024-01-{rng.randint(1, 9):02d}"
+        connection.execute("INSERT INTO Media (id, title, ingestion_date) VALUES (?, ?, ?)",
+                           (media_id, f"title {rng.randint(1, 40)}", date))
+        connection.executemany("INSERT INTO MediaKeywords (media_id, keyword) VALUES (?, ?)",
+                               [(media_id, f"k{n}") for n in range(media_id % 3)])
+    yield connection
+    connection.close()
+
+
+def _offset_pages(conn, sql, params, page_size):
+    rows = conn.execute(sql, params).fetchall()
+    return [rows[start:start + page_size] for start in range(0, len(rows), page_size)]
+
+
+@pytest.mark.parametrize("order_by", [
+    (('ingestion_date', 'DESC'), ('id', 'DESC')),
+    (('ingestion_date', 'ASC'), ('id', 'ASC')),
+    (('title', 'ASC'), ('ingestion_date', 'DESC'), ('id', 'ASC')),
+])
+def test_pages_match_offset_pagination(conn, order_by):
+    paginator = Paginator()
+    query = PageQuery("id, title", "Media", order_by)
+    order_sql = ', '.join(f"{expression} {direction}" for expression, direction in order_by)
+    expected = _offset_pages(conn, f"SELECT id, title FROM Media ORDER BY {order_sql}", (), 25)
+    generation = read_generation(conn)
+
+    # Forwards, backwards, then jumps - all after boundaries have been remembered
+    for page in list(range(1, 13)) + list(range(12, 0, -1)) + [7, 3, 12, 1]:
+        assert paginator.fetch_page(conn, query, page, 25, generation) == expected[page - 1]
+    assert paginator.fetch_page(conn, query, 13, 25, generation) == []
+
+
+def test_grouped_query_pages_and_count(conn):
+    paginator = Paginator()
+    query = PageQuery("m.id, COUNT(k.keyword)", "Media m LEFT JOIN MediaKeywords k ON m.id = k.media_id",
+                      (('m.ingestion_date', 'DESC'), ('m.id', 'DESC')), where="m.title LIKE ? OR m.id < ?",
+                      params=('title 1%', 50), group_by='m.id')
+    expected = _offset_pages(conn, '''
+        SELECT m.id, COUNT(k.keyword) FROM Media m LEFT JOIN MediaKeywords k ON m.id = k.media_id
+        WHERE m.title LIKE ? OR m.id < ? GROUP BY m.id ORDER BY m.ingestion_date DESC, m.id DESC
+    ''', ('title 1%', 50), 10)
+    generation = read_generation(conn)
+    rows, total_pages, total = paginator.fetch(conn, query, 1, 10, generation)
+    assert rows == expected[0]
+    assert total == sum(len(page) for page in expected) and total_pages == len(expected)
+    for page in range(2, total_pages + 1):
+        assert paginator.fetch_page(conn, query, page, 10, generation) == expected[page - 1]
+
+
+def test_writes_invalidate_counts_and_boundaries(conn):
+    paginator = Paginator()
+    query = PageQuery("id", "Media", (('id', 'ASC'),))
+    assert paginator.count(conn, query, read_generation(conn)) == 300
+    assert paginator.fetch_page(conn, query, 2, 50, read_generation(conn))[0] == (51,)
+
+    conn.execute("DELETE FROM Media WHERE id <= 10")
+    generation = read_generation(conn)
+    assert paginator.count(conn, query, generation) == 290
+    assert paginator.fetch_page(conn, query, 3, 50, generation)[0] == (111,)
@@ -0,0 +1,283 @@
+# test_query_plans.py
+# Description: Query plan snapshots for the media database (see App_Function_Libraries/DB/Query_Plan_Audit.py).
+#
+# The plans below were taken from a fixture built by build_media_fixture. No ANALYZE is run (the application never
+# runs it), so the planner's choices do not depend on the fixture size. If a schema change alters a plan on purpose,
+# check it with `python -m App_Function_Libraries.DB.Query_Plan_Audit --verbose` and update the snapshot.
+#
+# The wording of EXPLAIN QUERY PLAN changes between SQLite releases, so the exact text is only compared on the
+# version that recorded the snapshot. On every version, each call must use the same indexes / INTEGER PRIMARY KEY
+# lookups as the snapshot and must not scan a table outside ALLOWED_FULL_SCANS.
+#
+# Imports
+import re
+import sqlite3
+#
+# Third-party library imports
+import pytest
+#
+# Local Imports
+from App_Function_Libraries.DB.Query_Plan_Audit import DEFAULT_CALLS, audit, build_media_fixture, plan_snapshot
+from App_Function_Libraries.DB.SQLite_DB import Database
+#
+####################################################################################################
+
+# sqlite3.sqlite_version that produced EXPECTED_PLANS
+SNAPSHOT_SQLITE_VERSION = '3.40.1'
+
+EXPECTED_PLANS = {
+    'check_media_exists': [
+        [
+            'MULTI-INDEX OR',
+            '  INDEX 1',
+            '    SEARCH Media USING INDEX idx_media_title (title=?)',
+            '  INDEX 2',
+            '    SEARCH Media USING INDEX idx_unique_media_url (url=?)',
+        ],
+    ],
+    'check_media_and_whisper_model': [
+        [
+            'MULTI-INDEX OR',
+            '  INDEX 1',
+            '    SEARCH Media USING INDEX idx_media_title (title=?)',
+            '  INDEX 2',
+            '    SEARCH Media USING INDEX idx_unique_media_url (url=?)',
+        ],
+        ['SEARCH Transcripts USING INDEX idx_transcripts_media_created (media_id=?)'],
+    ],
+    'fetch_all_keywords': [
+        ['SCAN Keywords'],
+    ],
+    'fetch_keywords_for_media': [
+        [
+            'SEARCH mk USING COVERING INDEX idx_unique_media_keyword (media_id=?)',
+            'SEARCH k USING INTEGER PRIMARY KEY (rowid=?)',
+        ],
+    ],
+    'get_keyword_media_index': [
+        ['SCAN mk', 'SEARCH k USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'get_media_index_generation': [
+        ['SEARCH IndexGeneration USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'browse_items:Title': [
+        ['SCAN Media'],
+    ],
+    'browse_items:Keyword': [
+        ['SCAN mk', 'SEARCH m USING INTEGER PRIMARY KEY (rowid=?)', 'SEARCH k USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'fetch_item_details': [
+        ['SEARCH MediaModifications USING INDEX idx_mediamodifications_media_date (media_id=?)'],
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'fetch_item_details_single': [
+        ['SEARCH MediaModifications USING INDEX idx_mediamodifications_media_date (media_id=?)'],
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'fetch_items_by_content': [
+        ['SCAN Media'],
+    ],
+    'sqlite_search_db': [
+        [
+            'SCAN Media USING INDEX idx_media_ingestion_date',
+            'SEARCH MediaModifications USING INDEX idx_mediamodifications_media_date (media_id=?) LEFT-JOIN',
+            'USE TEMP B-TREE FOR DISTINCT',
+        ],
+    ],
+    'sqlite_search_db:keywords': [
+        [
+            'SCAN Media USING INDEX idx_media_ingestion_date',
+            'CORRELATED SCALAR SUBQUERY 1',
+            '  SEARCH mk USING COVERING INDEX idx_unique_media_keyword (media_id=?)',
+            '  SEARCH k USING INTEGER PRIMARY KEY (rowid=?)',
+            'SEARCH MediaModifications USING INDEX idx_mediamodifications_media_date (media_id=?) LEFT-JOIN',
+            'USE TEMP B-TREE FOR DISTINCT',
+        ],
+    ],
+    'search_media_database': [
+        ['SCAN Media'],
+    ],
+    'load_media_content': [
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'fetch_paginated_data': [
+        ['SEARCH IndexGeneration USING INTEGER PRIMARY KEY (rowid=?)'],
+        ['SCAN Media USING COVERING INDEX idx_media_trash_date'],
+        ['SCAN Media'],
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid>?)'],
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid>?)'],
+    ],
+    'search_and_display_items': [
+        ['SEARCH IndexGeneration USING INTEGER PRIMARY KEY (rowid=?)'],
+        [
+            'CO-ROUTINE (subquery-1)',
+            '  SCAN m',
+            '  SEARCH mm USING COVERING INDEX idx_mediamodifications_media_date (media_id=?) LEFT-JOIN',
+            '  SEARCH mk USING COVERING INDEX idx_unique_media_keyword (media_id=?) LEFT-JOIN',
+            '  SEARCH k USING INTEGER PRIMARY KEY (rowid=?) LEFT-JOIN',
+            'SCAN (subquery-1)',
+        ],
+        [
+            'SCAN m',
+            'SEARCH mm USING COVERING INDEX idx_mediamodifications_media_date (media_id=?) LEFT-JOIN',
+            'SEARCH mk USING COVERING INDEX idx_unique_media_keyword (media_id=?) LEFT-JOIN',
+            'SEARCH k USING INTEGER PRIMARY KEY (rowid=?) LEFT-JOIN',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ],
+        [
+            'SCAN m',
+            'SEARCH mm USING INDEX idx_mediamodifications_media_date (media_id=?) LEFT-JOIN',
+            'SEARCH mk USING COVERING INDEX idx_unique_media_keyword (media_id=?) LEFT-JOIN',
+            'SEARCH k USING INTEGER PRIMARY KEY (rowid=?) LEFT-JOIN',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ],
+    ],
+    'get_paginated_files': [
+        ['SEARCH IndexGeneration USING INTEGER PRIMARY KEY (rowid=?)'],
+        ['SCAN Media USING COVERING INDEX idx_media_trash_date'],
+        ['SCAN Media USING COVERING INDEX idx_media_title'],
+        ['SEARCH Media USING COVERING INDEX idx_media_title (title>?)'],
+        ['SEARCH Media USING COVERING INDEX idx_media_title (title>?)'],
+        ['SEARCH Media USING COVERING INDEX idx_media_title (title>?)'],
+        ['SEARCH Media USING COVERING INDEX idx_media_title (title>?)'],
+    ],
+    'get_chat_messages': [
+        ['SEARCH ChatMessages USING INDEX idx_chatmessages_conversation_timestamp (conversation_id=?)'],
+    ],
+    'search_chat_conversations': [
+        ['SCAN cc', 'SEARCH m USING INTEGER PRIMARY KEY (rowid=?) LEFT-JOIN', 'USE TEMP B-TREE FOR ORDER BY'],
+    ],
+    'get_transcripts': [
+        ['SEARCH Transcripts USING INDEX idx_transcripts_media_created (media_id=?)'],
+    ],
+    'get_latest_transcription': [
+        ['SEARCH Transcripts USING INDEX idx_transcripts_media_created (media_id=?)'],
+    ],
+    'get_media_transcripts': [
+        ['SEARCH Transcripts USING INDEX idx_transcripts_media_created (media_id=?)'],
+    ],
+    'get_specific_transcript': [
+        ['SEARCH Transcripts USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'get_media_summaries': [
+        ['SEARCH MediaModifications USING INDEX idx_mediamodifications_media_date (media_id=?)'],
+    ],
+    'get_media_prompts': [
+        ['SEARCH MediaModifications USING INDEX idx_mediamodifications_media_date (media_id=?)'],
+    ],
+    'get_specific_summary': [
+        ['SEARCH MediaModifications USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'get_specific_prompt': [
+        ['SEARCH MediaModifications USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'get_media_content': [
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'get_full_document': [
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'get_media_title': [
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'get_trashed_items': [
+        ['SEARCH Media USING INDEX idx_media_trash_date (is_trash=?)'],
+    ],
+    'empty_trash': [
+        ['SEARCH Media USING COVERING INDEX idx_media_trash_date (is_trash=? AND trash_date<?)'],
+        ['SEARCH Media USING COVERING INDEX idx_media_trash_date (is_trash=? AND trash_date>?)'],
+    ],
+    'mark_as_trash': [
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'restore_from_trash': [
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+    'get_all_content_from_database': [
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid>?)'],
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid>?)'],
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid>?)'],
+    ],
+    'get_unprocessed_media': [
+        ['SEARCH Media USING INDEX idx_media_unprocessed (vector_processing=? AND rowid>?)'],
+    ],
+    'iter_media_by_keyword': [
+        [
+            'SEARCH Media USING INTEGER PRIMARY KEY (rowid=?)',
+            'LIST SUBQUERY 3',
+            '  SCAN mk',
+            '  SEARCH k USING INTEGER PRIMARY KEY (rowid=?)',
+            'CORRELATED SCALAR SUBQUERY 1',
+            '  SEARCH mm USING INDEX idx_mediamodifications_media_date (media_id=?)',
+            'CORRELATED SCALAR SUBQUERY 2',
+            '  SEARCH mm USING INDEX idx_mediamodifications_media_date (media_id=?)',
+        ],
+    ],
+    'get_document_version': [
+        ['SEARCH DocumentVersions USING INDEX idx_document_versions_media_version (media_id=?)'],
+        ['SEARCH DocumentVersions USING INDEX idx_document_versions_media_version (media_id=? AND version_number<?)'],
+        [
+            'SEARCH DocumentVersions USING INDEX idx_document_versions_media_version (media_id=? AND version_number>? AND version_number<?)',
+        ],
+    ],
+    'get_document_version:number': [
+        ['SEARCH DocumentVersions USING INDEX idx_document_versions_media_version (media_id=? AND version_number=?)'],
+    ],
+    'get_all_document_versions': [
+        ['SEARCH DocumentVersions USING INDEX idx_document_versions_media_version (media_id=?)'],
+    ],
+    'purge_media': [
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid=?)'],
+        [
+            'SEARCH ChatMessages USING INDEX idx_chatmessages_conversation_timestamp (conversation_id=?)',
+            'LIST SUBQUERY 1',
+            '  SEARCH ChatConversations USING COVERING INDEX idx_chatconversations_media_id (media_id=?)',
+        ],
+        ['SEARCH ChatConversations USING INDEX idx_chatconversations_media_id (media_id=?)'],
+        ['SEARCH MediaKeywords USING COVERING INDEX idx_unique_media_keyword (media_id=?)'],
+        ['SEARCH MediaVersion USING INDEX idx_media_version_media_version (media_id=?)'],
+        ['SEARCH MediaModifications USING INDEX idx_mediamodifications_media_date (media_id=?)'],
+        ['SEARCH Transcripts USING INDEX idx_transcripts_media_created (media_id=?)'],
+        ['SEARCH MediaChunks USING INDEX idx_mediachunks_media_id (media_id=?)'],
+        ['SEARCH UnvectorizedMediaChunks USING INDEX idx_unvectorized_media_chunks_media_id (media_id=?)'],
+        ['SEARCH DocumentVersions USING INDEX idx_document_versions_media_version (media_id=?)'],
+        ['SCAN media_fts VIRTUAL TABLE INDEX 0:='],
+        ['SEARCH Media USING INTEGER PRIMARY KEY (rowid=?)'],
+    ],
+}
+
+
+@pytest.fixture(scope="module")
+def audit_results(tmp_path_factory):
+    database = Database(str(tmp_path_factory.mktemp("query_plans") / "media_fixture.db"))
+    build_media_fixture(database, media_rows=500)
+    results = {result['label']: result for result in audit(database)}
+    database.close_connection()
+    return results
+
+
+_INDEX_LOOKUP = re.compile(r'\b(?:SEARCH|SCAN) (\w+) USING (?:COVERING )?(INDEX \w+|INTEGER PRIMARY KEY)')
+
+
+def index_lookups(plans):
+    """(table, index) pairs used across the statements of one call, e.g. ('Media', 'INDEX idx_media_title')."""
+    return {match.groups() for plan in plans for line in plan for match in _INDEX_LOOKUP.finditer(line)}
+
+
+def test_snapshot_covers_every_call():
+    assert sorted(EXPECTED_PLANS) == sorted(label for label, _, _ in DEFAULT_CALLS)
+
+
+@pytest.mark.parametrize("label", list(EXPECTED_PLANS))
+def test_query_plan_uses_snapshot_indexes(audit_results, label):
+    result = audit_results[label]
+    assert result['error'] is None
+    assert result['problems'] == []
+    assert index_lookups(EXPECTED_PLANS[label]) <= index_lookups(plan_snapshot([result])[label])
+
+
+@pytest.mark.skipif(sqlite3.sqlite_version != SNAPSHOT_SQLITE_VERSION,
+                    reason=f"plan text was recorded with SQLite {SNAPSHOT_SQLITE_VERSION}")
+@pytest.mark.parametrize("label", list(EXPECTED_PLANS))
+def test_query_plan_matches_snapshot(audit_results, label):
+    assert plan_snapshot([audit_results[label]])[label] == EXPECTED_PLANS[label]
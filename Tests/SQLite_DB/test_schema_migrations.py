@@ -0,0 +1,149 @@
+# test_schema_migrations.py
+# Description: Tests for the versioned migrations and resumable backfills in App_Function_Libraries/DB/Schema_Migrations.py
+#
+# Imports
+import sqlite3
+import threading
+#
+# Third-party library imports
+import pytest
+#
+# Local Imports
+from App_Function_Libraries.DB.Schema_Migrations import BACKFILL_DONE, BACKFILL_FAILED, BACKFILL_PENDING, Backfill, \
+    Migration, MigrationError, backfill_status, column_names, current_version, migrate, pending_backfills, \
+    run_backfill_batch, run_backfills, split_sql_script
+from App_Function_Libraries.DB.SQLite_DB import MEDIA_BACKFILLS, Database, create_tables
+#
+####################################################################################################
+
+
+def _create_items(conn):
+    conn.execute("CREATE TABLE Items (id INTEGER PRIMARY KEY, body TEXT)")
+    conn.executemany("INSERT INTO Items (body) VALUES (?)", [(f"item {i}",) for i in range(25)])
+
+
+def _add_length(conn):
+    conn.execute("ALTER TABLE Items ADD COLUMN length INTEGER")
+
+
+def _fill_length(conn, state, batch_size):
+    rows = conn.execute("SELECT id FROM Items WHERE id > ? ORDER BY id LIMIT ?", (state or 0, batch_size)).fetchall()
+    if not rows:
+        return None
+    conn.execute("UPDATE Items SET length = length(body) WHERE id > ? AND id <= ?", (state or 0, rows[-1][0]))
+    return rows[-1][0]
+
+
+MIGRATIONS = (
+    Migration(1, "Items", _create_items),
+    Migration(2, "Items.length", _add_length, backfills=('fill_length',)),
+)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "test.db"))
+    yield conn
+    conn.close()
+
+
+def test_migrations_apply_once_in_order(conn):
+    assert migrate(conn, MIGRATIONS[:1], 'test') == [1]
+    assert migrate(conn, MIGRATIONS, 'test') == [2]
+    assert migrate(conn, MIGRATIONS, 'test') == []
+    assert current_version(conn) == 2
+    assert 'length' in column_names(conn, 'Items')
+    assert pending_backfills(conn) == ['fill_length']
+    with pytest.raises(MigrationError):
+        migrate(conn, (MIGRATIONS[1], MIGRATIONS[0]), 'test')
+
+
+def test_failed_migration_rolls_back(conn):
+    def broken(conn):
+        conn.execute("CREATE TABLE Half (id INTEGER)")
+        conn.execute("ALTER TABLE Missing ADD COLUMN x")
+
+    with pytest.raises(MigrationError):
+        migrate(conn, MIGRATIONS[:1] + (Migration(2, "Broken", broken, backfills=('fill_length',)),), 'test')
+    assert current_version(conn) == 1
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'Half'").fetchone() is None
+    assert pending_backfills(conn) == []
+
+
+def test_split_sql_script_keeps_triggers_whole():
+    statements = split_sql_script('''
+        -- a comment
+        CREATE TABLE a (x);
+        CREATE TRIGGER t AFTER INSERT ON a BEGIN
+            UPDATE a SET x = 1;
+            UPDATE a SET x = 2;
+        END;
+        CREATE INDEX i ON a(x)
+    ''')
+    assert len(statements) == 3
+    assert statements[1].startswith("CREATE TRIGGER") and statements[1].endswith("END;")
+
+
+def test_interrupted_backfill_resumes(conn):
+    migrate(conn, MIGRATIONS, 'test')
+    stop_event = threading.Event()
+    calls = []
+
+    def step(conn, state, batch_size):
+        calls.append(state)
+        if len(calls) == 2:
+            stop_event.set()
+        return _fill_length(conn, state, batch_size)
+
+    run_backfills(conn, {'fill_length': Backfill('fill_length', "", step)}, batch_size=10, stop_event=stop_event)
+    assert calls == [None, 10]
+    assert backfill_status(conn)['fill_length']['status'] == BACKFILL_PENDING
+    assert conn.execute("SELECT COUNT(*) FROM Items WHERE length IS NULL").fetchone()[0] == 5
+
+    # A restart picks up after the last committed batch
+    assert run_backfills(conn, {'fill_length': Backfill('fill_length', "", step)}, batch_size=10) == ['fill_length']
+    assert calls == [None, 10, 20, 25]
+    assert backfill_status(conn)['fill_length']['status'] == BACKFILL_DONE
+    assert conn.execute("SELECT COUNT(*) FROM Items WHERE length IS NULL").fetchone()[0] == 0
+
+
+def test_failed_backfill_batch_rolls_back(conn):
+    migrate(conn, MIGRATIONS, 'test')
+
+    def step(conn, state, batch_size):
+        conn.execute("UPDATE Items SET length = 0")
+        raise ValueError("bad row")
+
+    assert run_backfill_batch(conn, Backfill('fill_length', "", step), 10)
+    status = backfill_status(conn)['fill_length']
+    assert status['status'] == BACKFILL_FAILED and status['error'] == "bad row"
+    assert conn.execute("SELECT COUNT(*) FROM Items WHERE length IS NOT NULL").fetchone()[0] == 0
+
+
+def test_legacy_media_database_is_upgraded(tmp_path):
+    path = str(tmp_path / "media.db")
+    legacy = sqlite3.connect(path)
+    legacy.execute("CREATE TABLE Media (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT, title TEXT NOT NULL, "
+                   "type TEXT NOT NULL, content TEXT, author TEXT, ingestion_date TEXT, transcription_model TEXT, "
+                   "is_trash BOOLEAN DEFAULT 0, trash_date DATETIME)")
+    legacy.executemany("INSERT INTO Media (title, type, content) VALUES (?, 'document', ?)",
+                       [(f"Title {i}", f"content number {i}") for i in range(1, 8)])
+    legacy.commit()
+    legacy.close()
+
+    database = Database(path)
+    try:
+        create_tables(database)
+        with database.get_connection() as conn:
+            assert current_version(conn) == 3
+            assert {'chunking_status', 'vector_processing'} <= set(column_names(conn, 'Media'))
+            assert set(pending_backfills(conn)) == {'compact_document_versions', 'media_fts'}
+            assert sorted(run_backfills(conn, MEDIA_BACKFILLS, batch_size=3)) == ['compact_document_versions',
+                                                                            'media_fts']
+            assert pending_backfills(conn) == []
+            assert conn.execute("SELECT rowid FROM media_fts WHERE media_fts MATCH 'number' ORDER BY rowid"
+                                ).fetchall() == [(i,) for i in range(1, 8)]
+        # Running the migrations again is a no-op
+        create_tables(database)
+    finally:
+        database.close_connection()
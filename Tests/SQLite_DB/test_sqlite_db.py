@@ -5,7 +5,7 @@ import tempfile
 import time
 
 import pytest
-from App_Function_Libraries.DB.SQLite_DB import DatabaseError, create_tables, Database
+from App_Function_Libraries.DB.SQLite_DB import DatabaseError, create_tables, Database, text_compressor
 from App_Function_Libraries.Utils import Utils
 #
 ####################################################################################################
@@ -119,6 +119,31 @@ def test_create_tables(db):
     assert db.table_exists('ChatConversations')
 
 
+def test_index_generation_bumped_by_media_writes(db):
+    create_tables(db)
+
+    def generation():
+        return db.execute_query("SELECT generation FROM IndexGeneration WHERE id = 1")[0][0]
+
+    start = generation()
+    db.execute_query("INSERT INTO Media (title, type, content) VALUES ('t', 'article', 'c')")
+    db.execute_query("INSERT INTO Keywords (keyword) VALUES ('k')")
+    assert generation() == start + 1
+    db.execute_query("INSERT INTO MediaKeywords (media_id, keyword_id) VALUES (1, 1)")
+    db.execute_query("UPDATE Media SET content = 'changed' WHERE id = 1")
+    assert generation() == start + 3
+
+
+def test_connections_read_compressed_text(db):
+    create_tables(db)
+    text = "A long transcript line that repeats. " * 200
+    db.execute_query("INSERT INTO Media (title, type, content) VALUES ('t', 'video', ?)",
+                     (text_compressor.compress(text),))
+    assert db.execute_query("SELECT typeof(content) FROM Media")[0][0] == 'blob'
+    assert db.execute_query("SELECT decompress_text(content) FROM Media WHERE decompress_text(content) LIKE ?",
+                            ('%repeats%',))[0][0] == text
+
+
 def test_multiple_connections(db):
     def worker():
         with db.get_connection() as conn:
@@ -0,0 +1,94 @@
+# test_streaming_export.py
+# Description: Tests for the batched media readers in SQLite_DB.py and the writers in DB/Streaming_Export.py
+#
+# Imports
+import csv
+import json
+import zipfile
+#
+# Third-party library imports
+import pytest
+#
+# Local Imports
+from App_Function_Libraries.DB import SQLite_DB
+from App_Function_Libraries.DB.Query_Plan_Audit import build_media_fixture
+from App_Function_Libraries.DB.SQLite_DB import Database, InputError, export_media_library, \
+    iter_all_content_from_database, iter_media_rows, iter_unprocessed_media, mark_media_as_processed
+from App_Function_Libraries.DB.Streaming_Export import write_csv, write_jsonl, write_markdown_zip
+#
+####################################################################################################
+
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    database = Database(str(tmp_path_factory.mktemp("streaming_export") / "media.db"))
+    build_media_fixture(database, media_rows=100)
+    yield database
+    database.close_connection()
+
+
+@pytest.fixture
+def media_db(database, monkeypatch):
+    monkeypatch.setattr(SQLite_DB, "db", database)
+    return database
+
+
+def test_writers_stream_any_iterable(tmp_path):
+    rows = ((i, f"title {i}") for i in range(5))
+    assert write_csv(str(tmp_path / "out.csv"), ["id", "title"], rows) == 5
+    with open(tmp_path / "out.csv", newline='', encoding='utf-8') as file:
+        assert list(csv.reader(file))[-1] == ["4", "title 4"]
+
+    assert write_jsonl(str(tmp_path / "out.jsonl"), ({'id': i} for i in range(3))) == 3
+    with open(tmp_path / "out.jsonl", encoding='utf-8') as file:
+        assert [json.loads(line)['id'] for line in file] == [0, 1, 2]
+
+    records = [{'title': 'Same/Name'}, {'title': 'Same/Name'}]
+    assert write_markdown_zip(str(tmp_path / "out.zip"), records, lambda record: f"# {record['title']}",
+                              lambda record: 'Same_Name') == 2
+    with zipfile.ZipFile(tmp_path / "out.zip") as archive:
+        assert archive.namelist() == ["Same_Name.md", "Same_Name_2.md"]
+
+
+def test_interrupted_write_leaves_no_file(tmp_path):
+    def records():
+        yield {'id': 1}
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        write_jsonl(str(tmp_path / "out.jsonl"), records())
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_batches_match_a_single_query(media_db):
+    with media_db.get_connection() as conn:
+        expected = [row[0] for row in conn.execute("SELECT id FROM Media WHERE is_trash = 0 ORDER BY id")]
+    streamed = [item['id'] for item in iter_all_content_from_database(batch_size=7)]
+    assert streamed == expected
+    assert list(iter_media_rows(('id', 'title'), 'id <= ?', (3,), batch_size=2)) == \
+        [{'id': 1, 'title': 'Title 1'}, {'id': 2, 'title': 'Title 2'}, {'id': 3, 'title': 'Title 3'}]
+
+
+def test_marking_items_processed_while_streaming(database):
+    with database.get_connection() as conn:
+        expected = [row[0] for row in conn.execute("SELECT id FROM Media WHERE vector_processing = 0 ORDER BY id")]
+    seen = []
+    for media_id, content, media_type, file_name in iter_unprocessed_media(database, batch_size=3):
+        seen.append(media_id)
+        mark_media_as_processed(database, media_id)
+    assert seen == expected
+    assert list(iter_unprocessed_media(database, batch_size=3)) == []
+
+
+def test_export_media_library(media_db, tmp_path):
+    total = sum(1 for _ in iter_all_content_from_database())
+    assert export_media_library(str(tmp_path / "library.jsonl"), batch_size=9) == total
+    with open(tmp_path / "library.jsonl", encoding='utf-8') as file:
+        first = json.loads(file.readline())
+    assert first['title'] == 'Title 1' and first['latest_summary'] == 'Summary of item 1'
+
+    assert export_media_library(str(tmp_path / "library.zip"), 'markdown_zip', include_trash=True) == 100
+    with pytest.raises(InputError):
+        export_media_library(str(tmp_path / "library.xml"), 'xml')
+    with pytest.raises(InputError):
+        next(iter_media_rows(('id', 'password')))
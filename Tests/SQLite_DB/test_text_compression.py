@@ -0,0 +1,63 @@
+# test_text_compression.py
+# Description: Tests for the compressed text column helpers in App_Function_Libraries/DB/Text_Compression.py
+#
+# Imports
+import sqlite3
+#
+# Third-party library imports
+import pytest
+#
+# Local Imports
+from App_Function_Libraries.DB.Text_Compression import TextCompressor, is_compressed, train_dictionary, \
+    zstd_available
+#
+####################################################################################################
+
+TRANSCRIPT = "\n".join(f"[00:{i:02d}] So today we are going to talk about the model, you know, and the data."
+                       for i in range(200))
+requires_zstd = pytest.mark.skipif(not zstd_available(), reason="zstandard is not installed")
+
+
+@pytest.mark.parametrize("codec", ["zlib", pytest.param("zstd", marks=requires_zstd)])
+def test_round_trip(codec):
+    compressor = TextCompressor(codec, min_size=100)
+    stored = compressor.compress(TRANSCRIPT)
+    assert is_compressed(stored) and len(stored) < len(TRANSCRIPT) / 4
+    assert compressor.decompress(stored) == TRANSCRIPT
+    # Any compressor reads values written with another codec
+    assert TextCompressor("zlib").decompress(stored) == TRANSCRIPT
+
+
+def test_small_and_plain_values_pass_through():
+    compressor = TextCompressor("zlib", min_size=100)
+    assert compressor.compress("short text") == "short text"
+    assert compressor.compress(None) is None
+    assert compressor.decompress("legacy plain text") == "legacy plain text"
+    assert compressor.decompress(None) is None
+
+
+@requires_zstd
+def test_dictionary_is_loaded_on_demand():
+    samples = [TRANSCRIPT.replace("model", f"model {i}") for i in range(50)]
+    dictionary = train_dictionary(samples, dictionary_size=4096)
+    writer = TextCompressor("zstd", min_size=100)
+    writer.add_dictionary(7, dictionary)
+    stored = writer.compress(TRANSCRIPT)
+
+    loaded = []
+    reader = TextCompressor("zstd", dictionary_loader=lambda dictionary_id: loaded.append(dictionary_id) or dictionary)
+    assert reader.decompress(stored) == TRANSCRIPT
+    assert reader.decompress(stored) == TRANSCRIPT
+    assert loaded == [7]
+
+
+def test_sql_function_sees_text():
+    compressor = TextCompressor("zlib", min_size=100)
+    conn = sqlite3.connect(":memory:")
+    conn.create_function("decompress_text", 1, compressor.decompress, deterministic=True)
+    conn.execute("CREATE TABLE Media (id INTEGER PRIMARY KEY, content TEXT)")
+    conn.executemany("INSERT INTO Media (content) VALUES (?)",
+                     [(compressor.compress(TRANSCRIPT),), ("plain row about something else",)])
+    assert conn.execute("SELECT typeof(content) FROM Media ORDER BY id").fetchall() == [("blob",), ("text",)]
+    assert conn.execute("SELECT id FROM Media WHERE decompress_text(content) LIKE '%the model%'").fetchall() == [(1,)]
+    assert conn.execute("SELECT decompress_text(content) FROM Media WHERE id = 1").fetchone()[0] == TRANSCRIPT
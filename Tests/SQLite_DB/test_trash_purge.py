@@ -0,0 +1,134 @@
+# test_trash_purge.py
+# Description: Tests for the batched media purge (purge_media / purge_trash) in App_Function_Libraries/DB/SQLite_DB.py
+#
+# Imports
+import numpy as np
+#
+# Third-party library imports
+import pytest
+#
+# Local Imports
+from App_Function_Libraries.DB import SQLite_DB
+from App_Function_Libraries.DB.Query_Plan_Audit import build_media_fixture
+from App_Function_Libraries.DB.SQLite_DB import MEDIA_DEPENDENT_TABLES, Database, InputError, empty_trash, \
+    purge_media, purge_trash
+from App_Function_Libraries.RAG import BM25_Index
+from App_Function_Libraries.RAG.Dedup_Index import NearDuplicateIndex, chunk_key
+from App_Function_Libraries.RAG.Vector_Store import LocalVectorStore
+#
+####################################################################################################
+
+# Media 50 and 100 of the fixture are in the trash (since 2024); media 10, 20, ... have chats
+TRASHED = [50, 100]
+
+
+def _rows_for(conn, media_ids):
+    placeholders = ', '.join('?' * len(media_ids))
+    counts = {}
+    for table, condition in MEDIA_DEPENDENT_TABLES:
+        query = f"SELECT COUNT(*) FROM {table} WHERE {condition.format(ids=placeholders)}"
+        counts[table] = conn.execute(query, media_ids).fetchone()[0]
+    return counts
+
+
+@pytest.fixture
+def media_db(tmp_path, monkeypatch):
+    database = Database(str(tmp_path / "media.db"))
+    build_media_fixture(database, media_rows=100)
+    with database.get_connection() as conn:
+        conn.execute("INSERT INTO media_fts (rowid, title, content) SELECT id, title, content FROM Media")
+        # Large chunks for the trashed items, so purging them frees whole pages
+        conn.executemany("INSERT INTO MediaChunks (media_id, chunk_text, start_index, end_index, chunk_id) "
+                         "VALUES (?, ?, 0, 10, ?)",
+                         [(i, f"chunk of {i} " * (2000 if i in TRASHED else 10), f"{i}_chunk_0") for i in range(1, 101)])
+        conn.executemany("INSERT INTO UnvectorizedMediaChunks (media_id, chunk_text, chunk_index, start_char, end_char) "
+                         "VALUES (?, ?, 0, 0, 10)", [(i, f"chunk of {i}") for i in range(1, 101)])
+    monkeypatch.setattr(SQLite_DB, "db", database)
+    yield database
+    database.close_connection()
+
+
+@pytest.fixture
+def vector_store(tmp_path, monkeypatch):
+    store = LocalVectorStore(str(tmp_path / "vectors"))
+    monkeypatch.setattr(SQLite_DB, "get_vector_store", lambda: store)
+    dedup_index = NearDuplicateIndex(str(tmp_path / "dedup.db"))
+    monkeypatch.setattr(SQLite_DB, "get_dedup_index", lambda: dedup_index)
+    shared = store.create_collection("all_content_embeddings")
+    shared.add([f"{i}_chunk_0" for i in (1, 50, 100)], np.eye(3, 4).tolist(),
+               metadatas=[{"media_id": str(i)} for i in (1, 50, 100)])
+    own = store.create_collection("video_50")
+    own.add(["50_chunk_0", "50_chunk_1"], np.eye(2, 4).tolist(), metadatas=[{"media_id": "50"}] * 2)
+    for i in (1, 50, 100):
+        dedup_index.register(chunk_key("all_content_embeddings", f"{i}_chunk_0"), f"text of item {i} " * 10)
+    yield store, dedup_index
+    dedup_index.close()
+    store.close()
+
+
+def test_purge_removes_every_dependent_row(media_db):
+    with media_db.get_connection() as conn:
+        before = _rows_for(conn, TRASHED)
+        kept = _rows_for(conn, [10, 42])
+    assert all(before.values())
+
+    report = purge_media(TRASHED, batch_size=1, vacuum='none', purge_vectors=False)
+    assert report['media'] == 2
+    assert report['rows'] == before
+    assert report['freed_bytes'] > 0 and report['reclaimed_bytes'] == 0
+    with media_db.get_connection() as conn:
+        assert set(_rows_for(conn, TRASHED).values()) == {0}
+        assert _rows_for(conn, [10, 42]) == kept
+        assert conn.execute("SELECT rowid FROM media_fts WHERE media_fts MATCH 'Transcript' AND rowid IN (50, 100)"
+                            ).fetchall() == []
+
+
+def test_purge_deletes_vectors_and_dedup_entries(media_db, vector_store):
+    store, dedup_index = vector_store
+    report = purge_media([50], vacuum='none')
+    assert report['vectors'] == 3
+    assert store.list_collections() == ["all_content_embeddings"]
+    assert sorted(store.get_collection("all_content_embeddings").get()['ids']) == ["100_chunk_0", "1_chunk_0"]
+    assert dedup_index.find_duplicate("text of item 50 " * 10) is None
+    assert dedup_index.find_duplicate("text of item 1 " * 10) is not None
+
+
+def test_purge_removes_bm25_entries(media_db, tmp_path, monkeypatch):
+    settings = dict(BM25_Index.DEFAULT_BM25_SETTINGS, index_path=str(tmp_path / "bm25.db"))
+    monkeypatch.setattr(BM25_Index, "get_bm25_settings", lambda: dict(settings))
+    monkeypatch.setattr(SQLite_DB, "get_bm25_settings", lambda: dict(settings))
+    monkeypatch.setattr(BM25_Index, "_indexes", {})
+    documents, chunks = BM25_Index.get_bm25_index('document'), BM25_Index.get_bm25_index('chunk')
+    documents.add_documents([(str(i), f"media item {i}") for i in (1, 50, 100)])
+    chunks.add_documents([(f"{i}_chunk_{n}", f"chunk {n} of item {i}") for i in (1, 50, 100) for n in (0, 1)])
+
+    purge_media(TRASHED, vacuum='none', purge_vectors=False)
+    assert documents.document_ids() == {"1"}
+    assert chunks.document_ids() == {"1_chunk_0", "1_chunk_1"}
+    assert sorted(doc_id for doc_id, _ in chunks.search("chunk item")) == ["1_chunk_0", "1_chunk_1"]
+    documents.close()
+    chunks.close()
+
+
+def test_empty_trash_reclaims_space(media_db):
+    with media_db.get_connection() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    report = purge_trash(30, vacuum='incremental', purge_vectors=False)
+    assert report['media'] == 2 and report['remaining'] == 0
+    assert report['vacuum'] == 'incremental'
+    assert report['reclaimed_bytes'] > 0
+    with media_db.get_connection() as conn:
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    assert empty_trash(30) == (0, 0)
+
+
+def test_full_vacuum_enables_incremental_auto_vacuum(media_db):
+    with media_db.get_connection() as conn:
+        conn.execute("PRAGMA auto_vacuum = NONE")
+        conn.execute("VACUUM")
+    assert purge_media([42], vacuum='incremental', purge_vectors=False)['vacuum'] == 'none'
+    assert purge_media([43], vacuum='full', purge_vectors=False)['vacuum'] == 'full'
+    with media_db.get_connection() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    with pytest.raises(InputError):
+        purge_media([44], vacuum='sometimes')
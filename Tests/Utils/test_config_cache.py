@@ -0,0 +1,58 @@
+# test_config_cache.py
+# Description: Tests for the cached config.txt loader in App_Function_Libraries/Utils/Utils.py
+#
+# Imports
+import os
+import sys
+#
+# Third-party library imports
+import pytest
+#
+# Add the project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+#
+# Local Imports
+from App_Function_Libraries.Utils import Utils
+
+
+# Start from the shipped config so every key load_and_log_configs() expects is present
+with open(os.path.join(os.path.dirname(__file__), '..', '..', 'Config_Files', 'config.txt')) as shipped:
+    CONFIG_TEXT = shipped.read().replace("openai_api_key = <openai_api_key>", "openai_api_key = key-one", 1)
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    path = tmp_path / "config.txt"
+    path.write_text(CONFIG_TEXT)
+    monkeypatch.setattr(Utils, "get_config_path", lambda: str(path))
+    monkeypatch.setattr(Utils, "_config_state", (None, None, None))
+    return path
+
+
+def test_config_is_parsed_once(config_file):
+    first = Utils.load_comprehensive_config()
+    assert Utils.load_comprehensive_config() is first
+    snapshot = Utils.load_and_log_configs()
+    assert Utils.load_and_log_configs() is snapshot
+    assert snapshot['api_keys']['openai'] == "key-one"
+
+
+def test_config_reloads_when_file_changes(config_file):
+    first = Utils.load_and_log_configs()
+    config_file.write_text(CONFIG_TEXT.replace("key-one", "key-two-longer"))
+    second = Utils.load_and_log_configs()
+    assert second is not first
+    assert second['api_keys']['openai'] == "key-two-longer"
+
+
+def test_reload_config_forces_reparse(config_file):
+    first = Utils.load_comprehensive_config()
+    Utils.reload_config()
+    assert Utils.load_comprehensive_config() is not first
+
+
+def test_cached_config_is_read_only(config_file):
+    with pytest.raises(TypeError):
+        Utils.load_and_log_configs()['api_keys']['openai'] = "changed"
+    with pytest.raises(TypeError):
+        Utils.load_comprehensive_config().set('API', 'openai_api_key', 'changed')
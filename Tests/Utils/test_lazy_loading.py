@@ -0,0 +1,123 @@
+# test_lazy_loading.py
+# Description: Tests for App_Function_Libraries/Utils/Lazy_Loading.py, and an import-time budget for the modules that
+# used to load heavy libraries or open databases on import.
+#
+# Imports
+import os
+import subprocess
+import sys
+import threading
+#
+# Third-party library imports
+import pytest
+#
+# Add the project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, PROJECT_ROOT)
+#
+# Local Imports
+from App_Function_Libraries.Utils.Lazy_Loading import LazyModule, LazyObject, is_loaded, run_once
+#
+####################################################################################################
+
+# Importing any of these must not import a heavy library; it is fine (and expected) once they are used
+LIGHT_IMPORTS = (
+    'App_Function_Libraries.DB.SQLite_DB',
+    'App_Function_Libraries.DB.DB_Manager',
+    'App_Function_Libraries.Chunk_Lib',
+    'App_Function_Libraries.RAG.ChromaDB_Library',
+    'App_Function_Libraries.RAG.Embeddings_Create',
+    'App_Function_Libraries.Audio.Audio_Transcription_Lib',
+    'App_Function_Libraries.Gradio_Related',
+)
+HEAVY_MODULES = ('torch', 'transformers', 'onnxruntime', 'faster_whisper', 'pyaudio', 'chromadb', 'gradio', 'pandas',
+                 'sklearn', 'nltk', 'pyannote', 'yt_dlp')
+# Cumulative import time allowed per module, in seconds; generous, the heavy-module check is the precise guard
+IMPORT_BUDGET_SECONDS = float(os.environ.get('TLDW_IMPORT_BUDGET_SECONDS', '3.0'))
+
+
+def test_lazy_module_imports_on_first_use():
+    module = LazyModule('json')
+    assert not is_loaded(module)
+    assert module.dumps([1]) == '[1]'
+    assert is_loaded(module)
+
+    seen = []
+    hooked = LazyModule('string', on_import=lambda real: seen.append(real.__name__))
+    hooked.ascii_letters, hooked.digits
+    assert seen == ['string']
+
+    missing = LazyModule('no_such_module_anywhere')
+    with pytest.raises(ModuleNotFoundError):
+        missing.anything
+
+
+def test_lazy_object_creates_once_and_retries_failures():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("not yet")
+        return {'a': 1}
+
+    value = LazyObject(factory, 'test value')
+    assert not is_loaded(value) and "not created" in repr(value)
+    with pytest.raises(ConnectionError):
+        value.get('a')
+    threads = [threading.Thread(target=value.get, args=('a',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert value.get('a') == 1
+    assert len(calls) == 2
+
+
+def test_run_once_allows_reentry_and_retries():
+    calls = []
+
+    @run_once
+    def setup(fail):
+        calls.append(fail)
+        setup(False)  # e.g. a schema setup that opens a connection through the guarded path
+        if fail:
+            raise RuntimeError("locked")
+
+    with pytest.raises(RuntimeError):
+        setup(True)
+    setup(False)
+    setup(True)
+    assert calls == [True, False]
+
+
+def _import_profile(args):
+    """Run python -X importtime and return {module: cumulative seconds}, skipping if dependencies are missing."""
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=PROJECT_ROOT, capture_output=True,
+                            text=True, timeout=300)
+    if result.returncode != 0:
+        if 'ModuleNotFoundError' in result.stderr or 'ImportError' in result.stderr:
+            pytest.skip(f"Dependencies missing here: {result.stderr.strip().splitlines()[-1]}")
+        raise AssertionError(result.stderr)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            profile[name.strip()] = int(cumulative) / 1e6
+    return profile
+
+
+@pytest.mark.parametrize('module_name', LIGHT_IMPORTS)
+def test_import_stays_light(module_name):
+    profile = _import_profile(['-c', f'import {module_name}'])
+    loaded = sorted({name.split('.')[0] for name in profile} & set(HEAVY_MODULES))
+    assert loaded == [], f"Importing {module_name} loads {loaded}; defer them with Utils/Lazy_Loading.py"
+    assert profile[module_name] < IMPORT_BUDGET_SECONDS
+
+
+def test_cli_help_is_quick():
+    profile = _import_profile(['summarize.py', '--help'])
+    loaded = sorted({name.split('.')[0] for name in profile} & set(HEAVY_MODULES))
+    assert loaded == []